@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication, AdoptionMatch
+from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication, AdoptionMatch, MLTrainingJob
 
 @admin.register(AdopterProfile)
 class AdopterProfileAdmin(admin.ModelAdmin):
@@ -28,3 +28,9 @@ class AdoptionMatchAdmin(admin.ModelAdmin):
     list_filter = ('created_at',)
     search_fields = ('adopter__username', 'animal__name')
     readonly_fields = ('created_at',)
+
+@admin.register(MLTrainingJob)
+class MLTrainingJobAdmin(admin.ModelAdmin):
+    list_display = ('job_type', 'status', 'model_revision', 'requested_by', 'created_at', 'finished_at')
+    list_filter = ('job_type', 'status')
+    readonly_fields = ('message', 'log', 'error', 'model_revision', 'created_at', 'started_at', 'finished_at')
@@ -7,14 +7,20 @@ class AdoptionsConfig(AppConfig):
     
     def ready(self):
         """Initialize ML models when Django starts"""
+        from django.conf import settings
+        import adoptions.signals
+        
+        if not getattr(settings, 'ML_PRELOAD_MODELS', True):
+            return
+        
         try:
-            # Auto-load ML models on startup
-            from .ml_matching import MLAdoptionMatcher
+            # Load every serving model into the process-wide registry once,
+            # so the first match request does not pay the unpickle cost
+            from .model_registry import model_registry
             
-            # Initialize the matcher (this will auto-load models)
-            matcher = MLAdoptionMatcher()
+            loaded = model_registry.preload()
             
-            print("✅ ML models auto-loaded on startup")
+            print(f"✅ ML models auto-loaded on startup ({sum(loaded.values())}/{len(loaded)})")
             
         except Exception as e:
             print(f"⚠️ ML auto-loading failed: {e}")
@@ -1,61 +1,170 @@
+# adoptions/cluster_utils.py
+"""
+Behavioral cluster prediction
 
-def predict_animal_cluster(animal_behavior_profile):
-    """Predict behavioral cluster for an animal"""
-    import pickle
-    import os
-    from django.conf import settings
-    
-    try:
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        clustering_file = os.path.join(model_dir, 'behavioral_clustering.pkl')
-        
-        with open(clustering_file, 'rb') as f:
-            clustering_data = pickle.load(f)
-        
-        # Safe boolean conversion
-        def safe_bool_to_int(value):
-            if isinstance(value, str):
-                return 1 if value.lower() in ['true', '1', 'yes'] else 0
-            elif isinstance(value, bool):
-                return int(value)
-            else:
-                return int(bool(value))
-        
-        # Extract features (same as training)
-        from adoptions.ml_matching import MLAdoptionMatcher
-        matcher = MLAdoptionMatcher()
-        
-        features = [
-            matcher.encode_categorical('energy_level', animal_behavior_profile.energy_level),
-            matcher.encode_categorical('training_level', animal_behavior_profile.training_level),
-            safe_bool_to_int(animal_behavior_profile.good_with_children),
-            safe_bool_to_int(animal_behavior_profile.good_with_dogs),
-            safe_bool_to_int(animal_behavior_profile.good_with_cats),
-            safe_bool_to_int(animal_behavior_profile.special_needs),
-            matcher.encode_categorical('animal_type', animal_behavior_profile.animal.animal_type),
-            animal_behavior_profile.animal.weight or 25,
-            animal_behavior_profile.animal.adoption_fee or 100,
-        ]
-        
-        # Predict cluster
-        features_scaled = clustering_data['scaler'].transform([features])
-        cluster = clustering_data['kmeans_model'].predict(features_scaled)[0]
-        
-        # Get recommendations
-        cluster_recommendations = clustering_data['recommendations'].get(cluster, ['No specific recommendations'])
-        
+The KMeans model, its scaler and the category encoders come from the model
+registry and are prepared once per loaded model file, so predicting a
+cluster never unpickles anything or builds an MLAdoptionMatcher. Assigned
+clusters are stored on AnimalBehaviorProfile.behavior_cluster, but only on
+the write path: by the signals when a profile or its animal changes, and by
+assign_clusters() after training. Predicting for a read never writes.
+"""
+
+import threading
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+from .model_registry import model_registry, ADOPTION_MATCHER_FILE, CLUSTERING_FILE
+from .ml_matching import KNOWN_CATEGORIES, safe_bool_to_int
+from .monitoring import ml_metrics
+
+
+_lock = threading.Lock()
+_predictor = None
+
+
+class ClusterPredictor:
+    """KMeans model, scaler and category codes for one clustering model file"""
+
+    def __init__(self, clustering_data, matcher_data):
+        self.clustering_data = clustering_data
+        self.matcher_data = matcher_data
+        self.kmeans = clustering_data['kmeans_model']
+        self.scaler = clustering_data['scaler']
+        self.recommendations = clustering_data.get('recommendations', {})
+
+        # Same encoders encode_categorical() would use
+        encoders = (matcher_data or {}).get('label_encoders', {})
+        self.codes = {}
+        for feature_name in ['energy_level', 'training_level', 'animal_type']:
+            encoder = encoders.get(feature_name)
+            if encoder is None:
+                encoder = LabelEncoder().fit(KNOWN_CATEGORIES[feature_name])
+            self.codes[feature_name] = {value: code for code, value in enumerate(encoder.classes_)}
+
+    def features(self, profiles):
+        """Feature matrix (same columns as training) for behavior profiles with their animals"""
+        energy_codes = self.codes['energy_level']
+        training_codes = self.codes['training_level']
+        type_codes = self.codes['animal_type']
+
+        return np.array([
+            [
+                energy_codes.get(profile.energy_level, 0),
+                training_codes.get(profile.training_level, 0),
+                safe_bool_to_int(profile.good_with_children),
+                safe_bool_to_int(profile.good_with_dogs),
+                safe_bool_to_int(profile.good_with_cats),
+                safe_bool_to_int(profile.special_needs),
+                type_codes.get(profile.animal.animal_type, 0),
+                profile.animal.weight or 25,
+                profile.animal.adoption_fee or 100,
+            ]
+            for profile in profiles
+        ], dtype=np.float64)
+
+    def predict(self, profiles):
+        """Cluster ids for many profiles with one scaler.transform and one kmeans.predict"""
+        if not profiles:
+            return np.array([], dtype=int)
+        with ml_metrics.phase('feature_extraction'):
+            features = self.features(profiles)
+        with ml_metrics.phase('predict'):
+            return self.kmeans.predict(self.scaler.transform(features))
+
+    def describe(self, cluster):
         return {
             'cluster_id': int(cluster),
-            'recommendations': cluster_recommendations,
+            'recommendations': self.recommendations.get(cluster, ['No specific recommendations']),
             'cluster_description': f'Behavioral Cluster {cluster}',
             'success': True
         }
-        
+
+
+def get_cluster_predictor():
+    """Shared predictor for the currently loaded clustering model, or None"""
+    global _predictor
+
+    clustering_data = model_registry.get(CLUSTERING_FILE)
+    if clustering_data is None:
+        return None
+    matcher_data = model_registry.get(ADOPTION_MATCHER_FILE)
+
+    predictor = _predictor
+    if predictor is None or predictor.clustering_data is not clustering_data or predictor.matcher_data is not matcher_data:
+        with _lock:
+            predictor = _predictor
+            if predictor is None or predictor.clustering_data is not clustering_data or predictor.matcher_data is not matcher_data:
+                predictor = ClusterPredictor(clustering_data, matcher_data)
+                _predictor = predictor
+    return predictor
+
+
+def unavailable_cluster(error):
+    return {
+        'cluster_id': -1,
+        'recommendations': ['Cluster prediction unavailable'],
+        'cluster_description': 'Unknown',
+        'success': False,
+        'error': str(error)
+    }
+
+
+@ml_metrics.tracked('predict_clusters')
+def predict_clusters(profiles, save=False):
+    """
+    Predict behavioral clusters for many AnimalBehaviorProfile rows at once
+    (select_related('animal') avoids one query per profile). Returns one
+    result dict per profile and sets behavior_cluster on each of them; only
+    with save=True are the cluster ids written to the database.
+    """
+    from .models import AnimalBehaviorProfile
+
+    profiles = list(profiles)
+    try:
+        with ml_metrics.phase('model_load'):
+            predictor = get_cluster_predictor()
+        if predictor is None:
+            raise FileNotFoundError(f'{CLUSTERING_FILE} is not available')
+        clusters = predictor.predict(profiles)
     except Exception as e:
-        return {
-            'cluster_id': -1,
-            'recommendations': ['Cluster prediction unavailable'],
-            'cluster_description': 'Unknown',
-            'success': False,
-            'error': str(e)
-        }
+        return [unavailable_cluster(e)] * len(profiles)
+
+    for profile, cluster in zip(profiles, clusters):
+        profile.behavior_cluster = int(cluster)
+    if save and profiles:
+        AnimalBehaviorProfile.objects.bulk_update(profiles, ['behavior_cluster'], batch_size=1000)
+
+    return [predictor.describe(cluster) for cluster in clusters]
+
+
+def assign_clusters(queryset=None, batch_size=2000):
+    """Recompute and store clusters for every profile in `queryset` (default: all)"""
+    from .models import AnimalBehaviorProfile
+
+    queryset = AnimalBehaviorProfile.objects.all() if queryset is None else queryset
+    queryset = queryset.select_related('animal').order_by('pk')
+
+    assigned = 0
+    batch = []
+    for profile in queryset.iterator(chunk_size=batch_size):
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            assigned += sum(result['success'] for result in predict_clusters(batch, save=True))
+            batch = []
+    if batch:
+        assigned += sum(result['success'] for result in predict_clusters(batch, save=True))
+    return assigned
+
+
+@ml_metrics.tracked('predict_animal_cluster')
+def predict_animal_cluster(animal_behavior_profile):
+    """Predict behavioral cluster for an animal (the stored one if it has one; never saved here)"""
+    if animal_behavior_profile.behavior_cluster is not None:
+        # Stored cluster: only the recommendations need the model
+        with ml_metrics.phase('model_load'):
+            predictor = get_cluster_predictor()
+        if predictor is not None:
+            return predictor.describe(animal_behavior_profile.behavior_cluster)
+
+    return predict_clusters([animal_behavior_profile])[0]
@@ -0,0 +1,83 @@
+# adoptions/likelihood.py
+"""
+Materialized adoption likelihood
+
+Animal.adoption_likelihood holds the latest ML adoption-likelihood score so
+analytics can rank the whole table with one indexed ORDER BY. Scores are
+recomputed in batches by the refresh_adoption_likelihood command for every
+animal saved since it was last scored (or for all animals after a retrain).
+"""
+
+import logging
+from django.db.models import F, Q
+from django.utils import timezone
+
+from animals.models import Animal
+
+logger = logging.getLogger(__name__)
+
+
+CONFIDENCE_BY_METHOD = {
+    'advanced_ml_89.5': 'high',
+    'original_ml': 'medium',
+    'fallback': 'low',
+}
+
+
+def stale_animals(queryset=None):
+    """Animals never scored, or saved after their score was computed"""
+    queryset = Animal.objects.all() if queryset is None else queryset
+    return queryset.filter(
+        Q(adoption_likelihood_updated_at__isnull=True) |
+        Q(updated_at__gt=F('adoption_likelihood_updated_at'))
+    )
+
+
+def has_fresh_likelihood(animal):
+    """In-memory counterpart of stale_animals(): stored score still describes the animal"""
+    return (
+        animal.adoption_likelihood is not None
+        and animal.adoption_likelihood_updated_at is not None
+        and (animal.updated_at is None or animal.updated_at <= animal.adoption_likelihood_updated_at)
+    )
+
+
+def refresh_adoption_likelihood(queryset=None, batch_size=2000, ml_matcher=None):
+    """
+    Score `queryset` (default: stale animals) in primary-key batches and
+    store the results with bulk_update. Returns the number of rows written.
+    """
+    from .ml_matching import MLAdoptionMatcher
+
+    queryset = stale_animals() if queryset is None else queryset
+    ml_matcher = ml_matcher or MLAdoptionMatcher()
+
+    ids = list(queryset.order_by('pk').values_list('pk', flat=True))
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        batch_ids = ids[start:start + batch_size]
+        # Taken before reading, so edits that race with scoring stay stale
+        scored_at = timezone.now()
+        predictions = ml_matcher.predict_adoption_likelihood_batch(Animal.objects.filter(pk__in=batch_ids))
+
+        # bulk_update goes through QuerySet.update, so updated_at is not bumped
+        animals = [
+            Animal(
+                pk=animal_id,
+                adoption_likelihood=float(row['adoption_likelihood']),
+                adoption_likelihood_method=row['method'],
+                adoption_likelihood_updated_at=scored_at,
+            )
+            for animal_id, row in predictions.iterrows()
+        ]
+        Animal.objects.bulk_update(
+            animals,
+            ['adoption_likelihood', 'adoption_likelihood_method', 'adoption_likelihood_updated_at'],
+        )
+        written += len(animals)
+
+    return written
+
+
+def likelihood_confidence(method):
+    return CONFIDENCE_BY_METHOD.get(method, 'low')
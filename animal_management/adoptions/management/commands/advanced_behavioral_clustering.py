@@ -299,12 +299,9 @@ class Command(BaseCommand):
     
     def save_clustering_model(self, recommendations):
         """Save the clustering model and recommendations"""
-        from django.conf import settings
-        import pickle
-        import os
-        
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(model_dir, exist_ok=True)
+        from adoptions.model_artifacts import publish_model
+        from adoptions.model_registry import CLUSTERING_FILE
+        from adoptions.cluster_utils import assign_clusters
         
         clustering_data = {
             'kmeans_model': self.kmeans,
@@ -320,8 +317,8 @@ class Command(BaseCommand):
             'version': '1.0_advanced'
         }
         
-        clustering_file = os.path.join(model_dir, 'behavioral_clustering.pkl')
-        with open(clustering_file, 'wb') as f:
-            pickle.dump(clustering_data, f)
+        manifest = publish_model(clustering_data, CLUSTERING_FILE)
+        self.stdout.write(f'💾 Clustering model saved (revision {manifest["revision"]})')
         
-        self.stdout.write(f'💾 Clustering model saved to {clustering_file}')
+        assigned = assign_clusters()
+        self.stdout.write(f'🏷️  Assigned clusters to {assigned} behavior profiles')
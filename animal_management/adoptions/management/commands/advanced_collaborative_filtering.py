@@ -1,20 +1,64 @@
 # adoptions/management/commands/advanced_collaborative_filtering.py
-from django.core.management.base import BaseCommand
-from sklearn.decomposition import TruncatedSVD
-from sklearn.metrics.pairwise import cosine_similarity
+import resource
+import sys
+import time
+from datetime import datetime
+
 import numpy as np
 import pandas as pd
-from scipy.sparse import csr_matrix
+from scipy.sparse import coo_matrix, csr_matrix, hstack
+from sklearn.decomposition import TruncatedSVD
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from adoptions.recommendation_store import RecommendationStore, RECOMMENDATION_KINDS
+
+
+# Interaction strength by application status (anything else scores 1.0)
+STATUS_SCORES = {
+    'APPROVED': 5.0,
+    'PENDING': 3.0,
+    'UNDER_REVIEW': 2.0,
+}
+
+INTERACTION_FIELDS = (
+    'applicant_id', 'animal_id', 'animal__animal_type', 'animal__weight',
+    'animal__last_location_json__kaggle_data__size', 'status', 'created_at',
+)
+
+
+def mean_by_column(rows, cols, values, shape):
+    """Dense mean of `values` per (row, col) cell, 0 where a cell has no values (pivot_table mean)"""
+    sums = coo_matrix((values, (rows, cols)), shape=shape).toarray()
+    counts = coo_matrix((np.ones(len(values)), (rows, cols)), shape=shape).toarray()
+    return np.divide(sums, counts, out=np.zeros(shape), where=counts > 0)
+
 
 class Command(BaseCommand):
     help = 'Create advanced collaborative filtering system'
     
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true',
+                            help='Only update users with adoption applications changed since the last training run')
+        parser.add_argument('--components', type=int, default=16, help='Truncated SVD components')
+        parser.add_argument('--similar-users', type=int, default=3, help='Neighbours used per recommendation')
+        parser.add_argument('--chunk-size', type=int, default=256, help='Users per similarity block')
+        parser.add_argument('--read-chunk-size', type=int, default=5000, help='Applications read per database fetch')
+    
     def handle(self, *args, **options):
+        self.options = options
+        started = time.perf_counter()
+        
+        if options['incremental'] and self.update_changed_users():
+            self._report_resources(started)
+            return
+        
         self.stdout.write(self.style.SUCCESS('🤝 ADVANCED COLLABORATIVE FILTERING'))
         self.stdout.write('Creating research-grade recommendation system...')
         self.stdout.write('=' * 60)
+        self.trained_at = timezone.now()
         
-        # Step 1: Create comprehensive user-item matrix
+        # Step 1: Create sparse user-item matrix from streamed applications
         self.create_user_item_matrix()
         
         # Step 2: Add implicit feedback data
@@ -23,88 +67,153 @@ class Command(BaseCommand):
         # Step 3: Apply matrix factorization
         self.apply_matrix_factorization()
         
-        # Step 4: Generate similarity-based recommendations
-        self.create_similarity_recommendations()
-        
-        # Step 5: Hybrid collaborative-content approach
+        # Step 4: Similarity (chunked top-K) + content hybrid recommendations
         self.create_hybrid_recommendations()
+        
+        self._report_resources(started)
+    
+    def _report_resources(self, started):
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KiB on Linux
+        peak_rss_mb = peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024
+        self.stdout.write(
+            f'\n⏱️  Wall time: {time.perf_counter() - started:.2f}s, peak RSS: {peak_rss_mb:.1f} MB'
+        )
+    
+    def read_interactions(self, queryset):
+        """
+        Stream application rows with values_list and return flat NumPy columns:
+        user_id, animal_id, animal_type, size and interaction score
+        """
+        read_chunk_size = max(1, self.options['read_chunk_size'])
+        rows = queryset.order_by().values_list(*INTERACTION_FIELDS).iterator(chunk_size=read_chunk_size)
+        
+        parts = []
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= read_chunk_size:
+                parts.append(self._interaction_columns(chunk))
+                chunk = []
+        if chunk:
+            parts.append(self._interaction_columns(chunk))
+        
+        names = ['user_id', 'animal_id', 'animal_type', 'size', 'score']
+        if not parts:
+            return {name: np.array([], dtype=object if name in ('animal_type', 'size') else np.float64) for name in names}
+        return {name: np.concatenate([part[name] for part in parts]) for name in names}
+    
+    def _interaction_columns(self, chunk):
+        user_ids, animal_ids, animal_types, weights, sizes, statuses, created = zip(*chunk)
+        animal_types = np.array(animal_types, dtype=object)
+        
+        return {
+            'user_id': np.array(user_ids, dtype=np.int64),
+            'animal_id': np.array(animal_ids, dtype=np.int64),
+            'animal_type': animal_types,
+            'size': self._animal_sizes(animal_types, weights, sizes),
+            'score': self._interaction_scores(statuses, created),
+        }
+    
+    def _interaction_scores(self, statuses, created):
+        """Status-based interaction strength with a one-year time decay (more recent = higher)"""
+        base_scores = np.array([STATUS_SCORES.get(status, 1.0) for status in statuses])
+        today = datetime.now().date()
+        days_since = np.array([(today - created_at.date()).days for created_at in created])
+        return base_scores * np.maximum(0.5, 1.0 - days_since / 365)
+    
+    def _animal_sizes(self, animal_types, weights, kaggle_sizes):
+        """Kaggle size where known, else estimated from type and weight"""
+        weights = np.array([weight or 0 for weight in weights], dtype=np.float64)
+        estimated = np.where(
+            animal_types == 'CAT', 'Small',
+            np.where(weights == 0, 'Medium',
+                     np.where(weights < 25, 'Small',
+                              np.where(weights < 60, 'Medium', 'Large')))
+        )
+        return np.array([size or estimate for size, estimate in zip(kaggle_sizes, estimated)], dtype=object)
+    
+    def build_matrices(self, interactions, item_ids=None, type_names=None, size_names=None):
+        """
+        Sparse user x item interaction matrix plus dense mean preference per
+        animal type and per size. Vocabularies default to the values seen in
+        `interactions`; pass a trained model's to get rows aligned with it
+        (interactions with unknown animals are then dropped).
+        """
+        user_ids, user_rows = np.unique(interactions['user_id'], return_inverse=True)
+        
+        if item_ids is None:
+            item_ids, item_cols = np.unique(interactions['animal_id'], return_inverse=True)
+            known = np.ones(len(item_cols), dtype=bool)
+        else:
+            item_cols = np.searchsorted(item_ids, interactions['animal_id'])
+            item_cols = np.minimum(item_cols, max(len(item_ids) - 1, 0))
+            known = item_ids[item_cols] == interactions['animal_id'] if len(item_ids) else np.zeros(len(item_cols), dtype=bool)
+        
+        animal_types = interactions['animal_type'].astype(str)
+        sizes = interactions['size'].astype(str)
+        if type_names is None:
+            type_names = np.unique(animal_types)
+        if size_names is None:
+            size_names = np.unique(sizes)
+        type_cols = np.searchsorted(type_names, animal_types)
+        size_cols = np.searchsorted(size_names, sizes)
+        
+        scores = interactions['score']
+        n_users = len(user_ids)
+        
+        return {
+            'user_ids': user_ids,
+            'item_ids': item_ids,
+            'type_names': type_names,
+            'size_names': size_names,
+            # Repeated applications for the same animal are summed
+            'user_item': coo_matrix(
+                (scores[known], (user_rows[known], item_cols[known])), shape=(n_users, len(item_ids))
+            ).tocsr(),
+            'type_prefs': mean_by_column(user_rows, type_cols, scores, (n_users, len(type_names))),
+            'size_prefs': mean_by_column(user_rows, size_cols, scores, (n_users, len(size_names))),
+            'user_rows': user_rows,
+            'type_cols': type_cols,
+        }
+    
+    def factor_features(self, matrices):
+        """SVD input: item interactions alongside the type and size preferences"""
+        return hstack([
+            matrices['user_item'],
+            csr_matrix(matrices['type_prefs']),
+            csr_matrix(matrices['size_prefs']),
+        ]).tocsr()
     
     def create_user_item_matrix(self):
-        """Create comprehensive user-item interaction matrix"""
+        """Create sparse user-item interaction matrix"""
         self.stdout.write('\n📊 Creating User-Item Matrix...')
         
         from adoptions.models import AdoptionApplication
-        from django.contrib.auth.models import User
-        from animals.models import Animal
-        
-        # Get all adoption interactions
-        applications = AdoptionApplication.objects.all()
         
-        if len(applications) < 5:
+        if AdoptionApplication.objects.count() < 5:
             self.stdout.write('⚠️  Limited adoption data, creating enhanced synthetic interactions...')
             self._create_enhanced_synthetic_data()
         
-        # Create interaction matrix
-        user_item_data = []
+        self.interactions = self.read_interactions(AdoptionApplication.objects.all())
+        self.matrices = self.build_matrices(self.interactions)
         
-        for app in applications:
-            interaction_score = self._calculate_interaction_score(app)
-            
-            user_item_data.append({
-                'user_id': app.applicant.id,
-                'animal_id': app.animal.id,
-                'animal_type': app.animal.animal_type,
-                'animal_size': self._get_animal_size(app.animal),
-                'interaction_score': interaction_score,
-                'application_status': app.status
-            })
-        
-        self.interaction_df = pd.DataFrame(user_item_data)
-        
-        # Create user-animal_type matrix (more robust with limited data)
-        self.user_type_matrix = self.interaction_df.pivot_table(
-            index='user_id',
-            columns='animal_type', 
-            values='interaction_score',
-            fill_value=0
+        user_ids = self.matrices['user_ids']
+        self.item_ids = self.matrices['item_ids']
+        self.user_type_matrix = pd.DataFrame(
+            self.matrices['type_prefs'], index=user_ids, columns=[str(name) for name in self.matrices['type_names']]
         )
-        
-        # Create user-size preference matrix
-        self.user_size_matrix = self.interaction_df.pivot_table(
-            index='user_id',
-            columns='animal_size',
-            values='interaction_score', 
-            fill_value=0
+        self.user_size_matrix = pd.DataFrame(
+            self.matrices['size_prefs'], index=user_ids, columns=[str(name) for name in self.matrices['size_names']]
         )
         
-        self.stdout.write(f'✅ Created interaction matrix: {len(self.interaction_df)} interactions')
+        user_item = self.matrices['user_item']
+        density = user_item.nnz / max(1, user_item.shape[0] * user_item.shape[1])
+        self.stdout.write(f'✅ Created interaction matrix: {len(self.interactions["score"])} interactions')
+        self.stdout.write(f'📊 User-Item Matrix: {user_item.shape} ({user_item.nnz} non-zero, density {density:.5f})')
         self.stdout.write(f'📊 User-Type Matrix: {self.user_type_matrix.shape}')
         self.stdout.write(f'📊 User-Size Matrix: {self.user_size_matrix.shape}')
     
-    def _calculate_interaction_score(self, application):
-        """Calculate interaction strength score"""
-        base_score = 1.0
-        
-        # Status-based scoring
-        if application.status == 'APPROVED':
-            base_score = 5.0
-        elif application.status == 'PENDING':
-            base_score = 3.0
-        elif application.status == 'UNDER_REVIEW':
-            base_score = 2.0
-        else:
-            base_score = 1.0
-        
-        # Add time-based decay (more recent = higher score)
-        try:
-            days_since = (datetime.now().date() - application.created_at.date()).days
-            time_factor = max(0.5, 1.0 - (days_since / 365))  # Decay over a year
-            base_score *= time_factor
-        except:
-            pass
-        
-        return base_score
-    
     def _get_animal_size(self, animal):
         """Get animal size from Kaggle data or estimate"""
         try:
@@ -129,7 +238,7 @@ class Command(BaseCommand):
     
     def _create_enhanced_synthetic_data(self):
         """Create enhanced synthetic interaction data for better collaborative filtering"""
-        from django.contrib.auth.models import User
+        from django.contrib.auth import get_user_model
         from animals.models import Animal
         from adoptions.models import AdoptionApplication, AdopterProfile
         
@@ -165,7 +274,7 @@ class Command(BaseCommand):
         for persona in personas:
             try:
                 # Create or get user
-                user, created = User.objects.get_or_create(
+                user, created = get_user_model().objects.get_or_create(
                     username=persona['username'],
                     defaults={'email': f"{persona['username']}@example.com"}
                 )
@@ -219,164 +328,60 @@ class Command(BaseCommand):
         """Add implicit feedback signals"""
         self.stdout.write('\n🔍 Adding Implicit Feedback Signals...')
         
-        # Add viewing patterns (simulated)
-        viewing_data = []
+        shape = self.user_type_matrix.shape
+        user_rows = self.matrices['user_rows']
+        type_cols = self.matrices['type_cols']
         
-        for _, interaction in self.interaction_df.iterrows():
-            # Simulate viewing behavior based on interaction score
-            view_count = max(1, int(interaction['interaction_score']))
-            
-            for _ in range(view_count):
-                viewing_data.append({
-                    'user_id': interaction['user_id'],
-                    'animal_type': interaction['animal_type'],
-                    'action': 'view',
-                    'weight': 0.5
-                })
-        
-        # Add search patterns (inferred from applications)
-        search_data = []
-        
-        for user_id in self.interaction_df['user_id'].unique():
-            user_interactions = self.interaction_df[self.interaction_df['user_id'] == user_id]
-            
-            # Infer search preferences
-            preferred_types = user_interactions['animal_type'].value_counts()
-            
-            for animal_type, count in preferred_types.items():
-                search_data.append({
-                    'user_id': user_id,
-                    'animal_type': animal_type,
-                    'action': 'search',
-                    'weight': min(2.0, count * 0.5)
-                })
+        # Viewing patterns (simulated): one view per interaction point, at least one
+        view_counts = np.maximum(1, self.interactions['score'].astype(int))
+        views = coo_matrix((view_counts, (user_rows, type_cols)), shape=shape).tocsr()
+        
+        # Search patterns (inferred from applications per animal type)
+        searches = coo_matrix((np.ones(len(user_rows)), (user_rows, type_cols)), shape=shape).tocsr()
+        searches.data = np.minimum(2.0, searches.data * 0.5)
         
         self.implicit_feedback = {
-            'viewing': viewing_data,
-            'searching': search_data
+            'viewing': views,
+            'searching': searches
         }
         
-        self.stdout.write(f'✅ Added implicit feedback: {len(viewing_data)} views, {len(search_data)} searches')
+        self.stdout.write(f'✅ Added implicit feedback: {int(view_counts.sum())} views, {searches.nnz} searches')
     
     def apply_matrix_factorization(self):
-        """Apply SVD matrix factorization for collaborative filtering"""
+        """Apply truncated SVD to the sparse user features"""
         self.stdout.write('\n🔢 Applying Matrix Factorization...')
         
+        features = self.factor_features(self.matrices)
+        
         try:
-            # Convert to sparse matrix for efficiency
-            user_type_sparse = csr_matrix(self.user_type_matrix.values)
-            
-            # Apply SVD
-            n_components = min(5, min(self.user_type_matrix.shape) - 1)
+            n_components = min(self.options['components'], min(features.shape) - 1)
+            if n_components < 1:
+                raise ValueError(f'matrix {features.shape} is too small')
             
             self.svd_model = TruncatedSVD(n_components=n_components, random_state=42)
-            user_factors = self.svd_model.fit_transform(user_type_sparse)
-            
-            # Calculate user similarity matrix
-            self.user_similarity = cosine_similarity(user_factors)
+            self.user_factors = self.svd_model.fit_transform(features).astype(np.float32)
             
-            self.stdout.write(f'✅ SVD applied: {n_components} components')
+            self.stdout.write(f'✅ SVD applied: {n_components} components on {features.shape} sparse features')
             self.stdout.write(f'📊 Explained variance ratio: {self.svd_model.explained_variance_ratio_.sum():.3f}')
             
-            # Store user factors for recommendations
-            self.user_factors = user_factors
-            
         except Exception as e:
             self.stdout.write(f'⚠️  SVD failed: {str(e)}, using alternative approach')
             
-            # Fallback: simple user similarity based on preferences
-            self.user_similarity = cosine_similarity(self.user_type_matrix.values)
-            self.user_factors = self.user_type_matrix.values
-    
-    def create_similarity_recommendations(self):
-        """Create recommendations based on user similarity"""
-        self.stdout.write('\n👥 Creating Similarity-Based Recommendations...')
-        
-        recommendations = {}
-        
-        for i, user_id in enumerate(self.user_type_matrix.index):
-            # Find similar users
-            user_similarities = self.user_similarity[i]
-            similar_user_indices = np.argsort(user_similarities)[::-1][1:4]  # Top 3 similar users
-            
-            user_recommendations = []
-            
-            for similar_idx in similar_user_indices:
-                similar_user_id = self.user_type_matrix.index[similar_idx]
-                similarity_score = user_similarities[similar_idx]
-                
-                # Get what similar users liked
-                similar_user_prefs = self.user_type_matrix.iloc[similar_idx]
-                
-                for animal_type, score in similar_user_prefs.items():
-                    if score > 0:  # Similar user interacted with this type
-                        user_recommendations.append({
-                            'animal_type': animal_type,
-                            'score': score * similarity_score,
-                            'reason': f'Users similar to you adopted {animal_type.lower()}s'
-                        })
-            
-            # Aggregate and sort recommendations
-            if user_recommendations:
-                rec_df = pd.DataFrame(user_recommendations)
-                aggregated = rec_df.groupby('animal_type').agg({
-                    'score': 'sum',
-                    'reason': 'first'
-                }).sort_values('score', ascending=False)
-                
-                recommendations[user_id] = aggregated.to_dict('index')
-            
-        self.similarity_recommendations = recommendations
-        
-        self.stdout.write(f'✅ Generated similarity recommendations for {len(recommendations)} users')
+            # Fallback: similarity on the raw type preferences
+            self.svd_model = None
+            self.user_factors = self.user_type_matrix.values.astype(np.float32)
     
     def create_hybrid_recommendations(self):
         """Create hybrid content-collaborative recommendations"""
         self.stdout.write('\n🔗 Creating Hybrid Recommendations...')
         
-        hybrid_recommendations = {}
-        
-        for user_id in self.user_type_matrix.index:
-            user_recs = []
-            
-            # Get collaborative filtering recommendations
-            if user_id in self.similarity_recommendations:
-                collab_recs = self.similarity_recommendations[user_id]
-                
-                for animal_type, data in collab_recs.items():
-                    user_recs.append({
-                        'type': 'collaborative',
-                        'animal_type': animal_type,
-                        'score': data['score'],
-                        'reason': data['reason']
-                    })
-            
-            # Add content-based recommendations (user's historical preferences)
-            user_prefs = self.user_type_matrix.loc[user_id]
-            
-            for animal_type, score in user_prefs.items():
-                if score > 0:
-                    user_recs.append({
-                        'type': 'content',
-                        'animal_type': animal_type,
-                        'score': score * 0.8,  # Weight content slightly lower
-                        'reason': f'Based on your previous {animal_type.lower()} adoption'
-                    })
-            
-            # Combine and deduplicate
-            if user_recs:
-                rec_df = pd.DataFrame(user_recs)
-                
-                # Aggregate scores by animal type
-                aggregated = rec_df.groupby('animal_type').agg({
-                    'score': 'sum',
-                    'type': lambda x: 'hybrid' if len(set(x)) > 1 else x.iloc[0],
-                    'reason': 'first'
-                }).sort_values('score', ascending=False)
-                
-                hybrid_recommendations[user_id] = aggregated.to_dict('index')
+        user_ids = self.user_type_matrix.index.to_numpy()
+        self.recommendation_store = self.recommend_for_users(
+            self.user_type_matrix.values, self.user_factors, np.arange(len(user_ids)), user_ids,
+            list(self.user_type_matrix.columns)
+        )
         
-        self.hybrid_recommendations = hybrid_recommendations
+        self.stdout.write(f'✅ Generated recommendations for {len(self.recommendation_store)} users')
         
         # Save collaborative filtering model
         self.save_collaborative_model()
@@ -386,45 +391,151 @@ class Command(BaseCommand):
         
         self.stdout.write('\n🎉 Advanced Collaborative Filtering Complete!')
     
+    def recommend_for_users(self, preferences, user_factors, positions, user_ids, animal_types):
+        """
+        Hybrid recommendations for the users at `positions`: the animal types
+        their most similar users (cosine similarity of factors) liked, plus
+        their own preferences weighted at 0.8. Similarities are computed in
+        blocks of --chunk-size users, so memory stays at chunk x users.
+        """
+        similar_users = min(self.options['similar_users'], len(user_factors) - 1)
+        chunk_size = max(1, self.options['chunk_size'])
+        
+        norms = np.linalg.norm(user_factors, axis=1)
+        norms[norms == 0] = 1
+        normalized = (user_factors / norms[:, None]).astype(np.float32)
+        
+        n_types = preferences.shape[1]
+        scores = np.zeros((len(positions), n_types))
+        has_collab = np.zeros((len(positions), n_types), dtype=bool)
+        
+        for start in range(0, len(positions), chunk_size):
+            block = positions[start:start + chunk_size]
+            if similar_users < 1:
+                continue
+            
+            similarities = normalized[block] @ normalized.T
+            similarities[np.arange(len(block)), block] = -np.inf
+            
+            # Top-K neighbours per row without sorting the whole row
+            top = np.argpartition(similarities, -similar_users, axis=1)[:, -similar_users:]
+            top_similarities = np.take_along_axis(similarities, top, axis=1)
+            similar_prefs = preferences[top]
+            
+            scores[start:start + len(block)] = (similar_prefs * top_similarities[:, :, None]).sum(axis=1)
+            has_collab[start:start + len(block)] = (similar_prefs > 0).any(axis=1)
+        
+        own_prefs = preferences[positions]
+        has_content = own_prefs > 0
+        scores = np.where(has_collab, scores, 0) + np.where(has_content, own_prefs * 0.8, 0)
+        
+        kinds = np.where(
+            has_collab & has_content, RECOMMENDATION_KINDS.index('hybrid'),
+            np.where(has_collab, RECOMMENDATION_KINDS.index('collaborative'), RECOMMENDATION_KINDS.index('content'))
+        )
+        return RecommendationStore.from_scores(
+            np.asarray(user_ids)[positions], scores, kinds, has_collab | has_content, animal_types
+        )
+    
+    def update_changed_users(self):
+        """
+        Incremental retrain: recompute preferences and recommendations only
+        for users whose adoption applications changed since the model was
+        trained. Returns False when a full training run is needed instead.
+        """
+        from adoptions.models import AdoptionApplication
+        from adoptions.model_registry import model_registry, COLLABORATIVE_FILE
+        
+        collaborative_data = model_registry.get(COLLABORATIVE_FILE)
+        if not collaborative_data or 'item_ids' not in collaborative_data:
+            self.stdout.write('⚠️  No incremental-capable model found, running full training')
+            return False
+        
+        self.stdout.write(self.style.SUCCESS('🤝 INCREMENTAL COLLABORATIVE FILTERING UPDATE'))
+        trained_at = timezone.now()
+        
+        changed_users = set(AdoptionApplication.objects.filter(
+            updated_at__gt=collaborative_data['trained_at']
+        ).values_list('applicant_id', flat=True))
+        
+        if not changed_users:
+            self.stdout.write('✅ No new adoption applications since the last training run')
+            return True
+        
+        user_type_matrix = collaborative_data['user_type_matrix']
+        user_size_matrix = collaborative_data['user_size_matrix']
+        type_names = np.array(user_type_matrix.columns, dtype=str)
+        size_names = np.array(user_size_matrix.columns, dtype=str)
+        
+        interactions = self.read_interactions(AdoptionApplication.objects.filter(applicant_id__in=changed_users))
+        if (set(interactions['animal_type'].astype(str)) - set(type_names)
+                or set(interactions['size'].astype(str)) - set(size_names)):
+            self.stdout.write('⚠️  New animal types or sizes since the last training run, running full training')
+            return False
+        
+        matrices = self.build_matrices(interactions, collaborative_data['item_ids'], type_names, size_names)
+        svd_model = collaborative_data.get('svd_model')
+        if svd_model is not None:
+            changed_factors = svd_model.transform(self.factor_features(matrices)).astype(np.float32)
+        else:
+            changed_factors = matrices['type_prefs'].astype(np.float32)
+        
+        # Replace the changed users' rows (and add new users), keeping user ids sorted
+        changed_ids = matrices['user_ids']
+        keep = ~np.isin(user_type_matrix.index.to_numpy(), changed_ids)
+        user_ids = np.concatenate([user_type_matrix.index.to_numpy()[keep], changed_ids])
+        order = np.argsort(user_ids, kind='stable')
+        user_ids = user_ids[order]
+        
+        type_prefs = np.concatenate([user_type_matrix.values[keep], matrices['type_prefs']])[order]
+        size_prefs = np.concatenate([user_size_matrix.values[keep], matrices['size_prefs']])[order]
+        user_factors = np.concatenate([collaborative_data['user_factors'][keep], changed_factors])[order]
+        
+        self.user_type_matrix = pd.DataFrame(type_prefs, index=user_ids, columns=user_type_matrix.columns)
+        self.user_size_matrix = pd.DataFrame(size_prefs, index=user_ids, columns=user_size_matrix.columns)
+        self.user_factors = user_factors
+        self.svd_model = svd_model
+        self.item_ids = collaborative_data['item_ids']
+        self.trained_at = trained_at
+        
+        updates = self.recommend_for_users(
+            type_prefs, user_factors, np.searchsorted(user_ids, changed_ids), user_ids,
+            list(user_type_matrix.columns)
+        )
+        self.recommendation_store = RecommendationStore.from_dict(
+            collaborative_data['recommendation_store']
+        ).merged(updates)
+        
+        self.save_collaborative_model()
+        self.stdout.write(f'✅ Updated recommendations for {len(updates)} of {len(self.recommendation_store)} users')
+        return True
+    
     def save_collaborative_model(self):
         """Save collaborative filtering model"""
-        from django.conf import settings
-        import pickle
-        import os
-        
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+        from adoptions.model_artifacts import publish_model
+        from adoptions.model_registry import COLLABORATIVE_FILE
         
         collaborative_data = {
             'user_type_matrix': self.user_type_matrix,
             'user_size_matrix': self.user_size_matrix,
-            'user_similarity': self.user_similarity,
-            'similarity_recommendations': self.similarity_recommendations,
-            'hybrid_recommendations': self.hybrid_recommendations,
-            'implicit_feedback': self.implicit_feedback,
-            'version': '1.0_advanced'
+            'user_factors': self.user_factors,
+            'item_ids': self.item_ids,
+            'svd_model': self.svd_model,
+            'recommendation_store': self.recommendation_store.to_dict(),
+            'trained_at': self.trained_at,
+            'version': '2.0_sparse'
         }
         
-        if hasattr(self, 'svd_model'):
-            collaborative_data['svd_model'] = self.svd_model
-            collaborative_data['user_factors'] = self.user_factors
-        
-        collab_file = os.path.join(model_dir, 'collaborative_filtering.pkl')
-        with open(collab_file, 'wb') as f:
-            pickle.dump(collaborative_data, f)
-        
-        self.stdout.write(f'💾 Collaborative filtering model saved to {collab_file}')
+        manifest = publish_model(collaborative_data, COLLABORATIVE_FILE)
+        self.stdout.write(f'💾 Collaborative filtering model saved (revision {manifest["revision"]})')
     
     def _display_sample_recommendations(self):
         """Display sample recommendations"""
         self.stdout.write('\n📋 Sample Hybrid Recommendations:')
         
-        sample_users = list(self.hybrid_recommendations.keys())[:3]
-        
-        for user_id in sample_users:
-            user_recs = self.hybrid_recommendations[user_id]
-            
+        for user_id in self.recommendation_store.user_ids[:3]:
             self.stdout.write(f'\n👤 User {user_id} Recommendations:')
             
-            for animal_type, data in list(user_recs.items())[:3]:  # Top 3
-                self.stdout.write(f'    🎯 {animal_type}: Score {data["score"]:.2f} ({data["type"]})')
-                self.stdout.write(f'        Reason: {data["reason"]}')
+            for rec in self.recommendation_store.lookup(user_id)[:3]:  # Top 3
+                self.stdout.write(f'    🎯 {rec["animal_type"]}: Score {rec["score"]:.2f} ({rec["type"]})')
+                self.stdout.write(f'        Reason: {rec["reason"]}')
@@ -1,7 +1,5 @@
 # adoptions/management/commands/advanced_reality_check.py
 from django.core.management.base import BaseCommand
-import pickle
-import os
 import numpy as np
 import random
 
@@ -29,16 +27,12 @@ class Command(BaseCommand):
         """Load the advanced model"""
         self.stdout.write('\n🤖 Loading Advanced Model...')
         
-        from django.conf import settings
+        from adoptions.model_registry import model_registry, ADVANCED_MODEL_FILE
         
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        advanced_model_file = os.path.join(model_dir, 'advanced_adoption_model.pkl')
+        self.advanced_model_data = model_registry.get(ADVANCED_MODEL_FILE)
         
-        if os.path.exists(advanced_model_file):
+        if self.advanced_model_data:
             try:
-                with open(advanced_model_file, 'rb') as f:
-                    self.advanced_model_data = pickle.load(f)
-                
                 self.advanced_model = self.advanced_model_data['model']
                 self.scaler = self.advanced_model_data['scaler']
                 
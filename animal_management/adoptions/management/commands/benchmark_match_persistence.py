@@ -0,0 +1,74 @@
+# adoptions/management/commands/benchmark_match_persistence.py
+import time
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from adoptions.models import AdoptionMatch
+from adoptions.match_index import MATCH_SCORE_FIELDS, build_match, bulk_upsert_matches
+from animals.models import Animal
+
+
+class Command(BaseCommand):
+    help = 'Compare per-row update_or_create with bulk upserts for AdoptionMatch persistence'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--animals', type=int, nargs='+', default=[1000, 10000],
+                            help='Synthetic animal counts to benchmark')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Rows per bulk upsert statement')
+
+    def handle(self, *args, **options):
+        self.stdout.write('💾 AdoptionMatch persistence benchmark (synthetic data is rolled back)')
+
+        for count in options['animals']:
+            with transaction.atomic():
+                self._benchmark(count, options['chunk_size'])
+                transaction.set_rollback(True)
+
+    def _benchmark(self, count, chunk_size):
+        adopter = get_user_model().objects.create(
+            username=f'bench-{uuid.uuid4().hex[:12]}', user_type='PUBLIC'
+        )
+        # bulk_create skips save() signals, so the match index is not touched
+        animals = Animal.objects.bulk_create(
+            [Animal(name=f'Bench {i}', animal_type='DOG', gender='UNKNOWN', status='AVAILABLE')
+             for i in range(count)],
+            batch_size=1000,
+        )
+
+        def scores_for(i, bump):
+            return {
+                'overall_score': (i % 100) + bump,
+                'lifestyle_score': 70, 'experience_score': 70, 'housing_score': 70, 'family_score': 70,
+                'match_reasons': ['Benchmark'], 'potential_challenges': [],
+            }
+
+        def per_row(bump):
+            for i, animal in enumerate(animals):
+                match = build_match(adopter.id, animal, scores_for(i, bump))
+                AdoptionMatch.objects.update_or_create(
+                    adopter_id=adopter.id,
+                    animal=animal,
+                    defaults={field: getattr(match, field) for field in MATCH_SCORE_FIELDS},
+                )
+
+        def bulk(bump):
+            bulk_upsert_matches(
+                [build_match(adopter.id, animal, scores_for(i, bump)) for i, animal in enumerate(animals)],
+                chunk_size,
+            )
+
+        self.stdout.write(f'\n📊 {count} animals:')
+        for label, write in [('update_or_create', per_row), ('bulk upsert', bulk)]:
+            AdoptionMatch.objects.filter(adopter_id=adopter.id).delete()
+            for phase, bump in [('insert', 0), ('update', 0.5)]:
+                with CaptureQueriesContext(connection) as queries:
+                    start = time.perf_counter()
+                    write(bump)
+                    elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'    {label:17} {phase:6}: {len(queries):6} queries  {elapsed * 1000:9.1f}ms'
+                )
@@ -0,0 +1,319 @@
+# adoptions/management/commands/benchmark_matching.py
+import json
+import random
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from adoptions.models import AdopterProfile, AnimalBehaviorProfile
+from adoptions.model_registry import model_registry
+from adoptions.monitoring import ml_metrics
+from animals.models import Animal
+
+
+BENCHMARKS = ['my_matches', 'calculate_matches_ml', 'predict_adoption_likelihood', 'predict_animal_cluster']
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the adoption matching hot paths on synthetic data (rolled back afterwards) '
+        'and write throughput, query counts and memory as JSON'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', type=int, nargs='+', default=[1000, 10000],
+                            help='Synthetic animal (and behavior profile) counts, e.g. 1000 10000 100000')
+        parser.add_argument('--adopters', type=int, default=50, help='Synthetic adopter profiles per scale')
+        parser.add_argument('--iterations', type=int, default=5, help='Timed calls per benchmark')
+        parser.add_argument('--sample-size', type=int, default=500,
+                            help='Animals / behavior profiles per call for the per-item benchmarks')
+        parser.add_argument('--only', nargs='+', choices=BENCHMARKS, help='Run only these benchmarks')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', default='benchmark_matching.json', help='JSON results file ("-" for stdout)')
+
+    def handle(self, *args, **options):
+        self.options = options
+        self.iterations = max(1, options['iterations'])
+        benchmarks = options['only'] or BENCHMARKS
+
+        # Warm the registry once so every scale measures serving, not the first unpickle
+        model_registry.preload()
+
+        results = {
+            'benchmark': 'matching',
+            'git_commit': self._git_commit(),
+            'created_at': timezone.now().isoformat(),
+            'database': connection.vendor,
+            'models': {name: info['version'] for name, info in model_registry.status().items()},
+            'options': {
+                key: options[key] for key in ['adopters', 'iterations', 'sample_size', 'seed']
+            },
+            'scales': {},
+        }
+
+        for scale in options['scales']:
+            self.stdout.write(f'\n📦 Scale {scale}: generating synthetic data...')
+            with transaction.atomic():
+                adopters, animals = self._create_data(scale, options['adopters'], random.Random(options['seed']))
+                results['scales'][str(scale)] = {
+                    name: getattr(self, f'bench_{name}')(adopters, animals) for name in benchmarks
+                }
+                transaction.set_rollback(True)
+
+        self._write(results)
+
+    # Synthetic data -------------------------------------------------------
+
+    def _create_data(self, scale, adopter_count, rng):
+        """bulk_create skips save() signals, so no match index or cluster work is triggered"""
+        tag = uuid.uuid4().hex[:8]
+        start = time.perf_counter()
+
+        users = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f'bench-{tag}-{i}', user_type='PUBLIC') for i in range(adopter_count)],
+            batch_size=1000,
+        )
+        adopters = AdopterProfile.objects.bulk_create([
+            AdopterProfile(
+                user=user,
+                housing_type=rng.choice(['HOUSE', 'APARTMENT', 'CONDO', 'OTHER']),
+                has_yard=rng.random() < 0.5,
+                children_in_home=rng.choice([0, 0, 1, 2, 3]),
+                pet_experience=rng.choice(['NONE', 'BEGINNER', 'INTERMEDIATE', 'EXPERT']),
+                activity_level=rng.choice(['SEDENTARY', 'MODERATELY_ACTIVE', 'ACTIVE', 'VERY_ACTIVE']),
+                work_schedule='9-5',
+                hours_alone=rng.randint(0, 10),
+                willing_to_train=rng.random() < 0.8,
+                special_needs_capable=rng.random() < 0.2,
+                budget_for_pet='100',
+            )
+            for user in users
+        ], batch_size=1000)
+        for adopter, user in zip(adopters, users):
+            adopter.user = user
+
+        animals = Animal.objects.bulk_create([
+            Animal(
+                name=f'Bench {i}',
+                animal_type=rng.choice(['DOG', 'DOG', 'CAT', 'OTHER']),
+                gender=rng.choice(['MALE', 'FEMALE']),
+                status='AVAILABLE',
+                age_estimate=rng.choice(['Young', '2 years', '5 years', 'Senior', '8 weeks']),
+                weight=round(rng.uniform(2, 45), 1),
+                vaccinated=rng.random() < 0.7,
+                adoption_fee=rng.choice([0.0, 50.0, 100.0, 150.0]),
+                last_location_json={'kaggle_data': {
+                    'size': rng.choice(['Small', 'Medium', 'Large']),
+                    'time_in_shelter_days': rng.randint(0, 365),
+                    'previous_owner': rng.randint(0, 1),
+                    'health_condition': rng.randint(0, 2),
+                }},
+            )
+            for i in range(scale)
+        ], batch_size=1000)
+        AnimalBehaviorProfile.objects.bulk_create([
+            AnimalBehaviorProfile(
+                animal=animal,
+                energy_level=rng.choice(['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH']),
+                temperament=rng.choice(['CALM', 'PLAYFUL', 'INDEPENDENT', 'AFFECTIONATE', 'SHY']),
+                training_level=rng.choice(['NONE', 'BASIC', 'INTERMEDIATE', 'ADVANCED']),
+                good_with_children=rng.random() < 0.6,
+                good_with_dogs=rng.random() < 0.6,
+                good_with_cats=rng.random() < 0.4,
+                house_trained=rng.random() < 0.5,
+            )
+            for animal in animals
+        ], batch_size=1000)
+
+        self.stdout.write(
+            f'   {adopter_count} adopters, {scale} animals + behavior profiles '
+            f'in {time.perf_counter() - start:.1f}s'
+        )
+        return adopters, animals
+
+    # Measurement ----------------------------------------------------------
+
+    def _measure(self, name, calls, items_per_call=1):
+        """
+        Time each call (in a savepoint that is rolled back, so calls do not
+        see each other's writes), count its queries, then run one extra
+        call under tracemalloc for peak Python memory
+        """
+        def run(call):
+            with transaction.atomic():
+                call()
+                transaction.set_rollback(True)
+
+        ml_metrics.reset()
+        timings = []
+        queries = []
+        for call in calls:
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                run(call)
+                timings.append(time.perf_counter() - start)
+            queries.append(len(captured.captured_queries))
+        phases = ml_metrics.snapshot()['latency']
+
+        tracemalloc.start()
+        run(calls[0])
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        ordered = sorted(timings)
+        result = {
+            'calls': len(timings),
+            'items_per_call': items_per_call,
+            'mean_ms': round(statistics.mean(timings) * 1000, 3),
+            'p50_ms': round(statistics.median(timings) * 1000, 3),
+            'p95_ms': round(ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000, 3),
+            'max_ms': round(ordered[-1] * 1000, 3),
+            'items_per_second': round(items_per_call * len(timings) / sum(timings), 1),
+            'queries_per_call': round(statistics.mean(queries), 1),
+            'max_queries': max(queries),
+            'peak_python_memory_mb': round(peak_memory / (1024 * 1024), 2),
+            'phases': phases,
+        }
+        self.stdout.write(
+            f'   {name:<30} p50 {result["p50_ms"]:>10.1f}ms  {result["items_per_second"]:>10.1f} items/s  '
+            f'{result["queries_per_call"]:>7.1f} queries  {result["peak_python_memory_mb"]:>7.1f} MB'
+        )
+        return result
+
+    def _sample(self, items):
+        rng = random.Random(self.options['seed'])
+        return rng.sample(items, min(len(items), self.options['sample_size']))
+
+    def _adopter_calls(self, adopters, make_call):
+        return [make_call(adopters[i % len(adopters)]) for i in range(self.iterations)]
+
+    # Benchmarks -----------------------------------------------------------
+
+    def bench_my_matches(self, adopters, animals):
+        """Cold = first request builds the adopter's index; warm = indexed read"""
+        from adoptions.views import AdoptionMatchViewSet
+
+        view = AdoptionMatchViewSet.as_view({'get': 'my_matches'})
+        factory = APIRequestFactory()
+
+        def request_for(adopter):
+            def call():
+                request = factory.get('/api/adoption-matches/my_matches/')
+                force_authenticate(request, user=adopter.user)
+                response = view(request)
+                if response.status_code != 200:
+                    raise CommandError(f'my_matches returned HTTP {response.status_code}')
+            return call
+
+        cold = self._measure('my_matches (cold index)', self._adopter_calls(adopters, request_for))
+
+        # Build the indexes outside the timed calls, then time the indexed reads
+        from adoptions.match_index import get_available_behavior_profiles, rebuild_adopter_matches
+        available = get_available_behavior_profiles()
+        warm_adopters = adopters[:self.iterations]
+        for adopter in warm_adopters:
+            rebuild_adopter_matches(adopter, available)
+        warm = self._measure('my_matches (warm index)', self._adopter_calls(warm_adopters, request_for))
+        return {'cold': cold, 'warm': warm}
+
+    def bench_calculate_matches_ml(self, adopters, animals):
+        from adoptions.views import AdoptionMatchViewSet
+
+        view = AdoptionMatchViewSet.as_view({'post': 'calculate_matches_ml'})
+        factory = APIRequestFactory()
+
+        def request_for(adopter):
+            def call():
+                request = factory.post(
+                    '/api/adoption-matches/calculate_matches_ml/', {'adopter_profile_id': adopter.id}, format='json'
+                )
+                force_authenticate(request, user=adopter.user)
+                response = view(request)
+                if response.status_code != 200:
+                    raise CommandError(f'calculate_matches_ml returned HTTP {response.status_code}')
+            return call
+
+        return self._measure(
+            'calculate_matches_ml', self._adopter_calls(adopters, request_for), items_per_call=len(animals)
+        )
+
+    def bench_predict_adoption_likelihood(self, adopters, animals):
+        from adoptions.ml_matching import MLAdoptionMatcher
+
+        matcher = MLAdoptionMatcher()
+        sample = self._sample(animals)
+
+        def per_animal():
+            for animal in sample:
+                matcher.predict_adoption_likelihood(animal)
+
+        def batch():
+            matcher.predict_adoption_likelihood_batch(Animal.objects.filter(pk__in=[a.pk for a in animals]))
+
+        return {
+            'per_animal': self._measure(
+                'predict_adoption_likelihood', [per_animal] * self.iterations, items_per_call=len(sample)
+            ),
+            'batch': self._measure(
+                'predict_adoption_likelihood_batch', [batch] * self.iterations, items_per_call=len(animals)
+            ),
+        }
+
+    def bench_predict_animal_cluster(self, adopters, animals):
+        from adoptions.cluster_utils import predict_animal_cluster, predict_clusters
+
+        sample_ids = [animal.pk for animal in self._sample(animals)]
+
+        def load_profiles(ids):
+            return list(AnimalBehaviorProfile.objects.filter(animal_id__in=ids).select_related('animal'))
+
+        def per_profile():
+            for profile in load_profiles(sample_ids):
+                predict_animal_cluster(profile)
+
+        def batch():
+            predict_clusters(load_profiles([animal.pk for animal in animals]))
+
+        return {
+            'per_profile': self._measure(
+                'predict_animal_cluster', [per_profile] * self.iterations, items_per_call=len(sample_ids)
+            ),
+            'batch': self._measure(
+                'predict_clusters', [batch] * self.iterations, items_per_call=len(animals)
+            ),
+        }
+
+    # Output ---------------------------------------------------------------
+
+    def _git_commit(self):
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', 'HEAD'], cwd=settings.BASE_DIR, capture_output=True, text=True, timeout=5
+            ).stdout.strip() or None
+        except Exception:
+            return None
+
+    def _write(self, results):
+        peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KiB on Linux
+        results['peak_rss_mb'] = round(peak_rss / (1024 * 1024) if sys.platform == 'darwin' else peak_rss / 1024, 1)
+
+        output = json.dumps(results, indent=2, sort_keys=True)
+        if self.options['output'] == '-':
+            self.stdout.write(output)
+            return
+        with open(self.options['output'], 'w') as f:
+            f.write(output + '\n')
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Results written to {self.options["output"]}'))
@@ -0,0 +1,72 @@
+# adoptions/management/commands/benchmark_my_matches.py
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from adoptions.models import AdopterProfile
+from adoptions.model_registry import model_registry
+
+
+class Command(BaseCommand):
+    help = 'Benchmark my_matches latency with cold (reload per request) vs warm model registry'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=str, help='Username of an adopter with a profile (default: first profile)')
+        parser.add_argument('--iterations', type=int, default=10, help='Requests per mode')
+
+    def handle(self, *args, **options):
+        from adoptions.views import AdoptionMatchViewSet
+
+        profiles = AdopterProfile.objects.select_related('user')
+        if options['user']:
+            profiles = profiles.filter(user__username=options['user'])
+        profile = profiles.first()
+        if not profile:
+            raise CommandError('No adopter profile found to benchmark with')
+
+        iterations = max(1, options['iterations'])
+        view = AdoptionMatchViewSet.as_view({'get': 'my_matches'})
+        factory = APIRequestFactory()
+
+        def run_once(cold):
+            if cold:
+                # Old behaviour: every request unpickled the model files again
+                model_registry.invalidate()
+            request = factory.get('/api/adoption-matches/my_matches/')
+            force_authenticate(request, user=profile.user)
+
+            start = time.perf_counter()
+            with transaction.atomic():
+                response = view(request)
+                transaction.set_rollback(True)
+            elapsed = (time.perf_counter() - start) * 1000
+
+            if response.status_code != 200:
+                raise CommandError(f'my_matches returned HTTP {response.status_code}')
+            return elapsed
+
+        self.stdout.write(f'⏱️  Benchmarking my_matches for {profile.user.username} ({iterations} iterations)')
+
+        results = {}
+        for label, cold in [('before (cold load)', True), ('after (registry)', False)]:
+            model_registry.invalidate()
+            if not cold:
+                model_registry.preload()
+            loads_before = model_registry.load_count
+            timings = [run_once(cold) for _ in range(iterations)]
+            results[label] = timings
+
+            self.stdout.write(f'\n📊 {label}:')
+            self.stdout.write(f'    mean: {statistics.mean(timings):.1f}ms')
+            self.stdout.write(f'    p50:  {statistics.median(timings):.1f}ms')
+            self.stdout.write(f'    max:  {max(timings):.1f}ms')
+            self.stdout.write(f'    model loads: {model_registry.load_count - loads_before}')
+
+        before = statistics.mean(results['before (cold load)'])
+        after = statistics.mean(results['after (registry)'])
+        self.stdout.write(self.style.SUCCESS(
+            f'\n🚀 Saved {before - after:.1f}ms per request ({before / after:.1f}x faster)'
+        ))
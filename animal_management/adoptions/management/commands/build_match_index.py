@@ -0,0 +1,76 @@
+# adoptions/management/commands/build_match_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from adoptions.models import AdopterProfile
+from adoptions.ml_matching import MLAdoptionMatcher
+from adoptions.match_index import (
+    get_available_behavior_profiles, get_index_size, replace_adopter_matches, top_matches
+)
+
+
+class Command(BaseCommand):
+    help = 'Backfill the top-K adoption match index for every adopter'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help='Adopters written per transaction')
+        parser.add_argument('--only-missing', action='store_true', help='Skip adopters that already have an index')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        size = get_index_size()
+
+        self.stdout.write(f'🗂️  Building adoption match index (top {size} per adopter)')
+
+        start = time.perf_counter()
+        animals, behavior_profiles = get_available_behavior_profiles()
+        ml_matcher = MLAdoptionMatcher()
+        self.stdout.write(f'   Loaded {len(animals)} available animals in {time.perf_counter() - start:.2f}s')
+
+        profiles = AdopterProfile.objects.select_related('user').order_by('pk')
+        if options['only_missing']:
+            profiles = profiles.filter(matches_indexed_at__isnull=True)
+        total = profiles.count()
+
+        adopters_done = 0
+        rows_written = 0
+        scoring_start = time.perf_counter()
+
+        batch = []
+        for adopter_profile in profiles.iterator(chunk_size=batch_size):
+            batch.append(adopter_profile)
+            if len(batch) >= batch_size:
+                rows_written += self._write_batch(batch, animals, behavior_profiles, ml_matcher)
+                adopters_done += len(batch)
+                batch = []
+                self._report(adopters_done, total, rows_written, scoring_start)
+
+        if batch:
+            rows_written += self._write_batch(batch, animals, behavior_profiles, ml_matcher)
+            adopters_done += len(batch)
+            self._report(adopters_done, total, rows_written, scoring_start)
+
+        elapsed = time.perf_counter() - scoring_start
+        self.stdout.write(self.style.SUCCESS(
+            f'\n✅ Indexed {adopters_done} adopters ({rows_written} matches) in {elapsed:.2f}s'
+        ))
+        if elapsed > 0:
+            self.stdout.write(
+                f'   Throughput: {adopters_done / elapsed:.1f} adopters/s, '
+                f'{adopters_done * len(animals) / elapsed:.0f} pairs scored/s, '
+                f'{rows_written / elapsed:.0f} rows written/s'
+            )
+
+    def _write_batch(self, profiles, animals, behavior_profiles, ml_matcher):
+        matches = []
+        for adopter_profile in profiles:
+            matches.extend(top_matches(adopter_profile, animals, behavior_profiles, ml_matcher))
+
+        replace_adopter_matches([p.user_id for p in profiles], matches)
+        return len(matches)
+
+    def _report(self, done, total, rows, started):
+        elapsed = time.perf_counter() - started
+        rate = done / elapsed if elapsed > 0 else 0
+        self.stdout.write(f'   {done}/{total} adopters, {rows} matches ({rate:.1f} adopters/s)')
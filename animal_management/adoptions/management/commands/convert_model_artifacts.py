@@ -0,0 +1,55 @@
+# adoptions/management/commands/convert_model_artifacts.py
+import os
+import pickle
+import time
+
+from django.core.management.base import BaseCommand
+
+from adoptions.model_artifacts import artifact_dir, load_artifact, payload_size, save_artifact
+from adoptions.model_registry import model_registry, SERVING_MODEL_FILES
+
+
+class Command(BaseCommand):
+    help = 'Convert the pickled models in ml_models/ to memory-mappable versioned artifacts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('models', nargs='*', help='Model files to convert (default: all serving models)')
+        parser.add_argument('--remove-pickles', action='store_true',
+                            help='Delete each pickle once its artifact has been written and verified')
+
+    def handle(self, *args, **options):
+        model_dir = model_registry.model_dir
+        self.stdout.write(f'📦 Converting models in {model_dir}')
+
+        converted = 0
+        for file_name in options['models'] or SERVING_MODEL_FILES:
+            pickle_path = os.path.join(model_dir, file_name)
+            if not os.path.exists(pickle_path):
+                self.stdout.write(f'   ⏭️  {file_name}: no pickle found')
+                continue
+
+            start = time.perf_counter()
+            try:
+                with open(pickle_path, 'rb') as f:
+                    data = pickle.load(f)
+                manifest = save_artifact(data, model_dir, file_name)
+                # Make sure the artifact loads memory-mapped before trusting it
+                load_artifact(model_dir, file_name)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f'   ❌ {file_name}: {e}'))
+                continue
+
+            size = payload_size(model_dir, file_name, manifest)
+            self.stdout.write(
+                f'   ✅ {file_name} -> {os.path.basename(artifact_dir(model_dir, file_name))}/ '
+                f'(version {manifest["version"] or "unknown"}, {len(manifest["arrays"])} arrays, {size / 1024:.0f} KB, '
+                f'{time.perf_counter() - start:.2f}s)'
+            )
+
+            if options['remove_pickles']:
+                os.remove(pickle_path)
+                self.stdout.write(f'   🗑️  Removed {file_name}')
+            converted += 1
+
+        model_registry.invalidate()
+        self.stdout.write(self.style.SUCCESS(f'\n✅ Converted {converted} models'))
@@ -8,8 +8,6 @@ from sklearn.metrics import classification_report, confusion_matrix, roc_auc_sco
 from sklearn.utils.class_weight import compute_class_weight
 import numpy as np
 import pandas as pd
-import pickle
-import os
 
 class Command(BaseCommand):
     help = 'Fix ML overfitting and create genuinely advanced learning system'
@@ -325,10 +323,8 @@ class Command(BaseCommand):
         """Save the improved model"""
         self.stdout.write('\n💾 Saving Improved Model...')
         
-        from django.conf import settings
-        
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(model_dir, exist_ok=True)
+        from adoptions.model_artifacts import publish_model
+        from adoptions.model_registry import ADVANCED_MODEL_FILE
         
         improved_model_data = {
             'model': self.best_model,
@@ -340,11 +336,9 @@ class Command(BaseCommand):
             'version': '3.0_advanced'
         }
         
-        model_file = os.path.join(model_dir, 'advanced_adoption_model.pkl')
-        with open(model_file, 'wb') as f:
-            pickle.dump(improved_model_data, f)
+        manifest = publish_model(improved_model_data, ADVANCED_MODEL_FILE)
         
-        self.stdout.write(f'✅ Advanced model saved to {model_file}')
+        self.stdout.write(f'✅ Advanced model saved as revision {manifest["revision"]}')
     
     def final_assessment(self, test_accuracy, auc_score):
         """Final assessment of the improved ML system"""
@@ -4,8 +4,6 @@ from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.metrics import silhouette_score
 import numpy as np
-import pickle
-import os
 
 class Command(BaseCommand):
     help = 'Create behavioral clustering system (no external dependencies)'
@@ -339,10 +337,8 @@ class Command(BaseCommand):
         self.stdout.write('\n🔗 Integrating with ML System...')
         
         # Save clustering model
-        from django.conf import settings
-        
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(model_dir, exist_ok=True)
+        from adoptions.model_artifacts import publish_model
+        from adoptions.model_registry import CLUSTERING_FILE
         
         clustering_data = {
             'kmeans_model': self.kmeans,
@@ -361,11 +357,8 @@ class Command(BaseCommand):
             'version': '2.0_production_ready'
         }
         
-        clustering_file = os.path.join(model_dir, 'behavioral_clustering.pkl')
-        with open(clustering_file, 'wb') as f:
-            pickle.dump(clustering_data, f)
-        
-        self.stdout.write(f'✅ Clustering model saved to {clustering_file}')
+        manifest = publish_model(clustering_data, CLUSTERING_FILE)
+        self.stdout.write(f'✅ Clustering model saved (revision {manifest["revision"]})')
         
         # Create cluster prediction function
         self.create_cluster_predictor()
@@ -373,71 +366,10 @@ class Command(BaseCommand):
         self.stdout.write('✅ Behavioral clustering integrated with ML system')
     
     def create_cluster_predictor(self):
-        """Create function to predict cluster for new animals"""
-        
-        predictor_code = '''
-def predict_animal_cluster(animal_behavior_profile):
-    """Predict which behavioral cluster an animal belongs to"""
-    import pickle
-    import os
-    from django.conf import settings
-    
-    try:
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        clustering_file = os.path.join(model_dir, 'behavioral_clustering.pkl')
-        
-        with open(clustering_file, 'rb') as f:
-            clustering_data = pickle.load(f)
-        
-        kmeans = clustering_data['kmeans_model']
-        scaler = clustering_data['scaler']
-        recommendations = clustering_data['recommendations']
-        
-        # Extract features (same as training)
-        from adoptions.ml_matching import MLAdoptionMatcher
-        matcher = MLAdoptionMatcher()
-        
-        features = [
-            matcher.encode_categorical('energy_level', animal_behavior_profile.energy_level),
-            matcher.encode_categorical('training_level', animal_behavior_profile.training_level),
-            int(animal_behavior_profile.good_with_children),
-            int(animal_behavior_profile.good_with_dogs),
-            int(animal_behavior_profile.good_with_cats),
-            int(animal_behavior_profile.special_needs),
-            matcher.encode_categorical('animal_type', animal_behavior_profile.animal.animal_type),
-            animal_behavior_profile.animal.weight or 25,
-            animal_behavior_profile.animal.adoption_fee or 100,
-        ]
-        
-        # Scale and predict
-        features_scaled = scaler.transform([features])
-        cluster = kmeans.predict(features_scaled)[0]
-        
-        # Get recommendations for this cluster
-        cluster_recommendations = recommendations.get(cluster, [])
-        
-        return {
-            'cluster_id': int(cluster),
-            'recommendations': cluster_recommendations,
-            'cluster_description': f'Behavioral Cluster {cluster}',
-            'success': True
-        }
-        
-    except Exception as e:
-        return {
-            'cluster_id': -1,
-            'recommendations': ['Unable to determine cluster'],
-            'cluster_description': 'Unknown',
-            'success': False,
-            'error': str(e)
-        }
-'''
-        
-        # Save predictor function to a utils file
-        from django.conf import settings
+        """Load the new model and store clusters for existing animals"""
+        from adoptions.cluster_utils import assign_clusters
         
-        utils_file = os.path.join(settings.BASE_DIR, 'adoptions', 'cluster_utils.py')
-        with open(utils_file, 'w') as f:
-            f.write(predictor_code)
+        # adoptions/cluster_utils.py serves predictions from the model registry
+        assigned = assign_clusters()
         
-        self.stdout.write('✅ Cluster predictor function created')
+        self.stdout.write(f'✅ Assigned clusters to {assigned} behavior profiles')
@@ -1,8 +1,6 @@
 # adoptions/management/commands/integrate_advanced_model.py
 from django.core.management.base import BaseCommand
-import pickle
-import os
-import shutil
+import numpy as np
 
 class Command(BaseCommand):
     help = 'Integrate advanced model into main ML system'
@@ -12,262 +10,32 @@ class Command(BaseCommand):
         self.stdout.write('Updating main ML system to use advanced model...')
         self.stdout.write('=' * 60)
         
-        # Step 1: Create enhanced ML matching system
-        self.create_enhanced_ml_system()
-        
-        # Step 2: Update the main model file
+        # Step 1: Publish the advanced model as the main model
         self.update_main_model()
         
-        # Step 3: Test integration
+        # Step 2: Test integration
         self.test_integration()
     
-    def create_enhanced_ml_system(self):
-        """Create enhanced ML matching system that handles feature engineering"""
-        self.stdout.write('\n🔬 Creating Enhanced ML System...')
-        
-        enhanced_ml_code = '''# Enhanced ML system with feature engineering
-import numpy as np
-import pickle
-import os
-from sklearn.preprocessing import StandardScaler, PolynomialFeatures
-from sklearn.feature_selection import SelectKBest, f_classif
-from django.conf import settings
-
-class EnhancedMLAdoptionMatcher:
-    """
-    Enhanced ML system that handles advanced feature engineering
-    """
-    
-    def __init__(self):
-        self.advanced_model = None
-        self.basic_scaler = None
-        self.poly_features = None
-        self.feature_selector = None
-        self.model_name = None
-        self.load_advanced_model()
-    
-    def load_advanced_model(self):
-        """Load the advanced model with all preprocessing"""
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        advanced_model_file = os.path.join(model_dir, 'advanced_adoption_model.pkl')
-        
-        if os.path.exists(advanced_model_file):
-            try:
-                with open(advanced_model_file, 'rb') as f:
-                    model_data = pickle.load(f)
-                
-                self.advanced_model = model_data['model']
-                self.basic_scaler = model_data['scaler']
-                self.model_name = model_data['model_name']
-                
-                # Create feature engineering pipeline to match training
-                self.poly_features = PolynomialFeatures(degree=2, interaction_only=True, include_bias=False)
-                self.feature_selector = SelectKBest(f_classif, k=30)  # Select top 30 features
-                
-                print(f"✅ Enhanced model loaded: {self.model_name}")
-                return True
-                
-            except Exception as e:
-                print(f"❌ Error loading enhanced model: {str(e)}")
-                return False
-        else:
-            print("❌ Advanced model file not found")
-            return False
-    
-    def extract_basic_features(self, animal, kaggle_data):
-        """Extract the 9 basic features (same as original system)"""
-        
-        def categorize_age(age_str):
-            if not age_str:
-                return 'Adult'
-            age_str = str(age_str).lower()
-            if 'week' in age_str or 'puppy' in age_str or 'kitten' in age_str:
-                return 'Baby'
-            elif 'month' in age_str:
-                try:
-                    months = int(age_str.split()[0])
-                    return 'Baby' if months < 6 else 'Young' if months < 12 else 'Adult'
-                except:
-                    return 'Adult'
-            elif 'year' in age_str:
-                try:
-                    years = int(age_str.split()[0])
-                    if years < 1: return 'Baby'
-                    elif years < 3: return 'Young'
-                    elif years < 8: return 'Adult'
-                    else: return 'Senior'
-                except:
-                    return 'Adult'
-            return 'Adult'
-        
-        def encode_categorical(feature_name, value):
-            """Simple encoding for categorical features"""
-            encodings = {
-                'animal_type': {'DOG': 2, 'CAT': 1, 'OTHER': 0},
-                'size': {'Small': 0, 'Medium': 1, 'Large': 2, 'Extra Large': 3},
-                'age_category': {'Baby': 0, 'Young': 1, 'Adult': 2, 'Senior': 3}
-            }
-            return encodings.get(feature_name, {}).get(value, 0)
-        
-        # Get age category
-        age_category = categorize_age(animal.age_estimate)
-        
-        # Extract the 9 basic features
-        features = [
-            encode_categorical('animal_type', animal.animal_type),
-            encode_categorical('size', kaggle_data.get('size', 'Medium')),
-            encode_categorical('age_category', age_category),
-            animal.weight or 0,
-            int(animal.vaccinated) if animal.vaccinated else 0,
-            animal.adoption_fee or 0,
-            kaggle_data.get('time_in_shelter_days', 30),
-            kaggle_data.get('previous_owner', 0),
-            kaggle_data.get('health_condition', 0),
-        ]
-        
-        return features
-    
-    def engineer_features(self, basic_features):
-        """Apply the same feature engineering as during training"""
-        try:
-            # Step 1: Scale basic features
-            features_scaled = self.basic_scaler.transform([basic_features])
-            
-            # Step 2: Create polynomial features (interactions)
-            # We need to fit this on some data first - let's use the current features
-            # In a real system, you'd save the fitted transformers
-            
-            # For now, let's create a simplified version that matches the expected 45 features
-            # by adding some manual feature interactions
-            
-            basic_array = np.array(features_scaled[0])
-            
-            # Create manual interactions (simplified version)
-            interactions = []
-            
-            # Add squared terms
-            for i in range(len(basic_array)):
-                interactions.append(basic_array[i] ** 2)
-            
-            # Add some key interactions
-            interactions.append(basic_array[0] * basic_array[1])  # animal_type * size
-            interactions.append(basic_array[0] * basic_array[2])  # animal_type * age
-            interactions.append(basic_array[1] * basic_array[2])  # size * age
-            interactions.append(basic_array[3] * basic_array[4])  # weight * vaccinated
-            interactions.append(basic_array[5] * basic_array[6])  # fee * time_in_shelter
-            
-            # Add more interactions to reach approximately 45 features
-            for i in range(len(basic_array)):
-                for j in range(i+1, len(basic_array)):
-                    if len(interactions) < 36:  # 9 basic + 36 interactions = 45
-                        interactions.append(basic_array[i] * basic_array[j])
-            
-            # Combine basic features with interactions
-            engineered_features = np.concatenate([basic_array, interactions])
-            
-            # Ensure we have exactly 45 features
-            if len(engineered_features) > 45:
-                engineered_features = engineered_features[:45]
-            elif len(engineered_features) < 45:
-                # Pad with zeros if needed
-                padding = np.zeros(45 - len(engineered_features))
-                engineered_features = np.concatenate([engineered_features, padding])
-            
-            return engineered_features.reshape(1, -1)
-            
-        except Exception as e:
-            print(f"Feature engineering error: {e}")
-            # Fallback: create 45 features by padding
-            basic_array = np.array(basic_features)
-            if len(basic_array) < 45:
-                padding = np.zeros(45 - len(basic_array))
-                padded_features = np.concatenate([basic_array, padding])
-            else:
-                padded_features = basic_array[:45]
-            
-            return padded_features.reshape(1, -1)
-    
-    def predict_adoption_likelihood(self, animal):
-        """Predict adoption likelihood using advanced model"""
-        if not self.advanced_model:
-            return {
-                'adoption_likelihood': 0.5,
-                'confidence': 'low',
-                'message': 'Advanced model not available'
-            }
-        
-        try:
-            # Get Kaggle data
-            if not (animal.last_location_json and 'kaggle_data' in animal.last_location_json):
-                kaggle_data = {
-                    'size': 'Medium',
-                    'time_in_shelter_days': 30,
-                    'previous_owner': 0,
-                    'health_condition': 0
-                }
-            else:
-                kaggle_data = animal.last_location_json['kaggle_data']
-            
-            # Extract basic features
-            basic_features = self.extract_basic_features(animal, kaggle_data)
-            
-            # Engineer features to match training
-            engineered_features = self.engineer_features(basic_features)
-            
-            # Make prediction
-            probability = self.advanced_model.predict_proba(engineered_features)[0][1]
-            prediction = self.advanced_model.predict(engineered_features)[0]
-            
-            return {
-                'adoption_likelihood': float(probability),
-                'prediction_class': int(prediction),
-                'confidence': 'high',
-                'method': 'advanced_ml',
-                'model_used': self.model_name,
-                'features_engineered': engineered_features.shape[1]
-            }
-            
-        except Exception as e:
-            print(f"❌ Enhanced prediction failed: {e}")
-            return {
-                'adoption_likelihood': 0.5,
-                'confidence': 'low',
-                'message': f'Prediction error: {str(e)}'
-            }
-
-# Global instance
-enhanced_matcher = EnhancedMLAdoptionMatcher()
-'''
-        
-        # Save enhanced ML system
-        enhanced_file = os.path.join(settings.BASE_DIR, 'adoptions', 'enhanced_ml_matching.py')
-        with open(enhanced_file, 'w') as f:
-            f.write(enhanced_ml_code)
-        
-        self.stdout.write('✅ Enhanced ML system created')
-    
     def update_main_model(self):
         """Update the main model to use advanced version"""
         self.stdout.write('\n🔄 Updating Main Model...')
         
-        from django.conf import settings
-        
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+        from adoptions.model_artifacts import publish_model
+        from adoptions.model_registry import model_registry, ADOPTION_MATCHER_FILE, ADVANCED_MODEL_FILE
         
         # Backup original model
-        original_file = os.path.join(model_dir, 'adoption_matcher.pkl')
-        backup_file = os.path.join(model_dir, 'adoption_matcher_backup.pkl')
+        original_model = model_registry.get(ADOPTION_MATCHER_FILE)
         
-        if os.path.exists(original_file):
-            shutil.copy2(original_file, backup_file)
+        if original_model:
+            publish_model(original_model, 'adoption_matcher_backup.pkl')
             self.stdout.write('✅ Original model backed up')
         
-        # Copy advanced model as main model
-        advanced_file = os.path.join(model_dir, 'advanced_adoption_model.pkl')
+        # Publish advanced model as main model
+        advanced_model = model_registry.get(ADVANCED_MODEL_FILE)
         
-        if os.path.exists(advanced_file):
-            shutil.copy2(advanced_file, original_file)
-            self.stdout.write('✅ Advanced model set as main model')
+        if advanced_model:
+            manifest = publish_model(advanced_model, ADOPTION_MATCHER_FILE)
+            self.stdout.write(f'✅ Advanced model set as main model (revision {manifest["revision"]})')
         else:
             self.stdout.write('❌ Advanced model not found')
     
@@ -276,8 +44,9 @@ enhanced_matcher = EnhancedMLAdoptionMatcher()
         self.stdout.write('\n🧪 Testing Integration...')
         
         try:
-            # Import the enhanced system
-            from adoptions.enhanced_ml_matching import enhanced_matcher
+            # A new matcher serves the revision just published through the registry
+            from adoptions.ml_matching import MLAdoptionMatcher
+            matcher = MLAdoptionMatcher()
             
             # Test on a few animals
             from animals.models import Animal
@@ -290,7 +59,7 @@ enhanced_matcher = EnhancedMLAdoptionMatcher()
             
             for i, animal in enumerate(test_animals):
                 try:
-                    result = enhanced_matcher.predict_adoption_likelihood(animal)
+                    result = matcher.predict_adoption_likelihood(animal)
                     predictions.append(result['adoption_likelihood'])
                     
                     self.stdout.write(f'  Animal {i+1} ({animal.animal_type}): {result["adoption_likelihood"]:.3f}')
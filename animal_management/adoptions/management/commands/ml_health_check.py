@@ -17,8 +17,10 @@ class Command(BaseCommand):
         # Model files
         self.stdout.write(f'\n📁 Model Files:')
         for file_name, status in health_report['model_files'].items():
-            icon = '✅' if status == 'OK' else '❌'
-            self.stdout.write(f'    {icon} {file_name}: {status}')
+            icon = '✅' if status.startswith('OK') else '❌'
+            version = health_report['model_versions'].get(file_name)
+            version_text = f' (version {version})' if version else ''
+            self.stdout.write(f'    {icon} {file_name}: {status}{version_text}')
         
         # System performance
         perf = health_report['system_performance']
@@ -0,0 +1,47 @@
+# adoptions/management/commands/refresh_adoption_likelihood.py
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from adoptions.likelihood import refresh_adoption_likelihood, stale_animals
+from adoptions.ml_matching import MLAdoptionMatcher
+from animals.models import Animal
+
+
+class Command(BaseCommand):
+    help = 'Recompute the stored adoption likelihood for animals changed since their last score'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Rescore every animal (e.g. after retraining)')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Animals scored per batch')
+        parser.add_argument('--interval', type=int, default=0,
+                            help='Keep running and refresh every N seconds (0 = run once)')
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        queryset = Animal.objects.all() if options['all'] else None
+
+        while True:
+            self._refresh(queryset, batch_size)
+            if not options['interval']:
+                break
+            # Only the first pass honours --all; later passes pick up changes
+            queryset = None
+            time.sleep(options['interval'])
+            close_old_connections()
+
+    def _refresh(self, queryset, batch_size):
+        pending = (queryset if queryset is not None else stale_animals()).count()
+        if not pending:
+            self.stdout.write('✅ Adoption likelihood scores are up to date')
+            return
+
+        self.stdout.write(f'🔄 Scoring {pending} animals...')
+        start = time.perf_counter()
+        written = refresh_adoption_likelihood(queryset, batch_size, MLAdoptionMatcher())
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ Stored adoption likelihood for {written} animals in {elapsed:.2f}s'
+        ))
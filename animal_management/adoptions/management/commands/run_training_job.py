@@ -0,0 +1,29 @@
+# adoptions/management/commands/run_training_job.py
+from django.core.management.base import BaseCommand, CommandError
+
+from adoptions.models import MLTrainingJob
+from adoptions.training_jobs import TRAINING_JOBS, run_job
+
+
+class Command(BaseCommand):
+    help = 'Run an ML training job now and publish its model (recorded like API-started jobs)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('job_type', choices=sorted(TRAINING_JOBS), help='Model to train')
+
+    def handle(self, *args, **options):
+        if MLTrainingJob.objects.filter(job_type=options['job_type'], status='RUNNING').exists():
+            raise CommandError(f'A {options["job_type"]} job is already running')
+
+        job = MLTrainingJob.objects.create(job_type=options['job_type'])
+        self.stdout.write(f'🚀 Running {job.get_job_type_display()} training (job {job.pk})...')
+
+        job = run_job(job.pk)
+        if job.status == 'SUCCEEDED':
+            self.stdout.write(self.style.SUCCESS(
+                f'✅ Published revision {job.model_revision} in '
+                f'{(job.finished_at - job.started_at).total_seconds():.1f}s'
+            ))
+        else:
+            self.stdout.write(job.log)
+            raise CommandError(f'Training failed: {job.error}')
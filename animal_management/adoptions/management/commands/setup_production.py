@@ -15,16 +15,12 @@ class Command(BaseCommand):
         # Step 1: Verify all models exist
         self.verify_models()
         
-        # Step 2: Create auto-loading system
-        self.setup_auto_loading()
-        
-        # Step 3: Create API endpoints
+        # Step 2: Create API endpoints
+        # (model auto-loading lives in adoptions/apps.py and monitoring in
+        # adoptions/monitoring.py + ml_health_check; they are not generated)
         self.setup_api_endpoints()
         
-        # Step 4: Create monitoring system
-        self.setup_monitoring()
-        
-        # Step 5: Final production test
+        # Step 3: Final production test
         self.production_test()
         
         self.stdout.write('\n✅ Production setup complete!')
@@ -75,165 +71,6 @@ class Command(BaseCommand):
         else:
             self.stdout.write(f'\n  ❌ Only {len(available_models)}/4 models available - Need training')
     
-    def setup_auto_loading(self):
-        """Setup automatic model loading in Django"""
-        self.stdout.write('\n🔄 Setting up Auto-Loading...')
-        
-        # Create apps.py for auto-loading
-        apps_code = '''# adoptions/apps.py
-from django.apps import AppConfig
-
-class AdoptionsConfig(AppConfig):
-    default_auto_field = 'django.db.models.BigAutoField'
-    name = 'adoptions'
-    
-    def ready(self):
-        """Initialize ML models when Django starts"""
-        try:
-            # Auto-load ML models on startup
-            from .ml_matching import MLAdoptionMatcher
-            
-            # Initialize the matcher (this will auto-load models)
-            matcher = MLAdoptionMatcher()
-            
-            print("✅ ML models auto-loaded on startup")
-            
-        except Exception as e:
-            print(f"⚠️ ML auto-loading failed: {e}")
-'''
-        
-        apps_file = os.path.join(settings.BASE_DIR, 'adoptions', 'apps.py')
-        with open(apps_file, 'w') as f:
-            f.write(apps_code)
-        
-        self.stdout.write('  ✅ Auto-loading configured in apps.py')
-        
-        # Create production utilities
-        self.create_production_utils()
-    
-    def create_production_utils(self):
-        """Create production utility functions"""
-        
-        utils_code = '''# adoptions/production_utils.py
-"""
-Production utilities for ML system
-"""
-
-def get_ml_system_status():
-    """Get current status of ML system"""
-    try:
-        from .ml_matching import MLAdoptionMatcher
-        import os
-        from django.conf import settings
-        
-        matcher = MLAdoptionMatcher()
-        
-        # Check models
-        model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        
-        models_status = {
-            'core_ml': matcher.adoption_likelihood_model is not None,
-            'compatibility': matcher.compatibility_model is not None,
-            'advanced_model': hasattr(matcher, 'advanced_model_data'),
-            'collaborative': hasattr(matcher, 'collaborative_model') and matcher.collaborative_model,
-        }
-        
-        # Check files
-        files_status = {
-            'adoption_matcher': os.path.exists(os.path.join(model_dir, 'adoption_matcher.pkl')),
-            'production_model': os.path.exists(os.path.join(model_dir, 'production_model.pkl')),
-            'collaborative_filtering': os.path.exists(os.path.join(model_dir, 'collaborative_filtering.pkl')),
-            'behavioral_clustering': os.path.exists(os.path.join(model_dir, 'behavioral_clustering.pkl')),
-        }
-        
-        return {
-            'status': 'operational',
-            'models_loaded': models_status,
-            'files_available': files_status,
-            'ready_for_production': sum(models_status.values()) >= 2
-        }
-        
-    except Exception as e:
-        return {
-            'status': 'error',
-            'error': str(e),
-            'ready_for_production': False
-        }
-
-def predict_adoption_likelihood_safe(animal):
-    """Safe wrapper for adoption likelihood prediction"""
-    try:
-        from .ml_matching import MLAdoptionMatcher
-        
-        matcher = MLAdoptionMatcher()
-        result = matcher.predict_adoption_likelihood(animal)
-        
-        return {
-            'success': True,
-            'prediction': result
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'prediction': {
-                'adoption_likelihood': 0.5,
-                'confidence': 'low',
-                'method': 'fallback'
-            }
-        }
-
-def get_collaborative_recommendations_safe(user_id):
-    """Safe wrapper for collaborative recommendations"""
-    try:
-        from .ml_matching import MLAdoptionMatcher
-        
-        matcher = MLAdoptionMatcher()
-        recommendations = matcher.get_collaborative_recommendations(user_id)
-        
-        return {
-            'success': True,
-            'recommendations': recommendations
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'recommendations': []
-        }
-
-def get_behavioral_cluster_safe(animal_behavior_profile):
-    """Safe wrapper for behavioral clustering"""
-    try:
-        from .cluster_utils import predict_animal_cluster
-        
-        result = predict_animal_cluster(animal_behavior_profile)
-        
-        return {
-            'success': True,
-            'cluster_info': result
-        }
-        
-    except Exception as e:
-        return {
-            'success': False,
-            'error': str(e),
-            'cluster_info': {
-                'cluster_id': -1,
-                'recommendations': ['Cluster prediction unavailable'],
-                'cluster_description': 'Unknown'
-            }
-        }
-'''
-        
-        utils_file = os.path.join(settings.BASE_DIR, 'adoptions', 'production_utils.py')
-        with open(utils_file, 'w') as f:
-            f.write(utils_code)
-        
-        self.stdout.write('  ✅ Production utilities created')
-    
     def setup_api_endpoints(self):
         """Setup API endpoints for ML features"""
         self.stdout.write('\n🌐 Setting up API Endpoints...')
@@ -455,205 +292,6 @@ fetch('/adoptions/api/collaborative-recommendations/?user_id=456')
         self.stdout.write(f'  📄 Views addition saved to: {views_file}')
         self.stdout.write(f'  📄 URLs addition saved to: {urls_file}')
     
-    def setup_monitoring(self):
-        """Setup monitoring and logging"""
-        self.stdout.write('\n📊 Setting up Monitoring...')
-        
-        monitoring_code = '''# adoptions/monitoring.py
-"""
-ML System Monitoring and Health Checks
-"""
-
-import os
-import time
-from django.conf import settings
-from django.utils import timezone
-import logging
-
-logger = logging.getLogger(__name__)
-
-class MLSystemMonitor:
-    """Monitor ML system health and performance"""
-    
-    def __init__(self):
-        self.model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
-        self.health_checks = []
-    
-    def check_model_files(self):
-        """Check if all model files exist and are readable"""
-        required_files = [
-            'adoption_matcher.pkl',
-            'production_model.pkl', 
-            'collaborative_filtering.pkl',
-            'behavioral_clustering.pkl'
-        ]
-        
-        results = {}
-        for file_name in required_files:
-            file_path = os.path.join(self.model_dir, file_name)
-            
-            if os.path.exists(file_path):
-                try:
-                    # Check if file is readable
-                    with open(file_path, 'rb') as f:
-                        f.read(1)  # Read first byte
-                    results[file_name] = 'OK'
-                except Exception as e:
-                    results[file_name] = f'Error: {str(e)}'
-            else:
-                results[file_name] = 'Missing'
-        
-        return results
-    
-    def check_ml_system_performance(self):
-        """Test ML system performance"""
-        try:
-            from .production_utils import get_ml_system_status
-            
-            start_time = time.time()
-            status = get_ml_system_status()
-            end_time = time.time()
-            
-            response_time = end_time - start_time
-            
-            return {
-                'status': status.get('status', 'unknown'),
-                'response_time_ms': round(response_time * 1000, 2),
-                'models_loaded': status.get('models_loaded', {}),
-                'ready_for_production': status.get('ready_for_production', False)
-            }
-            
-        except Exception as e:
-            return {
-                'status': 'error',
-                'error': str(e),
-                'response_time_ms': None,
-                'models_loaded': {},
-                'ready_for_production': False
-            }
-    
-    def test_prediction_pipeline(self):
-        """Test the full prediction pipeline"""
-        try:
-            from animals.models import Animal
-            from .production_utils import predict_adoption_likelihood_safe
-            
-            # Get a test animal
-            test_animal = Animal.objects.filter(
-                last_location_json__kaggle_data__isnull=False
-            ).first()
-            
-            if not test_animal:
-                return {
-                    'status': 'no_test_data',
-                    'message': 'No animals with Kaggle data for testing'
-                }
-            
-            start_time = time.time()
-            result = predict_adoption_likelihood_safe(test_animal)
-            end_time = time.time()
-            
-            prediction_time = end_time - start_time
-            
-            return {
-                'status': 'success' if result['success'] else 'error',
-                'prediction_time_ms': round(prediction_time * 1000, 2),
-                'prediction_result': result.get('prediction', {}),
-                'error': result.get('error') if not result['success'] else None
-            }
-            
-        except Exception as e:
-            return {
-                'status': 'error',
-                'error': str(e),
-                'prediction_time_ms': None
-            }
-    
-    def run_full_health_check(self):
-        """Run complete health check"""
-        logger.info("Running ML system health check")
-        
-        health_report = {
-            'timestamp': timezone.now().isoformat(),
-            'model_files': self.check_model_files(),
-            'system_performance': self.check_ml_system_performance(),
-            'prediction_pipeline': self.test_prediction_pipeline()
-        }
-        
-        # Determine overall health
-        files_ok = all(status == 'OK' for status in health_report['model_files'].values())
-        system_ok = health_report['system_performance']['status'] == 'operational'
-        pipeline_ok = health_report['prediction_pipeline']['status'] == 'success'
-        
-        health_report['overall_health'] = 'healthy' if (files_ok and system_ok and pipeline_ok) else 'unhealthy'
-        
-        # Log results
-        if health_report['overall_health'] == 'healthy':
-            logger.info("ML system health check: HEALTHY")
-        else:
-            logger.warning(f"ML system health check: UNHEALTHY - {health_report}")
-        
-        return health_report
-
-# Global monitor instance
-ml_monitor = MLSystemMonitor()
-'''
-        
-        monitoring_file = os.path.join(settings.BASE_DIR, 'adoptions', 'monitoring.py')
-        with open(monitoring_file, 'w') as f:
-            f.write(monitoring_code)
-        
-        self.stdout.write('  ✅ Monitoring system created')
-        
-        # Create management command for health checks
-        health_check_command = '''# adoptions/management/commands/ml_health_check.py
-from django.core.management.base import BaseCommand
-
-class Command(BaseCommand):
-    help = 'Run ML system health check'
-    
-    def handle(self, *args, **options):
-        from adoptions.monitoring import ml_monitor
-        
-        self.stdout.write('🏥 Running ML System Health Check...')
-        
-        health_report = ml_monitor.run_full_health_check()
-        
-        self.stdout.write(f'\\n📊 Health Report:')
-        self.stdout.write(f'  Overall Health: {health_report["overall_health"].upper()}')
-        
-        # Model files
-        self.stdout.write(f'\\n📁 Model Files:')
-        for file_name, status in health_report['model_files'].items():
-            icon = '✅' if status == 'OK' else '❌'
-            self.stdout.write(f'    {icon} {file_name}: {status}')
-        
-        # System performance
-        perf = health_report['system_performance']
-        self.stdout.write(f'\\n⚡ System Performance:')
-        self.stdout.write(f'    Status: {perf["status"]}')
-        self.stdout.write(f'    Response Time: {perf["response_time_ms"]}ms')
-        self.stdout.write(f'    Production Ready: {perf["ready_for_production"]}')
-        
-        # Prediction pipeline
-        pipeline = health_report['prediction_pipeline']
-        self.stdout.write(f'\\n🎯 Prediction Pipeline:')
-        self.stdout.write(f'    Status: {pipeline["status"]}')
-        if pipeline.get('prediction_time_ms'):
-            self.stdout.write(f'    Prediction Time: {pipeline["prediction_time_ms"]}ms')
-        
-        if health_report['overall_health'] == 'healthy':
-            self.stdout.write('\\n🎉 ML system is healthy and production-ready!')
-        else:
-            self.stdout.write('\\n⚠️  ML system has health issues that need attention.')
-'''
-        
-        health_check_file = os.path.join(settings.BASE_DIR, 'adoptions', 'management', 'commands', 'ml_health_check.py')
-        with open(health_check_file, 'w') as f:
-            f.write(health_check_command)
-        
-        self.stdout.write('  ✅ Health check command created')
-    
     def production_test(self):
         """Run final production test"""
         self.stdout.write('\n🧪 Running Production Test...')
@@ -1,604 +1,45 @@
 # adoptions/management/commands/update_ml_system.py
 from django.core.management.base import BaseCommand
-import os
-import shutil
-from django.conf import settings
 
 class Command(BaseCommand):
-    help = 'Update MLAdoptionMatcher to use advanced model permanently'
+    help = 'Retrain the ML adoption system and publish it for the serving workers'
     
     def handle(self, *args, **options):
         self.stdout.write(self.style.SUCCESS('🔧 UPDATING ML SYSTEM TO ADVANCED MODEL'))
-        self.stdout.write('Permanently integrating 89.5% accuracy model...')
+        self.stdout.write('Retraining and publishing the adoption models...')
         self.stdout.write('=' * 60)
         
-        # Step 1: Update the main MLAdoptionMatcher file
-        self.update_ml_matcher_file()
+        # Step 1: Retrain and publish (MLAdoptionMatcher.save_model -> publish_model)
+        if not self.retrain_and_publish():
+            return
         
-        # Step 2: Update model loading mechanism
-        self.update_model_loading()
-        
-        # Step 3: Add advanced prediction method
-        self.add_advanced_prediction_method()
-        
-        # Step 4: Test integration
+        # Step 2: Test integration
         self.test_advanced_integration()
         
         self.stdout.write('\n✅ MLAdoptionMatcher updated to use advanced model!')
     
-    def update_ml_matcher_file(self):
-        """Update the main ml_matching.py file"""
-        self.stdout.write('\n📝 Updating MLAdoptionMatcher file...')
-        
-        # Read current file
-        ml_file_path = os.path.join(settings.BASE_DIR, 'adoptions', 'ml_matching.py')
-        
-        # Create backup
-        backup_path = ml_file_path + '.backup'
-        if os.path.exists(ml_file_path):
-            shutil.copy2(ml_file_path, backup_path)
-            self.stdout.write(f'  ✅ Backup created: {backup_path}')
-        
-        # Enhanced ML matching system code
-        enhanced_code = '''# adoptions/ml_matching.py (ENHANCED WITH ADVANCED MODEL)
-import pandas as pd
-import numpy as np
-from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_absolute_error, accuracy_score
-import pickle
-import os
-from django.conf import settings
-from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication
-from animals.models import Animal
-
-class MLAdoptionMatcher:
-    """
-    ENHANCED ML-based adoption matching system
-    Now uses advanced 89.5% accuracy model with collaborative filtering
-    """
-    
-    def __init__(self):
-        self.compatibility_model = None
-        self.adoption_likelihood_model = None
-        self.advanced_model = None  # NEW: Advanced 89.5% model
-        self.collaborative_model = None  # NEW: Collaborative filtering
-        self.scaler = StandardScaler()
-        self.likelihood_scaler = StandardScaler()
-        self.label_encoders = {}
-        self.likelihood_encoders = {}
-        self.model_path = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(self.model_path, exist_ok=True)
-        
-        # Load all models
-        self.load_model()
-        self.load_advanced_model()  # NEW
-        self.load_collaborative_model()  # NEW
-    
-    def load_advanced_model(self):
-        """Load the advanced 89.5% accuracy model"""
-        try:
-            advanced_file = os.path.join(self.model_path, 'production_model.pkl')
-            if os.path.exists(advanced_file):
-                with open(advanced_file, 'rb') as f:
-                    self.advanced_model_data = pickle.load(f)
-                print("✅ Advanced model (89.5% accuracy) loaded")
-                return True
-        except Exception as e:
-            print(f"⚠️ Advanced model load failed: {e}")
-        return False
-    
-    def load_collaborative_model(self):
-        """Load collaborative filtering model"""
-        try:
-            collab_file = os.path.join(self.model_path, 'collaborative_filtering.pkl')
-            if os.path.exists(collab_file):
-                with open(collab_file, 'rb') as f:
-                    self.collaborative_model = pickle.load(f)
-                print("✅ Collaborative filtering model loaded")
-                return True
-        except Exception as e:
-            print(f"⚠️ Collaborative model load failed: {e}")
-        return False
-    
-    def encode_categorical(self, feature_name, value):
-        """Convert text values to numbers for ML"""
-        if feature_name not in self.label_encoders:
-            self.label_encoders[feature_name] = LabelEncoder()
-            known_categories = self.get_known_categories(feature_name)
-            self.label_encoders[feature_name].fit(known_categories)
-        
-        try:
-            return self.label_encoders[feature_name].transform([value])[0]
-        except ValueError:
-            return 0
-    
-    def get_known_categories(self, feature_name):
-        """Define all possible categories for each feature"""
-        categories = {
-            'activity_level': ['SEDENTARY', 'MODERATELY_ACTIVE', 'ACTIVE', 'VERY_ACTIVE'],
-            'pet_experience': ['NONE', 'BEGINNER', 'INTERMEDIATE', 'EXPERT'],
-            'housing_type': ['APARTMENT', 'HOUSE', 'CONDO', 'OTHER'],
-            'energy_level': ['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH'],
-            'training_level': ['NONE', 'BASIC', 'INTERMEDIATE', 'ADVANCED'],
-            'animal_type': ['DOG', 'CAT', 'OTHER'],
-            'size': ['Small', 'Medium', 'Large', 'Extra Large'],
-            'age_category': ['Baby', 'Young', 'Adult', 'Senior'],
-        }
-        return categories.get(feature_name, ['DEFAULT'])
-    
-    def prepare_features(self, adopter_profile, animal_behavior_profile):
-        """Convert adopter and animal data into numbers for ML"""
-        
-        def safe_bool_to_int(value):
-            if isinstance(value, str):
-                return int(value.lower() in ['true', '1', 'yes'])
-            elif isinstance(value, bool):
-                return int(value)
-            else:
-                return int(bool(value))
-        
-        def safe_int(value, default=0):
-            try:
-                return int(value)
-            except (ValueError, TypeError):
-                return default
-        
-        features = {
-            'adopter_activity': self.encode_categorical('activity_level', adopter_profile.activity_level),
-            'adopter_experience': self.encode_categorical('pet_experience', adopter_profile.pet_experience),
-            'adopter_housing': self.encode_categorical('housing_type', adopter_profile.housing_type),
-            'has_yard': safe_bool_to_int(adopter_profile.has_yard),
-            'children_count': safe_int(adopter_profile.children_in_home),
-            'hours_alone': safe_int(adopter_profile.hours_alone),
-            'willing_train': safe_bool_to_int(adopter_profile.willing_to_train),
-            'special_needs_ok': safe_bool_to_int(adopter_profile.special_needs_capable),
-            'animal_energy': self.encode_categorical('energy_level', animal_behavior_profile.energy_level),
-            'animal_training': self.encode_categorical('training_level', animal_behavior_profile.training_level),
-            'good_with_kids': safe_bool_to_int(animal_behavior_profile.good_with_children),
-            'good_with_dogs': safe_bool_to_int(animal_behavior_profile.good_with_dogs),
-            'good_with_cats': safe_bool_to_int(animal_behavior_profile.good_with_cats),
-            'special_needs': safe_bool_to_int(animal_behavior_profile.special_needs),
-            'animal_type': self.encode_categorical('animal_type', animal_behavior_profile.animal.animal_type),
-        }
-        
-        return list(features.values())
-
-    def _extract_animal_features_for_likelihood(self, animal, kaggle_data):
-        """Extract features for advanced model (same as training)"""
-        
-        def categorize_age(age_str):
-            if not age_str:
-                return 'Adult'
-            age_str = str(age_str).lower()
-            if 'week' in age_str or 'puppy' in age_str or 'kitten' in age_str:
-                return 'Baby'
-            elif 'month' in age_str:
-                try:
-                    months = int(age_str.split()[0])
-                    return 'Baby' if months < 6 else 'Young' if months < 12 else 'Adult'
-                except:
-                    return 'Adult'
-            elif 'year' in age_str:
-                try:
-                    years = int(age_str.split()[0])
-                    if years < 1: return 'Baby'
-                    elif years < 3: return 'Young'
-                    elif years < 8: return 'Adult'
-                    else: return 'Senior'
-                except:
-                    return 'Adult'
-            return 'Adult'
-        
-        def encode_for_likelihood(feature_name, value):
-            if feature_name not in self.likelihood_encoders:
-                self.likelihood_encoders[feature_name] = LabelEncoder()
-                categories = self.get_known_categories(feature_name)
-                self.likelihood_encoders[feature_name].fit(categories)
-            
-            try:
-                return self.likelihood_encoders[feature_name].transform([value])[0]
-            except ValueError:
-                return 0
-        
-        age_category = categorize_age(animal.age_estimate)
-        
-        features = [
-            encode_for_likelihood('animal_type', animal.animal_type),
-            encode_for_likelihood('size', kaggle_data.get('size', 'Medium')),
-            encode_for_likelihood('age_category', age_category),
-            animal.weight or 0,
-            int(animal.vaccinated) if animal.vaccinated else 0,
-            animal.adoption_fee or 0,
-            kaggle_data.get('time_in_shelter_days', 30),
-            kaggle_data.get('previous_owner', 0),
-            kaggle_data.get('health_condition', 0),
-        ]
-        
-        return features
-    
-    def predict_adoption_likelihood(self, animal):
-        """ENHANCED: Use advanced 89.5% accuracy model"""
-        
-        # Try advanced model first
-        if hasattr(self, 'advanced_model_data') and self.advanced_model_data:
-            return self._predict_with_advanced_model(animal)
-        
-        # Fallback to original model
-        return self._predict_with_original_model(animal)
-    
-    def _predict_with_advanced_model(self, animal):
-        """Use the 89.5% accuracy advanced model"""
-        try:
-            # Get Kaggle data
-            if not (animal.last_location_json and 'kaggle_data' in animal.last_location_json):
-                kaggle_data = {
-                    'size': 'Medium',
-                    'time_in_shelter_days': 30,
-                    'previous_owner': 0,
-                    'health_condition': 0 if animal.vaccinated else 1
-                }
-            else:
-                kaggle_data = animal.last_location_json['kaggle_data']
-            
-            # Extract the 9 basic features
-            basic_features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
-            
-            # Use simplified prediction (since we know this works)
-            # Based on our successful 89.5% model characteristics
-            
-            # Calculate prediction based on learned patterns
-            animal_type_factor = 0.1 if animal.animal_type == 'CAT' else 0.0  # Cats slightly more adoptable
-            size_factor = 0.1 if kaggle_data.get('size') == 'Small' else 0.0  # Small animals more adoptable
-            health_factor = -0.2 if kaggle_data.get('health_condition', 0) > 0 else 0.1  # Health matters
-            age_factor = 0.1 if 'Young' in str(animal.age_estimate) else -0.1 if 'Senior' in str(animal.age_estimate) else 0.0
-            
-            # Base probability with learned factors
-            base_prob = 0.65  # Base from our 89.5% model
-            final_prob = base_prob + animal_type_factor + size_factor + health_factor + age_factor
-            
-            # Ensure valid range
-            final_prob = max(0.1, min(0.95, final_prob))
-            
-            # Add some realistic variation based on features
-            variation = sum(basic_features) % 100 / 500  # Small variation based on features
-            final_prob = max(0.1, min(0.95, final_prob + variation - 0.1))
-            
-            return {
-                'adoption_likelihood': float(final_prob),
-                'confidence': 'high',
-                'method': 'advanced_ml_89.5',
-                'model_version': '3.0_production',
-                'test_accuracy': 0.895,
-                'animal_id': animal.id,
-                'animal_name': animal.name
-            }
-            
-        except Exception as e:
-            return self._predict_with_original_model(animal)
-    
-    def _predict_with_original_model(self, animal):
-        """Fallback to original model"""
-        if not self.adoption_likelihood_model:
-            return {
-                'adoption_likelihood': 0.5,
-                'confidence': 'low',
-                'method': 'fallback',
-                'message': 'No trained model available'
-            }
-        
-        try:
-            if not (animal.last_location_json and 'kaggle_data' in animal.last_location_json):
-                kaggle_data = {
-                    'size': 'Medium',
-                    'time_in_shelter_days': 30,
-                    'previous_owner': 0,
-                    'health_condition': 0 if animal.vaccinated else 1
-                }
-            else:
-                kaggle_data = animal.last_location_json['kaggle_data']
-            
-            features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
-            features_scaled = self.likelihood_scaler.transform([features])
-            
-            likelihood_proba = self.adoption_likelihood_model.predict_proba(features_scaled)[0]
-            likelihood = likelihood_proba[1] if len(likelihood_proba) > 1 else likelihood_proba[0]
-            
-            return {
-                'adoption_likelihood': float(likelihood),
-                'confidence': 'medium',
-                'method': 'original_ml',
-                'animal_id': animal.id,
-                'animal_name': animal.name
-            }
-            
-        except Exception as e:
-            return {
-                'adoption_likelihood': 0.5,
-                'confidence': 'low',
-                'message': f'Prediction error: {str(e)}'
-            }
-    
-    def get_collaborative_recommendations(self, user_id):
-        """Get collaborative filtering recommendations"""
-        if not self.collaborative_model:
-            return []
-        
-        try:
-            hybrid_recs = self.collaborative_model.get('hybrid_recommendations', {})
-            user_recs = hybrid_recs.get(user_id, {})
-            
-            recommendations = []
-            for animal_type, data in user_recs.items():
-                recommendations.append({
-                    'animal_type': animal_type,
-                    'score': data.get('score', 0),
-                    'reason': data.get('reason', 'Based on similar users'),
-                    'type': data.get('type', 'collaborative')
-                })
-            
-            return sorted(recommendations, key=lambda x: x['score'], reverse=True)
-            
-        except Exception as e:
-            return []
-    
-    def predict_compatibility(self, adopter_profile, animal_behavior_profile):
-        """ENHANCED compatibility prediction with collaborative filtering"""
-        
-        # Get basic compatibility
-        basic_result = self._get_basic_compatibility(adopter_profile, animal_behavior_profile)
-        
-        # Add collaborative recommendations
-        try:
-            collab_recs = self.get_collaborative_recommendations(adopter_profile.user.id)
-            if collab_recs:
-                animal_type = animal_behavior_profile.animal.animal_type
-                matching_rec = next((r for r in collab_recs if r['animal_type'] == animal_type), None)
-                
-                if matching_rec:
-                    # Boost score based on collaborative filtering
-                    collaborative_boost = min(10, matching_rec['score'] / 2)
-                    basic_result['overall_score'] = min(100, basic_result['overall_score'] + collaborative_boost)
-                    basic_result['collaborative_recommendation'] = matching_rec['reason']
-        except:
-            pass
-        
-        # Add advanced adoption likelihood
-        adoption_prediction = self.predict_adoption_likelihood(animal_behavior_profile.animal)
-        basic_result['adoption_likelihood'] = adoption_prediction['adoption_likelihood']
-        basic_result['prediction_method'] = adoption_prediction.get('method', 'unknown')
-        
-        return basic_result
-    
-    def _get_basic_compatibility(self, adopter_profile, animal_behavior_profile):
-        """Get basic compatibility score"""
-        if self.compatibility_model:
-            try:
-                features = self.prepare_features(adopter_profile, animal_behavior_profile)
-                features_scaled = self.scaler.transform([features])
-                
-                ml_score = self.compatibility_model.predict(features_scaled)[0]
-                ml_score = max(0, min(100, ml_score))
-                
-                return {
-                    'overall_score': ml_score,
-                    'prediction_method': 'enhanced_ml',
-                    'confidence': 'high',
-                    'match_reasons': ["ML-based compatibility analysis"],
-                    'potential_challenges': [] if ml_score > 70 else ["Consider additional preparation"]
-                }
-                
-            except Exception as e:
-                pass
-        
-        # Fallback to rule-based matching
-        from .matching import AdoptionMatchingSystem
-        matcher = AdoptionMatchingSystem()
-        return matcher.calculate_compatibility(adopter_profile, animal_behavior_profile.animal)
-    
-    # Keep all existing methods for backwards compatibility
-    def train_model(self):
-        """Train models (enhanced version)"""
-        print("🤖 Training enhanced ML adoption system...")
-        
-        compatibility_success = self._train_compatibility_model()
-        likelihood_success = self.train_adoption_likelihood_model()
-        
-        if compatibility_success or likelihood_success:
-            self.save_model()
-            print("✅ Enhanced ML training completed!")
-            return True
-        else:
-            print("❌ Training failed")
-            return False
-    
-    def _train_compatibility_model(self):
-        """Train compatibility model"""
-        successful_adoptions = AdoptionApplication.objects.filter(status='APPROVED')
-        
-        if len(successful_adoptions) < 5:
-            print("❌ Not enough training data for compatibility model")
-            return False
-        
-        X = []
-        y = []
-        
-        for adoption in successful_adoptions:
-            try:
-                if not hasattr(adoption.applicant, 'adopterprofile'):
-                    continue
-                
-                adopter_profile = adoption.applicant.adopterprofile
-                
-                if hasattr(adoption.animal, 'behavior_profile'):
-                    features = self.prepare_features(adopter_profile, adoption.animal.behavior_profile)
-                    X.append(features)
-                    
-                    from .matching import AdoptionMatchingSystem
-                    rule_matcher = AdoptionMatchingSystem()
-                    score = rule_matcher.calculate_compatibility(adopter_profile, adoption.animal)
-                    y.append(score['overall_score'])
-                
-            except Exception as e:
-                continue
-        
-        if len(X) < 3:
-            return False
-        
-        X = np.array(X)
-        y = np.array(y)
-        
-        if len(X) > 4:
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        else:
-            X_train, X_test, y_train, y_test = X, X, y, y
-        
-        X_train_scaled = self.scaler.fit_transform(X_train)
-        X_test_scaled = self.scaler.transform(X_test)
-        
-        self.compatibility_model = RandomForestRegressor(n_estimators=50, random_state=42)
-        self.compatibility_model.fit(X_train_scaled, y_train)
-        
-        train_score = self.compatibility_model.score(X_train_scaled, y_train)
-        test_score = self.compatibility_model.score(X_test_scaled, y_test)
-        
-        print(f"✅ Compatibility model trained! Test accuracy: {test_score:.3f}")
-        return True
-    
-    def train_adoption_likelihood_model(self):
-        """Train adoption likelihood model"""
-        animals_with_kaggle = Animal.objects.filter(
-            last_location_json__kaggle_data__isnull=False
-        )
-        
-        if len(animals_with_kaggle) < 10:
-            return False
+    def retrain_and_publish(self):
+        """Train the matcher; save_model() publishes a new artifact revision"""
+        self.stdout.write('\n🤖 Retraining MLAdoptionMatcher...')
         
-        X = []
-        y = []
+        from adoptions.ml_matching import MLAdoptionMatcher
         
-        for animal in animals_with_kaggle:
-            try:
-                kaggle_data = animal.last_location_json['kaggle_data']
-                features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
-                X.append(features)
-                y.append(kaggle_data.get('adoption_likelihood', 0))
-            except:
-                continue
-        
-        if len(X) < 5:
+        if not MLAdoptionMatcher().train_model():
+            self.stdout.write('  ❌ Training failed, published model left unchanged')
             return False
         
-        X = np.array(X)
-        y = np.array(y)
-        
-        if len(X) > 10:
-            X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-        else:
-            X_train, X_test, y_train, y_test = X, X, y, y
-        
-        X_train_scaled = self.likelihood_scaler.fit_transform(X_train)
-        X_test_scaled = self.likelihood_scaler.transform(X_test)
-        
-        self.adoption_likelihood_model = RandomForestClassifier(
-            n_estimators=50, 
-            random_state=42,
-            class_weight='balanced'
-        )
-        self.adoption_likelihood_model.fit(X_train_scaled, y_train)
-        
-        test_score = self.adoption_likelihood_model.score(X_test_scaled, y_test)
-        print(f"✅ Adoption likelihood model trained! Accuracy: {test_score:.3f}")
-        
+        self.stdout.write('  ✅ New model revision published')
         return True
     
-    def save_model(self):
-        """Save enhanced model"""
-        model_data = {
-            'compatibility_model': self.compatibility_model,
-            'adoption_likelihood_model': self.adoption_likelihood_model,
-            'scaler': self.scaler,
-            'likelihood_scaler': self.likelihood_scaler,
-            'label_encoders': self.label_encoders,
-            'likelihood_encoders': self.likelihood_encoders,
-            'version': '3.0_enhanced'
-        }
-        
-        model_file = os.path.join(self.model_path, 'adoption_matcher.pkl')
-        with open(model_file, 'wb') as f:
-            pickle.dump(model_data, f)
-        
-        print(f"💾 Enhanced model saved to {model_file}")
-    
-    def load_model(self):
-        """Load enhanced model"""
-        model_file = os.path.join(self.model_path, 'adoption_matcher.pkl')
-        
-        if os.path.exists(model_file):
-            try:
-                with open(model_file, 'rb') as f:
-                    model_data = pickle.load(f)
-                
-                self.compatibility_model = model_data.get('model') or model_data.get('compatibility_model')
-                self.scaler = model_data.get('scaler', StandardScaler())
-                self.label_encoders = model_data.get('label_encoders', {})
-                self.adoption_likelihood_model = model_data.get('adoption_likelihood_model')
-                self.likelihood_scaler = model_data.get('likelihood_scaler', StandardScaler())
-                self.likelihood_encoders = model_data.get('likelihood_encoders', {})
-                
-                version = model_data.get('version', '1.0')
-                print(f"✅ Enhanced ML model loaded (version {version})")
-                return True
-                
-            except Exception as e:
-                print(f"⚠️ Failed to load model: {e}")
-                return False
-        
-        print("ℹ️ No saved model found, will train new model")
-        return False
-'''
-        
-        # Write enhanced code to file
-        with open(ml_file_path, 'w') as f:
-            f.write(enhanced_code)
-        
-        self.stdout.write('  ✅ MLAdoptionMatcher updated with advanced model')
-    
-    def update_model_loading(self):
-        """Ensure advanced models auto-load in production"""
-        self.stdout.write('\n⚙️ Setting up auto-loading...')
-        
-        # This is already handled in the enhanced code above
-        self.stdout.write('  ✅ Auto-loading configured in enhanced MLAdoptionMatcher')
-    
-    def add_advanced_prediction_method(self):
-        """Add advanced prediction methods"""
-        self.stdout.write('\n🎯 Adding advanced prediction methods...')
-        
-        # This is already included in the enhanced code above
-        self.stdout.write('  ✅ Advanced prediction methods added')
-        self.stdout.write('    • 89.5% accuracy model integration')
-        self.stdout.write('    • Collaborative filtering recommendations')
-        self.stdout.write('    • Enhanced compatibility scoring')
-    
     def test_advanced_integration(self):
         """Test the advanced integration"""
         self.stdout.write('\n🧪 Testing Advanced Integration...')
         
         try:
-            # Import the updated system
-            import importlib
-            import sys
-            
-            # Reload the module to get the updated version
-            if 'adoptions.ml_matching' in sys.modules:
-                importlib.reload(sys.modules['adoptions.ml_matching'])
-            
             from adoptions.ml_matching import MLAdoptionMatcher
             from animals.models import Animal
             
-            # Test the updated system
+            # A new instance reads the revision just published through the registry
             matcher = MLAdoptionMatcher()
             
             test_animal = Animal.objects.filter(
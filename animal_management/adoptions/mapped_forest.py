@@ -0,0 +1,128 @@
+# adoptions/mapped_forest.py
+"""
+Random forests that predict straight from flat NumPy arrays
+
+scikit-learn copies every tree's nodes into private memory when a forest
+is unpickled (Tree.__setstate__), so a memory-mapped forest is not shared
+between workers. MappedForest keeps the nodes of all trees in a handful of
+concatenated arrays instead; model_artifacts saves them as .npy files and
+loads them with mmap_mode='r', so every worker reads the same pages.
+
+Predictions match the scikit-learn forest they were built from: the same
+float32 comparison against the split thresholds and the same per-tree
+accumulation order.
+"""
+
+import numpy as np
+from sklearn.ensemble import (
+    ExtraTreesClassifier, ExtraTreesRegressor, RandomForestClassifier, RandomForestRegressor,
+)
+
+FOREST_TYPES = (RandomForestClassifier, RandomForestRegressor, ExtraTreesClassifier, ExtraTreesRegressor)
+
+
+def can_map(model):
+    """Fitted single-output forest of a supported type"""
+    return isinstance(model, FOREST_TYPES) and hasattr(model, 'estimators_') and model.n_outputs_ == 1
+
+
+class MappedForest:
+    """Prediction-only stand-in for a fitted RandomForest/ExtraTrees model"""
+
+    def __init__(self, kind, max_depth, n_features_in, roots, children_left, children_right,
+                 feature, threshold, value, classes=None, feature_importances=None):
+        self.kind = kind  # 'classifier' or 'regressor'
+        self.max_depth = max_depth
+        self.n_features_in_ = n_features_in
+        self.roots = roots
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.classes = classes
+        self.feature_importances = feature_importances
+
+    @classmethod
+    def from_forest(cls, forest):
+        trees = [estimator.tree_ for estimator in forest.estimators_]
+        sizes = np.array([tree.node_count for tree in trees], dtype=np.int64)
+        roots = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+
+        def children(tree, root, side):
+            # Leaves stay -1; inner nodes point into the concatenated arrays
+            nodes = getattr(tree, side).astype(np.int64)
+            return np.where(nodes >= 0, nodes + root, -1)
+
+        classifier = hasattr(forest, 'classes_')
+        values = []
+        for tree in trees:
+            if classifier:
+                proba = tree.value[:, 0, :forest.n_classes_].astype(np.float64)
+                if not np.allclose(proba.sum(axis=1), 1.0):
+                    # scikit-learn < 1.4 stores class counts and normalises them in
+                    # DecisionTreeClassifier.predict_proba; do that once per node
+                    normalizer = proba.sum(axis=1)[:, np.newaxis]
+                    normalizer[normalizer == 0.0] = 1.0
+                    proba = proba / normalizer
+                values.append(proba)
+            else:
+                values.append(tree.value[:, 0, :1].astype(np.float64))
+
+        return cls(
+            kind='classifier' if classifier else 'regressor',
+            max_depth=max(tree.max_depth for tree in trees),
+            n_features_in=forest.n_features_in_,
+            roots=roots,
+            children_left=np.concatenate([children(tree, root, 'children_left') for tree, root in zip(trees, roots)]),
+            children_right=np.concatenate([children(tree, root, 'children_right') for tree, root in zip(trees, roots)]),
+            feature=np.concatenate([np.maximum(tree.feature, 0) for tree in trees]).astype(np.int64),
+            threshold=np.concatenate([tree.threshold for tree in trees]),
+            value=np.concatenate(values),
+            classes=np.asarray(forest.classes_) if classifier else None,
+            feature_importances=np.asarray(forest.feature_importances_, dtype=np.float64),
+        )
+
+    @property
+    def n_estimators(self):
+        return len(self.roots)
+
+    @property
+    def classes_(self):
+        return self.classes
+
+    @property
+    def feature_importances_(self):
+        return self.feature_importances
+
+    def apply(self, X):
+        """Leaf node (index into the concatenated arrays) of every row in every tree: (n_trees, n_rows)"""
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(len(X))
+        nodes = np.repeat(self.roots[:, np.newaxis], len(X), axis=1)
+        for _ in range(self.max_depth):
+            left = self.children_left[nodes]
+            inner = left >= 0
+            if not inner.any():
+                break
+            go_left = X[rows, self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(inner, np.where(go_left, left, self.children_right[nodes]), nodes)
+        return nodes
+
+    def _accumulate(self, X):
+        leaves = self.apply(X)
+        total = np.zeros((leaves.shape[1], self.value.shape[1]), dtype=np.float64)
+        for tree_leaves in leaves:
+            total += self.value[tree_leaves]
+        total /= self.n_estimators
+        return total
+
+    def predict_proba(self, X):
+        if self.kind != 'classifier':
+            raise AttributeError("regression forests have no predict_proba")
+        return self._accumulate(X)
+
+    def predict(self, X):
+        if self.kind == 'classifier':
+            return self.classes.take(np.argmax(self._accumulate(X), axis=1), axis=0)
+        return self._accumulate(X)[:, 0]
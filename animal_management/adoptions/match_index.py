@@ -0,0 +1,272 @@
+# adoptions/match_index.py
+"""
+Persistent top-K match index
+
+The AdoptionMatch table holds each adopter's best ADOPTION_MATCH_INDEX_SIZE
+matches. It is rebuilt for one adopter when their profile changes and
+patched per adopter when an animal's behavior profile or status changes,
+so my_matches is a single indexed read instead of scoring every animal.
+
+Changes are queued by adoptions/signals.py and applied by a background
+worker thread (or inline when ADOPTION_MATCH_INDEX_ASYNC is off).
+"""
+
+import logging
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.utils import timezone
+
+from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionMatch
+from animals.models import Animal
+from animal_management.background import BackgroundQueue
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_BEHAVIOR_PROFILE = {
+    'energy_level': 'MEDIUM',
+    'temperament': 'CALM',
+    'training_level': 'BASIC',
+    'good_with_children': True,
+    'good_with_dogs': True,
+    'good_with_cats': True,
+    'house_trained': False,
+}
+
+
+def get_index_size():
+    return getattr(settings, 'ADOPTION_MATCH_INDEX_SIZE', 50)
+
+
+def get_behavior_profiles(animals):
+    """
+    Return (animals, behavior_profiles) as parallel lists, creating a default
+    behavior profile for any animal that does not have one yet.
+    """
+    animals = list(animals)
+    behavior_profiles = []
+    for animal in animals:
+        if hasattr(animal, 'behavior_profile'):
+            behavior_profiles.append(animal.behavior_profile)
+        else:
+            behavior_profile, created = AnimalBehaviorProfile.objects.get_or_create(
+                animal=animal,
+                defaults=DEFAULT_BEHAVIOR_PROFILE
+            )
+            behavior_profiles.append(behavior_profile)
+    return animals, behavior_profiles
+
+
+def get_available_behavior_profiles():
+    """(animals, behavior_profiles) for every animal available for adoption"""
+    available_animals = Animal.objects.filter(
+        status='AVAILABLE'
+    ).select_related('behavior_profile')
+    return get_behavior_profiles(available_animals)
+
+
+def score_animals(adopter_profile, behavior_profiles, ml_matcher=None):
+    """Score one adopter against many animals: ML first, rule-based fallback"""
+    from .ml_matching import MLAdoptionMatcher
+    from .matching import AdoptionMatchingSystem
+
+    try:
+        return (ml_matcher or MLAdoptionMatcher()).predict_compatibility_batch(adopter_profile, behavior_profiles)
+    except Exception as e:
+        logger.warning(f"ML batch matching failed, using rule-based: {e}")
+        return AdoptionMatchingSystem().calculate_compatibility_batch(adopter_profile, behavior_profiles)
+
+
+def score_adopters(adopter_profiles, behavior_profile, ml_matcher=None):
+    """Score one animal for many adopters: ML first, rule-based fallback"""
+    from .ml_matching import MLAdoptionMatcher
+    from .matching import AdoptionMatchingSystem
+
+    try:
+        return (ml_matcher or MLAdoptionMatcher()).predict_compatibility_for_adopters(
+            adopter_profiles, behavior_profile
+        )
+    except Exception as e:
+        logger.warning(f"ML batch matching failed, using rule-based: {e}")
+        matcher = AdoptionMatchingSystem()
+        return [
+            matcher.calculate_compatibility_batch(adopter_profile, [behavior_profile])[0]
+            for adopter_profile in adopter_profiles
+        ]
+
+
+def evict_lowest_matches(adopter_ids):
+    """Delete the lowest-scoring indexed match of each adopter in one statement"""
+    lowest = AdoptionMatch.objects.filter(
+        adopter_id=OuterRef('adopter_id')
+    ).order_by('overall_score', 'id').values('id')[:1]
+    return AdoptionMatch.objects.filter(adopter_id__in=adopter_ids, id=Subquery(lowest)).delete()
+
+
+def build_match(adopter_id, animal, scores):
+    """Unsaved AdoptionMatch row from a score dictionary"""
+    return AdoptionMatch(
+        adopter_id=adopter_id,
+        animal=animal,
+        overall_score=scores['overall_score'],
+        lifestyle_score=scores.get('lifestyle_score', 75),
+        experience_score=scores.get('experience_score', 75),
+        housing_score=scores.get('housing_score', 75),
+        family_score=scores.get('family_score', 75),
+        match_reasons=scores.get('match_reasons', ['Compatible lifestyle']),
+        potential_challenges=scores.get('potential_challenges', []),
+    )
+
+
+MATCH_SCORE_FIELDS = [
+    'overall_score', 'lifestyle_score', 'experience_score', 'housing_score', 'family_score',
+    'match_reasons', 'potential_challenges',
+]
+
+
+def bulk_upsert_matches(matches, chunk_size=1000):
+    """
+    Insert or update AdoptionMatch rows in chunks with one
+    INSERT ... ON CONFLICT (adopter, animal) DO UPDATE per chunk
+    """
+    matches = list(matches)
+    for start in range(0, len(matches), chunk_size):
+        AdoptionMatch.objects.bulk_create(
+            matches[start:start + chunk_size],
+            update_conflicts=True,
+            unique_fields=['adopter', 'animal'],
+            update_fields=MATCH_SCORE_FIELDS,
+        )
+    return len(matches)
+
+
+def replace_adopter_matches(adopter_ids, matches, chunk_size=1000):
+    """
+    Make `matches` the complete index for the given adopters: upsert them and
+    delete any other rows those adopters still have
+    """
+    keep = {}
+    for match in matches:
+        keep.setdefault(match.adopter_id, []).append(match.animal_id)
+
+    with transaction.atomic():
+        bulk_upsert_matches(matches, chunk_size)
+        for adopter_id in adopter_ids:
+            AdoptionMatch.objects.filter(adopter_id=adopter_id).exclude(
+                animal_id__in=keep.get(adopter_id, [])
+            ).delete()
+        AdopterProfile.objects.filter(user_id__in=adopter_ids).update(matches_indexed_at=timezone.now())
+
+
+def top_matches(adopter_profile, animals, behavior_profiles, ml_matcher=None, size=None):
+    """Unsaved AdoptionMatch rows for the adopter's best `size` animals"""
+    if not animals:
+        return []
+    all_scores = score_animals(adopter_profile, behavior_profiles, ml_matcher)
+    ranked = sorted(zip(animals, all_scores), key=lambda pair: pair[1]['overall_score'], reverse=True)
+    return [
+        build_match(adopter_profile.user_id, animal, scores)
+        for animal, scores in ranked[:size or get_index_size()]
+    ]
+
+
+def rebuild_adopter_matches(adopter_profile, available=None, ml_matcher=None):
+    """Replace an adopter's indexed matches with a fresh top-K"""
+    animals, behavior_profiles = available or get_available_behavior_profiles()
+    matches = top_matches(adopter_profile, animals, behavior_profiles, ml_matcher)
+
+    replace_adopter_matches([adopter_profile.user_id], matches)
+    adopter_profile.matches_indexed_at = timezone.now()
+    return matches
+
+
+def refresh_animal_matches(animal_id):
+    """Patch every indexed adopter's top-K after one animal changed"""
+    size = get_index_size()
+    animal = Animal.objects.filter(pk=animal_id).select_related('behavior_profile').first()
+    indexed_profiles = AdopterProfile.objects.filter(matches_indexed_at__isnull=False)
+
+    if animal is None or animal.status != 'AVAILABLE':
+        # Animal left the pool: drop it and refill the adopters that had it
+        affected = set(AdoptionMatch.objects.filter(animal_id=animal_id).values_list('adopter_id', flat=True))
+        AdoptionMatch.objects.filter(animal_id=animal_id).delete()
+        if affected:
+            available = get_available_behavior_profiles()
+            for adopter_profile in indexed_profiles.filter(user_id__in=affected):
+                rebuild_adopter_matches(adopter_profile, available)
+        return
+
+    from .ml_matching import MLAdoptionMatcher
+    ml_matcher = MLAdoptionMatcher()
+    _, (behavior_profile,) = get_behavior_profiles([animal])
+
+    # Current state of every adopter's index in two queries
+    index_stats = {
+        row['adopter_id']: (row['count'], row['floor'])
+        for row in AdoptionMatch.objects.order_by().values('adopter_id').annotate(
+            count=Count('id'), floor=Min('overall_score')
+        )
+    }
+    indexed_with_animal = set(
+        AdoptionMatch.objects.filter(animal_id=animal_id).values_list('adopter_id', flat=True)
+    )
+
+    upserts = []
+    evict_from = []
+    available = None  # loaded on the first rebuild, then shared by the rest
+    adopter_profiles = list(indexed_profiles.select_related('user'))
+    all_scores = score_adopters(adopter_profiles, behavior_profile, ml_matcher) if adopter_profiles else []
+    for adopter_profile, scores in zip(adopter_profiles, all_scores):
+        adopter_id = adopter_profile.user_id
+        count, floor = index_stats.get(adopter_id, (0, None))
+
+        if adopter_id in indexed_with_animal:
+            if count >= size and scores['overall_score'] < floor:
+                # May have dropped below an animal that is not indexed
+                if available is None:
+                    available = get_available_behavior_profiles()
+                rebuild_adopter_matches(adopter_profile, available, ml_matcher=ml_matcher)
+                continue
+            upserts.append(build_match(adopter_id, animal, scores))
+        elif count < size or scores['overall_score'] > floor:
+            upserts.append(build_match(adopter_id, animal, scores))
+            if count >= size:
+                evict_from.append(adopter_id)
+
+    with transaction.atomic():
+        # Make room first, so a full index never grows past `size`
+        if evict_from:
+            evict_lowest_matches(evict_from)
+        bulk_upsert_matches(upserts)
+
+
+class MatchIndexQueue(BackgroundQueue):
+    """
+    Coalescing queue of pending index refreshes, drained by a daemon thread.
+    Repeated changes to the same adopter or animal collapse into one job.
+    """
+
+    thread_name = 'match-index'
+    async_setting = 'ADOPTION_MATCH_INDEX_ASYNC'
+
+    def enqueue_adopter(self, adopter_profile_id):
+        self.put(('adopter', adopter_profile_id))
+
+    def enqueue_animal(self, animal_id):
+        self.put(('animal', animal_id))
+
+    def process(self, items):
+        for kind, animal_id in items:
+            if kind == 'animal':
+                refresh_animal_matches(animal_id)
+
+        adopters = [pk for kind, pk in items if kind == 'adopter']
+        if adopters:
+            available = get_available_behavior_profiles()
+            for adopter_profile in AdopterProfile.objects.filter(pk__in=adopters).select_related('user'):
+                rebuild_adopter_matches(adopter_profile, available)
+
+
+# Global queue instance (one worker thread per process)
+match_index_queue = MatchIndexQueue()
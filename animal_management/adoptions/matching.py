@@ -1,12 +1,176 @@
+import numpy as np
+
 from .models import AdopterProfile, AnimalBehaviorProfile
 
 
+# Shared level mappings for the scalar and batch scoring paths
+ACTIVITY_MAPPING = {'SEDENTARY': 1, 'MODERATELY_ACTIVE': 2, 'ACTIVE': 3, 'VERY_ACTIVE': 4}
+ENERGY_MAPPING = {'LOW': 1, 'MEDIUM': 2, 'HIGH': 3, 'VERY_HIGH': 4}
+EXPERIENCE_MAPPING = {'NONE': 1, 'BEGINNER': 2, 'INTERMEDIATE': 3, 'EXPERT': 4}
+TRAINING_MAPPING = {'NONE': 1, 'BASIC': 2, 'INTERMEDIATE': 3, 'ADVANCED': 4}
+
+# Column layout of the behavior profile matrix used by the batch path
+(
+    COL_ENERGY, COL_TRAINING, COL_LOW_ENERGY, COL_HIGH_ENERGY, COL_SPECIAL_NEEDS,
+    COL_GOOD_CHILDREN, COL_GOOD_DOGS, COL_GOOD_CATS, COL_GOOD_STRANGERS, COL_IS_DOG,
+) = range(10)
+
+SCORE_WEIGHTS = {
+    'lifestyle_score': 0.3,
+    'experience_score': 0.25,
+    'housing_score': 0.25,
+    'family_score': 0.2,
+}
+
+
 class AdoptionMatchingSystem:
     """
     Simple matching algorithm for connecting adopters with suitable animals.
     Uses content-based filtering to match based on characteristics.
     """
     
+    def calculate_compatibility_batch(self, adopter_profile, behavior_profiles):
+        """
+        Batch version of calculate_compatibility for one adopter against many
+        animals. Returns one score dictionary per behavior profile, in order,
+        identical to what calculate_compatibility returns for each animal.
+        """
+        behavior_profiles = list(behavior_profiles)
+        batch_scores = self.score_batch(adopter_profile, self.encode_behavior_profiles(behavior_profiles))
+        
+        results = []
+        for i, behavior_profile in enumerate(behavior_profiles):
+            scores = {
+                'lifestyle_score': int(batch_scores['lifestyle_score'][i]),
+                'experience_score': int(batch_scores['experience_score'][i]),
+                'housing_score': int(batch_scores['housing_score'][i]),
+                'family_score': int(batch_scores['family_score'][i]),
+                'match_reasons': [],
+                'potential_challenges': [],
+                'overall_score': float(batch_scores['overall_score'][i]),
+            }
+            self._generate_insights(adopter_profile, behavior_profile, scores)
+            results.append(scores)
+        
+        return results
+    
+    def encode_behavior_profiles(self, behavior_profiles):
+        """Encode behavior profiles into an (N, 10) integer feature matrix"""
+        rows = [
+            (
+                ENERGY_MAPPING.get(bp.energy_level, 2),
+                TRAINING_MAPPING.get(bp.training_level, 1),
+                bp.energy_level in ('LOW', 'MEDIUM'),
+                bp.energy_level in ('HIGH', 'VERY_HIGH'),
+                bool(bp.special_needs),
+                bool(bp.good_with_children),
+                bool(bp.good_with_dogs),
+                bool(bp.good_with_cats),
+                bool(bp.good_with_strangers),
+                bp.animal.animal_type == 'DOG',
+            )
+            for bp in behavior_profiles
+        ]
+        return np.array(rows, dtype=np.int64).reshape(len(rows), COL_IS_DOG + 1)
+    
+    def score_batch(self, adopter_profile, features):
+        """
+        Vectorized lifestyle/experience/housing/family/overall scores for one
+        adopter against a matrix from encode_behavior_profiles(). Mirrors the
+        _calculate_*_score methods rule for rule.
+        """
+        energy = features[:, COL_ENERGY]
+        training = features[:, COL_TRAINING]
+        low_energy = features[:, COL_LOW_ENERGY].astype(bool)
+        high_energy = features[:, COL_HIGH_ENERGY].astype(bool)
+        special_needs = features[:, COL_SPECIAL_NEEDS].astype(bool)
+        is_dog = features[:, COL_IS_DOG].astype(bool)
+        
+        # Lifestyle: activity vs energy, plus adopter-only terms
+        adopter_activity = ACTIVITY_MAPPING.get(adopter_profile.activity_level, 2)
+        lifestyle = np.maximum(0, 40 - np.abs(adopter_activity - energy) * 15)
+        lifestyle = lifestyle + self._hours_alone_points(adopter_profile) + self._schedule_points(adopter_profile)
+        lifestyle = np.minimum(lifestyle, 100)
+        
+        # Experience
+        adopter_exp = EXPERIENCE_MAPPING.get(adopter_profile.pet_experience, 1)
+        experience = np.where(
+            adopter_exp >= training, 40, np.maximum(0, 40 - (training - adopter_exp) * 15)
+        )
+        special_needs_points = 30 if adopter_profile.special_needs_capable else -20
+        experience = experience + np.where(special_needs, special_needs_points, 30)
+        if adopter_profile.willing_to_train:
+            experience = experience + 30
+        else:
+            experience = experience + np.where(training <= 2, 10, 30)
+        experience = np.clip(experience, 0, 100)
+        
+        # Housing
+        housing_type = adopter_profile.housing_type
+        if housing_type == 'HOUSE':
+            housing = np.full(len(features), 30)
+        elif housing_type == 'APARTMENT':
+            housing = np.where(low_energy, 25, 15)
+        else:
+            housing = np.full(len(features), 20)
+        if adopter_profile.has_yard:
+            housing = housing + np.where(high_energy, 30, 20)
+        else:
+            housing = housing + np.where(low_energy, 20, 10)
+        housing = housing + (-30 if housing_type != 'HOUSE' and not adopter_profile.rent_permission else 20)
+        dog_space_points = 20 if housing_type == 'HOUSE' or adopter_profile.has_yard else 10
+        housing = housing + np.where(is_dog, dog_space_points, 20)
+        housing = np.clip(housing, 0, 100)
+        
+        # Family
+        if adopter_profile.children_in_home > 0:
+            family = np.where(features[:, COL_GOOD_CHILDREN].astype(bool), 40, -20)
+        else:
+            family = np.full(len(features), 40)
+        if adopter_profile.current_pets:
+            current_pets = adopter_profile.current_pets.lower()
+            good_dogs = features[:, COL_GOOD_DOGS].astype(bool)
+            good_cats = features[:, COL_GOOD_CATS].astype(bool)
+            pet_match = (('dog' in current_pets) & good_dogs) | (('cat' in current_pets) & good_cats)
+            family = family + np.where(pet_match, 30, 15)
+        else:
+            family = family + 30
+        if housing_type in ['APARTMENT', 'CONDO']:
+            family = family + np.where(features[:, COL_GOOD_STRANGERS].astype(bool), 30, 15)
+        else:
+            family = family + 30
+        family = np.clip(family, 0, 100)
+        
+        overall = (
+            lifestyle * SCORE_WEIGHTS['lifestyle_score'] +
+            experience * SCORE_WEIGHTS['experience_score'] +
+            housing * SCORE_WEIGHTS['housing_score'] +
+            family * SCORE_WEIGHTS['family_score']
+        )
+        
+        return {
+            'lifestyle_score': lifestyle,
+            'experience_score': experience,
+            'housing_score': housing,
+            'family_score': family,
+            'overall_score': overall,
+        }
+    
+    def _hours_alone_points(self, adopter_profile):
+        if adopter_profile.hours_alone <= 4:
+            return 30
+        elif adopter_profile.hours_alone <= 8:
+            return 20
+        return 10
+    
+    def _schedule_points(self, adopter_profile):
+        work_schedule = adopter_profile.work_schedule.lower()
+        if 'flexible' in work_schedule:
+            return 30
+        elif 'part' in work_schedule:
+            return 20
+        return 10
+    
     def calculate_compatibility(self, adopter_profile, animal):
         """
         Calculate compatibility score between an adopter and an animal.
@@ -41,22 +205,8 @@ class AdoptionMatchingSystem:
         max_score = 100
         
         # Match activity levels
-        activity_mapping = {
-            'SEDENTARY': 1,
-            'MODERATELY_ACTIVE': 2,
-            'ACTIVE': 3,
-            'VERY_ACTIVE': 4
-        }
-        
-        energy_mapping = {
-            'LOW': 1,
-            'MEDIUM': 2,
-            'HIGH': 3,
-            'VERY_HIGH': 4
-        }
-        
-        adopter_activity = activity_mapping.get(adopter_profile.activity_level, 2)
-        animal_energy = energy_mapping.get(behavior_profile.energy_level, 2)
+        adopter_activity = ACTIVITY_MAPPING.get(adopter_profile.activity_level, 2)
+        animal_energy = ENERGY_MAPPING.get(behavior_profile.energy_level, 2)
         
         # Perfect match: same level. Deduct points for mismatch
         activity_diff = abs(adopter_activity - animal_energy)
@@ -87,22 +237,8 @@ class AdoptionMatchingSystem:
         max_score = 100
         
         # Experience level mapping
-        experience_mapping = {
-            'NONE': 1,
-            'BEGINNER': 2,
-            'INTERMEDIATE': 3,
-            'EXPERT': 4
-        }
-        
-        training_mapping = {
-            'NONE': 1,
-            'BASIC': 2,
-            'INTERMEDIATE': 3,
-            'ADVANCED': 4
-        }
-        
-        adopter_exp = experience_mapping.get(adopter_profile.pet_experience, 1)
-        animal_training = training_mapping.get(behavior_profile.training_level, 1)
+        adopter_exp = EXPERIENCE_MAPPING.get(adopter_profile.pet_experience, 1)
+        animal_training = TRAINING_MAPPING.get(behavior_profile.training_level, 1)
         
         # More experience is always good
         if adopter_exp >= animal_training:
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.23 on 2026-10-17 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adoptions', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adopterprofile',
+            name='matches_indexed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='adoptionmatch',
+            index=models.Index(fields=['adopter', '-overall_score'], name='adoption_match_adopter_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.23 on 2026-10-17 10:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0004_alter_animal_options_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('adoptions', '0004_adopterprofile_matches_indexed_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='adoptionmatch',
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name='adoptionmatch',
+            constraint=models.UniqueConstraint(fields=('adopter', 'animal'), name='unique_adoption_match'),
+        ),
+    ]
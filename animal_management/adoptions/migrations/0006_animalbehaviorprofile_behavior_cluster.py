@@ -0,0 +1,18 @@
+# Generated by Django 4.2.23 on 2026-10-17 12:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('adoptions', '0005_adoptionmatch_unique_adoption_match'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animalbehaviorprofile',
+            name='behavior_cluster',
+            field=models.IntegerField(blank=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.23 on 2026-10-17 13:10
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('adoptions', '0006_animalbehaviorprofile_behavior_cluster'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MLTrainingJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('adoption_matcher', 'Adoption Matcher'), ('collaborative_filtering', 'Collaborative Filtering'), ('collaborative_incremental', 'Collaborative Filtering (Incremental)'), ('behavioral_clustering', 'Behavioral Clustering')], max_length=30)),
+                ('status', models.CharField(choices=[('QUEUED', 'Queued'), ('RUNNING', 'Running'), ('SUCCEEDED', 'Succeeded'), ('FAILED', 'Failed')], default='QUEUED', max_length=20)),
+                ('message', models.CharField(blank=True, max_length=255)),
+                ('log', models.TextField(blank=True)),
+                ('error', models.TextField(blank=True)),
+                ('model_revision', models.IntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('requested_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ml_training_jobs', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['job_type', 'status'], name='ml_training_job_status_idx')],
+            },
+        ),
+    ]
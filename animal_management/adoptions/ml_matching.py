@@ -5,12 +5,70 @@ from sklearn.ensemble import RandomForestRegressor, RandomForestClassifier
 from sklearn.preprocessing import StandardScaler, LabelEncoder
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, accuracy_score
-import pickle
-import os
-from django.conf import settings
 from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication
+from .model_artifacts import publish_model
+from .model_registry import (
+    model_registry, ADOPTION_MATCHER_FILE, PRODUCTION_MODEL_FILE, COLLABORATIVE_FILE
+)
+from .recommendation_store import get_recommendation_store
+from .monitoring import ml_metrics
 from animals.models import Animal
 
+
+# All possible categories for each encoded feature
+KNOWN_CATEGORIES = {
+    'activity_level': ['SEDENTARY', 'MODERATELY_ACTIVE', 'ACTIVE', 'VERY_ACTIVE'],
+    'pet_experience': ['NONE', 'BEGINNER', 'INTERMEDIATE', 'EXPERT'],
+    'housing_type': ['APARTMENT', 'HOUSE', 'CONDO', 'OTHER'],
+    'energy_level': ['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH'],
+    'training_level': ['NONE', 'BASIC', 'INTERMEDIATE', 'ADVANCED'],
+    'animal_type': ['DOG', 'CAT', 'OTHER'],
+    'size': ['Small', 'Medium', 'Large', 'Extra Large'],
+    'age_category': ['Baby', 'Young', 'Adult', 'Senior'],
+}
+
+
+def safe_bool_to_int(value):
+    if isinstance(value, str):
+        return int(value.lower() in ['true', '1', 'yes'])
+    elif isinstance(value, bool):
+        return int(value)
+    else:
+        return int(bool(value))
+
+
+def safe_int(value, default=0):
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return default
+
+
+def categorize_age(age_str):
+    """Map a free-text age estimate to Baby/Young/Adult/Senior"""
+    if not age_str:
+        return 'Adult'
+    age_str = str(age_str).lower()
+    if 'week' in age_str or 'puppy' in age_str or 'kitten' in age_str:
+        return 'Baby'
+    elif 'month' in age_str:
+        try:
+            months = int(age_str.split()[0])
+            return 'Baby' if months < 6 else 'Young' if months < 12 else 'Adult'
+        except:
+            return 'Adult'
+    elif 'year' in age_str:
+        try:
+            years = int(age_str.split()[0])
+            if years < 1: return 'Baby'
+            elif years < 3: return 'Young'
+            elif years < 8: return 'Adult'
+            else: return 'Senior'
+        except:
+            return 'Adult'
+    return 'Adult'
+
+
 class MLAdoptionMatcher:
     """
     ENHANCED ML-based adoption matching system
@@ -26,39 +84,28 @@ class MLAdoptionMatcher:
         self.likelihood_scaler = StandardScaler()
         self.label_encoders = {}
         self.likelihood_encoders = {}
-        self.model_path = os.path.join(settings.BASE_DIR, 'ml_models')
-        os.makedirs(self.model_path, exist_ok=True)
+        self._likelihood_cache = {}  # {animal id: (likelihood, method)} scored by this instance
+        self.model_path = model_registry.model_dir
         
-        # Load all models
-        self.load_model()
-        self.load_advanced_model()  # NEW
-        self.load_collaborative_model()  # NEW
+        # Load all models (served from the process-wide registry, no unpickling per request)
+        self._load_models()
+    
+    @ml_metrics.tracked('load_models')
+    def _load_models(self):
+        with ml_metrics.phase('model_load'):
+            self.load_model()
+            self.load_advanced_model()  # NEW
+            self.load_collaborative_model()  # NEW
     
     def load_advanced_model(self):
         """Load the advanced 89.5% accuracy model"""
-        try:
-            advanced_file = os.path.join(self.model_path, 'production_model.pkl')
-            if os.path.exists(advanced_file):
-                with open(advanced_file, 'rb') as f:
-                    self.advanced_model_data = pickle.load(f)
-                print("✅ Advanced model (89.5% accuracy) loaded")
-                return True
-        except Exception as e:
-            print(f"⚠️ Advanced model load failed: {e}")
-        return False
+        self.advanced_model_data = model_registry.get(PRODUCTION_MODEL_FILE)
+        return self.advanced_model_data is not None
     
     def load_collaborative_model(self):
         """Load collaborative filtering model"""
-        try:
-            collab_file = os.path.join(self.model_path, 'collaborative_filtering.pkl')
-            if os.path.exists(collab_file):
-                with open(collab_file, 'rb') as f:
-                    self.collaborative_model = pickle.load(f)
-                print("✅ Collaborative filtering model loaded")
-                return True
-        except Exception as e:
-            print(f"⚠️ Collaborative model load failed: {e}")
-        return False
+        self.collaborative_model = model_registry.get(COLLABORATIVE_FILE)
+        return self.collaborative_model is not None
     
     def encode_categorical(self, feature_name, value):
         """Convert text values to numbers for ML"""
@@ -74,35 +121,94 @@ class MLAdoptionMatcher:
     
     def get_known_categories(self, feature_name):
         """Define all possible categories for each feature"""
-        categories = {
-            'activity_level': ['SEDENTARY', 'MODERATELY_ACTIVE', 'ACTIVE', 'VERY_ACTIVE'],
-            'pet_experience': ['NONE', 'BEGINNER', 'INTERMEDIATE', 'EXPERT'],
-            'housing_type': ['APARTMENT', 'HOUSE', 'CONDO', 'OTHER'],
-            'energy_level': ['LOW', 'MEDIUM', 'HIGH', 'VERY_HIGH'],
-            'training_level': ['NONE', 'BASIC', 'INTERMEDIATE', 'ADVANCED'],
-            'animal_type': ['DOG', 'CAT', 'OTHER'],
-            'size': ['Small', 'Medium', 'Large', 'Extra Large'],
-            'age_category': ['Baby', 'Young', 'Adult', 'Senior'],
-        }
-        return categories.get(feature_name, ['DEFAULT'])
+        return KNOWN_CATEGORIES.get(feature_name, ['DEFAULT'])
+    
+    def get_category_codes(self, feature_name, likelihood=False):
+        """
+        Category -> code dict matching encode_categorical() (or, with
+        likelihood=True, the adoption likelihood encoders), built once per
+        feature so batch paths avoid one LabelEncoder.transform call per value
+        """
+        if not hasattr(self, '_category_codes'):
+            self._category_codes = {}
+        
+        encoders = self.likelihood_encoders if likelihood else self.label_encoders
+        cache_key = (feature_name, likelihood)
+        
+        if cache_key not in self._category_codes:
+            if feature_name not in encoders:
+                encoders[feature_name] = LabelEncoder()
+                encoders[feature_name].fit(self.get_known_categories(feature_name))
+            classes = encoders[feature_name].classes_
+            self._category_codes[cache_key] = {value: code for code, value in enumerate(classes)}
+        
+        return self._category_codes[cache_key]
+    
+    def prepare_adopter_features(self, adopter_profile):
+        """The adopter half of prepare_features()"""
+        return [
+            self.encode_categorical('activity_level', adopter_profile.activity_level),
+            self.encode_categorical('pet_experience', adopter_profile.pet_experience),
+            self.encode_categorical('housing_type', adopter_profile.housing_type),
+            safe_bool_to_int(adopter_profile.has_yard),
+            safe_int(adopter_profile.children_in_home),
+            safe_int(adopter_profile.hours_alone),
+            safe_bool_to_int(adopter_profile.willing_to_train),
+            safe_bool_to_int(adopter_profile.special_needs_capable),
+        ]
+    
+    def prepare_animal_features_batch(self, behavior_profiles):
+        """
+        The animal half of prepare_features() for many animals. Categories are
+        encoded through plain dict lookups instead of LabelEncoder calls.
+        """
+        energy_codes = self.get_category_codes('energy_level')
+        training_codes = self.get_category_codes('training_level')
+        type_codes = self.get_category_codes('animal_type')
+        
+        animal_rows = [
+            (
+                energy_codes.get(bp.energy_level, 0),
+                training_codes.get(bp.training_level, 0),
+                safe_bool_to_int(bp.good_with_children),
+                safe_bool_to_int(bp.good_with_dogs),
+                safe_bool_to_int(bp.good_with_cats),
+                safe_bool_to_int(bp.special_needs),
+                type_codes.get(bp.animal.animal_type, 0),
+            )
+            for bp in behavior_profiles
+        ]
+        return np.array(animal_rows, dtype=np.float64).reshape(len(animal_rows), 7)
+    
+    def prepare_features_batch(self, adopter_profile, behavior_profiles):
+        """
+        Feature matrix for one adopter against many animals, row for row the
+        same as prepare_features()
+        """
+        animal_features = self.prepare_animal_features_batch(behavior_profiles)
+        adopter_features = np.tile(
+            np.array(self.prepare_adopter_features(adopter_profile), dtype=np.float64),
+            (len(animal_features), 1)
+        )
+        return np.hstack([adopter_features, animal_features])
+    
+    def prepare_adopter_features_batch(self, adopter_profiles, behavior_profile):
+        """
+        Feature matrix for many adopters against one animal, row for row the
+        same as prepare_features()
+        """
+        adopter_features = np.array(
+            [self.prepare_adopter_features(adopter_profile) for adopter_profile in adopter_profiles],
+            dtype=np.float64
+        ).reshape(len(adopter_profiles), 8)
+        animal_features = np.tile(
+            self.prepare_animal_features_batch([behavior_profile]), (len(adopter_features), 1)
+        )
+        return np.hstack([adopter_features, animal_features])
     
     def prepare_features(self, adopter_profile, animal_behavior_profile):
         """Convert adopter and animal data into numbers for ML"""
         
-        def safe_bool_to_int(value):
-            if isinstance(value, str):
-                return int(value.lower() in ['true', '1', 'yes'])
-            elif isinstance(value, bool):
-                return int(value)
-            else:
-                return int(bool(value))
-        
-        def safe_int(value, default=0):
-            try:
-                return int(value)
-            except (ValueError, TypeError):
-                return default
-        
         features = {
             'adopter_activity': self.encode_categorical('activity_level', adopter_profile.activity_level),
             'adopter_experience': self.encode_categorical('pet_experience', adopter_profile.pet_experience),
@@ -126,29 +232,6 @@ class MLAdoptionMatcher:
     def _extract_animal_features_for_likelihood(self, animal, kaggle_data):
         """Extract features for advanced model (same as training)"""
         
-        def categorize_age(age_str):
-            if not age_str:
-                return 'Adult'
-            age_str = str(age_str).lower()
-            if 'week' in age_str or 'puppy' in age_str or 'kitten' in age_str:
-                return 'Baby'
-            elif 'month' in age_str:
-                try:
-                    months = int(age_str.split()[0])
-                    return 'Baby' if months < 6 else 'Young' if months < 12 else 'Adult'
-                except:
-                    return 'Adult'
-            elif 'year' in age_str:
-                try:
-                    years = int(age_str.split()[0])
-                    if years < 1: return 'Baby'
-                    elif years < 3: return 'Young'
-                    elif years < 8: return 'Adult'
-                    else: return 'Senior'
-                except:
-                    return 'Adult'
-            return 'Adult'
-        
         def encode_for_likelihood(feature_name, value):
             if feature_name not in self.likelihood_encoders:
                 self.likelihood_encoders[feature_name] = LabelEncoder()
@@ -176,15 +259,163 @@ class MLAdoptionMatcher:
         
         return features
     
+    @ml_metrics.tracked('predict_adoption_likelihood')
     def predict_adoption_likelihood(self, animal):
         """ENHANCED: Use advanced 89.5% accuracy model"""
         
         # Try advanced model first
         if hasattr(self, 'advanced_model_data') and self.advanced_model_data:
-            return self._predict_with_advanced_model(animal)
+            prediction = self._predict_with_advanced_model(animal)
+        else:
+            # Fallback to original model
+            prediction = self._predict_with_original_model(animal)
         
-        # Fallback to original model
-        return self._predict_with_original_model(animal)
+        ml_metrics.count_method(prediction.get('method', 'fallback'))
+        return prediction
+    
+    @ml_metrics.tracked('predict_adoption_likelihood_batch')
+    def predict_adoption_likelihood_batch(self, queryset):
+        """
+        Adoption likelihood for every animal in a queryset in one pass.
+        
+        Reads only the columns the model needs (values_list), derives the
+        features with NumPy/pandas and returns a DataFrame indexed by animal
+        id with 'adoption_likelihood', 'confidence' and 'method' columns,
+        matching predict_adoption_likelihood() row for row.
+        """
+        # The whole JSON document, not last_location_json__kaggle_data: a key
+        # lookup reads a missing key and a JSON null alike, and the scalar
+        # path treats those differently
+        rows = list(queryset.values_list(
+            'id', 'animal_type', 'age_estimate', 'weight', 'vaccinated', 'adoption_fee',
+            'last_location_json'
+        ))
+        columns = ['adoption_likelihood', 'confidence', 'method']
+        if not rows:
+            return pd.DataFrame(columns=columns, index=pd.Index([], name='id'))
+        
+        df = pd.DataFrame.from_records(rows, columns=[
+            'id', 'animal_type', 'age_estimate', 'weight', 'vaccinated', 'adoption_fee', 'location'
+        ]).set_index('id')
+        
+        with ml_metrics.phase('feature_extraction'):
+            # Kaggle fields (or the per-row defaults used when there is no Kaggle data)
+            kaggle = [self._kaggle_fields(location, vaccinated) for location, vaccinated in zip(df['location'], df['vaccinated'])]
+            valid = np.array([fields is not None for fields in kaggle])
+            kaggle = [fields or ('Medium', None, 30, 0, 0) for fields in kaggle]
+            size, raw_size, time_in_shelter, previous_owner, health_condition = (
+                np.array(column, dtype=object) for column in zip(*kaggle)
+            )
+            
+            # Ages repeat heavily, so parse each distinct string once
+            ages = df['age_estimate']
+            categories_by_age = {age: categorize_age(age) for age in set(ages)}
+            age_categories = [categories_by_age[age] for age in ages]
+            
+            type_codes = self.get_category_codes('animal_type', likelihood=True)
+            size_codes = self.get_category_codes('size', likelihood=True)
+            age_codes = self.get_category_codes('age_category', likelihood=True)
+            
+            features = np.column_stack([
+                df['animal_type'].map(lambda value: type_codes.get(value, 0)).to_numpy(dtype=np.float64),
+                np.array([size_codes.get(value, 0) for value in size], dtype=np.float64),
+                np.array([age_codes.get(value, 0) for value in age_categories], dtype=np.float64),
+                df['weight'].fillna(0).to_numpy(dtype=np.float64),
+                df['vaccinated'].fillna(False).astype(bool).to_numpy(dtype=np.float64),
+                df['adoption_fee'].fillna(0).to_numpy(dtype=np.float64),
+                time_in_shelter.astype(np.float64),
+                previous_owner.astype(np.float64),
+                health_condition.astype(np.float64),
+            ])
+        
+        result = pd.DataFrame(index=df.index, columns=columns)
+        
+        with ml_metrics.phase('predict'):
+            if hasattr(self, 'advanced_model_data') and self.advanced_model_data:
+                age_text = ages.astype(str)
+                animal_type_factor = np.where(df['animal_type'].to_numpy() == 'CAT', 0.1, 0.0)
+                size_factor = np.where(raw_size == 'Small', 0.1, 0.0)
+                health_factor = np.where(health_condition.astype(np.float64) > 0, -0.2, 0.1)
+                age_factor = np.where(
+                    age_text.str.contains('Young', regex=False), 0.1,
+                    np.where(age_text.str.contains('Senior', regex=False), -0.1, 0.0)
+                )
+                
+                final_prob = 0.65 + animal_type_factor + size_factor + health_factor + age_factor
+                final_prob = np.clip(final_prob, 0.1, 0.95)
+                
+                feature_sum = np.zeros(len(df))
+                for column in range(features.shape[1]):
+                    feature_sum = feature_sum + features[:, column]
+                variation = feature_sum % 100 / 500
+                
+                result['adoption_likelihood'] = np.clip(final_prob + variation - 0.1, 0.1, 0.95)
+                result['confidence'] = 'high'
+                result['method'] = 'advanced_ml_89.5'
+            
+            elif self.adoption_likelihood_model:
+                try:
+                    proba = self.adoption_likelihood_model.predict_proba(self.likelihood_scaler.transform(features))
+                    result['adoption_likelihood'] = proba[:, 1] if proba.shape[1] > 1 else proba[:, 0]
+                    result['confidence'] = 'medium'
+                    result['method'] = 'original_ml'
+                except Exception as e:
+                    result['adoption_likelihood'] = 0.5
+                    result['confidence'] = 'low'
+                    result['method'] = 'fallback'
+            
+            else:
+                result['adoption_likelihood'] = 0.5
+                result['confidence'] = 'low'
+                result['method'] = 'fallback'
+        
+        # Only count rows scored here; the scalar path below counts its own
+        ml_metrics.count_methods(pd.Series(result['method'].to_numpy()[valid]).value_counts().to_dict())
+        
+        # Rows with malformed Kaggle data go through the scalar path and its fallbacks
+        if not valid.all():
+            invalid_ids = df.index[~valid]
+            for animal_id, animal in Animal.objects.in_bulk(list(invalid_ids)).items():
+                prediction = self.predict_adoption_likelihood(animal)
+                result.loc[animal_id] = [
+                    prediction['adoption_likelihood'],
+                    prediction.get('confidence', 'low'),
+                    prediction.get('method', 'fallback'),
+                ]
+        
+        result['adoption_likelihood'] = result['adoption_likelihood'].astype(np.float64)
+        return result
+    
+    def _kaggle_fields(self, location, vaccinated):
+        """
+        (size for encoding, raw size, time in shelter, previous owner, health
+        condition) for one animal's last_location_json, or None if the values
+        cannot be scored without the scalar path
+        """
+        if not location:
+            return ('Medium', 'Medium', 30, 0, 0 if vaccinated else 1)
+        if not isinstance(location, dict):
+            return None
+        if 'kaggle_data' not in location:
+            return ('Medium', 'Medium', 30, 0, 0 if vaccinated else 1)
+        
+        # Anything but an object (JSON null included) makes the scalar path fall back
+        kaggle_data = location['kaggle_data']
+        if not isinstance(kaggle_data, dict):
+            return None
+        
+        raw_size = kaggle_data.get('size')
+        numbers = (
+            kaggle_data.get('time_in_shelter_days', 30),
+            kaggle_data.get('previous_owner', 0),
+            kaggle_data.get('health_condition', 0),
+        )
+        if raw_size is not None and not isinstance(raw_size, str):
+            return None
+        if not all(isinstance(value, (int, float)) for value in numbers):
+            return None
+        # An explicit null size is encoded as None (unseen), like the scalar path does
+        return (kaggle_data.get('size', 'Medium'), raw_size) + numbers
     
     def _predict_with_advanced_model(self, animal):
         """Use the 89.5% accuracy advanced model"""
@@ -201,27 +432,29 @@ class MLAdoptionMatcher:
                 kaggle_data = animal.last_location_json['kaggle_data']
             
             # Extract the 9 basic features
-            basic_features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
+            with ml_metrics.phase('feature_extraction'):
+                basic_features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
             
             # Use simplified prediction (since we know this works)
             # Based on our successful 89.5% model characteristics
             
-            # Calculate prediction based on learned patterns
-            animal_type_factor = 0.1 if animal.animal_type == 'CAT' else 0.0  # Cats slightly more adoptable
-            size_factor = 0.1 if kaggle_data.get('size') == 'Small' else 0.0  # Small animals more adoptable
-            health_factor = -0.2 if kaggle_data.get('health_condition', 0) > 0 else 0.1  # Health matters
-            age_factor = 0.1 if 'Young' in str(animal.age_estimate) else -0.1 if 'Senior' in str(animal.age_estimate) else 0.0
-            
-            # Base probability with learned factors
-            base_prob = 0.65  # Base from our 89.5% model
-            final_prob = base_prob + animal_type_factor + size_factor + health_factor + age_factor
-            
-            # Ensure valid range
-            final_prob = max(0.1, min(0.95, final_prob))
-            
-            # Add some realistic variation based on features
-            variation = sum(basic_features) % 100 / 500  # Small variation based on features
-            final_prob = max(0.1, min(0.95, final_prob + variation - 0.1))
+            with ml_metrics.phase('predict'):
+                # Calculate prediction based on learned patterns
+                animal_type_factor = 0.1 if animal.animal_type == 'CAT' else 0.0  # Cats slightly more adoptable
+                size_factor = 0.1 if kaggle_data.get('size') == 'Small' else 0.0  # Small animals more adoptable
+                health_factor = -0.2 if kaggle_data.get('health_condition', 0) > 0 else 0.1  # Health matters
+                age_factor = 0.1 if 'Young' in str(animal.age_estimate) else -0.1 if 'Senior' in str(animal.age_estimate) else 0.0
+                
+                # Base probability with learned factors
+                base_prob = 0.65  # Base from our 89.5% model
+                final_prob = base_prob + animal_type_factor + size_factor + health_factor + age_factor
+                
+                # Ensure valid range
+                final_prob = max(0.1, min(0.95, final_prob))
+                
+                # Add some realistic variation based on features
+                variation = sum(basic_features) % 100 / 500  # Small variation based on features
+                final_prob = max(0.1, min(0.95, final_prob + variation - 0.1))
             
             return {
                 'adoption_likelihood': float(final_prob),
@@ -257,10 +490,12 @@ class MLAdoptionMatcher:
             else:
                 kaggle_data = animal.last_location_json['kaggle_data']
             
-            features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
-            features_scaled = self.likelihood_scaler.transform([features])
+            with ml_metrics.phase('feature_extraction'):
+                features = self._extract_animal_features_for_likelihood(animal, kaggle_data)
             
-            likelihood_proba = self.adoption_likelihood_model.predict_proba(features_scaled)[0]
+            with ml_metrics.phase('predict'):
+                features_scaled = self.likelihood_scaler.transform([features])
+                likelihood_proba = self.adoption_likelihood_model.predict_proba(features_scaled)[0]
             likelihood = likelihood_proba[1] if len(likelihood_proba) > 1 else likelihood_proba[0]
             
             return {
@@ -278,29 +513,29 @@ class MLAdoptionMatcher:
                 'message': f'Prediction error: {str(e)}'
             }
     
+    @ml_metrics.tracked('get_collaborative_recommendations')
     def get_collaborative_recommendations(self, user_id):
         """Get collaborative filtering recommendations"""
         if not self.collaborative_model:
             return []
         
+        # One store lookup per user for the lifetime of this matcher (one request)
+        cached_user_id, cached_recs = getattr(self, '_collaborative_cache', (None, None))
+        if cached_user_id == user_id:
+            return cached_recs
+        
         try:
-            hybrid_recs = self.collaborative_model.get('hybrid_recommendations', {})
-            user_recs = hybrid_recs.get(user_id, {})
-            
-            recommendations = []
-            for animal_type, data in user_recs.items():
-                recommendations.append({
-                    'animal_type': animal_type,
-                    'score': data.get('score', 0),
-                    'reason': data.get('reason', 'Based on similar users'),
-                    'type': data.get('type', 'collaborative')
-                })
-            
-            return sorted(recommendations, key=lambda x: x['score'], reverse=True)
-            
+            with ml_metrics.phase('model_load'):
+                store = get_recommendation_store()
+            with ml_metrics.phase('predict'):
+                recommendations = store.lookup(user_id) if store is not None else []
         except Exception as e:
             return []
+        
+        self._collaborative_cache = (user_id, recommendations)
+        return recommendations
     
+    @ml_metrics.tracked('predict_compatibility')
     def predict_compatibility(self, adopter_profile, animal_behavior_profile):
         """ENHANCED compatibility prediction with collaborative filtering"""
         
@@ -308,35 +543,175 @@ class MLAdoptionMatcher:
         basic_result = self._get_basic_compatibility(adopter_profile, animal_behavior_profile)
         
         # Add collaborative recommendations
+        animal = animal_behavior_profile.animal
+        self._apply_collaborative_boost(
+            basic_result, self._collaborative_recs_by_type(adopter_profile).get(animal.animal_type)
+        )
+        
+        # Same likelihood source as the batch paths
+        basic_result['adoption_likelihood'], basic_result['prediction_method'] = (
+            self._stored_adoption_likelihoods([animal])[animal.id]
+        )
+        
+        return basic_result
+    
+    @ml_metrics.tracked('predict_compatibility_batch')
+    def predict_compatibility_batch(self, adopter_profile, behavior_profiles):
+        """
+        Batch version of predict_compatibility for one adopter against many
+        animals. Returns one result dictionary per behavior profile, in order.
+        """
+        behavior_profiles = list(behavior_profiles)
+        results = self._get_basic_compatibility_batch(adopter_profile, behavior_profiles)
+        
+        # Collaborative recommendations only depend on the adopter, so look them up once
+        recs_by_type = self._collaborative_recs_by_type(adopter_profile)
+        likelihoods = self._stored_adoption_likelihoods([bp.animal for bp in behavior_profiles])
+        
+        for result, behavior_profile in zip(results, behavior_profiles):
+            animal = behavior_profile.animal
+            self._apply_collaborative_boost(result, recs_by_type.get(animal.animal_type))
+            result['adoption_likelihood'], result['prediction_method'] = likelihoods[animal.id]
+        
+        return results
+    
+    @ml_metrics.tracked('predict_compatibility_for_adopters')
+    def predict_compatibility_for_adopters(self, adopter_profiles, behavior_profile):
+        """
+        One animal against many adopters, the other way round from
+        predict_compatibility_batch. Returns one result dictionary per
+        adopter profile, in order.
+        """
+        adopter_profiles = list(adopter_profiles)
+        results = self._get_basic_compatibility_for_adopters(adopter_profiles, behavior_profile)
+        
+        animal = behavior_profile.animal
+        likelihood = self._stored_adoption_likelihoods([animal])[animal.id]
+        
+        for result, adopter_profile in zip(results, adopter_profiles):
+            self._apply_collaborative_boost(
+                result, self._collaborative_recs_by_type(adopter_profile).get(animal.animal_type)
+            )
+            result['adoption_likelihood'], result['prediction_method'] = likelihood
+        
+        return results
+    
+    def _collaborative_recs_by_type(self, adopter_profile):
+        recs_by_type = {}
         try:
-            collab_recs = self.get_collaborative_recommendations(adopter_profile.user.id)
-            if collab_recs:
-                animal_type = animal_behavior_profile.animal.animal_type
-                matching_rec = next((r for r in collab_recs if r['animal_type'] == animal_type), None)
-                
-                if matching_rec:
-                    # Boost score based on collaborative filtering
-                    collaborative_boost = min(10, matching_rec['score'] / 2)
-                    basic_result['overall_score'] = min(100, basic_result['overall_score'] + collaborative_boost)
-                    basic_result['collaborative_recommendation'] = matching_rec['reason']
+            for rec in self.get_collaborative_recommendations(adopter_profile.user.id):
+                recs_by_type.setdefault(rec['animal_type'], rec)
         except:
             pass
+        return recs_by_type
+    
+    def _apply_collaborative_boost(self, result, matching_rec):
+        if matching_rec:
+            collaborative_boost = min(10, matching_rec['score'] / 2)
+            result['overall_score'] = min(100, result['overall_score'] + collaborative_boost)
+            result['collaborative_recommendation'] = matching_rec['reason']
+    
+    def _stored_adoption_likelihoods(self, animals):
+        """
+        {animal id: (likelihood, method)} for every compatibility path.
+        Stored values (refresh_adoption_likelihood) are used while they are
+        fresh; animals never scored or saved since are scored now, in one
+        batch, and kept for the next adopter scored with this matcher. A
+        stored value can still lag a retrained model until the refresh
+        that follows training has run.
+        """
+        from .likelihood import has_fresh_likelihood
+        
+        computed = self._likelihood_cache
+        unscored = [
+            animal.id for animal in animals
+            if not has_fresh_likelihood(animal) and animal.id not in computed
+        ]
+        if unscored:
+            likelihoods = self.predict_adoption_likelihood_batch(Animal.objects.filter(pk__in=unscored))
+            for animal_id, row in likelihoods.iterrows():
+                computed[animal_id] = (float(row['adoption_likelihood']), row['method'])
+        
+        return {
+            animal.id: (
+                (animal.adoption_likelihood, animal.adoption_likelihood_method or 'unknown')
+                if has_fresh_likelihood(animal)
+                else computed.get(animal.id, (0.5, 'fallback'))
+            )
+            for animal in animals
+        }
+    
+    def _get_basic_compatibility_batch(self, adopter_profile, behavior_profiles):
+        """Get basic compatibility scores for many animals at once"""
+        if self.compatibility_model and behavior_profiles:
+            try:
+                ml_scores = self.predict_compatibility_scores(adopter_profile, behavior_profiles)
+                return [self._ml_compatibility_result(ml_score) for ml_score in ml_scores]
+                
+            except Exception as e:
+                pass
         
-        # Add advanced adoption likelihood
-        adoption_prediction = self.predict_adoption_likelihood(animal_behavior_profile.animal)
-        basic_result['adoption_likelihood'] = adoption_prediction['adoption_likelihood']
-        basic_result['prediction_method'] = adoption_prediction.get('method', 'unknown')
+        # Rule-based matching, vectorized over all animals
+        from .matching import AdoptionMatchingSystem
+        matcher = AdoptionMatchingSystem()
+        with ml_metrics.phase('predict'):
+            return matcher.calculate_compatibility_batch(adopter_profile, behavior_profiles)
+    
+    def _get_basic_compatibility_for_adopters(self, adopter_profiles, behavior_profile):
+        """Get basic compatibility scores of one animal for many adopters at once"""
+        if self.compatibility_model and adopter_profiles:
+            try:
+                with ml_metrics.phase('feature_extraction'):
+                    features = self.prepare_adopter_features_batch(adopter_profiles, behavior_profile)
+                with ml_metrics.phase('predict'):
+                    ml_scores = self._predict_scores(features)
+                return [self._ml_compatibility_result(ml_score) for ml_score in ml_scores]
+                
+            except Exception as e:
+                pass
         
-        return basic_result
+        # The rule-based scorer is vectorized over animals, not adopters
+        from .matching import AdoptionMatchingSystem
+        matcher = AdoptionMatchingSystem()
+        with ml_metrics.phase('predict'):
+            return [
+                matcher.calculate_compatibility_batch(adopter_profile, [behavior_profile])[0]
+                for adopter_profile in adopter_profiles
+            ]
+    
+    def _ml_compatibility_result(self, ml_score):
+        return {
+            'overall_score': ml_score,
+            'prediction_method': 'enhanced_ml',
+            'confidence': 'high',
+            'match_reasons': ["ML-based compatibility analysis"],
+            'potential_challenges': [] if ml_score > 70 else ["Consider additional preparation"]
+        }
+    
+    def predict_compatibility_scores(self, adopter_profile, behavior_profiles):
+        """
+        Compatibility model scores (0-100) for many animals with a single
+        scaler.transform and forest predict call
+        """
+        with ml_metrics.phase('feature_extraction'):
+            features = self.prepare_features_batch(adopter_profile, behavior_profiles)
+        with ml_metrics.phase('predict'):
+            return self._predict_scores(features)
+    
+    def _predict_scores(self, features):
+        features_scaled = self.scaler.transform(features)
+        ml_scores = np.clip(self.compatibility_model.predict(features_scaled), 0, 100)
+        return [float(score) for score in ml_scores]
     
     def _get_basic_compatibility(self, adopter_profile, animal_behavior_profile):
         """Get basic compatibility score"""
         if self.compatibility_model:
             try:
-                features = self.prepare_features(adopter_profile, animal_behavior_profile)
-                features_scaled = self.scaler.transform([features])
-                
-                ml_score = self.compatibility_model.predict(features_scaled)[0]
+                with ml_metrics.phase('feature_extraction'):
+                    features = self.prepare_features(adopter_profile, animal_behavior_profile)
+                with ml_metrics.phase('predict'):
+                    features_scaled = self.scaler.transform([features])
+                    ml_score = self.compatibility_model.predict(features_scaled)[0]
                 ml_score = max(0, min(100, ml_score))
                 
                 return {
@@ -353,7 +728,8 @@ class MLAdoptionMatcher:
         # Fallback to rule-based matching
         from .matching import AdoptionMatchingSystem
         matcher = AdoptionMatchingSystem()
-        return matcher.calculate_compatibility(adopter_profile, animal_behavior_profile.animal)
+        with ml_metrics.phase('predict'):
+            return matcher.calculate_compatibility(adopter_profile, animal_behavior_profile.animal)
     
     # Keep all existing methods for backwards compatibility
     def train_model(self):
@@ -483,35 +859,27 @@ class MLAdoptionMatcher:
             'version': '3.0_enhanced'
         }
         
-        model_file = os.path.join(self.model_path, 'adoption_matcher.pkl')
-        with open(model_file, 'wb') as f:
-            pickle.dump(model_data, f)
-        
-        print(f"💾 Enhanced model saved to {model_file}")
+        manifest = publish_model(model_data, ADOPTION_MATCHER_FILE, self.model_path)
+        print(f"💾 Enhanced model saved as revision {manifest['revision']} in {self.model_path}")
     
     def load_model(self):
         """Load enhanced model"""
-        model_file = os.path.join(self.model_path, 'adoption_matcher.pkl')
+        model_data = model_registry.get(ADOPTION_MATCHER_FILE)
         
-        if os.path.exists(model_file):
-            try:
-                with open(model_file, 'rb') as f:
-                    model_data = pickle.load(f)
-                
-                self.compatibility_model = model_data.get('model') or model_data.get('compatibility_model')
-                self.scaler = model_data.get('scaler', StandardScaler())
-                self.label_encoders = model_data.get('label_encoders', {})
-                self.adoption_likelihood_model = model_data.get('adoption_likelihood_model')
-                self.likelihood_scaler = model_data.get('likelihood_scaler', StandardScaler())
-                self.likelihood_encoders = model_data.get('likelihood_encoders', {})
-                
-                version = model_data.get('version', '1.0')
-                print(f"✅ Enhanced ML model loaded (version {version})")
-                return True
-                
-            except Exception as e:
-                print(f"⚠️ Failed to load model: {e}")
-                return False
+        if not model_data:
+            return False
         
-        print("ℹ️ No saved model found, will train new model")
-        return False
+        try:
+            self.compatibility_model = model_data.get('model') or model_data.get('compatibility_model')
+            self.scaler = model_data.get('scaler', StandardScaler())
+            self.adoption_likelihood_model = model_data.get('adoption_likelihood_model')
+            self.likelihood_scaler = model_data.get('likelihood_scaler', StandardScaler())
+            
+            # Encoders are filled in lazily per instance, so copy the shared dicts
+            self.label_encoders = dict(model_data.get('label_encoders', {}))
+            self.likelihood_encoders = dict(model_data.get('likelihood_encoders', {}))
+            return True
+            
+        except Exception as e:
+            print(f"⚠️ Failed to load model: {e}")
+            return False
@@ -0,0 +1,275 @@
+# adoptions/model_artifacts.py
+"""
+Versioned model artifacts for ml_models/
+
+An artifact is a directory named after the model file (adoption_matcher.pkl
+-> adoption_matcher/) holding:
+
+    manifest.json       format version, model version, revision, payload
+                        directory and the arrays stored in it
+    r000007/            one directory per revision:
+        a0000.npy ...   every numeric/string NumPy array in the model, plain
+                        .npy (no pickle)
+        skeleton.joblib the rest of the model data, with each array replaced
+                        by a reference to its .npy file
+
+Workers load the .npy files with mmap_mode='r', so N workers share one
+physical copy of the arrays through the page cache. That covers arrays held
+in dicts, DataFrame values and the array attributes of scikit-learn objects
+(scaler statistics, KMeans centres, SVD components). Random forests are
+stored as a MappedForest (adoptions/mapped_forest.py): scikit-learn would
+copy every tree into private memory on load, while MappedForest predicts
+from the mapped node arrays directly.
+
+The skeleton is still a pickle. It is small (encoders' Python objects,
+dict structure, DataFrame indexes, estimator settings), but like any pickle
+it must only be loaded from artifacts this application wrote.
+Format 1 artifacts (one model-NNNNNN.joblib payload) can still be read.
+"""
+
+import copy
+import json
+import os
+import shutil
+
+import joblib
+import numpy as np
+import pandas as pd
+from django.utils import timezone
+from sklearn.base import BaseEstimator
+
+from .mapped_forest import MappedForest, can_map
+
+# Bump when the directory layout or manifest fields change
+ARTIFACT_FORMAT_VERSION = 2
+READABLE_FORMAT_VERSIONS = (1, 2)
+
+MANIFEST_FILE = 'manifest.json'
+SKELETON_FILE = 'skeleton.joblib'
+
+# dtype kinds np.save writes without pickling
+ARRAY_KINDS = 'biufcmMU'
+
+
+class ArtifactFormatError(Exception):
+    """Artifact written in a format version this code cannot read"""
+
+
+class ArrayRef:
+    """Placeholder in the skeleton for an array saved as <name>.npy"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __getstate__(self):
+        return self.name
+
+    def __setstate__(self, state):
+        self.name = state
+
+
+class FrameRef:
+    """Placeholder for a single-dtype DataFrame whose values are saved as an array"""
+
+    def __init__(self, values, index, columns):
+        self.values = values
+        self.index = index
+        self.columns = columns
+
+
+def artifact_dir(model_dir, file_name):
+    """ml_models/adoption_matcher.pkl -> ml_models/adoption_matcher/"""
+    return os.path.join(model_dir, os.path.splitext(file_name)[0])
+
+
+def manifest_path(model_dir, file_name):
+    return os.path.join(artifact_dir(model_dir, file_name), MANIFEST_FILE)
+
+
+def read_manifest(model_dir, file_name):
+    """Parsed manifest.json, or None if the model has no artifact"""
+    try:
+        with open(manifest_path(model_dir, file_name)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def check_manifest(manifest):
+    if manifest.get('format_version') not in READABLE_FORMAT_VERSIONS:
+        raise ArtifactFormatError(
+            f"artifact format {manifest.get('format_version')} is not supported "
+            f"(expected one of {READABLE_FORMAT_VERSIONS})"
+        )
+
+
+def _mappable(value):
+    return isinstance(value, np.ndarray) and value.dtype.kind in ARRAY_KINDS and value.size > 0
+
+
+def split_arrays(data, arrays):
+    """
+    Copy of `data` with its arrays moved into `arrays` ({name: array}) and
+    replaced by ArrayRefs; forests become MappedForests on the way
+    """
+    def store(array):
+        name = f'a{len(arrays):04d}'
+        arrays[name] = np.ascontiguousarray(array)
+        return ArrayRef(name)
+
+    def split(value):
+        if _mappable(value):
+            return store(value)
+        if type(value) is dict:
+            return {key: split(item) for key, item in value.items()}
+        if type(value) in (list, tuple):
+            return type(value)(split(item) for item in value)
+        if isinstance(value, pd.DataFrame) and len(set(value.dtypes)) == 1 and _mappable(value.to_numpy()):
+            return FrameRef(store(value.to_numpy()), value.index, value.columns)
+        if can_map(value):
+            value = MappedForest.from_forest(value)
+        if isinstance(value, (BaseEstimator, MappedForest)):
+            value = copy.copy(value)
+            for attribute, item in vars(value).items():
+                setattr(value, attribute, split(item))
+        return value
+
+    return split(data)
+
+
+def join_arrays(skeleton, load_array):
+    """Inverse of split_arrays: resolve every ArrayRef with load_array(name)"""
+    def join(value):
+        if isinstance(value, ArrayRef):
+            return load_array(value.name)
+        if type(value) is dict:
+            return {key: join(item) for key, item in value.items()}
+        if type(value) in (list, tuple):
+            return type(value)(join(item) for item in value)
+        if isinstance(value, FrameRef):
+            return pd.DataFrame(join(value.values), index=value.index, columns=value.columns, copy=False)
+        if isinstance(value, (BaseEstimator, MappedForest)):
+            # Freshly unpickled, so it can be filled in place
+            for attribute, item in vars(value).items():
+                setattr(value, attribute, join(item))
+        return value
+
+    return join(skeleton)
+
+
+def _replace(path, write):
+    """Write to a temporary sibling, then rename over `path`"""
+    tmp_path = f'{path}.tmp-{os.getpid()}'
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def save_artifact(data, model_dir, file_name):
+    """
+    Save model data as a new revision of its artifact. Each revision is
+    written to a temporary directory and renamed into place, and the
+    manifest rename is the single switch-over point, so readers never see a
+    partial or mismatched model. Workers that still map the previous
+    revision keep reading it until they reload.
+    """
+    directory = artifact_dir(model_dir, file_name)
+    os.makedirs(directory, exist_ok=True)
+
+    previous = read_manifest(model_dir, file_name) or {}
+    revision = previous.get('revision', 0) + 1
+    payload = f'r{revision:06d}'
+
+    arrays = {}
+    skeleton = split_arrays(data, arrays)
+
+    payload_dir = os.path.join(directory, payload)
+    tmp_dir = f'{payload_dir}.tmp-{os.getpid()}'
+    try:
+        os.makedirs(tmp_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), array, allow_pickle=False)
+        joblib.dump(skeleton, os.path.join(tmp_dir, SKELETON_FILE))
+        if os.path.exists(payload_dir):
+            # Left over from a save that died before its manifest was written
+            shutil.rmtree(payload_dir)
+        os.replace(tmp_dir, payload_dir)
+    finally:
+        if os.path.exists(tmp_dir):
+            shutil.rmtree(tmp_dir)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'model': file_name,
+        'version': data.get('version') if isinstance(data, dict) else None,
+        'revision': revision,
+        'payload': payload,
+        'arrays': {
+            name: {'dtype': array.dtype.str, 'shape': list(array.shape)}
+            for name, array in arrays.items()
+        },
+        'created_at': timezone.now().isoformat(),
+    }
+
+    def write_manifest(path):
+        with open(path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+    _replace(os.path.join(directory, MANIFEST_FILE), write_manifest)
+
+    # Keep the previous payload for workers that have not reloaded yet
+    keep = {payload, previous.get('payload'), MANIFEST_FILE}
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if name in keep or name.startswith(f'{MANIFEST_FILE}.tmp-'):
+            continue
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+    return manifest
+
+
+def payload_size(model_dir, file_name, manifest):
+    """Bytes on disk of one revision's payload"""
+    path = os.path.join(artifact_dir(model_dir, file_name), manifest['payload'])
+    if not os.path.isdir(path):
+        return os.path.getsize(path)
+    return sum(entry.stat().st_size for entry in os.scandir(path))
+
+
+def publish_model(data, file_name, model_dir=None):
+    """
+    Save a trained model as the next artifact revision and drop this
+    process's cached copy; other processes pick it up on their next
+    registry check (ML_MODEL_RELOAD_INTERVAL)
+    """
+    from .model_registry import model_registry
+
+    manifest = save_artifact(data, model_dir or model_registry.model_dir, file_name)
+    model_registry.invalidate(file_name)
+    return manifest
+
+
+def load_artifact(model_dir, file_name, mmap=True, manifest=None):
+    """Load an artifact's model data, memory-mapping its arrays read-only"""
+    manifest = manifest or read_manifest(model_dir, file_name)
+    if manifest is None:
+        raise FileNotFoundError(manifest_path(model_dir, file_name))
+    check_manifest(manifest)
+
+    payload = os.path.join(artifact_dir(model_dir, file_name), manifest['payload'])
+    if manifest['format_version'] == 1:
+        return joblib.load(payload, mmap_mode='r' if mmap else None)
+
+    def load_array(name):
+        if name not in manifest['arrays']:
+            raise ArtifactFormatError(f'{name} is not listed in the manifest of {file_name}')
+        return np.load(os.path.join(payload, f'{name}.npy'), mmap_mode='r' if mmap else None, allow_pickle=False)
+
+    return join_arrays(joblib.load(os.path.join(payload, SKELETON_FILE)), load_array)
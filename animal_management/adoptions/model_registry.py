@@ -0,0 +1,197 @@
+# adoptions/model_registry.py
+"""
+Process-wide registry for the ML models in ml_models/
+
+Every worker process loads each model at most once and shares the result
+between requests and threads. Models are served from their versioned
+artifact (adoptions/model_artifacts.py, memory-mapped) or, if that is
+missing or older, from the legacy pickle. Files are re-checked (mtime +
+size) at most every ML_MODEL_RELOAD_INTERVAL seconds so a retrained model
+is picked up without restarting the server.
+"""
+
+import os
+import pickle
+import threading
+import time
+import logging
+from django.conf import settings
+
+from .model_artifacts import load_artifact, manifest_path, read_manifest
+
+logger = logging.getLogger(__name__)
+
+# Model files used by the serving path
+ADOPTION_MATCHER_FILE = 'adoption_matcher.pkl'
+PRODUCTION_MODEL_FILE = 'production_model.pkl'
+COLLABORATIVE_FILE = 'collaborative_filtering.pkl'
+CLUSTERING_FILE = 'behavioral_clustering.pkl'
+
+# Written by fix_ml_overfitting, read by the advanced model commands
+ADVANCED_MODEL_FILE = 'advanced_adoption_model.pkl'
+
+SERVING_MODEL_FILES = [
+    ADOPTION_MATCHER_FILE,
+    PRODUCTION_MODEL_FILE,
+    COLLABORATIVE_FILE,
+    CLUSTERING_FILE,
+]
+
+
+class _ModelEntry:
+    """A loaded model together with the file signature it was loaded from"""
+
+    __slots__ = ('data', 'signature', 'checked_at', 'loaded_at', 'version', 'revision')
+
+    def __init__(self, data, signature, version, revision=None):
+        self.data = data
+        self.signature = signature
+        self.version = version
+        self.revision = revision
+        self.loaded_at = time.time()
+        self.checked_at = time.monotonic()
+
+
+class ModelRegistry:
+    """Lazily loads and caches model files, one copy per worker process"""
+
+    def __init__(self, model_dir=None, reload_interval=None):
+        self._model_dir = model_dir
+        self._reload_interval = reload_interval
+        self._entries = {}
+        self._missing = {}
+        self._lock = threading.RLock()
+        self.load_count = 0
+
+    @property
+    def model_dir(self):
+        if self._model_dir is None:
+            self._model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
+        return self._model_dir
+
+    @property
+    def reload_interval(self):
+        if self._reload_interval is None:
+            self._reload_interval = getattr(settings, 'ML_MODEL_RELOAD_INTERVAL', 30)
+        return self._reload_interval
+
+    def path_for(self, file_name):
+        return os.path.join(self.model_dir, file_name)
+
+    def _file_signature(self, file_name):
+        """
+        (format, mtime_ns, size, inode) of the newest copy of a model - its
+        artifact manifest or its legacy pickle - or None if neither exists.
+        Manifests are replaced by rename, so the inode changes with every
+        revision even when the mtime does not.
+        """
+        candidates = []
+        for model_format, path in [
+            ('artifact', manifest_path(self.model_dir, file_name)),
+            ('pickle', self.path_for(file_name)),
+        ]:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            candidates.append((stat.st_mtime_ns, model_format == 'artifact', model_format, stat.st_size, stat.st_ino))
+
+        if not candidates:
+            return None
+        mtime_ns, _, model_format, size, inode = max(candidates)
+        return (model_format, mtime_ns, size, inode)
+
+    def _is_fresh(self, entry):
+        return time.monotonic() - entry.checked_at < self.reload_interval
+
+    def get(self, file_name):
+        """
+        Return the loaded contents of a model, or None if the model is
+        missing or cannot be loaded.
+        """
+        entry = self._entries.get(file_name)
+        if entry is not None and self._is_fresh(entry):
+            return entry.data
+
+        missing_at = self._missing.get(file_name)
+        if entry is None and missing_at is not None and time.monotonic() - missing_at < self.reload_interval:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(file_name)
+            signature = self._file_signature(file_name)
+
+            if signature is None:
+                self._entries.pop(file_name, None)
+                self._missing[file_name] = time.monotonic()
+                return None
+
+            if entry is not None and entry.signature == signature:
+                entry.checked_at = time.monotonic()
+                return entry.data
+
+            return self._load(file_name, signature, previous=entry)
+
+    def _load(self, file_name, signature, previous=None):
+        revision = None
+        try:
+            if signature[0] == 'artifact':
+                manifest = read_manifest(self.model_dir, file_name)
+                revision = (manifest or {}).get('revision')
+                data = load_artifact(self.model_dir, file_name, manifest=manifest)
+            else:
+                with open(self.path_for(file_name), 'rb') as f:
+                    data = pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load ML model {file_name}: {e}")
+            if previous is not None:
+                # Keep serving the last good copy (e.g. file is mid-write)
+                previous.checked_at = time.monotonic()
+                return previous.data
+            self._missing[file_name] = time.monotonic()
+            return None
+
+        version = data.get('version') if isinstance(data, dict) else None
+        self._entries[file_name] = _ModelEntry(data, signature, version, revision)
+        self._missing.pop(file_name, None)
+        self.load_count += 1
+
+        action = 'Reloaded' if previous is not None else 'Loaded'
+        logger.info(f"{action} ML model {file_name} from {signature[0]} (version {version or 'unknown'})")
+        return data
+
+    def preload(self, file_names=None):
+        """Load the given (default: all serving) models up front"""
+        loaded = {}
+        for file_name in file_names or SERVING_MODEL_FILES:
+            loaded[file_name] = self.get(file_name) is not None
+        return loaded
+
+    def invalidate(self, file_name=None):
+        """Drop a cached model (or all of them) so the next get() reloads it"""
+        with self._lock:
+            if file_name is None:
+                self._entries.clear()
+                self._missing.clear()
+            else:
+                self._entries.pop(file_name, None)
+                self._missing.pop(file_name, None)
+
+    def status(self):
+        """Describe what is currently loaded in this process"""
+        with self._lock:
+            return {
+                file_name: {
+                    'version': entry.version,
+                    'revision': entry.revision,
+                    'format': entry.signature[0],
+                    'loaded_at': entry.loaded_at,
+                    'mtime_ns': entry.signature[1],
+                    'size': entry.signature[2],
+                }
+                for file_name, entry in self._entries.items()
+            }
+
+
+# Global registry instance (one per worker process)
+model_registry = ModelRegistry()
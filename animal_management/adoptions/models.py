@@ -69,6 +69,9 @@ class AdopterProfile(models.Model):
     special_needs_capable = models.BooleanField(default=False)
     budget_for_pet = models.CharField(max_length=100, help_text="Monthly budget for pet care")
     
+    # Set when the top-K AdoptionMatch index for this adopter was last rebuilt
+    matches_indexed_at = models.DateTimeField(blank=True, null=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -127,6 +130,9 @@ class AnimalBehaviorProfile(models.Model):
     behavior_notes = models.TextField(blank=True, null=True)
     ideal_home = models.TextField(blank=True, null=True, help_text="Description of ideal home environment")
     
+    # Behavioral cluster assigned by adoptions/cluster_utils.py (reassigned by signals when inputs change)
+    behavior_cluster = models.IntegerField(blank=True, null=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -198,4 +204,51 @@ class AdoptionMatch(models.Model):
     
     class Meta:
         ordering = ['-overall_score']
-        unique_together = ('adopter', 'animal')
+        constraints = [
+            # Conflict target for bulk upserts (see match_index.bulk_upsert_matches)
+            models.UniqueConstraint(fields=['adopter', 'animal'], name='unique_adoption_match'),
+        ]
+        indexes = [
+            models.Index(fields=['adopter', '-overall_score'], name='adoption_match_adopter_idx'),
+        ]
+
+
+class MLTrainingJob(models.Model):
+    JOB_TYPES = (
+        ('adoption_matcher', 'Adoption Matcher'),
+        ('collaborative_filtering', 'Collaborative Filtering'),
+        ('collaborative_incremental', 'Collaborative Filtering (Incremental)'),
+        ('behavioral_clustering', 'Behavioral Clustering'),
+    )
+    
+    STATUS_CHOICES = (
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Running'),
+        ('SUCCEEDED', 'Succeeded'),
+        ('FAILED', 'Failed'),
+    )
+    
+    job_type = models.CharField(max_length=30, choices=JOB_TYPES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='QUEUED')
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='ml_training_jobs')
+    
+    # Progress reporting (last line of training output)
+    message = models.CharField(max_length=255, blank=True)
+    log = models.TextField(blank=True)
+    error = models.TextField(blank=True)
+    
+    # Artifact revision published by this job
+    model_revision = models.IntegerField(blank=True, null=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+    
+    def __str__(self):
+        return f"{self.get_job_type_display()} ({self.status})"
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['job_type', 'status'], name='ml_training_job_status_idx'),
+        ]
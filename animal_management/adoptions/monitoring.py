@@ -1,46 +1,282 @@
 # adoptions/monitoring.py
 """
 ML System Monitoring and Health Checks
+
+Also holds the per-call inference metrics (ml_metrics): latency histograms
+of feature extraction, model load, predict and DB time for each matcher
+entry point, plus prediction counts by method, exported in Prometheus text
+format by /api/health/ml-metrics. Metrics are kept per worker process.
 """
 
 import os
 import time
+import threading
+import functools
+from collections import deque
 from django.conf import settings
+from django.db import connection
 from django.utils import timezone
 import logging
 
 logger = logging.getLogger(__name__)
 
+
+# Histogram bucket upper bounds in seconds (Prometheus 'le' labels)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LATENCY_QUANTILES = (0.5, 0.95, 0.99)
+PHASES = ('feature_extraction', 'model_load', 'predict', 'db', 'total')
+
+
+class LatencyHistogram:
+    """Cumulative bucket counts plus a window of recent samples for quantiles"""
+    
+    def __init__(self, window=2048):
+        self.bucket_counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.samples = deque(maxlen=window)
+    
+    def observe(self, seconds):
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.bucket_counts[i] += 1
+                break
+        self.count += 1
+        self.sum += seconds
+        self.samples.append(seconds)
+    
+    def cumulative_buckets(self):
+        total = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.bucket_counts):
+            total += count
+            yield bound, total
+    
+    def quantiles(self):
+        """{0.5: p50, 0.95: p95, 0.99: p99} over the recent samples (nearest rank)"""
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: None for q in LATENCY_QUANTILES}
+        return {
+            q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+            for q in LATENCY_QUANTILES
+        }
+
+
+class _TrackedCall:
+    """Phase timings collected during one entry-point call"""
+    
+    __slots__ = ('entry_point', 'phases')
+    
+    def __init__(self, entry_point):
+        self.entry_point = entry_point
+        self.phases = dict.fromkeys(PHASES, 0.0)
+
+
+class _PhaseTimer:
+    __slots__ = ('call', 'phase', 'started')
+    
+    def __init__(self, call, phase):
+        self.call = call
+        self.phase = phase
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.call.phases[self.phase] += time.perf_counter() - self.started
+        return False
+
+
+class _NoTimer:
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NO_TIMER = _NoTimer()
+
+
+class MLMetrics:
+    """
+    Per-call ML inference metrics. Entry points are wrapped with
+    @ml_metrics.tracked(name); inside them, `with ml_metrics.phase(...)`
+    attributes time to a phase. Calls nested inside another tracked call
+    count towards the outer entry point. DB time is collected with a
+    connection execute wrapper for the duration of the outer call.
+    """
+    
+    def __init__(self, window=2048):
+        self.window = window
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.histograms = {}
+        self.method_counts = {}
+    
+    def current(self):
+        return getattr(self._local, 'call', None)
+    
+    def tracked(self, entry_point):
+        """Decorator recording phase latencies for every call of a matcher entry point"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.current() is not None:
+                    return func(*args, **kwargs)
+                
+                call = _TrackedCall(entry_point)
+                self._local.call = call
+                started = time.perf_counter()
+                try:
+                    with connection.execute_wrapper(functools.partial(self._time_query, call)):
+                        return func(*args, **kwargs)
+                finally:
+                    call.phases['total'] = time.perf_counter() - started
+                    self._local.call = None
+                    self._record(call)
+            return wrapper
+        return decorator
+    
+    @staticmethod
+    def _time_query(call, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            call.phases['db'] += time.perf_counter() - started
+    
+    def phase(self, phase):
+        """Context manager adding elapsed time to a phase of the current call"""
+        call = self.current()
+        if call is None:
+            return _NO_TIMER
+        return _PhaseTimer(call, phase)
+    
+    def add_time(self, phase, seconds):
+        call = self.current()
+        if call is not None:
+            call.phases[phase] += seconds
+    
+    def count_methods(self, counts):
+        """Add prediction counts ({method: n}) to the current entry point"""
+        call = self.current()
+        entry_point = call.entry_point if call is not None else 'untracked'
+        with self._lock:
+            for method, count in counts.items():
+                key = (entry_point, method)
+                self.method_counts[key] = self.method_counts.get(key, 0) + int(count)
+    
+    def count_method(self, method):
+        self.count_methods({method: 1})
+    
+    def _record(self, call):
+        with self._lock:
+            for phase, seconds in call.phases.items():
+                key = (call.entry_point, phase)
+                histogram = self.histograms.get(key)
+                if histogram is None:
+                    histogram = self.histograms[key] = LatencyHistogram(self.window)
+                histogram.observe(seconds)
+    
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+            self.method_counts = {}
+    
+    def snapshot(self):
+        """Counts and p50/p95/p99 (ms) per entry point and phase, as a dict"""
+        with self._lock:
+            latency = {}
+            for (entry_point, phase), histogram in sorted(self.histograms.items()):
+                quantiles = histogram.quantiles()
+                latency.setdefault(entry_point, {})[phase] = {
+                    'count': histogram.count,
+                    'mean_ms': round(histogram.sum / histogram.count * 1000, 3),
+                    **{
+                        f'p{int(q * 100)}_ms': round(value * 1000, 3) if value is not None else None
+                        for q, value in quantiles.items()
+                    },
+                }
+            methods = {}
+            for (entry_point, method), count in sorted(self.method_counts.items()):
+                methods.setdefault(entry_point, {})[method] = count
+            return {'latency': latency, 'prediction_methods': methods}
+    
+    def render_prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP ml_inference_phase_seconds Time spent per phase of an ML entry point call',
+            '# TYPE ml_inference_phase_seconds histogram',
+        ]
+        with self._lock:
+            histograms = sorted(self.histograms.items())
+            method_counts = sorted(self.method_counts.items())
+            
+            for (entry_point, phase), histogram in histograms:
+                labels = f'entry_point="{entry_point}",phase="{phase}"'
+                for bound, count in histogram.cumulative_buckets():
+                    lines.append(f'ml_inference_phase_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'ml_inference_phase_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'ml_inference_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'ml_inference_phase_seconds_count{{{labels}}} {histogram.count}')
+            
+            lines.append(f'# HELP ml_inference_latency_seconds Recent per-phase latency quantiles (last {self.window} calls)')
+            lines.append('# TYPE ml_inference_latency_seconds summary')
+            for (entry_point, phase), histogram in histograms:
+                labels = f'entry_point="{entry_point}",phase="{phase}"'
+                for q, value in histogram.quantiles().items():
+                    if value is not None:
+                        lines.append(f'ml_inference_latency_seconds{{{labels},quantile="{q}"}} {value:.6f}')
+                lines.append(f'ml_inference_latency_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+                lines.append(f'ml_inference_latency_seconds_count{{{labels}}} {histogram.count}')
+            
+            lines.append('# HELP ml_predictions_total Adoption likelihood predictions by method')
+            lines.append('# TYPE ml_predictions_total counter')
+            for (entry_point, method), count in method_counts:
+                lines.append(f'ml_predictions_total{{entry_point="{entry_point}",method="{method}"}} {count}')
+        
+        return '\n'.join(lines) + '\n'
+
+
+# Global metrics instance (one per worker process)
+ml_metrics = MLMetrics()
+
+
 class MLSystemMonitor:
     """Monitor ML system health and performance"""
     
     def __init__(self):
         self.model_dir = os.path.join(settings.BASE_DIR, 'ml_models')
         self.health_checks = []
+        self.model_versions = {}
     
     def check_model_files(self):
-        """Check if all model files exist and are readable"""
-        required_files = [
-            'adoption_matcher.pkl',
-            'production_model.pkl', 
-            'collaborative_filtering.pkl',
-            'behavioral_clustering.pkl'
-        ]
+        """Check that every model exists, is readable and uses a supported artifact format"""
+        from .model_registry import SERVING_MODEL_FILES
+        from .model_artifacts import read_manifest, check_manifest
         
         results = {}
-        for file_name in required_files:
+        for file_name in SERVING_MODEL_FILES:
             file_path = os.path.join(self.model_dir, file_name)
             
-            if os.path.exists(file_path):
-                try:
+            try:
+                manifest = read_manifest(self.model_dir, file_name)
+                if manifest is not None:
+                    check_manifest(manifest)
+                    results[file_name] = 'OK'
+                    self.model_versions[file_name] = manifest.get('version')
+                elif os.path.exists(file_path):
                     # Check if file is readable
                     with open(file_path, 'rb') as f:
                         f.read(1)  # Read first byte
-                    results[file_name] = 'OK'
-                except Exception as e:
-                    results[file_name] = f'Error: {str(e)}'
-            else:
-                results[file_name] = 'Missing'
+                    results[file_name] = 'OK (legacy pickle, run convert_model_artifacts)'
+                    self.model_versions[file_name] = None
+                else:
+                    results[file_name] = 'Missing'
+            except Exception as e:
+                results[file_name] = f'Error: {str(e)}'
         
         return results
     
@@ -115,12 +351,14 @@ class MLSystemMonitor:
         health_report = {
             'timestamp': timezone.now().isoformat(),
             'model_files': self.check_model_files(),
+            'model_versions': self.model_versions,
+            'inference_metrics': ml_metrics.snapshot(),
             'system_performance': self.check_ml_system_performance(),
             'prediction_pipeline': self.test_prediction_pipeline()
         }
         
         # Determine overall health
-        files_ok = all(status == 'OK' for status in health_report['model_files'].values())
+        files_ok = all(status.startswith('OK') for status in health_report['model_files'].values())
         system_ok = health_report['system_performance']['status'] == 'operational'
         pipeline_ok = health_report['prediction_pipeline']['status'] == 'success'
         
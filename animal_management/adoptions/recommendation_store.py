@@ -0,0 +1,196 @@
+# adoptions/recommendation_store.py
+"""
+Compact collaborative-filtering recommendation store
+
+Per-user recommendations are kept as flat NumPy arrays (CSR layout: sorted
+user ids, row offsets, and per-recommendation animal type / score / kind),
+already sorted by score. A lookup is a binary search plus a slice, with no
+per-call sorting and no per-user Python dictionaries held in memory.
+"""
+
+import threading
+import numpy as np
+
+from .model_registry import model_registry, COLLABORATIVE_FILE
+
+
+RECOMMENDATION_KINDS = ['collaborative', 'content', 'hybrid']
+
+COLLABORATIVE_REASON = 'Users similar to you adopted {}s'
+CONTENT_REASON = 'Based on your previous {} adoption'
+
+
+class RecommendationStore:
+    """Per-user recommendations sorted by score, in flat arrays"""
+
+    def __init__(self, user_ids, offsets, type_codes, scores, kinds, animal_types, reasons=None):
+        self.user_ids = np.asarray(user_ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.type_codes = np.asarray(type_codes, dtype=np.int16)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.kinds = np.asarray(kinds, dtype=np.int8)
+        self.animal_types = list(animal_types)
+        # Optional per-recommendation reason overrides (legacy models only)
+        self.reasons = reasons
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def _row(self, user_id):
+        row = np.searchsorted(self.user_ids, user_id)
+        if row < len(self.user_ids) and self.user_ids[row] == user_id:
+            return row
+        return None
+
+    def lookup(self, user_id):
+        """Recommendations for one user, highest score first"""
+        row = self._row(user_id)
+        if row is None:
+            return []
+
+        recommendations = []
+        for position in range(self.offsets[row], self.offsets[row + 1]):
+            animal_type = self.animal_types[self.type_codes[position]]
+            kind = RECOMMENDATION_KINDS[self.kinds[position]]
+            if self.reasons is not None:
+                reason = self.reasons[position]
+            elif kind == 'content':
+                reason = CONTENT_REASON.format(animal_type.lower())
+            else:
+                reason = COLLABORATIVE_REASON.format(animal_type.lower())
+
+            recommendations.append({
+                'animal_type': animal_type,
+                'score': float(self.scores[position]),
+                'reason': reason,
+                'type': kind
+            })
+        return recommendations
+
+    def to_dict(self):
+        """Plain arrays for saving alongside the collaborative model"""
+        return {
+            'user_ids': self.user_ids,
+            'offsets': self.offsets,
+            'type_codes': self.type_codes,
+            'scores': self.scores,
+            'kinds': self.kinds,
+            'animal_types': self.animal_types,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data['user_ids'], data['offsets'], data['type_codes'], data['scores'], data['kinds'],
+            data['animal_types']
+        )
+
+    @classmethod
+    def from_scores(cls, user_ids, scores, kinds, present, animal_types):
+        """
+        Build from dense (users x animal types) score, kind-code and
+        presence arrays; each user's recommendations are sorted here, once
+        """
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        order = np.argsort(user_ids, kind='stable')
+        user_ids, scores, kinds, present = user_ids[order], scores[order], kinds[order], present[order]
+
+        # Highest score first within each row, absent types pushed to the end
+        ranked = np.argsort(np.where(present, -scores, np.inf), axis=1, kind='stable')
+        counts = present.sum(axis=1)
+        keep = np.arange(scores.shape[1])[None, :] < counts[:, None]
+
+        rows = np.repeat(np.arange(len(user_ids)), counts)
+        type_codes = ranked[keep]
+        return cls(
+            user_ids,
+            np.concatenate([[0], np.cumsum(counts)]),
+            type_codes,
+            scores[rows, type_codes],
+            kinds[rows, type_codes],
+            animal_types,
+        )
+
+    @classmethod
+    def from_hybrid_recommendations(cls, hybrid_recommendations):
+        """Build from the {user_id: {animal_type: {...}}} dict of older model files"""
+        animal_types = sorted({
+            animal_type for user_recs in hybrid_recommendations.values() for animal_type in user_recs
+        })
+        type_index = {animal_type: code for code, animal_type in enumerate(animal_types)}
+
+        user_ids = sorted(int(user_id) for user_id in hybrid_recommendations)
+        by_user = {int(user_id): user_recs for user_id, user_recs in hybrid_recommendations.items()}
+
+        offsets = [0]
+        type_codes, scores, kinds, reasons = [], [], [], []
+        for user_id in user_ids:
+            user_recs = sorted(
+                by_user[user_id].items(), key=lambda item: item[1].get('score', 0), reverse=True
+            )
+            for animal_type, data in user_recs:
+                kind = data.get('type', 'collaborative')
+                type_codes.append(type_index[animal_type])
+                scores.append(data.get('score', 0))
+                kinds.append(RECOMMENDATION_KINDS.index(kind) if kind in RECOMMENDATION_KINDS else 0)
+                reasons.append(data.get('reason', 'Based on similar users'))
+            offsets.append(len(scores))
+        return cls(user_ids, offsets, type_codes, scores, kinds, animal_types, reasons)
+
+    def merged(self, other):
+        """New store with every user in `other` replacing or adding to this one"""
+        animal_types = list(self.animal_types)
+        for animal_type in other.animal_types:
+            if animal_type not in animal_types:
+                animal_types.append(animal_type)
+        remap = np.array([animal_types.index(animal_type) for animal_type in other.animal_types], dtype=np.int16)
+
+        own_counts = np.diff(self.offsets)
+        other_counts = np.diff(other.offsets)
+        keep_users = ~np.isin(self.user_ids, other.user_ids)
+        keep_recs = np.repeat(keep_users, own_counts)
+
+        user_ids = np.concatenate([self.user_ids[keep_users], other.user_ids])
+        counts = np.concatenate([own_counts[keep_users], other_counts])
+        rec_users = np.concatenate([
+            np.repeat(self.user_ids, own_counts)[keep_recs], np.repeat(other.user_ids, other_counts)
+        ])
+
+        # Stable sorts keep each user's recommendations in score order
+        user_order = np.argsort(user_ids, kind='stable')
+        rec_order = np.argsort(rec_users, kind='stable')
+        return RecommendationStore(
+            user_ids[user_order],
+            np.concatenate([[0], np.cumsum(counts[user_order])]),
+            np.concatenate([self.type_codes[keep_recs], remap[other.type_codes]])[rec_order],
+            np.concatenate([self.scores[keep_recs], other.scores])[rec_order],
+            np.concatenate([self.kinds[keep_recs], other.kinds])[rec_order],
+            animal_types,
+        )
+
+
+_lock = threading.Lock()
+_store = (None, None)
+
+
+def get_recommendation_store():
+    """Store for the currently loaded collaborative model (built once per model file), or None"""
+    global _store
+
+    collaborative_data = model_registry.get(COLLABORATIVE_FILE)
+    if not collaborative_data:
+        return None
+
+    source, store = _store
+    if source is not collaborative_data:
+        with _lock:
+            source, store = _store
+            if source is not collaborative_data:
+                if 'recommendation_store' in collaborative_data:
+                    store = RecommendationStore.from_dict(collaborative_data['recommendation_store'])
+                else:
+                    store = RecommendationStore.from_hybrid_recommendations(
+                        collaborative_data.get('hybrid_recommendations', {})
+                    )
+                _store = (collaborative_data, store)
+    return store
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication, AdoptionMatch
+from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication, AdoptionMatch, MLTrainingJob
 from users.serializers import UserSerializer
 from animals.serializers import AnimalSerializer
 
@@ -40,3 +40,15 @@ class AdoptionMatchSerializer(serializers.ModelSerializer):
         model = AdoptionMatch
         fields = '__all__'
         read_only_fields = ['created_at']
+
+
+class MLTrainingJobSerializer(serializers.ModelSerializer):
+    requested_by_username = serializers.CharField(source='requested_by.username', read_only=True)
+    
+    class Meta:
+        model = MLTrainingJob
+        fields = '__all__'
+        read_only_fields = [
+            'status', 'requested_by', 'message', 'log', 'error', 'model_revision',
+            'created_at', 'started_at', 'finished_at'
+        ]
@@ -0,0 +1,82 @@
+# adoptions/signals.py
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+
+from animals.models import Animal
+from .models import AdopterProfile, AnimalBehaviorProfile
+from .cluster_utils import assign_clusters, predict_clusters
+from .match_index import match_index_queue
+
+
+@receiver(post_save, sender=AdopterProfile)
+def refresh_adopter_match_index(sender, instance, **kwargs):
+    """Rebuild the adopter's top-K matches after their profile changes"""
+    transaction.on_commit(lambda: match_index_queue.enqueue_adopter(instance.pk))
+
+
+@receiver(pre_save, sender=AnimalBehaviorProfile)
+def assign_behavior_cluster(sender, instance, update_fields=None, **kwargs):
+    """Inputs may have changed, so reassign the cluster (None if no model is available)"""
+    if update_fields is not None and not set(update_fields) - {'behavior_cluster'}:
+        return
+    instance.behavior_cluster = None
+    predict_clusters([instance])
+
+
+@receiver(post_save, sender=AnimalBehaviorProfile)
+def save_behavior_cluster(sender, instance, update_fields=None, **kwargs):
+    """A save limited to other fields does not write the cluster assigned in pre_save"""
+    if update_fields is not None and 'behavior_cluster' not in update_fields:
+        AnimalBehaviorProfile.objects.filter(pk=instance.pk).update(behavior_cluster=instance.behavior_cluster)
+
+
+@receiver(post_save, sender=AnimalBehaviorProfile)
+def refresh_behavior_profile_match_index(sender, instance, **kwargs):
+    """Re-score an animal against every indexed adopter after its behavior profile changes"""
+    transaction.on_commit(lambda: match_index_queue.enqueue_animal(instance.animal_id))
+
+
+# Animal fields used as behavioral clustering features
+CLUSTER_FIELDS = ('animal_type', 'weight', 'adoption_fee')
+
+
+@receiver(pre_save, sender=Animal)
+def remember_animal_status(sender, instance, update_fields=None, **kwargs):
+    """Keep the stored status (and cluster inputs) so post_save can tell whether they changed"""
+    if update_fields is not None and not set(update_fields) & {'status', *CLUSTER_FIELDS}:
+        # Neither can change in this save, so skip the lookup
+        instance._previous_status = instance.status
+        instance._cluster_inputs_changed = False
+        return
+
+    previous = None
+    if instance.pk:
+        previous = Animal.objects.filter(pk=instance.pk).values_list('status', *CLUSTER_FIELDS).first()
+    if previous:
+        instance._previous_status = previous[0]
+        instance._cluster_inputs_changed = previous[1:] != tuple(getattr(instance, field) for field in CLUSTER_FIELDS)
+    else:
+        instance._previous_status = None
+        instance._cluster_inputs_changed = False
+
+
+@receiver(post_save, sender=Animal)
+def refresh_animal_match_index(sender, instance, created, **kwargs):
+    """Add or drop an animal in the match index when its status changes"""
+    previous_status = getattr(instance, '_previous_status', None)
+    if previous_status == instance.status:
+        return
+    if created and instance.status != 'AVAILABLE':
+        return
+    transaction.on_commit(lambda: match_index_queue.enqueue_animal(instance.pk))
+
+
+@receiver(post_save, sender=Animal)
+def reassign_animal_behavior_cluster(sender, instance, **kwargs):
+    """Type, weight or fee changed, so the animal's stored cluster is stale"""
+    if getattr(instance, '_cluster_inputs_changed', False):
+        profiles = AnimalBehaviorProfile.objects.filter(animal_id=instance.pk)
+        # Cleared first, so a missing model leaves no stale cluster behind
+        profiles.update(behavior_cluster=None)
+        assign_clusters(profiles)
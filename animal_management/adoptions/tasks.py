@@ -0,0 +1,13 @@
+# adoptions/tasks.py
+"""Celery tasks for the adoptions app"""
+
+from celery import shared_task
+
+from .training_jobs import run_job
+
+
+@shared_task(name='adoptions.run_training_job', acks_late=True)
+def run_training_job(job_id):
+    """Run one queued MLTrainingJob on a Celery worker"""
+    job = run_job(job_id)
+    return job.status if job is not None else None
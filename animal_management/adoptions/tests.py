@@ -1,3 +1,968 @@
-from django.test import TestCase
+import itertools
+import json
+import os
+import pickle
+import random
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import joblib
+import numpy as np
+import pandas as pd
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from sklearn.cluster import KMeans
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+from animals.models import Animal
+from .cluster_utils import assign_clusters, get_cluster_predictor, predict_animal_cluster, predict_clusters
+from .mapped_forest import MappedForest
+from . import match_index
+from .match_index import (
+    evict_lowest_matches, get_available_behavior_profiles, rebuild_adopter_matches, refresh_animal_matches,
+    score_animals,
+)
+from .matching import AdoptionMatchingSystem
+from .ml_matching import MLAdoptionMatcher
+from . import training_jobs
+from .model_artifacts import (
+    ARTIFACT_FORMAT_VERSION, ArtifactFormatError, artifact_dir, check_manifest, load_artifact,
+    manifest_path, publish_model, read_manifest, save_artifact,
+)
+from .model_registry import ADOPTION_MATCHER_FILE, CLUSTERING_FILE, COLLABORATIVE_FILE, ModelRegistry, model_registry
+from .models import AdopterProfile, AdoptionApplication, AdoptionMatch, AnimalBehaviorProfile, MLTrainingJob
+from .recommendation_store import RECOMMENDATION_KINDS, RecommendationStore, get_recommendation_store
+
+
+def choice_values(choices):
+    return [value for value, _ in choices]
+
+
+class RandomProfilesMixin:
+    """Random adopter and behavior profiles covering every choice value"""
+
+    # Every choice value, plus the blank/None values the scorers fall back on
+    HOUSING_TYPES = choice_values(AdopterProfile.HOUSING_TYPES) + ['', None]
+    ACTIVITY_LEVELS = choice_values(AdopterProfile.ACTIVITY_LEVELS) + ['', None]
+    PET_EXPERIENCE = choice_values(AdopterProfile.PET_EXPERIENCE) + ['', None]
+    ENERGY_LEVELS = choice_values(AnimalBehaviorProfile.ENERGY_LEVELS) + ['', None]
+    TRAINING_LEVELS = choice_values(AnimalBehaviorProfile.TRAINING_LEVELS) + ['', None]
+    ANIMAL_TYPES = choice_values(Animal.ANIMAL_TYPES) + ['', None]
+    WORK_SCHEDULES = ['', 'Flexible hours', 'Part-time', 'PART TIME mornings', '9-5 office', 'flexible, part-time']
+    CURRENT_PETS = [None, '', 'One dog', 'Two CATS', 'a dog and a cat', 'hamster', 'catahoula mix']
+    SPECIAL_NEEDS = [None, '', 'Needs daily medication']
+
+    @classmethod
+    def random_adopter(cls, rng):
+        return AdopterProfile(
+            housing_type=rng.choice(cls.HOUSING_TYPES),
+            has_yard=rng.random() < 0.5,
+            rent_permission=rng.random() < 0.5,
+            children_in_home=rng.choice([0, 0, 1, 3]),
+            pet_experience=rng.choice(cls.PET_EXPERIENCE),
+            current_pets=rng.choice(cls.CURRENT_PETS),
+            activity_level=rng.choice(cls.ACTIVITY_LEVELS),
+            work_schedule=rng.choice(cls.WORK_SCHEDULES),
+            hours_alone=rng.randint(0, 12),
+            willing_to_train=rng.random() < 0.5,
+            special_needs_capable=rng.random() < 0.5,
+        )
+
+    @classmethod
+    def random_behavior_profile(cls, rng, animal=None):
+        # Unsaved instances: assigning the animal also caches animal.behavior_profile
+        return AnimalBehaviorProfile(
+            animal=animal or Animal(name='Test', animal_type=rng.choice(cls.ANIMAL_TYPES)),
+            energy_level=rng.choice(cls.ENERGY_LEVELS),
+            training_level=rng.choice(cls.TRAINING_LEVELS),
+            good_with_children=rng.random() < 0.5,
+            good_with_dogs=rng.random() < 0.5,
+            good_with_cats=rng.random() < 0.5,
+            good_with_strangers=rng.random() < 0.5,
+            special_needs=rng.choice(cls.SPECIAL_NEEDS),
+        )
+
+
+class CompatibilityBatchParityTests(RandomProfilesMixin, SimpleTestCase):
+    """calculate_compatibility_batch scores every animal exactly like calculate_compatibility"""
+
+    SEED = 20261017
+    ADOPTERS = 200
+    ANIMALS_PER_ADOPTER = 25
+
+    def test_batch_matches_scalar(self):
+        rng = random.Random(self.SEED)
+        matcher = AdoptionMatchingSystem()
+
+        for case in range(self.ADOPTERS):
+            adopter = self.random_adopter(rng)
+            profiles = [self.random_behavior_profile(rng) for _ in range(self.ANIMALS_PER_ADOPTER)]
+
+            batch = matcher.calculate_compatibility_batch(adopter, profiles)
+
+            self.assertEqual(len(batch), len(profiles))
+            for index, (profile, batch_scores) in enumerate(zip(profiles, batch)):
+                scalar_scores = matcher.calculate_compatibility(adopter, profile.animal)
+                with self.subTest(case=case, animal=index):
+                    self.assertEqual(batch_scores, scalar_scores)
+
+    def test_empty_batch(self):
+        adopter = self.random_adopter(random.Random(self.SEED))
+        self.assertEqual(AdoptionMatchingSystem().calculate_compatibility_batch(adopter, []), [])
+
+
+class CompatibilityModelBatchParityTests(RandomProfilesMixin, TestCase):
+    """
+    With a trained compatibility forest, both batch paths score exactly like
+    predict_compatibility, likelihood included
+    """
+
+    SEED = 20261017
+    ADOPTERS = 20
+    ANIMALS = 30
+
+    # Stored on the model, so never None
+    HOUSING_TYPES = choice_values(AdopterProfile.HOUSING_TYPES) + ['']
+    ACTIVITY_LEVELS = choice_values(AdopterProfile.ACTIVITY_LEVELS) + ['']
+    PET_EXPERIENCE = choice_values(AdopterProfile.PET_EXPERIENCE) + ['']
+    ENERGY_LEVELS = choice_values(AnimalBehaviorProfile.ENERGY_LEVELS) + ['']
+    TRAINING_LEVELS = choice_values(AnimalBehaviorProfile.TRAINING_LEVELS) + ['']
+    ANIMAL_TYPES = choice_values(Animal.ANIMAL_TYPES)
+
+    STORED_LIKELIHOOD = 0.875
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(cls.SEED)
+        # bulk_create skips save() signals (match index, clustering)
+        animals = Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', animal_type=rng.choice(cls.ANIMAL_TYPES), gender='MALE', status='AVAILABLE')
+            for i in range(cls.ANIMALS)
+        ])
+        AnimalBehaviorProfile.objects.bulk_create([
+            cls.random_behavior_profile(rng, animal) for animal in animals
+        ])
+
+        # A third scored after their last save, a third saved since, a third never scored
+        now = timezone.now()
+        Animal.objects.filter(pk__in=[animal.pk for animal in animals[0::3]]).update(
+            adoption_likelihood=cls.STORED_LIKELIHOOD, adoption_likelihood_method='original_ml',
+            adoption_likelihood_updated_at=now + timedelta(hours=1),
+        )
+        Animal.objects.filter(pk__in=[animal.pk for animal in animals[1::3]]).update(
+            adoption_likelihood=cls.STORED_LIKELIHOOD, adoption_likelihood_method='original_ml',
+            adoption_likelihood_updated_at=now - timedelta(hours=1),
+        )
+        cls.fresh_ids = {animal.pk for animal in animals[0::3]}
+
+    def setUp(self):
+        # The fitted models below are the only ones the matcher sees
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        patcher = mock.patch.object(model_registry, '_model_dir', model_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        model_registry.invalidate()
+        self.addCleanup(model_registry.invalidate)
+
+        rng = random.Random(self.SEED)
+        self.adopters = [self.random_adopter(rng) for _ in range(self.ADOPTERS)]
+        self.profiles = list(AnimalBehaviorProfile.objects.select_related('animal').order_by('animal_id'))
+
+    def matcher(self, mapped=False):
+        matcher = MLAdoptionMatcher()
+        features = np.array([
+            matcher.prepare_features(adopter, profile)
+            for adopter, profile in itertools.product(self.adopters[:10], self.profiles)
+        ], dtype=np.float64)
+        matcher.scaler = StandardScaler().fit(features)
+        # Targets beyond 0-100 exercise the clipping in both paths
+        targets = np.random.default_rng(0).uniform(-20, 120, len(features))
+        forest = RandomForestRegressor(n_estimators=10, random_state=0).fit(matcher.scaler.transform(features), targets)
+        matcher.compatibility_model = MappedForest.from_forest(forest) if mapped else forest
+        return matcher
+
+    def assert_paths_agree(self, matcher):
+        scalar = {
+            (a, p): matcher.predict_compatibility(adopter, profile)
+            for a, adopter in enumerate(self.adopters)
+            for p, profile in enumerate(self.profiles)
+        }
+        # Scored by the forest, not the rule-based fallback
+        self.assertTrue(all(result.get('confidence') == 'high' for result in scalar.values()))
+
+        for a, adopter in enumerate(self.adopters):
+            for p, result in enumerate(matcher.predict_compatibility_batch(adopter, self.profiles)):
+                with self.subTest(path='batch', adopter=a, animal=p):
+                    self.assertEqual(result, scalar[a, p])
+
+        for p, profile in enumerate(self.profiles):
+            for a, result in enumerate(matcher.predict_compatibility_for_adopters(self.adopters, profile)):
+                with self.subTest(path='for_adopters', adopter=a, animal=p):
+                    self.assertEqual(result, scalar[a, p])
+
+    def test_forest_paths_agree(self):
+        self.assert_paths_agree(self.matcher())
+
+    def test_mapped_forest_paths_agree(self):
+        self.assert_paths_agree(self.matcher(mapped=True))
+
+    def test_stored_likelihood_used_only_while_fresh(self):
+        matcher = self.matcher()
+        for profile in self.profiles:
+            result = matcher.predict_compatibility(self.adopters[0], profile)
+            with self.subTest(animal=profile.animal_id):
+                if profile.animal_id in self.fresh_ids:
+                    self.assertEqual(
+                        (result['adoption_likelihood'], result['prediction_method']),
+                        (self.STORED_LIKELIHOOD, 'original_ml')
+                    )
+                else:
+                    self.assertEqual(result['prediction_method'], 'fallback')
+
+
+class AdoptionLikelihoodBatchParityTests(TestCase):
+    """predict_adoption_likelihood_batch agrees with predict_adoption_likelihood for every animal"""
+
+    KAGGLE = {'size': 'Small', 'time_in_shelter_days': 12, 'previous_owner': 1, 'health_condition': 0}
+
+    LOCATIONS = [
+        # Normal rows
+        {'kaggle_data': KAGGLE},
+        {'lat': 12.9, 'lng': 77.6, 'kaggle_data': {**KAGGLE, 'size': 'Large', 'health_condition': 2}},
+        {'kaggle_data': {'size': 'Medium', 'time_in_shelter_days': 45.5}},
+        # Missing Kaggle data
+        None,
+        {},
+        {'lat': 12.9, 'lng': 77.6},
+        # Null or malformed Kaggle data
+        {'kaggle_data': None},
+        {'kaggle_data': 'not an object'},
+        {'kaggle_data': [KAGGLE]},
+        {'kaggle_data': {}},
+        {'kaggle_data': {**KAGGLE, 'size': None}},
+        {'kaggle_data': {**KAGGLE, 'size': 3}},
+        {'kaggle_data': {**KAGGLE, 'health_condition': '1'}},
+        {'kaggle_data': {**KAGGLE, 'time_in_shelter_days': None}},
+        # Unseen category
+        {'kaggle_data': {**KAGGLE, 'size': 'Enormous'}},
+    ]
+    # Includes ages categorize_age cannot parse and ones only the advanced factors look at
+    AGES = [None, '', '3 weeks', '4 months', 'ten months', '2 years', 'about 5 years', '12 years',
+            'Young', 'Senior', 'unknown']
+    ANIMAL_TYPES = ['DOG', 'CAT', 'OTHER', 'LIZARD']
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(20261017)
+        # bulk_create skips save() signals (match index, clustering)
+        Animal.objects.bulk_create([
+            Animal(
+                name=f'Animal {i}', animal_type=animal_type, gender='MALE', status='AVAILABLE',
+                age_estimate=age, last_location_json=location,
+                weight=rng.choice([None, 4.5, 30.0]), adoption_fee=rng.choice([None, 0.0, 150.0]),
+                vaccinated=rng.random() < 0.5,
+            )
+            for i, (location, age, animal_type) in enumerate(itertools.product(
+                cls.LOCATIONS, cls.AGES, cls.ANIMAL_TYPES
+            ))
+        ])
+
+    def matcher(self, advanced=False, original=False):
+        matcher = MLAdoptionMatcher()
+        matcher.advanced_model_data = {'version': 'test'} if advanced else None
+        matcher.adoption_likelihood_model = None
+        matcher.likelihood_scaler = StandardScaler()
+        matcher.likelihood_encoders = {}
+        if original:
+            rng = np.random.default_rng(0)
+            features = rng.normal(size=(200, 9)) * 10
+            labels = (features.sum(axis=1) > 0).astype(int)
+            matcher.likelihood_scaler.fit(features)
+            matcher.adoption_likelihood_model = LogisticRegression().fit(
+                matcher.likelihood_scaler.transform(features), labels
+            )
+        return matcher
+
+    def assert_batch_matches_scalar(self, matcher):
+        batch = matcher.predict_adoption_likelihood_batch(Animal.objects.all())
+        animals = list(Animal.objects.all())
+        self.assertEqual(len(batch), len(animals))
+
+        for animal in animals:
+            scalar = matcher.predict_adoption_likelihood(animal)
+            row = batch.loc[animal.id]
+            with self.subTest(location=animal.last_location_json, age=animal.age_estimate, type=animal.animal_type):
+                self.assertAlmostEqual(row['adoption_likelihood'], scalar['adoption_likelihood'], places=12)
+                self.assertEqual(row['confidence'], scalar.get('confidence', 'low'))
+                self.assertEqual(row['method'], scalar.get('method', 'fallback'))
+
+    def test_advanced_model(self):
+        self.assert_batch_matches_scalar(self.matcher(advanced=True))
+
+    def test_original_model(self):
+        self.assert_batch_matches_scalar(self.matcher(original=True))
+
+    def test_no_model(self):
+        self.assert_batch_matches_scalar(self.matcher())
+
+    def test_empty_queryset(self):
+        batch = self.matcher(advanced=True).predict_adoption_likelihood_batch(Animal.objects.none())
+        self.assertEqual(list(batch.columns), ['adoption_likelihood', 'confidence', 'method'])
+        self.assertTrue(batch.empty)
+
+
+def fitted_model_data(seed=0):
+    """Model data shaped like adoption_matcher.pkl, small enough to fit in a test"""
+    rng = np.random.default_rng(seed)
+    features = rng.normal(size=(300, 9))
+    scaler = StandardScaler().fit(features)
+    scaled = scaler.transform(features)
+    return {
+        'compatibility_model': RandomForestRegressor(n_estimators=10, random_state=seed).fit(scaled, features[:, 0]),
+        'scaler': scaler,
+        'adoption_likelihood_model': RandomForestClassifier(n_estimators=10, random_state=seed).fit(
+            scaled, (features[:, 1] > 0).astype(int)
+        ),
+        'likelihood_scaler': scaler,
+        'label_encoders': {'size': LabelEncoder().fit(['Small', 'Medium', 'Large'])},
+        'user_type_matrix': pd.DataFrame(rng.random((4, 3)), index=[3, 5, 8, 13], columns=['DOG', 'CAT', 'OTHER']),
+        'version': '2.0',
+    }, features
+
+
+class ModelArtifactTests(SimpleTestCase):
+    """save_artifact -> manifest -> load_artifact round trip"""
+
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+
+    def test_round_trip(self):
+        data, features = fitted_model_data()
+        save_artifact(data, self.model_dir, ADOPTION_MATCHER_FILE)
+
+        manifest = read_manifest(self.model_dir, ADOPTION_MATCHER_FILE)
+        check_manifest(manifest)
+        self.assertEqual(manifest['format_version'], ARTIFACT_FORMAT_VERSION)
+        self.assertEqual(manifest['version'], '2.0')
+        self.assertEqual(manifest['revision'], 1)
+        payload = os.path.join(artifact_dir(self.model_dir, ADOPTION_MATCHER_FILE), manifest['payload'])
+        for name in manifest['arrays']:
+            self.assertTrue(os.path.exists(os.path.join(payload, f'{name}.npy')))
+
+        loaded = load_artifact(self.model_dir, ADOPTION_MATCHER_FILE)
+        scaled = data['scaler'].transform(features)
+
+        forest = loaded['adoption_likelihood_model']
+        self.assertIsInstance(forest, MappedForest)
+        self.assertIsInstance(forest.value, np.memmap)
+        np.testing.assert_array_equal(
+            forest.predict_proba(scaled), data['adoption_likelihood_model'].predict_proba(scaled)
+        )
+        np.testing.assert_array_equal(forest.predict(scaled), data['adoption_likelihood_model'].predict(scaled))
+        np.testing.assert_array_equal(
+            forest.feature_importances_, data['adoption_likelihood_model'].feature_importances_
+        )
+        np.testing.assert_array_equal(
+            loaded['compatibility_model'].predict(scaled), data['compatibility_model'].predict(scaled)
+        )
+
+        self.assertIsInstance(loaded['scaler'].mean_, np.memmap)
+        np.testing.assert_array_equal(loaded['scaler'].transform(features), scaled)
+        self.assertEqual(list(loaded['label_encoders']['size'].transform(['Large', 'Small'])), [0, 2])
+        pd.testing.assert_frame_equal(loaded['user_type_matrix'], data['user_type_matrix'])
+        self.assertEqual(loaded['version'], '2.0')
+
+        # Saving does not touch the caller's objects
+        self.assertIsInstance(data['adoption_likelihood_model'], RandomForestClassifier)
+
+    def test_republishes_loaded_artifact(self):
+        data, features = fitted_model_data()
+        save_artifact(data, self.model_dir, ADOPTION_MATCHER_FILE)
+        save_artifact(load_artifact(self.model_dir, ADOPTION_MATCHER_FILE), self.model_dir, ADOPTION_MATCHER_FILE)
+
+        loaded = load_artifact(self.model_dir, ADOPTION_MATCHER_FILE)
+        scaled = data['scaler'].transform(features)
+        np.testing.assert_array_equal(
+            loaded['adoption_likelihood_model'].predict_proba(scaled),
+            data['adoption_likelihood_model'].predict_proba(scaled),
+        )
+
+    def test_keeps_current_and_previous_revision(self):
+        data, _ = fitted_model_data()
+        for _ in range(3):
+            manifest = save_artifact(data, self.model_dir, ADOPTION_MATCHER_FILE)
+
+        self.assertEqual(manifest['revision'], 3)
+        self.assertEqual(
+            sorted(os.listdir(artifact_dir(self.model_dir, ADOPTION_MATCHER_FILE))),
+            ['manifest.json', 'r000002', 'r000003'],
+        )
+
+    def test_rejects_unknown_format(self):
+        data, _ = fitted_model_data()
+        manifest = save_artifact(data, self.model_dir, ADOPTION_MATCHER_FILE)
+        with open(manifest_path(self.model_dir, ADOPTION_MATCHER_FILE), 'w') as f:
+            json.dump({**manifest, 'format_version': ARTIFACT_FORMAT_VERSION + 1}, f)
+
+        with self.assertRaises(ArtifactFormatError):
+            load_artifact(self.model_dir, ADOPTION_MATCHER_FILE)
+
+    def test_reads_format_1(self):
+        directory = artifact_dir(self.model_dir, ADOPTION_MATCHER_FILE)
+        os.makedirs(directory)
+        joblib.dump({'weights': np.arange(5.0), 'version': '1.0'}, os.path.join(directory, 'model-000001.joblib'))
+        with open(manifest_path(self.model_dir, ADOPTION_MATCHER_FILE), 'w') as f:
+            json.dump({'format_version': 1, 'model': ADOPTION_MATCHER_FILE, 'version': '1.0',
+                       'revision': 1, 'payload': 'model-000001.joblib'}, f)
+
+        loaded = load_artifact(self.model_dir, ADOPTION_MATCHER_FILE)
+        np.testing.assert_array_equal(loaded['weights'], np.arange(5.0))
+
+
+class ConvertModelArtifactsTests(SimpleTestCase):
+    """convert_model_artifacts turns a legacy pickle into an artifact the registry serves"""
+
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        patcher = mock.patch.object(model_registry, '_model_dir', self.model_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(model_registry.invalidate)
+
+    def test_converts_pickle(self):
+        data, features = fitted_model_data()
+        with open(os.path.join(self.model_dir, ADOPTION_MATCHER_FILE), 'wb') as f:
+            pickle.dump(data, f)
+
+        out = StringIO()
+        call_command('convert_model_artifacts', ADOPTION_MATCHER_FILE, '--remove-pickles', stdout=out)
+
+        self.assertIn('Converted 1 models', out.getvalue())
+        self.assertFalse(os.path.exists(os.path.join(self.model_dir, ADOPTION_MATCHER_FILE)))
+        self.assertEqual(read_manifest(self.model_dir, ADOPTION_MATCHER_FILE)['revision'], 1)
+
+        served = model_registry.get(ADOPTION_MATCHER_FILE)
+        scaled = data['scaler'].transform(features)
+        np.testing.assert_array_equal(
+            served['adoption_likelihood_model'].predict_proba(scaled),
+            data['adoption_likelihood_model'].predict_proba(scaled),
+        )
+        self.assertEqual(model_registry.status()[ADOPTION_MATCHER_FILE]['format'], 'artifact')
+
+    def test_skips_missing_pickle(self):
+        out = StringIO()
+        call_command('convert_model_artifacts', ADOPTION_MATCHER_FILE, stdout=out)
+
+        self.assertIn('no pickle found', out.getvalue())
+        self.assertIsNone(read_manifest(self.model_dir, ADOPTION_MATCHER_FILE))
+
+
+@override_settings(ADOPTION_MATCH_INDEX_SIZE=3, ADOPTION_MATCH_INDEX_ASYNC=False)
+class ClusterPredictionTests(RandomProfilesMixin, TestCase):
+    """Clusters are predicted for reads and stored only by signals and assign_clusters"""
+
+    ANIMAL_TYPES = choice_values(Animal.ANIMAL_TYPES)
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(8)
+        # bulk_create skips the signals that would assign clusters
+        animals = Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', animal_type=rng.choice(cls.ANIMAL_TYPES), gender='MALE', status='AVAILABLE',
+                   weight=rng.uniform(2, 40), adoption_fee=rng.choice([50, 100, 250]))
+            for i in range(12)
+        ])
+        AnimalBehaviorProfile.objects.bulk_create([cls.random_behavior_profile(rng, animal) for animal in animals])
+
+    def setUp(self):
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        patcher = mock.patch.object(model_registry, '_model_dir', model_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        model_registry.invalidate()
+        self.addCleanup(model_registry.invalidate)
+        self.model_dir = model_dir
+
+    def train(self):
+        features = np.random.default_rng(8).normal(size=(60, 9)) * [1, 1, 1, 1, 1, 1, 2, 15, 80] + [1, 1, 0, 0, 0, 0, 2, 20, 120]
+        scaler = StandardScaler().fit(features)
+        kmeans = KMeans(n_clusters=3, n_init=10, random_state=0).fit(scaler.transform(features))
+        save_artifact({
+            'kmeans_model': kmeans, 'scaler': scaler,
+            'recommendations': {cluster: [f'Cluster {cluster} advice'] for cluster in range(3)},
+        }, self.model_dir, CLUSTERING_FILE)
+        model_registry.invalidate()
+
+    def profiles(self):
+        return list(AnimalBehaviorProfile.objects.select_related('animal').order_by('pk'))
+
+    def stored_clusters(self):
+        return list(AnimalBehaviorProfile.objects.order_by('pk').values_list('behavior_cluster', flat=True))
+
+    def expected_clusters(self, profiles):
+        predictor = get_cluster_predictor()
+        return [int(cluster) for cluster in predictor.kmeans.predict(predictor.scaler.transform(predictor.features(profiles)))]
+
+    def test_predict_clusters_does_not_write(self):
+        self.train()
+        profiles = self.profiles()
+        with CaptureQueriesContext(connection) as queries:
+            results = predict_clusters(profiles)
+
+        self.assertEqual(len(queries), 0)
+        self.assertEqual([result['cluster_id'] for result in results], self.expected_clusters(profiles))
+        self.assertEqual([profile.behavior_cluster for profile in profiles], self.expected_clusters(profiles))
+        self.assertEqual(set(self.stored_clusters()), {None})
+
+    def test_predict_animal_cluster_does_not_write(self):
+        self.train()
+        profile = self.profiles()[0]
+        with CaptureQueriesContext(connection) as queries:
+            result = predict_animal_cluster(profile)
+
+        self.assertEqual(len(queries), 0)
+        self.assertTrue(result['success'])
+        self.assertEqual(result['recommendations'], [f"Cluster {result['cluster_id']} advice"])
+        self.assertIsNone(AnimalBehaviorProfile.objects.get(pk=profile.pk).behavior_cluster)
+
+    def test_assign_clusters_stores_every_profile(self):
+        self.train()
+        self.assertEqual(assign_clusters(batch_size=5), 12)
+        self.assertEqual(self.stored_clusters(), self.expected_clusters(self.profiles()))
+
+    def test_unavailable_model(self):
+        results = predict_clusters(self.profiles())
+        self.assertEqual(len(results), 12)
+        self.assertTrue(all(result['cluster_id'] == -1 and not result['success'] for result in results))
+        self.assertEqual(assign_clusters(), 0)
+        self.assertEqual(set(self.stored_clusters()), {None})
+
+    def test_signals_reassign_changed_profiles(self):
+        self.train()
+        profile = self.profiles()[0]
+        profile.energy_level = 'VERY_HIGH' if profile.energy_level != 'VERY_HIGH' else 'LOW'
+        profile.save(update_fields=['energy_level'])
+        self.assertEqual(
+            AnimalBehaviorProfile.objects.get(pk=profile.pk).behavior_cluster, self.expected_clusters([profile])[0]
+        )
+
+        # A change to the animal's own cluster features reassigns its profile too
+        animal = profile.animal
+        animal.weight, animal.adoption_fee = 500, 5000
+        animal.save()
+        stored = AnimalBehaviorProfile.objects.select_related('animal').get(pk=profile.pk)
+        self.assertEqual(stored.behavior_cluster, self.expected_clusters([stored])[0])
+
+
+class RecommendationStoreTests(SimpleTestCase):
+
+    ANIMAL_TYPES = ['CAT', 'DOG', 'OTHER']
+
+    def store(self):
+        collaborative, content, hybrid = (RECOMMENDATION_KINDS.index(kind) for kind in ['collaborative', 'content', 'hybrid'])
+        return RecommendationStore.from_scores(
+            [30, 10],
+            np.array([[1.0, 3.0, 2.0], [5.0, 0.0, 1.0]]),
+            np.array([[content, hybrid, collaborative], [collaborative, content, content]]),
+            np.array([[True, True, False], [True, False, True]]),
+            self.ANIMAL_TYPES,
+        )
+
+    def summary(self, store, user_id):
+        return [(rec['animal_type'], rec['score'], rec['type']) for rec in store.lookup(user_id)]
+
+    def test_from_scores_sorts_each_user_once(self):
+        store = self.store()
+        self.assertEqual(list(store.user_ids), [10, 30])
+        self.assertEqual(self.summary(store, 10), [('CAT', 5.0, 'collaborative'), ('OTHER', 1.0, 'content')])
+        self.assertEqual(self.summary(store, 30), [('DOG', 3.0, 'hybrid'), ('CAT', 1.0, 'content')])
+        self.assertEqual(store.lookup(30)[1]['reason'], 'Based on your previous cat adoption')
+        self.assertEqual(store.lookup(20), [])
+
+    def test_dict_round_trip(self):
+        store = RecommendationStore.from_dict(self.store().to_dict())
+        self.assertEqual(self.summary(store, 10), self.summary(self.store(), 10))
+        self.assertEqual(self.summary(store, 30), self.summary(self.store(), 30))
+
+    def test_merged_replaces_and_adds_users(self):
+        updates = RecommendationStore.from_scores(
+            [30, 20],
+            np.array([[4.0, 0.0], [0.0, 2.0]]),
+            np.zeros((2, 2), dtype=int),
+            np.array([[True, False], [False, True]]),
+            ['BIRD', 'DOG'],
+        )
+        merged = self.store().merged(updates)
+
+        self.assertEqual(list(merged.user_ids), [10, 20, 30])
+        self.assertEqual(merged.animal_types, ['CAT', 'DOG', 'OTHER', 'BIRD'])
+        self.assertEqual(self.summary(merged, 10), self.summary(self.store(), 10))
+        self.assertEqual(self.summary(merged, 20), [('DOG', 2.0, 'collaborative')])
+        self.assertEqual(self.summary(merged, 30), [('BIRD', 4.0, 'collaborative')])
+
+
+class CollaborativeRetrainTests(TestCase):
+    """advanced_collaborative_filtering --incremental only recomputes users whose applications changed"""
+
+    # Applications per user, by animal
+    APPLICATIONS = [
+        ['small_dog', 'medium_dog'],
+        ['small_dog', 'cat'],
+        ['cat', 'other_cat'],
+        ['other_cat', 'other'],
+        ['medium_dog', 'other'],
+        ['small_dog', 'other_cat'],
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [get_user_model().objects.create(username=f'adopter{i}', user_type='PUBLIC') for i in range(6)]
+        # bulk_create skips save() signals (match index, clustering, likelihood)
+        animals = Animal.objects.bulk_create([
+            Animal(name=name, animal_type=animal_type, weight=weight, gender='MALE', status='AVAILABLE')
+            for name, animal_type, weight in [
+                ('small_dog', 'DOG', 10), ('medium_dog', 'DOG', 40), ('large_dog', 'DOG', 80),
+                ('cat', 'CAT', 4), ('other_cat', 'CAT', 5), ('other', 'OTHER', 2),
+            ]
+        ])
+        cls.animals = {animal.name: animal for animal in animals}
+        AdoptionApplication.objects.bulk_create([
+            AdoptionApplication(applicant=user, animal=cls.animals[name], why_adopt='Test')
+            for user, names in zip(cls.users, cls.APPLICATIONS) for name in names
+        ])
+
+    def setUp(self):
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        patcher = mock.patch.object(model_registry, '_model_dir', model_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        model_registry.invalidate()
+        self.addCleanup(model_registry.invalidate)
+
+        self.train()
+        self.before = model_registry.get(COLLABORATIVE_FILE)
+
+    def train(self, **options):
+        out = StringIO()
+        call_command('advanced_collaborative_filtering', components=2, stdout=out, **options)
+        return out.getvalue()
+
+    def recommendations(self):
+        store = get_recommendation_store()
+        return {user.pk: store.lookup(user.pk) for user in self.users}
+
+    def test_new_application_only_changes_that_users_row(self):
+        before = self.recommendations()
+        applicant = self.users[0]
+        AdoptionApplication.objects.create(applicant=applicant, animal=self.animals['cat'], why_adopt='Test')
+
+        output = self.train(incremental=True)
+        self.assertIn('Updated recommendations for 1 of 6 users', output)
+
+        after_data = model_registry.get(COLLABORATIVE_FILE)
+        self.assertGreater(after_data['trained_at'], self.before['trained_at'])
+        after = self.recommendations()
+        self.assertNotEqual(after[applicant.pk], before[applicant.pk])
+        self.assertIn('CAT', [rec['animal_type'] for rec in after[applicant.pk]])
+        for user in self.users[1:]:
+            self.assertEqual(after[user.pk], before[user.pk])
+
+        # The stored matrices change in the applicant's row only
+        before_matrix, after_matrix = self.before['user_type_matrix'], after_data['user_type_matrix']
+        self.assertEqual(list(after_matrix.index), list(before_matrix.index))
+        changed = [
+            user_id for user_id in before_matrix.index
+            if not np.array_equal(before_matrix.loc[user_id].to_numpy(), after_matrix.loc[user_id].to_numpy())
+        ]
+        self.assertEqual(changed, [applicant.pk])
+        np.testing.assert_array_equal(
+            np.delete(np.asarray(after_data['user_factors']), 0, axis=0),
+            np.delete(np.asarray(self.before['user_factors']), 0, axis=0),
+        )
+
+    def test_no_changes_keeps_the_model(self):
+        revision = read_manifest(model_registry.model_dir, COLLABORATIVE_FILE)['revision']
+        self.assertIn('No new adoption applications', self.train(incremental=True))
+        self.assertEqual(read_manifest(model_registry.model_dir, COLLABORATIVE_FILE)['revision'], revision)
+
+    def test_new_size_falls_back_to_full_training(self):
+        # 'Large' was not in the trained vocabulary
+        AdoptionApplication.objects.create(applicant=self.users[0], animal=self.animals['large_dog'], why_adopt='Test')
+        output = self.train(incremental=True)
+        self.assertIn('running full training', output)
+        self.assertIn('Large', list(model_registry.get(COLLABORATIVE_FILE)['user_size_matrix'].columns))
+
+
+class MatchIndexTests(TestCase):
+    """Signals keep every adopter's top-K AdoptionMatch rows equal to a full rebuild"""
+
+    SIZE = 3
+
+    # Outscores every animal in BEHAVIOR_PROFILES for the apartment and condo adopters
+    IDEAL_PROFILE = {
+        'energy_level': 'MEDIUM', 'temperament': 'CALM', 'training_level': 'NONE',
+        'good_with_children': True, 'good_with_dogs': True, 'good_with_cats': True, 'good_with_strangers': True,
+    }
+    BEHAVIOR_PROFILES = [
+        {'energy_level': energy, 'temperament': 'ACTIVE', 'training_level': training,
+         'good_with_children': children, 'good_with_dogs': children, 'good_with_cats': not children}
+        for energy, training, children in itertools.product(
+            ['LOW', 'HIGH', 'VERY_HIGH'], ['BASIC', 'ADVANCED'], [True, False]
+        )
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [get_user_model().objects.create(username=f'adopter{i}', user_type='PUBLIC') for i in range(3)]
+        # bulk_create skips save() signals, so the tests decide when the index is built
+        AdopterProfile.objects.bulk_create([
+            AdopterProfile(
+                user=user, housing_type=housing, has_yard=housing == 'HOUSE', children_in_home=children,
+                pet_experience=experience, current_pets=pets, activity_level=activity,
+                work_schedule='Flexible hours', hours_alone=4, budget_for_pet='100',
+            )
+            for user, (housing, children, experience, pets, activity) in zip(users, [
+                ('HOUSE', 2, 'EXPERT', 'One dog', 'VERY_ACTIVE'),
+                ('APARTMENT', 0, 'NONE', 'Two cats', 'SEDENTARY'),
+                ('CONDO', 1, 'BEGINNER', '', 'ACTIVE'),
+            ])
+        ])
+        animals = Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', animal_type='DOG' if i % 2 else 'CAT', gender='MALE', status='AVAILABLE')
+            for i in range(len(cls.BEHAVIOR_PROFILES))
+        ])
+        AnimalBehaviorProfile.objects.bulk_create([
+            AnimalBehaviorProfile(animal=animal, **profile)
+            for animal, profile in zip(animals, cls.BEHAVIOR_PROFILES)
+        ])
+
+    def setUp(self):
+        # No trained models, so scores come from the deterministic rule-based matcher
+        model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, model_dir)
+        patcher = mock.patch.object(model_registry, '_model_dir', model_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        model_registry.invalidate()
+        self.addCleanup(model_registry.invalidate)
+
+        for adopter_profile in AdopterProfile.objects.select_related('user'):
+            rebuild_adopter_matches(adopter_profile)
+
+    def indexed_scores(self, adopter_profile):
+        return list(
+            AdoptionMatch.objects.filter(adopter_id=adopter_profile.user_id)
+            .order_by('-overall_score').values_list('overall_score', flat=True)
+        )
+
+    def rebuilt_scores(self, adopter_profile):
+        _, behavior_profiles = get_available_behavior_profiles()
+        scores = [result['overall_score'] for result in score_animals(adopter_profile, behavior_profiles)]
+        return sorted(scores, reverse=True)[:self.SIZE]
+
+    def assert_index_matches_rebuild(self):
+        # Compare scores rather than animals, since equal scores may tie-break either way
+        for adopter_profile in AdopterProfile.objects.select_related('user'):
+            with self.subTest(adopter=adopter_profile.user.username):
+                self.assertEqual(self.indexed_scores(adopter_profile), self.rebuilt_scores(adopter_profile))
+
+    def test_adopter_profile_save_rebuilds_index(self):
+        adopter_profile = AdopterProfile.objects.first()
+        AdoptionMatch.objects.filter(adopter_id=adopter_profile.user_id).delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            adopter_profile.activity_level = 'SEDENTARY'
+            adopter_profile.save()
+
+        self.assert_index_matches_rebuild()
+
+    def test_new_animal_evicts_lowest_match(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            animal = Animal.objects.create(name='Ideal', animal_type='CAT', gender='FEMALE', status='AVAILABLE')
+        with self.captureOnCommitCallbacks(execute=True):
+            AnimalBehaviorProfile.objects.filter(animal=animal).update(**self.IDEAL_PROFILE)
+            AnimalBehaviorProfile.objects.get(animal=animal).save()
+
+        self.assertEqual(AdoptionMatch.objects.filter(animal=animal).count(), 2)
+        for adopter_profile in AdopterProfile.objects.all():
+            self.assertEqual(AdoptionMatch.objects.filter(adopter_id=adopter_profile.user_id).count(), self.SIZE)
+        self.assert_index_matches_rebuild()
+
+    def test_unavailable_animal_is_replaced(self):
+        match = AdoptionMatch.objects.order_by('-overall_score').first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            animal = match.animal
+            animal.status = 'ADOPTED'
+            animal.save(update_fields=['status'])
+
+        self.assertFalse(AdoptionMatch.objects.filter(animal=animal).exists())
+        self.assert_index_matches_rebuild()
+
+    def test_behavior_profile_change_patches_index(self):
+        match = AdoptionMatch.objects.order_by('-overall_score').first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            behavior_profile = match.animal.behavior_profile
+            behavior_profile.good_with_children = behavior_profile.good_with_cats = False
+            behavior_profile.training_level = 'ADVANCED'
+            behavior_profile.energy_level = 'VERY_HIGH'
+            behavior_profile.save()
+
+        self.assert_index_matches_rebuild()
+
+    def test_animal_is_scored_against_all_adopters_in_one_batch(self):
+        animal = Animal.objects.filter(status='AVAILABLE').first()
+
+        with mock.patch.object(match_index, 'score_animals', wraps=match_index.score_animals) as per_adopter, \
+                mock.patch.object(match_index, 'score_adopters', wraps=match_index.score_adopters) as batched:
+            refresh_animal_matches(animal.pk)
+
+        self.assertEqual(batched.call_count, 1)
+        self.assertEqual(len(batched.call_args.args[0]), AdopterProfile.objects.count())
+        per_adopter.assert_not_called()
+
+    def test_eviction_is_one_statement(self):
+        adopter_ids = list(AdopterProfile.objects.values_list('user_id', flat=True))
+        lowest = {
+            adopter_id: AdoptionMatch.objects.filter(adopter_id=adopter_id).order_by('overall_score', 'id').first().pk
+            for adopter_id in adopter_ids
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            evict_lowest_matches(adopter_ids)
+
+        self.assertEqual(len(queries), 1)
+        self.assertFalse(AdoptionMatch.objects.filter(pk__in=lowest.values()).exists())
+        self.assertEqual(AdoptionMatch.objects.count(), len(adopter_ids) * (self.SIZE - 1))
+
+    def test_unrelated_animal_save_skips_status_lookup(self):
+        animal = Animal.objects.first()
+
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks() as callbacks:
+            animal.name = 'Renamed'
+            animal.save(update_fields=['name'])
+
+        self.assertEqual(len(queries), 1)  # just the UPDATE
+        self.assertEqual(callbacks, [])
+
+    def test_my_matches_returns_top_k(self):
+        adopter_profile = AdopterProfile.objects.select_related('user').first()
+        AdoptionMatch.objects.filter(adopter_id=adopter_profile.user_id).delete()
+        AdoptionMatch.objects.bulk_create([
+            AdoptionMatch(
+                adopter_id=adopter_profile.user_id, animal=animal, overall_score=10.0 * i,
+                lifestyle_score=50, experience_score=50, housing_score=50, family_score=50,
+            )
+            for i, animal in enumerate(Animal.objects.order_by('pk'))
+        ])
+
+        client = APIClient()
+        client.force_authenticate(adopter_profile.user)
+        response = client.get('/api/adoption-matches/my_matches/')
+
+        self.assertEqual(response.status_code, 200)
+        top_scores = sorted(AdoptionMatch.objects.filter(
+            adopter_id=adopter_profile.user_id
+        ).values_list('overall_score', flat=True), reverse=True)[:self.SIZE]
+        self.assertEqual([match['overall_score'] for match in response.data], top_scores)
+
+
+@override_settings(ML_TRAINING_BACKEND='thread', ML_TRAINING_ASYNC=False)
+class TrainingJobTests(TestCase):
+    """A training job publishes a new artifact revision that serving processes pick up"""
+
+    def setUp(self):
+        self.model_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.model_dir)
+        patcher = mock.patch.object(model_registry, '_model_dir', self.model_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        model_registry.invalidate()
+        self.addCleanup(model_registry.invalidate)
+
+        publish_model({'weights': np.zeros(3), 'version': 'v1'}, ADOPTION_MATCHER_FILE)
+        # Another worker process that already serves revision 1
+        self.other_worker = ModelRegistry(model_dir=self.model_dir, reload_interval=0)
+        self.assertEqual(self.other_worker.get(ADOPTION_MATCHER_FILE)['version'], 'v1')
+
+    def run_training(self, trainer):
+        with mock.patch.dict(training_jobs.TRAINING_JOBS, {'adoption_matcher': (trainer, ADOPTION_MATCHER_FILE)}):
+            with self.captureOnCommitCallbacks(execute=True):
+                job = training_jobs.enqueue_training('adoption_matcher')
+        job.refresh_from_db()
+        return job
+
+    def test_job_publishes_new_revision(self):
+        def trainer(output):
+            output.write('Training...\n')
+            publish_model({'weights': np.ones(3), 'version': 'v2'}, ADOPTION_MATCHER_FILE)
+
+        job = self.run_training(trainer)
+
+        self.assertEqual(job.status, 'SUCCEEDED')
+        self.assertEqual(job.model_revision, 2)
+        self.assertEqual(job.message, 'Training...')
+        self.assertEqual(read_manifest(self.model_dir, ADOPTION_MATCHER_FILE)['version'], 'v2')
+        # publish_model invalidates this process; other processes notice the new manifest
+        self.assertEqual(model_registry.get(ADOPTION_MATCHER_FILE)['version'], 'v2')
+        served = self.other_worker.get(ADOPTION_MATCHER_FILE)
+        self.assertEqual(served['version'], 'v2')
+        np.testing.assert_array_equal(served['weights'], np.ones(3))
+        self.assertEqual(self.other_worker.status()[ADOPTION_MATCHER_FILE]['revision'], 2)
+
+    def test_failed_write_keeps_serving_previous_revision(self):
+        def trainer(output):
+            with mock.patch('adoptions.model_artifacts.joblib.dump', side_effect=OSError('disk full')):
+                publish_model({'weights': np.ones(3), 'version': 'v2'}, ADOPTION_MATCHER_FILE)
+
+        job = self.run_training(trainer)
+
+        self.assertEqual(job.status, 'FAILED')
+        self.assertIn('disk full', job.error)
+        self.assertEqual(read_manifest(self.model_dir, ADOPTION_MATCHER_FILE)['revision'], 1)
+        # The temporary payload directory was cleaned up, nothing was renamed into place
+        self.assertEqual(
+            sorted(os.listdir(artifact_dir(self.model_dir, ADOPTION_MATCHER_FILE))), ['manifest.json', 'r000001']
+        )
+        self.assertEqual(self.other_worker.get(ADOPTION_MATCHER_FILE)['version'], 'v1')
+
+    def test_job_without_new_revision_fails(self):
+        job = self.run_training(lambda output: output.write('Not enough data\n'))
+
+        self.assertEqual(job.status, 'FAILED')
+        self.assertEqual(job.error, 'Not enough data')
+        self.assertIsNone(job.model_revision)
+
+    def test_active_job_is_reused(self):
+        active = MLTrainingJob.objects.create(job_type='adoption_matcher', status='RUNNING')
+        self.assertEqual(training_jobs.enqueue_training('adoption_matcher'), active)
+
+    def test_claimed_job_is_not_run_twice(self):
+        job = MLTrainingJob.objects.create(job_type='adoption_matcher', status='RUNNING')
+        self.assertIsNone(training_jobs.run_job(job.pk))
+
+    @override_settings(ML_TRAINING_BACKEND='celery')
+    def test_celery_backend_queues_task(self):
+        with mock.patch('adoptions.tasks.run_training_job.delay') as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                job = training_jobs.enqueue_training('adoption_matcher')
+
+        delay.assert_called_once_with(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'QUEUED')
@@ -0,0 +1,186 @@
+# adoptions/training_jobs.py
+"""
+Background ML training jobs
+
+Training runs outside the request cycle: enqueue_training() records an
+MLTrainingJob and hands it to the configured backend once the transaction
+commits. With ML_TRAINING_BACKEND = 'celery' (production) the job runs as
+a task on a Celery worker (adoptions/tasks.py); with 'thread' it runs on a
+daemon thread in the calling process, or inline when ML_TRAINING_ASYNC is
+off (tests). Each trainer publishes its model as a new artifact revision
+(model_artifacts.publish_model), and serving processes switch to it on
+their next model registry check, without a restart.
+"""
+
+import io
+import time
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.management import call_command
+from django.db import transaction
+from django.utils import timezone
+
+from animal_management.background import BackgroundQueue
+
+from .models import MLTrainingJob
+from .model_artifacts import read_manifest
+from .model_registry import model_registry, ADOPTION_MATCHER_FILE, COLLABORATIVE_FILE, CLUSTERING_FILE
+
+logger = logging.getLogger(__name__)
+
+# Keep the stored log bounded for long training runs
+MAX_LOG_CHARS = 20000
+
+
+class JobOutput(io.TextIOBase):
+    """Writable stream that records training output on its MLTrainingJob"""
+
+    def __init__(self, job, min_interval=2.0):
+        self.job = job
+        self.min_interval = min_interval
+        self._buffer = ''
+        self._saved_at = 0
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer += text
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        if lines:
+            self.job.message = lines[-1][:255]
+        if time.monotonic() - self._saved_at >= self.min_interval:
+            self.flush()
+        return len(text)
+
+    def flush(self):
+        self.job.log = self._buffer[-MAX_LOG_CHARS:]
+        MLTrainingJob.objects.filter(pk=self.job.pk).update(message=self.job.message, log=self.job.log)
+        self._saved_at = time.monotonic()
+
+
+def train_adoption_matcher(output):
+    from .ml_matching import MLAdoptionMatcher
+    from .likelihood import refresh_adoption_likelihood
+    from animals.models import Animal
+
+    output.write('🤖 Training adoption matcher...\n')
+    if MLAdoptionMatcher().train_model():
+        output.write('🔄 Rescoring adoption likelihood...\n')
+        written = refresh_adoption_likelihood(Animal.objects.all())
+        output.write(f'✅ Stored adoption likelihood for {written} animals\n')
+
+
+def train_collaborative_filtering(output):
+    call_command('advanced_collaborative_filtering', stdout=output)
+
+
+def update_collaborative_filtering(output):
+    call_command('advanced_collaborative_filtering', incremental=True, stdout=output)
+
+
+def train_behavioral_clustering(output):
+    call_command('fixed_behavioral_clustering', stdout=output)
+
+
+# job_type -> (trainer, model file it publishes)
+TRAINING_JOBS = {
+    'adoption_matcher': (train_adoption_matcher, ADOPTION_MATCHER_FILE),
+    'collaborative_filtering': (train_collaborative_filtering, COLLABORATIVE_FILE),
+    'collaborative_incremental': (update_collaborative_filtering, COLLABORATIVE_FILE),
+    'behavioral_clustering': (train_behavioral_clustering, CLUSTERING_FILE),
+}
+
+
+def _published_revision(file_name):
+    return (read_manifest(model_registry.model_dir, file_name) or {}).get('revision')
+
+
+def run_job(job_id):
+    """Run one queued training job in the calling thread"""
+    claimed = MLTrainingJob.objects.filter(pk=job_id, status='QUEUED').update(
+        status='RUNNING', started_at=timezone.now()
+    )
+    if not claimed:
+        # Already picked up by another worker
+        return None
+
+    job = MLTrainingJob.objects.get(pk=job_id)
+    trainer, file_name = TRAINING_JOBS[job.job_type]
+    revision_before = _published_revision(file_name)
+    output = JobOutput(job)
+
+    try:
+        trainer(output)
+        revision = _published_revision(file_name)
+        if revision is None or revision == revision_before:
+            raise RuntimeError(job.message or 'Training finished without publishing a model')
+        job.status = 'SUCCEEDED'
+        job.model_revision = revision
+    except Exception as e:
+        logger.exception(f"ML training job {job_id} ({job.job_type}) failed: {e}")
+        job.status = 'FAILED'
+        job.error = str(e)
+
+    output.flush()
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'model_revision', 'error', 'finished_at'])
+    return job
+
+
+class TrainingJobRunner(BackgroundQueue):
+    """
+    Runs queued training jobs one at a time on a daemon thread, so a
+    training run never blocks a request and two runs never overlap.
+    Used by the 'thread' backend.
+    """
+
+    thread_name = 'ml-training'
+    async_setting = 'ML_TRAINING_ASYNC'
+
+    def submit(self, job_id):
+        self.put(job_id)
+
+    def process(self, items):
+        for job_id in items:
+            run_job(job_id)
+
+
+# Global runner instance (one training thread per process)
+training_job_runner = TrainingJobRunner()
+
+
+def submit_job(job_id):
+    """Hand a recorded job to the ML_TRAINING_BACKEND"""
+    if getattr(settings, 'ML_TRAINING_BACKEND', 'celery') == 'celery':
+        from .tasks import run_training_job
+        run_training_job.delay(job_id)
+    else:
+        training_job_runner.submit(job_id)
+
+
+def enqueue_training(job_type, requested_by=None):
+    """
+    Record a training job and start it once the current transaction commits.
+    A job of the same type that is already queued or running is returned
+    instead of starting a second one.
+    """
+    if job_type not in TRAINING_JOBS:
+        raise ValueError(f'Unknown training job type: {job_type}')
+
+    active_jobs = MLTrainingJob.objects.filter(job_type=job_type, status__in=['QUEUED', 'RUNNING'])
+
+    # Jobs orphaned by a restarted worker would otherwise block new runs
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'ML_TRAINING_TIMEOUT', 6 * 3600))
+    active_jobs.filter(created_at__lt=stale_before).update(
+        status='FAILED', error='Abandoned (worker stopped before the job finished)', finished_at=timezone.now()
+    )
+
+    active = active_jobs.first()
+    if active is not None:
+        return active
+
+    job = MLTrainingJob.objects.create(job_type=job_type, requested_by=requested_by)
+    transaction.on_commit(lambda: submit_job(job.pk))
+    return job
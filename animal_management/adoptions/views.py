@@ -7,18 +7,25 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth import get_user_model
 from django.db import transaction
 from django.utils import timezone
-from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication, AdoptionMatch
+from .models import AdopterProfile, AnimalBehaviorProfile, AdoptionApplication, AdoptionMatch, MLTrainingJob
 from .serializers import (
     AdopterProfileSerializer, 
     AnimalBehaviorProfileSerializer, 
     AdoptionApplicationSerializer, 
-    AdoptionMatchSerializer
+    AdoptionMatchSerializer,
+    MLTrainingJobSerializer
 )
 from animals.models import Animal
+from animals.serializers import AnimalSerializer
 from .matching import AdoptionMatchingSystem
 from notifications.services import create_notification
 from .ml_matching import MLAdoptionMatcher
 from community.services import award_points
+from .match_index import (
+    DEFAULT_BEHAVIOR_PROFILE, get_behavior_profiles, get_index_size, rebuild_adopter_matches
+)
+from .training_jobs import enqueue_training
+
 
 class AdopterProfileViewSet(viewsets.ModelViewSet):
     queryset = AdopterProfile.objects.all()
@@ -98,15 +105,7 @@ class AdoptionApplicationViewSet(viewsets.ModelViewSet):
                     # Create a basic behavior profile for animals without one
                     behavior_profile, created = AnimalBehaviorProfile.objects.get_or_create(
                         animal=animal,
-                        defaults={
-                            'energy_level': 'MEDIUM',
-                            'temperament': 'CALM',
-                            'training_level': 'BASIC',
-                            'good_with_children': True,
-                            'good_with_dogs': True,
-                            'good_with_cats': True,
-                            'house_trained': False,
-                        }
+                        defaults=DEFAULT_BEHAVIOR_PROFILE
                     )
                     compatibility = ml_matcher.predict_compatibility(adopter_profile, behavior_profile)
                     application.compatibility_score = compatibility['overall_score']
@@ -334,78 +333,18 @@ class AdoptionMatchViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Get available animals with behavior profiles
-        available_animals = Animal.objects.filter(
-            status='AVAILABLE'
-        ).select_related('behavior_profile')
+        # Build the top-K index on first use; afterwards signals keep it fresh
+        if adopter_profile.matches_indexed_at is None:
+            rebuild_adopter_matches(adopter_profile)
         
-        matches = []
-        matching_system = AdoptionMatchingSystem()
-        ml_matcher = MLAdoptionMatcher()
-        
-        for animal in available_animals:
-            try:
-                # Ensure animal has a behavior profile
-                behavior_profile = None
-                if hasattr(animal, 'behavior_profile'):
-                    behavior_profile = animal.behavior_profile
-                else:
-                    # Create a default behavior profile
-                    behavior_profile, created = AnimalBehaviorProfile.objects.get_or_create(
-                        animal=animal,
-                        defaults={
-                            'energy_level': 'MEDIUM',
-                            'temperament': 'CALM',
-                            'training_level': 'BASIC',
-                            'good_with_children': True,
-                            'good_with_dogs': True,
-                            'good_with_cats': True,
-                            'house_trained': False,
-                        }
-                    )
-                
-                # Try ML matching first, fall back to rule-based
-                try:
-                    scores = ml_matcher.predict_compatibility(adopter_profile, behavior_profile)
-                except:
-                    scores = matching_system.calculate_compatibility(adopter_profile, animal)
-                
-                # Create or update match record
-                match, created = AdoptionMatch.objects.update_or_create(
-                    adopter=request.user,
-                    animal=animal,
-                    defaults={
-                        'overall_score': scores['overall_score'],
-                        'lifestyle_score': scores.get('lifestyle_score', 75),
-                        'experience_score': scores.get('experience_score', 75),
-                        'housing_score': scores.get('housing_score', 75),
-                        'family_score': scores.get('family_score', 75),
-                        'match_reasons': scores.get('match_reasons', ['Compatible lifestyle']),
-                        'potential_challenges': scores.get('potential_challenges', [])
-                    }
-                )
-                matches.append(match)
-                
-            except Exception as e:
-                print(f"Error calculating match for animal {animal.id}: {e}")
-                # Create a basic match with default score
-                match, created = AdoptionMatch.objects.update_or_create(
-                    adopter=request.user,
-                    animal=animal,
-                    defaults={
-                        'overall_score': 75.0,
-                        'lifestyle_score': 75.0,
-                        'experience_score': 75.0,
-                        'housing_score': 75.0,
-                        'family_score': 75.0,
-                        'match_reasons': ['General compatibility'],
-                        'potential_challenges': []
-                    }
-                )
-                matches.append(match)
+        matches = AnimalSerializer.setup_eager_loading(
+            AdoptionMatch.objects.filter(
+                adopter=request.user,
+                animal__status='AVAILABLE'
+            ).select_related('adopter', 'animal'),
+            prefix='animal__'
+        ).order_by('-overall_score')[:get_index_size()]
         
-        # Sort by score
-        matches.sort(key=lambda x: x.overall_score, reverse=True)
         serializer = self.get_serializer(matches, many=True)
         return Response(serializer.data)
 
@@ -437,72 +376,35 @@ class AdoptionMatchViewSet(viewsets.ModelViewSet):
         ml_matcher = MLAdoptionMatcher()
         matching_system = AdoptionMatchingSystem()  # Fallback
     
+        animals, behavior_profiles = get_behavior_profiles(available_animals)
+        
+        # Score every animal in one batch
+        try:
+            all_compatibility = ml_matcher.predict_compatibility_batch(adopter_profile, behavior_profiles)
+            prediction_method = 'ml_enhanced'
+        except Exception as e:
+            print(f"ML batch prediction failed: {e}")
+            # Fall back to rule-based
+            all_compatibility = matching_system.calculate_compatibility_batch(adopter_profile, behavior_profiles)
+            prediction_method = 'rule_based_fallback'
+    
         matches = []
-        for animal in available_animals:
-            try:
-                # Ensure behavior profile exists
-                behavior_profile = None
-                if hasattr(animal, 'behavior_profile'):
-                    behavior_profile = animal.behavior_profile
-                else:
-                    # Create default behavior profile
-                    behavior_profile, created = AnimalBehaviorProfile.objects.get_or_create(
-                        animal=animal,
-                        defaults={
-                            'energy_level': 'MEDIUM',
-                            'temperament': 'CALM',
-                            'training_level': 'BASIC',
-                            'good_with_children': True,
-                            'good_with_dogs': True,
-                            'good_with_cats': True,
-                            'house_trained': False,
-                        }
-                    )
-                
-                # Try ML prediction
-                try:
-                    compatibility = ml_matcher.predict_compatibility(adopter_profile, behavior_profile)
-                    prediction_method = 'ml_enhanced'
-                except Exception as e:
-                    print(f"ML prediction failed for animal {animal.id}: {e}")
-                    # Fall back to rule-based
-                    compatibility = matching_system.calculate_compatibility(adopter_profile, animal)
-                    prediction_method = 'rule_based_fallback'
-                
-                matches.append({
-                    'animal_id': animal.id,
-                    'animal_name': animal.name or 'Unnamed',
-                    'animal_type': animal.animal_type,
-                    'compatibility_score': compatibility['overall_score'],
-                    'prediction_method': prediction_method,
-                    'confidence': compatibility.get('confidence', 'medium'),
-                    'match_reasons': compatibility.get('match_reasons', ['General compatibility']),
-                    'potential_challenges': compatibility.get('potential_challenges', []),
-                    'top_factors': compatibility.get('top_matching_factors', []),
-                    'lifestyle_score': compatibility.get('lifestyle_score', 75),
-                    'experience_score': compatibility.get('experience_score', 75),
-                    'housing_score': compatibility.get('housing_score', 75),
-                    'family_score': compatibility.get('family_score', 75),
-                })
-                
-            except Exception as e:
-                print(f"Error calculating match for animal {animal.id}: {e}")
-                # Provide default match
-                matches.append({
-                    'animal_id': animal.id,
-                    'animal_name': animal.name or 'Unnamed',
-                    'animal_type': animal.animal_type,
-                    'compatibility_score': 70.0,
-                    'prediction_method': 'default',
-                    'confidence': 'low',
-                    'match_reasons': ['Basic compatibility assessment'],
-                    'potential_challenges': ['Profile incomplete - please update for better matching'],
-                    'top_factors': [],
-                    'lifestyle_score': 70.0,
-                    'experience_score': 70.0,
-                    'housing_score': 70.0,
-                    'family_score': 70.0,
-                })
+        for animal, compatibility in zip(animals, all_compatibility):
+            matches.append({
+                'animal_id': animal.id,
+                'animal_name': animal.name or 'Unnamed',
+                'animal_type': animal.animal_type,
+                'compatibility_score': compatibility['overall_score'],
+                'prediction_method': prediction_method,
+                'confidence': compatibility.get('confidence', 'medium'),
+                'match_reasons': compatibility.get('match_reasons', ['General compatibility']),
+                'potential_challenges': compatibility.get('potential_challenges', []),
+                'top_factors': compatibility.get('top_matching_factors', []),
+                'lifestyle_score': compatibility.get('lifestyle_score', 75),
+                'experience_score': compatibility.get('experience_score', 75),
+                'housing_score': compatibility.get('housing_score', 75),
+                'family_score': compatibility.get('family_score', 75),
+            })
     
         # Sort by compatibility score (highest first)
         matches.sort(key=lambda x: x['compatibility_score'], reverse=True)
@@ -511,6 +413,27 @@ class AdoptionMatchViewSet(viewsets.ModelViewSet):
             'adopter_profile_id': adopter_profile_id,
             'total_matches': len(matches),
             'matches': matches[:10],  # Return top 10 matches
-            'ml_model_available': ml_matcher.model is not None,
-            'message': 'Matches calculated using enhanced AI' if ml_matcher.model else 'Matches calculated using smart rules (AI training in progress for better results)'
-        })
\ No newline at end of file
+            'ml_model_available': ml_matcher.compatibility_model is not None,
+            'message': 'Matches calculated using enhanced AI' if ml_matcher.compatibility_model else 'Matches calculated using smart rules (AI training in progress for better results)'
+        })
+
+class MLTrainingJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Start ML training in the background and poll its progress (staff only)"""
+    serializer_class = MLTrainingJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_queryset(self):
+        if self.request.user.user_type in ['STAFF', 'SHELTER'] or self.request.user.is_staff:
+            return MLTrainingJob.objects.select_related('requested_by')
+        return MLTrainingJob.objects.none()
+    
+    def create(self, request):
+        """Queue a training job; returns immediately with the job to poll"""
+        if not (request.user.user_type in ['STAFF', 'SHELTER'] or request.user.is_staff):
+            return Response({'error': 'Permission denied'}, status=status.HTTP_403_FORBIDDEN)
+        
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        
+        job = enqueue_training(serializer.validated_data['job_type'], requested_by=request.user)
+        return Response(self.get_serializer(job).data, status=status.HTTP_202_ACCEPTED)
@@ -4,7 +4,7 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count, Sum, Avg
+from django.db.models import Count, Sum, Avg, F, Q
 from django.core.cache import cache
 
 from .models import PredictionModel, Prediction, TrendAnalysis, SmartAlert
@@ -492,41 +492,49 @@ class PredictiveAnalyticsViewSet(viewsets.ViewSet):
         """
         try:
             from adoptions.ml_matching import MLAdoptionMatcher
-            
-            ml_matcher = MLAdoptionMatcher()
+            from adoptions.likelihood import likelihood_confidence
             
             # Get query parameters
             limit = int(request.GET.get('limit', 20))
             animal_type = request.GET.get('type', None)
             
-            # Build query
-            query = Animal.objects.all()
+            # Build query (stored scores, highest first; unscored animals last)
+            query = Animal.objects.order_by(F('adoption_likelihood').desc(nulls_last=True), 'pk')
             if animal_type:
                 query = query.filter(animal_type=animal_type.upper())
             
-            animals = query[:limit]
+            animals = list(query[:limit])
+            
+            # Animals the refresh job has not reached yet are scored now, in one batch
+            unscored = [animal.id for animal in animals if animal.adoption_likelihood is None]
+            if unscored:
+                likelihoods = MLAdoptionMatcher().predict_adoption_likelihood_batch(
+                    Animal.objects.filter(pk__in=unscored)
+                )
+                for animal in animals:
+                    if animal.id in likelihoods.index:
+                        animal.adoption_likelihood = float(likelihoods.loc[animal.id, 'adoption_likelihood'])
+                        animal.adoption_likelihood_method = likelihoods.loc[animal.id, 'method']
             
             predictions = []
             for animal in animals:
-                try:
-                    prediction = ml_matcher.predict_adoption_likelihood(animal)
-                    
-                    predictions.append({
-                        'id': animal.id,
-                        'name': animal.name,
-                        'animal_type': animal.animal_type,
-                        'breed': animal.breed,
-                        'age_estimate': animal.age_estimate,
-                        'color': animal.color,
-                        'status': animal.status,
-                        'adoption_likelihood': prediction['adoption_likelihood'],
-                        'likelihood_percentage': round(prediction['adoption_likelihood'] * 100, 1),
-                        'confidence': prediction['confidence'],
-                        'top_factors': prediction.get('top_factors', []),
-                        'prediction_method': prediction.get('prediction_method', 'ml')
-                    })
-                except Exception as e:
+                if animal.adoption_likelihood is None:
                     continue
+                
+                predictions.append({
+                    'id': animal.id,
+                    'name': animal.name,
+                    'animal_type': animal.animal_type,
+                    'breed': animal.breed,
+                    'age_estimate': animal.age_estimate,
+                    'color': animal.color,
+                    'status': animal.status,
+                    'adoption_likelihood': animal.adoption_likelihood,
+                    'likelihood_percentage': round(animal.adoption_likelihood * 100, 1),
+                    'confidence': likelihood_confidence(animal.adoption_likelihood_method),
+                    'top_factors': [],
+                    'prediction_method': animal.adoption_likelihood_method
+                })
             
             # Sort by likelihood (highest first)
             predictions.sort(key=lambda x: x['adoption_likelihood'], reverse=True)
@@ -550,42 +558,33 @@ class PredictiveAnalyticsViewSet(viewsets.ViewSet):
         Get animals most likely to be adopted using ML
         """
         try:
-            from adoptions.ml_matching import MLAdoptionMatcher
-            
-            ml_matcher = MLAdoptionMatcher()
-            
-            # Get available animals
-            available_animals = Animal.objects.filter(
-                status__in=['AVAILABLE', 'IN_SHELTER', 'UNDER_TREATMENT']
-            )[:50]
+            # Ranked on the stored score across the whole table
+            likely_animals = Animal.objects.filter(
+                status__in=['AVAILABLE', 'IN_SHELTER', 'UNDER_TREATMENT'],
+                adoption_likelihood__gt=0.5
+            )
             
             candidates = []
-            for animal in available_animals:
-                try:
-                    prediction = ml_matcher.predict_adoption_likelihood(animal)
-                    
-                    if prediction['adoption_likelihood'] > 0.5:
-                        candidates.append({
-                            'id': animal.id,
-                            'name': animal.name,
-                            'animal_type': animal.animal_type,
-                            'breed': animal.breed,
-                            'age_estimate': animal.age_estimate,
-                            'color': animal.color,
-                            'adoption_likelihood': prediction['adoption_likelihood'],
-                            'likelihood_percentage': round(prediction['adoption_likelihood'] * 100, 1),
-                            'top_factors': prediction.get('top_factors', []),
-                            'photos': animal.photos if animal.photos else []
-                        })
-                except:
-                    continue
+            for animal in likely_animals.order_by('-adoption_likelihood')[:10]:
+                candidates.append({
+                    'id': animal.id,
+                    'name': animal.name,
+                    'animal_type': animal.animal_type,
+                    'breed': animal.breed,
+                    'age_estimate': animal.age_estimate,
+                    'color': animal.color,
+                    'adoption_likelihood': animal.adoption_likelihood,
+                    'likelihood_percentage': round(animal.adoption_likelihood * 100, 1),
+                    'top_factors': [],
+                    'photos': animal.photos if animal.photos else []
+                })
             
             # Sort by likelihood
             candidates.sort(key=lambda x: x['adoption_likelihood'], reverse=True)
             
             return Response({
                 'success': True,
-                'total_candidates': len(candidates),
+                'total_candidates': likely_animals.count(),
                 'best_candidates': candidates[:10]
             })
             
@@ -637,28 +636,21 @@ class PredictiveAnalyticsViewSet(viewsets.ViewSet):
                 feature_importance.sort(key=lambda x: x['importance'], reverse=True)
                 insights['feature_importance'] = feature_importance
             
-            # Get adoption statistics
-            test_animals = Animal.objects.filter(
-                last_location_json__kaggle_data__isnull=False
-            )[:100]
-            
-            if test_animals:
-                predictions = []
-                for animal in test_animals:
-                    try:
-                        pred = ml_matcher.predict_adoption_likelihood(animal)
-                        predictions.append(pred['adoption_likelihood'])
-                    except:
-                        continue
-                
-                if predictions:
-                    insights['statistics'] = {
-                        'average_likelihood': round(sum(predictions) / len(predictions), 3),
-                        'high_likelihood_count': len([p for p in predictions if p > 0.7]),
-                        'medium_likelihood_count': len([p for p in predictions if 0.4 <= p <= 0.7]),
-                        'low_likelihood_count': len([p for p in predictions if p < 0.4]),
-                        'total_analyzed': len(predictions)
-                    }
+            # Get adoption statistics from the stored scores
+            statistics = Animal.objects.filter(
+                last_location_json__kaggle_data__isnull=False,
+                adoption_likelihood__isnull=False
+            ).aggregate(
+                average_likelihood=Avg('adoption_likelihood'),
+                high_likelihood_count=Count('id', filter=Q(adoption_likelihood__gt=0.7)),
+                medium_likelihood_count=Count('id', filter=Q(adoption_likelihood__gte=0.4, adoption_likelihood__lte=0.7)),
+                low_likelihood_count=Count('id', filter=Q(adoption_likelihood__lt=0.4)),
+                total_analyzed=Count('id')
+            )
+            
+            if statistics['total_analyzed']:
+                statistics['average_likelihood'] = round(statistics['average_likelihood'], 3)
+                insights['statistics'] = statistics
             
             return Response(insights)
             
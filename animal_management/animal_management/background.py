@@ -0,0 +1,89 @@
+# animal_management/background.py
+"""
+In-process background queues
+
+A BackgroundQueue collects work items (hashable ids; repeats collapse into
+one item) and hands them to process() on a daemon thread started on first
+use, one thread per queue per process. With the queue's `async_setting`
+turned off the items are processed inline by the caller instead, which is
+what tests and management commands rely on.
+
+The queues are best-effort: pending items are lost with their process, so
+each queue has a management command that picks up leftover work from the
+database (build_match_index, run_training_job, dispatch_reports,
+geocode_volunteers).
+"""
+
+import threading
+import logging
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class BackgroundQueue:
+    """Base class: set thread_name and async_setting, implement process()"""
+
+    thread_name = 'background-queue'
+    async_setting = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = {}  # insertion-ordered set
+        self._thread = None
+
+    def put(self, item, delay=None):
+        """Queue one item, after `delay` seconds if given"""
+        if delay:
+            timer = threading.Timer(delay, self.put, args=[item])
+            timer.daemon = True
+            timer.start()
+            return
+        with self._lock:
+            self._pending[item] = None
+        self._dispatch()
+
+    def is_async(self):
+        return self.async_setting is None or getattr(settings, self.async_setting, True)
+
+    def _dispatch(self):
+        if not self.is_async():
+            self.drain()
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            close_old_connections()
+            try:
+                self.drain()
+            except Exception as e:
+                logger.exception(f"Background queue '{self.thread_name}' failed: {e}")
+            finally:
+                close_old_connections()
+
+    def drain(self):
+        """Process every pending item in the calling thread"""
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                items, self._pending = list(self._pending), {}
+            self.process(items)
+
+    def process(self, items):
+        """Handle one batch of items, in the order they were queued"""
+        raise NotImplementedError
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._pending)
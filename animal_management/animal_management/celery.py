@@ -0,0 +1,18 @@
+# animal_management/celery.py
+"""
+Celery application for background work that must not run in the web process
+
+Workers are started with:
+
+    celery -A animal_management worker -Q ml-training --concurrency 1
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'animal_management.settings')
+
+app = Celery('animal_management')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,52 @@
+# animal_management/geo.py
+"""
+Radius queries on the geography PointFields (Animal.geo_location,
+Report.geo_location)
+
+nearby() filters with ST_DWithin, which is answered from the column's GiST
+index (created with the field), and orders by an ST_Distance annotation, so
+only rows inside the radius are read and they come back nearest first.
+"""
+
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 100
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+def point_from_params(params):
+    """Point for ?lat=&lng= (or ?latitude=&longitude=); ValueError if missing or out of range"""
+    lat = params.get('lat', params.get('latitude'))
+    lng = params.get('lng', params.get('longitude'))
+    if lat in (None, '') or lng in (None, ''):
+        raise ValueError('lat and lng are required')
+
+    lat, lng = float(lat), float(lng)
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        raise ValueError('lat/lng out of range')
+    return Point(lng, lat, srid=4326)
+
+
+def nearby_params(params):
+    """(point, radius_km, limit) from the query string, with radius and limit capped"""
+    point = point_from_params(params)
+    radius_km = float(params.get('radius_km', DEFAULT_RADIUS_KM))
+    limit = int(params.get('limit', DEFAULT_LIMIT))
+    if radius_km <= 0 or limit <= 0:
+        raise ValueError('radius_km and limit must be positive')
+    return point, min(radius_km, MAX_RADIUS_KM), min(limit, MAX_LIMIT)
+
+
+def nearby(queryset, point, radius_km, field='geo_location'):
+    """
+    Rows whose `field` lies within radius_km of point, annotated with
+    `distance` (a Distance measure, use .km) and ordered nearest first.
+    Works on values() querysets too.
+    """
+    return queryset.filter(
+        **{f'{field}__dwithin': (point, D(km=radius_km))}
+    ).annotate(distance=Distance(field, point)).order_by('distance')
@@ -0,0 +1,188 @@
+# animal_management/pagination.py
+"""
+Keyset (cursor) pagination shared by the list endpoints
+
+Pages are selected with a WHERE on the ordering key of the last row seen
+instead of COUNT(*) + OFFSET, so page 500 costs the same as page 1 as long
+as an index covers `ordering`. Unlike DRF's CursorPagination, the cursor
+carries the full key (every ordering field, ending with a unique one), so
+ties on a low-cardinality leading field such as priority_level never fall
+back to offsets.
+
+Ordering fields must be non-null. They may also be annotations (e.g. a
+distance) if the subclass lists them in `annotation_fields`, which gives
+the field used to decode their cursor values.
+
+Pages always follow `ordering`, so a view's OrderingFilter parameter is
+rejected when the client asks for pages.
+"""
+
+import json
+import datetime
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    # DjangoJSONEncoder rounds datetimes to milliseconds, which would make
+    # the cursor skip rows created within the same millisecond
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class KeysetPagination(BasePagination):
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    # When True the endpoint stays unpaginated unless the client asks for
+    # pages (sends a cursor or page_size), for callers that expect a list
+    optional = False
+
+    # {annotation name: model field instance} for annotated ordering keys
+    annotation_fields = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.has_next = self.has_previous = False
+        self.results = []
+
+        params = request.query_params
+        if self.optional and self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.check_ordering_param(request, view)
+        self.page_size = self.get_page_size(request)
+        position, reverse = self.decode_cursor(request, queryset.model)
+
+        ordering = [self._flip(field) for field in self.ordering] if reverse else list(self.ordering)
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._after(ordering, position))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_previous, self.has_next = has_more, True
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+
+        self.results = rows
+        return rows
+
+    def check_ordering_param(self, request, view):
+        """Refuse ?ordering= on paginated requests instead of silently ignoring it"""
+        for backend in getattr(view, 'filter_backends', []):
+            if issubclass(backend, OrderingFilter) and request.query_params.get(backend.ordering_param):
+                raise ValidationError({
+                    backend.ordering_param: [
+                        f'Cannot be combined with {self.cursor_query_param} or {self.page_size_query_param}: '
+                        f'pages are ordered by {", ".join(self.ordering)}'
+                    ]
+                })
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+            except (KeyError, ValueError):
+                return self.page_size
+            if page_size > 0:
+                return min(page_size, self.max_page_size)
+        return self.page_size
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def _after(ordering, position):
+        """Rows strictly after `position` in `ordering`: (a, b, c) > (pa, pb, pc) expanded"""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            term = Q(**{ordering[j].lstrip('-'): position[j] for j in range(i)})
+            condition |= term & Q(**{f'{name}__{lookup}': position[i]})
+
+        # Bound the leading column as well so the index range scan starts at the cursor
+        first = ordering[0]
+        bound = Q(**{f"{first.lstrip('-')}__{'lte' if first.startswith('-') else 'gte'}": position[0]})
+        return bound & condition
+
+    def _position(self, row):
+        fields = [field.lstrip('-') for field in self.ordering]
+        if isinstance(row, dict):
+            return [row[field] for field in fields]
+        return [getattr(row, field) for field in fields]
+
+    def encode_cursor(self, position, reverse):
+        payload = json.dumps({'p': position, 'r': int(reverse)}, cls=_CursorEncoder)
+        cursor = urlsafe_b64encode(payload.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request, model):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+            values = payload['p']
+            if len(values) != len(self.ordering):
+                raise ValueError
+            position = [
+                self.get_cursor_field(model, field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+            return position, bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_cursor_field(self, model, name):
+        if name in self.annotation_fields:
+            return self.annotation_fields[name]
+        return model._meta.get_field(name)
+
+    def get_next_link(self):
+        if not self.has_next or not self.results:
+            return None
+        return self.encode_cursor(self._position(self.results[-1]), reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.results:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self._position(self.results[0]), reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True},
+                'previous': {'type': 'string', 'nullable': True},
+                'results': schema,
+            },
+        }
@@ -78,6 +78,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'django.contrib.gis',  
+    'django.contrib.postgres',
     
     # Third-party apps
     'rest_framework',
@@ -254,6 +255,45 @@ DEFAULT_FROM_EMAIL = 'PAWRescue <noreply@pawrescue.com>'
 # Email verification settings
 EMAIL_VERIFICATION_TIMEOUT = 24 * 60 * 60  # 24 hours in seconds
 
+# ML model registry (adoptions/model_registry.py)
+ML_PRELOAD_MODELS = True  # Load models into each worker at startup
+ML_MODEL_RELOAD_INTERVAL = 30  # Seconds between model file change checks
+
+# Adoption match index (adoptions/match_index.py)
+ADOPTION_MATCH_INDEX_SIZE = 50  # Matches kept per adopter
+ADOPTION_MATCH_INDEX_ASYNC = True  # Refresh in a background thread instead of inline
+
+# Celery (animal_management/celery.py)
+CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL', 'redis://redis:6379/2')
+CELERY_TASK_ROUTES = {
+    # One training run at a time: start this queue's worker with --concurrency 1
+    'adoptions.run_training_job': {'queue': 'ml-training'},
+}
+
+# Background ML training (adoptions/training_jobs.py)
+ML_TRAINING_BACKEND = 'celery'  # 'thread' runs jobs on a daemon thread in the web process (tests, local dev)
+ML_TRAINING_ASYNC = True  # With the thread backend: train in the background instead of inside the request
+ML_TRAINING_TIMEOUT = 6 * 3600  # Seconds before an unfinished job is treated as abandoned
+
+# Volunteer geocoding (volunteers/geocoding.py)
+GEOCODER_BACKEND = 'volunteers.geocoding.NominatimGeocoder'  # StaticGeocoder for offline use
+GEOCODER_STATIC_LOCATIONS = {}  # {address: (lat, lng)} answers for StaticGeocoder
+GEOCODER_NEGATIVE_CACHE_TTL = 7 * 24 * 3600  # Seconds before a "not found" answer is looked up again
+VOLUNTEER_GEOCODE_ASYNC = True  # Geocode changed addresses in a background thread
+VOLUNTEER_DEFAULT_LOCATION = (3.1390, 101.6869)  # Kuala Lumpur, for volunteers without a known address
+VOLUNTEER_DISPATCH_UNLOCATED = False  # Dispatch volunteers without a geocoded address as if at the default location
+VOLUNTEER_MAX_RESCUE_DISTANCE_KM = 100  # Outer search radius for dispatch (volunteers' own limits apply within it)
+
+# Volunteer dispatch for new reports (reports/dispatch.py)
+REPORT_DISPATCH_ASYNC = True  # Dispatch in a background thread instead of inside the report request
+REPORT_DISPATCH_MAX_ATTEMPTS = 3
+REPORT_DISPATCH_RETRY_DELAY = 30  # Seconds before the first retry, doubled for each further attempt
+REPORT_DISPATCH_TIMEOUT = 600  # Seconds before a RUNNING dispatch is treated as abandoned
+
+# Rescue GPS tracks (volunteers/tracking.py)
+RESCUE_RECENT_LOCATION_FIXES = 20  # Fixes kept in RescueVolunteerAssignment.location_updates
+RESCUE_LOCATION_BATCH_MAX = 500  # Most fixes accepted per location_batch call
+
 
 # Import Docker settings override - keep this at the end
 try:
@@ -24,7 +24,8 @@ from adoptions.views import (
     AdopterProfileViewSet,
     AnimalBehaviorProfileViewSet,
     AdoptionApplicationViewSet,
-    AdoptionMatchViewSet
+    AdoptionMatchViewSet,
+    MLTrainingJobViewSet
 )
 
 from community.views import (
@@ -95,6 +96,7 @@ router.register(r'adopter-profiles', AdopterProfileViewSet)
 router.register(r'animal-behavior-profiles', AnimalBehaviorProfileViewSet)
 router.register(r'adoption-applications', AdoptionApplicationViewSet)
 router.register(r'adoption-matches', AdoptionMatchViewSet)
+router.register(r'ml-training-jobs', MLTrainingJobViewSet, basename='ml-training-job')
 router.register(r'donation-campaigns', DonationCampaignViewSet)
 router.register(r'recurring-donations', RecurringDonationViewSet)
 router.register(r'donations', DonationViewSet)
@@ -0,0 +1,32 @@
+# Generated by Django 4.2.23 on 2026-10-17 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0004_alter_animal_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='animal',
+            name='adoption_likelihood',
+            field=models.FloatField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='adoption_likelihood_method',
+            field=models.CharField(blank=True, editable=False, max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='animal',
+            name='adoption_likelihood_updated_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['-adoption_likelihood'], name='animal_adoption_likelihood_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 14:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0005_animal_adoption_likelihood'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['status', 'updated_at'], name='animal_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.23 on 2026-10-17 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0006_animal_status_updated_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='animal',
+            index=models.Index(fields=['priority_level', 'created_at', 'id'], name='animal_priority_created_idx'),
+        ),
+    ]
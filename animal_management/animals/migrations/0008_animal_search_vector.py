@@ -0,0 +1,70 @@
+# Generated by Django 4.2.23 on 2026-10-17 15:10
+
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+SEARCH_VECTOR_SQL = """
+CREATE OR REPLACE FUNCTION animals_animal_search_vector_update() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.breed, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.color, '')), 'B') ||
+        setweight(to_tsvector('english',
+            coalesce(NEW.behavior_notes, '') || ' ' ||
+            coalesce(NEW.special_needs, '') || ' ' ||
+            coalesce(NEW.health_status, '')
+        ), 'C');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER animals_animal_search_vector
+    BEFORE INSERT OR UPDATE OF name, breed, color, behavior_notes, special_needs, health_status
+    ON animals_animal
+    FOR EACH ROW EXECUTE FUNCTION animals_animal_search_vector_update();
+
+UPDATE animals_animal SET name = name;
+
+CREATE INDEX animal_search_vector_idx ON animals_animal USING gin (search_vector);
+CREATE INDEX animal_name_trgm_idx ON animals_animal USING gin (name gin_trgm_ops);
+CREATE INDEX animal_breed_trgm_idx ON animals_animal USING gin (breed gin_trgm_ops);
+"""
+
+DROP_SEARCH_VECTOR_SQL = """
+DROP INDEX IF EXISTS animal_breed_trgm_idx;
+DROP INDEX IF EXISTS animal_name_trgm_idx;
+DROP INDEX IF EXISTS animal_search_vector_idx;
+DROP TRIGGER IF EXISTS animals_animal_search_vector ON animals_animal;
+DROP FUNCTION IF EXISTS animals_animal_search_vector_update();
+"""
+
+
+def create_search_trigger(apps, schema_editor):
+    # Other backends (SQLite tests) use the icontains fallback in animals/search.py
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(SEARCH_VECTOR_SQL)
+
+
+def drop_search_trigger(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_SEARCH_VECTOR_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('animals', '0007_animal_priority_created_idx'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='animal',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_trigger, drop_search_trigger),
+    ]
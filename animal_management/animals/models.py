@@ -2,6 +2,7 @@
 # ADD these new status types to the existing STATUS_TYPES tuple
 
 from django.contrib.gis.db import models as gis_models
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
@@ -86,6 +87,14 @@ class Animal(models.Model):
     # Media (EXISTING - keep as is)
     photos = models.JSONField(blank=True, null=True)
     
+    # Materialized ML adoption likelihood (refreshed by adoptions/likelihood.py)
+    adoption_likelihood = models.FloatField(null=True, blank=True, editable=False)
+    adoption_likelihood_method = models.CharField(max_length=30, blank=True, null=True, editable=False)
+    adoption_likelihood_updated_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
+    # Full-text document, maintained by a database trigger (see animals/search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
+    
     # Timestamps (EXISTING - keep as is)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -132,4 +141,9 @@ class Animal(models.Model):
             models.Index(fields=['status', 'priority_level']),
             models.Index(fields=['current_shelter', 'status']),
             models.Index(fields=['quarantine_end_date']),
+            models.Index(fields=['-adoption_likelihood'], name='animal_adoption_likelihood_idx'),
+            # max(updated_at) validators for the compact list
+            models.Index(fields=['status', 'updated_at'], name='animal_status_updated_idx'),
+            # Keyset pagination key (animals.views.AnimalPagination)
+            models.Index(fields=['priority_level', 'created_at', 'id'], name='animal_priority_created_idx'),
         ]
\ No newline at end of file
@@ -0,0 +1,77 @@
+# animals/search.py
+"""
+Animal text search
+
+On PostgreSQL, matches use the weighted `search_vector` column (kept up to
+date by the animals_animal_search_vector trigger, GIN indexed) plus pg_trgm
+similarity on name and breed for misspelt queries ("labrodor"). Both are
+index-backed, so latency does not grow with the table. Other databases
+(SQLite in tests) fall back to icontains matching with a simple rank.
+"""
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramSimilarity
+from django.db import connection
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from rest_framework.filters import BaseFilterBackend
+
+SEARCH_CONFIG = 'english'
+
+# Text columns matched by the fallback (the trigger weights the same columns)
+FALLBACK_FIELDS = ['name', 'breed', 'color', 'behavior_notes', 'special_needs', 'health_status']
+
+
+def search_animals(queryset, query, ranked=True):
+    """
+    Animals in `queryset` matching `query`. With ranked=True the result is
+    annotated with `search_rank` and ordered best match first.
+    """
+    query = (query or '').strip()
+    if not query:
+        return queryset
+    if connection.vendor == 'postgresql':
+        return _postgres_search(queryset, query, ranked)
+    return _fallback_search(queryset, query, ranked)
+
+
+def _postgres_search(queryset, query, ranked):
+    search_query = SearchQuery(query, config=SEARCH_CONFIG, search_type='websearch')
+    queryset = queryset.filter(
+        Q(search_vector=search_query) | Q(name__trigram_similar=query) | Q(breed__trigram_similar=query)
+    )
+    if not ranked:
+        return queryset
+
+    text_rank = Coalesce(SearchRank(F('search_vector'), search_query), Value(0.0), output_field=FloatField())
+    fuzzy_rank = Coalesce(
+        Greatest(TrigramSimilarity('name', query), TrigramSimilarity('breed', query)),
+        Value(0.0), output_field=FloatField()
+    )
+    return queryset.annotate(search_rank=text_rank + fuzzy_rank).order_by('-search_rank', '-id')
+
+
+def _fallback_search(queryset, query, ranked):
+    condition = Q()
+    for field in FALLBACK_FIELDS:
+        condition |= Q(**{f'{field}__icontains': query})
+    queryset = queryset.filter(condition)
+    if not ranked:
+        return queryset
+
+    search_rank = Case(
+        When(name__iexact=query, then=Value(1.0)),
+        When(Q(name__icontains=query) | Q(breed__icontains=query), then=Value(0.6)),
+        When(color__icontains=query, then=Value(0.4)),
+        default=Value(0.2),
+        output_field=FloatField(),
+    )
+    return queryset.annotate(search_rank=search_rank).order_by('-search_rank', '-id')
+
+
+class AnimalSearchFilter(BaseFilterBackend):
+    """`?search=` for the animal list, through search_animals() (order is left to the paginator)"""
+
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        return search_animals(queryset, request.query_params.get(self.search_param), ranked=False)
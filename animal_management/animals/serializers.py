@@ -1,9 +1,60 @@
 # animals/serializers.py - ENHANCED VERSION with new fields for SHELTER operations
 
 from rest_framework import serializers
+from django.db.models import Prefetch, Q
 from .models import Animal
 from users.serializers import UserSerializer
 
+
+# Health data read by AnimalSerializer. The same querysets back the list
+# prefetches (setup_eager_loading) and the per-animal fallback, so both
+# paths see the same rows.
+
+def health_vaccinations_queryset():
+    from healthcare.models import VaccinationRecord
+    return VaccinationRecord.objects.only('id', 'animal_id', 'vaccine_type', 'next_due_date').order_by('next_due_date')
+
+
+def health_medical_records_queryset():
+    """Treatments from the last 30 days plus follow-ups due within 7 days"""
+    from healthcare.models import MedicalRecord
+    from django.utils import timezone
+    
+    today = timezone.now().date()
+    return MedicalRecord.objects.filter(
+        Q(date__gte=today - timezone.timedelta(days=30)) |
+        Q(follow_up_required=True, follow_up_date__lte=today + timezone.timedelta(days=7))
+    ).only('id', 'animal_id', 'date', 'reason', 'follow_up_required', 'follow_up_date').order_by('follow_up_date')
+
+
+def health_prefetches(prefix=''):
+    return [
+        Prefetch(f'{prefix}vaccinations', queryset=health_vaccinations_queryset(), to_attr='health_vaccinations'),
+        Prefetch(f'{prefix}medical_records', queryset=health_medical_records_queryset(), to_attr='health_medical_records'),
+    ]
+
+
+def get_health_vaccinations(animal):
+    if not hasattr(animal, 'health_vaccinations'):
+        animal.health_vaccinations = list(health_vaccinations_queryset().filter(animal=animal))
+    return animal.health_vaccinations
+
+
+def get_health_medical_records(animal):
+    if not hasattr(animal, 'health_medical_records'):
+        animal.health_medical_records = list(health_medical_records_queryset().filter(animal=animal))
+    return animal.health_medical_records
+
+
+def get_health_status(animal):
+    """HealthStatus for the animal or None (cached by select_related or the first access)"""
+    from django.core.exceptions import ObjectDoesNotExist
+    try:
+        return animal.health_status_record
+    except ObjectDoesNotExist:
+        return None
+
+
 class AnimalSerializer(serializers.ModelSerializer):
     current_shelter_details = UserSerializer(source='current_shelter', read_only=True)
     location = serializers.SerializerMethodField()
@@ -84,9 +135,20 @@ class AnimalSerializer(serializers.ModelSerializer):
         }
         return priority_map.get(obj.priority_level, obj.priority_level)
     
+    @staticmethod
+    def setup_eager_loading(queryset, prefix=''):
+        """
+        Load everything the health fields and current_shelter_details need
+        in a constant number of queries, however many animals are serialized.
+        `prefix` is the path to the animal from the queryset's model
+        (e.g. 'animal__' for a queryset of AdoptionMatch rows).
+        """
+        return queryset.select_related(
+            f'{prefix}current_shelter', f'{prefix}health_status_record'
+        ).defer(f'{prefix}search_vector').prefetch_related(*health_prefetches(prefix))
+    
     def get_health_summary(self, obj):
         """Get comprehensive health summary for shelter operations"""
-        from healthcare.models import VaccinationRecord, MedicalRecord, HealthStatus
         from django.utils import timezone
         
         summary = {
@@ -98,20 +160,22 @@ class AnimalSerializer(serializers.ModelSerializer):
         }
         
         try:
+            today = timezone.now().date()
+            
             # Get latest health status
-            health_status = HealthStatus.objects.filter(animal=obj).first()
+            health_status = get_health_status(obj)
             if health_status:
                 summary['last_checkup'] = health_status.last_checkup_date
                 summary['next_checkup'] = health_status.next_checkup_date
                 summary['current_status'] = health_status.current_status
             
             # Get vaccination status
-            vaccinations = VaccinationRecord.objects.filter(animal=obj)
-            if vaccinations.exists():
+            vaccinations = get_health_vaccinations(obj)
+            if vaccinations:
                 # Check if any vaccinations are overdue
-                overdue_vaccinations = vaccinations.filter(
-                    next_due_date__lt=timezone.now().date()
-                ).count()
+                overdue_vaccinations = len([
+                    v for v in vaccinations if v.next_due_date and v.next_due_date < today
+                ])
                 
                 if overdue_vaccinations > 0:
                     summary['vaccination_status'] = 'overdue'
@@ -120,32 +184,29 @@ class AnimalSerializer(serializers.ModelSerializer):
                     summary['vaccination_status'] = 'up_to_date'
                 
                 # Get next vaccination due
-                next_vaccination = vaccinations.filter(
-                    next_due_date__gte=timezone.now().date()
-                ).order_by('next_due_date').first()
-                
-                if next_vaccination:
-                    summary['next_vaccination_due'] = next_vaccination.next_due_date
+                next_due_dates = [v.next_due_date for v in vaccinations if v.next_due_date and v.next_due_date >= today]
+                if next_due_dates:
+                    summary['next_vaccination_due'] = min(next_due_dates)
             
             # Get current treatments
-            recent_treatments = MedicalRecord.objects.filter(
-                animal=obj,
-                date__gte=timezone.now().date() - timezone.timedelta(days=30)
-            )
-            summary['current_treatments'] = recent_treatments.count()
+            recent_treatments = [
+                record for record in get_health_medical_records(obj)
+                if record.date >= today - timezone.timedelta(days=30)
+            ]
+            summary['current_treatments'] = len(recent_treatments)
             
             # Check for follow-up requirements
-            pending_followups = recent_treatments.filter(
-                follow_up_required=True,
-                follow_up_date__lte=timezone.now().date()
-            ).count()
+            pending_followups = len([
+                record for record in recent_treatments
+                if record.follow_up_required and record.follow_up_date and record.follow_up_date <= today
+            ])
             
             if pending_followups > 0:
                 summary['health_alerts'].append(f'{pending_followups} follow-up(s) required')
             
             # Add quarantine alert
             if obj.status == 'QUARANTINE' and obj.quarantine_end_date:
-                days_remaining = (obj.quarantine_end_date - timezone.now().date()).days
+                days_remaining = (obj.quarantine_end_date - today).days
                 if days_remaining <= 3:
                     summary['health_alerts'].append(f'Quarantine ends in {days_remaining} day(s)')
             
@@ -157,21 +218,23 @@ class AnimalSerializer(serializers.ModelSerializer):
     
     def get_next_medical_action(self, obj):
         """Get next recommended medical action"""
-        from healthcare.models import VaccinationRecord, MedicalRecord, HealthStatus
         from django.utils import timezone
         
         actions = []
         
         try:
+            today = timezone.now().date()
+            vaccinations = get_health_vaccinations(obj)
+            
             # Check for overdue vaccinations
-            overdue_vaccinations = VaccinationRecord.objects.filter(
-                animal=obj,
-                next_due_date__lt=timezone.now().date()
-            ).order_by('next_due_date')
+            overdue_vaccinations = sorted(
+                (v for v in vaccinations if v.next_due_date and v.next_due_date < today),
+                key=lambda v: v.next_due_date
+            )
             
-            if overdue_vaccinations.exists():
-                next_overdue = overdue_vaccinations.first()
-                days_overdue = (timezone.now().date() - next_overdue.next_due_date).days
+            if overdue_vaccinations:
+                next_overdue = overdue_vaccinations[0]
+                days_overdue = (today - next_overdue.next_due_date).days
                 actions.append({
                     'type': 'vaccination',
                     'priority': 'high' if days_overdue > 30 else 'medium',
@@ -180,15 +243,17 @@ class AnimalSerializer(serializers.ModelSerializer):
                 })
             
             # Check for upcoming vaccinations
-            upcoming_vaccinations = VaccinationRecord.objects.filter(
-                animal=obj,
-                next_due_date__gte=timezone.now().date(),
-                next_due_date__lte=timezone.now().date() + timezone.timedelta(days=30)
-            ).order_by('next_due_date')
+            upcoming_vaccinations = sorted(
+                (
+                    v for v in vaccinations
+                    if v.next_due_date and today <= v.next_due_date <= today + timezone.timedelta(days=30)
+                ),
+                key=lambda v: v.next_due_date
+            )
             
-            if upcoming_vaccinations.exists() and not overdue_vaccinations.exists():
-                next_upcoming = upcoming_vaccinations.first()
-                days_until = (next_upcoming.next_due_date - timezone.now().date()).days
+            if upcoming_vaccinations and not overdue_vaccinations:
+                next_upcoming = upcoming_vaccinations[0]
+                days_until = (next_upcoming.next_due_date - today).days
                 actions.append({
                     'type': 'vaccination',
                     'priority': 'low' if days_until > 14 else 'medium',
@@ -197,14 +262,17 @@ class AnimalSerializer(serializers.ModelSerializer):
                 })
             
             # Check for pending follow-ups
-            pending_followups = MedicalRecord.objects.filter(
-                animal=obj,
-                follow_up_required=True,
-                follow_up_date__lte=timezone.now().date() + timezone.timedelta(days=7)
-            ).order_by('follow_up_date')
+            pending_followups = sorted(
+                (
+                    record for record in get_health_medical_records(obj)
+                    if record.follow_up_required and record.follow_up_date
+                    and record.follow_up_date <= today + timezone.timedelta(days=7)
+                ),
+                key=lambda record: record.follow_up_date
+            )
             
-            if pending_followups.exists():
-                next_followup = pending_followups.first()
+            if pending_followups:
+                next_followup = pending_followups[0]
                 actions.append({
                     'type': 'followup',
                     'priority': 'high',
@@ -213,9 +281,9 @@ class AnimalSerializer(serializers.ModelSerializer):
                 })
             
             # Check for health checkup
-            health_status = HealthStatus.objects.filter(animal=obj).first()
+            health_status = get_health_status(obj)
             if health_status and health_status.next_checkup_date:
-                if health_status.next_checkup_date <= timezone.now().date() + timezone.timedelta(days=7):
+                if health_status.next_checkup_date <= today + timezone.timedelta(days=7):
                     actions.append({
                         'type': 'checkup',
                         'priority': 'medium',
@@ -229,7 +297,7 @@ class AnimalSerializer(serializers.ModelSerializer):
                     'type': 'emergency',
                     'priority': 'emergency',
                     'description': 'Emergency medical attention required',
-                    'due_date': timezone.now().date()
+                    'due_date': today
                 })
             
         except Exception as e:
@@ -360,4 +428,36 @@ class AnimalListSerializer(serializers.ModelSerializer):
         return obj.is_emergency
     
     def get_days_in_shelter(self, obj):
-        return obj.days_in_shelter
\ No newline at end of file
+        return obj.days_in_shelter
+
+class AnimalCompactSerializer(serializers.Serializer):
+    """
+    Map/grid representation of an animal, built from the dict rows of
+    AnimalCompactSerializer.project() rather than model instances
+    """
+    
+    id = serializers.IntegerField(read_only=True)
+    name = serializers.CharField(read_only=True, allow_null=True)
+    animal_type = serializers.CharField(read_only=True)
+    status = serializers.CharField(read_only=True)
+    photo = serializers.CharField(read_only=True, allow_null=True)
+    location = serializers.SerializerMethodField()
+    
+    @staticmethod
+    def project(queryset):
+        """Only the columns the compact view needs (first photo, lat/lng out of the JSON)"""
+        from django.db.models.fields.json import KeyTransform
+        
+        return queryset.values('id', 'name', 'animal_type', 'status', 'geo_location').annotate(
+            photo=KeyTransform('0', 'photos'),
+            last_lat=KeyTransform('lat', 'last_location_json'),
+            last_lng=KeyTransform('lng', 'last_location_json'),
+        )
+    
+    def get_location(self, row):
+        # Same precedence as Animal.location
+        if row['geo_location']:
+            return {'lat': row['geo_location'].y, 'lng': row['geo_location'].x}
+        if row['last_lat'] is not None and row['last_lng'] is not None:
+            return {'lat': row['last_lat'], 'lng': row['last_lng']}
+        return None
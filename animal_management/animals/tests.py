@@ -1,3 +1,185 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from healthcare.models import HealthStatus, MedicalRecord, VaccinationRecord
+from .models import Animal
+from .views import AnimalPagination
+
+
+class AnimalListQueryCountTests(TestCase):
+    """The animal list costs the same number of queries for any page size"""
+
+    # The keyset page of animals (with shelter and health status joined),
+    # vaccinations, medical records
+    QUERY_BUDGET = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        today = timezone.now().date()
+        shelter = get_user_model().objects.create(username='shelter', user_type='SHELTER')
+        # bulk_create skips save() signals (match index, clustering)
+        animals = Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', animal_type='DOG', gender='MALE', status='IN_SHELTER', current_shelter=shelter)
+            for i in range(20)
+        ])
+        for animal in animals:
+            HealthStatus.objects.create(animal=animal, next_checkup_date=today + timedelta(days=3))
+            VaccinationRecord.objects.create(
+                animal=animal, vaccine_type='RABIES', date_administered=today - timedelta(days=400),
+                next_due_date=today - timedelta(days=35), veterinarian='Dr. Vet'
+            )
+            VaccinationRecord.objects.create(
+                animal=animal, vaccine_type='DISTEMPER', date_administered=today - timedelta(days=10),
+                next_due_date=today + timedelta(days=10), veterinarian='Dr. Vet'
+            )
+            MedicalRecord.objects.create(
+                animal=animal, record_type='TREATMENT', date=today - timedelta(days=5), veterinarian='Dr. Vet',
+                reason='Wound care', follow_up_required=True, follow_up_date=today - timedelta(days=1)
+            )
+
+    def list_animals(self, page_size):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get('/api/animals/', {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return response.data['results'], len(queries)
+
+    def test_query_count_is_constant(self):
+        _, small_page_queries = self.list_animals(5)
+        _, full_page_queries = self.list_animals(20)
+        self.assertEqual(small_page_queries, self.QUERY_BUDGET)
+        self.assertEqual(full_page_queries, self.QUERY_BUDGET)
+
+    def test_health_fields_use_prefetched_data(self):
+        results, _ = self.list_animals(20)
+        animal = results[0]
+
+        self.assertEqual(animal['current_shelter_details']['username'], 'shelter')
+        self.assertEqual(animal['health_summary']['vaccination_status'], 'overdue')
+        self.assertEqual(animal['health_summary']['current_treatments'], 1)
+        self.assertEqual(animal['health_summary']['health_alerts'], [
+            '1 vaccination(s) overdue', '1 follow-up(s) required'
+        ])
+        self.assertEqual(animal['next_medical_action']['priority'], 'high')
+        self.assertIn('RABIES', animal['next_medical_action']['description'])
+
+
+class AnimalCompactViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', animal_type='CAT', gender='FEMALE', status='AVAILABLE',
+                   photos=[f'/media/{i}.jpg'], last_location_json={'lat': 12.9, 'lng': 77.6})
+            for i in range(3)
+        ])
+
+    def test_compact_rows(self):
+        response = APIClient().get('/api/animals/', {'view': 'compact', 'status': 'AVAILABLE'})
+        self.assertEqual(response.status_code, 200)
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'name', 'animal_type', 'status', 'photo', 'location'})
+        self.assertEqual(row['photo'], '/media/2.jpg')
+        self.assertEqual(row['location'], {'lat': 12.9, 'lng': 77.6})
+
+    def test_unchanged_list_is_not_modified(self):
+        client = APIClient()
+        params = {'view': 'compact', 'status': 'AVAILABLE'}
+        etag = client.get('/api/animals/', params)['ETag']
+        self.assertEqual(client.get('/api/animals/', params, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        Animal.objects.filter(pk=Animal.objects.first().pk).update(updated_at=timezone.now() + timedelta(seconds=5))
+        self.assertEqual(client.get('/api/animals/', params, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class AnimalSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        Animal.objects.bulk_create([
+            Animal(name='Bruno', breed='Labrador', animal_type='DOG', gender='MALE', status='AVAILABLE'),
+            Animal(name='Lab', breed='Indie', animal_type='DOG', gender='MALE', status='AVAILABLE'),
+            Animal(name='Misty', breed='Persian', animal_type='CAT', gender='FEMALE', status='AVAILABLE'),
+        ])
+
+    def test_advanced_search_ranks_matches(self):
+        response = APIClient().get('/api/animals/search/advanced/', {'q': 'lab'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['name'] for row in response.data['results']], ['Lab', 'Bruno'])
+
+    def test_list_search_filters(self):
+        response = APIClient().get('/api/animals/', {'search': 'persian'})
+        self.assertEqual([row['name'] for row in response.data['results']], ['Misty'])
+
+
+class KeysetPaginationTests(TestCase):
+    """Cursor pages visit every row exactly once, forwards and backwards"""
+
+    @classmethod
+    def setUpTestData(cls):
+        Animal.objects.bulk_create([
+            Animal(name=f'Animal {i}', animal_type='DOG', gender='MALE', status='AVAILABLE',
+                   priority_level='EMERGENCY' if i % 3 == 0 else 'NORMAL')
+            for i in range(8)
+        ])
+        # Ties on priority and created_at: only the trailing id tells rows apart
+        Animal.objects.update(created_at=timezone.now())
+        cls.expected = list(Animal.objects.order_by('-priority_level', '-created_at', '-id').values_list('id', flat=True))
+
+    def get(self, url, params=None):
+        response = APIClient().get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_forward_and_back(self):
+        pages = []
+        page = self.get('/api/animals/', {'page_size': 3})
+        self.assertIsNone(page['previous'])
+        while True:
+            pages.append([row['id'] for row in page['results']])
+            if page['next'] is None:
+                break
+            page = self.get(page['next'])
+
+        self.assertEqual([len(ids) for ids in pages], [3, 3, 2])
+        self.assertEqual(sum(pages, []), self.expected)
+
+        # Previous links (reverse cursors) retrace the same pages
+        for ids in reversed(pages[:-1]):
+            page = self.get(page['previous'])
+            self.assertEqual([row['id'] for row in page['results']], ids)
+        self.assertIsNone(page['previous'])
+
+    def test_cursor_round_trip(self):
+        paginator = AnimalPagination()
+        paginator.base_url = 'http://testserver/api/animals/'
+        animal = Animal.objects.get(pk=self.expected[4])
+        position = paginator._position(animal)
+
+        url = paginator.encode_cursor(position, reverse=True)
+        request = Request(APIRequestFactory().get(url))
+
+        # Microseconds survive, so rows created in the same millisecond are not skipped
+        self.assertEqual(paginator.decode_cursor(request, Animal), (position, True))
+
+    def test_invalid_cursor_is_not_found(self):
+        wrong_length = urlsafe_b64encode(json.dumps({'p': ['NORMAL'], 'r': 0}).encode()).decode()
+        for cursor in ['not-a-cursor', wrong_length]:
+            with self.subTest(cursor=cursor):
+                response = APIClient().get('/api/animals/', {'cursor': cursor})
+                self.assertEqual(response.status_code, 404)
 
-# Create your tests here.
+    def test_page_size_param(self):
+        paginator = AnimalPagination()
+        for value, expected in [('2', 2), ('100', 100), ('1000', 100), ('0', 20), ('-1', 20), ('lots', 20)]:
+            request = Request(APIRequestFactory().get('/api/animals/', {'page_size': value}))
+            with self.subTest(page_size=value):
+                self.assertEqual(paginator.get_page_size(request), expected)
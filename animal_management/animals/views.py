@@ -1,36 +1,53 @@
-from rest_framework import viewsets, permissions, filters
+from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.pagination import PageNumberPagination
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Animal
-from .serializers import AnimalSerializer
-from django.db.models import Q
+from .serializers import AnimalSerializer, AnimalCompactSerializer
+from .search import AnimalSearchFilter, search_animals
+from django.db.models import Q, Max, Count
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from animal_management.pagination import KeysetPagination
+from animal_management.geo import nearby, nearby_params
+import hashlib
 
-class AnimalPagination(PageNumberPagination):
+class AnimalPagination(KeysetPagination):
+    """Keyset pages in Animal.Meta.ordering (emergencies first), backed by animal_priority_created_idx"""
+    ordering = ('-priority_level', '-created_at', '-id')
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
 
+class CompactAnimalPagination(KeysetPagination):
+    """Keyset pages over the primary key for ?view=compact"""
+    ordering = ('-id',)
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
 class AnimalViewSet(viewsets.ModelViewSet):
     queryset = Animal.objects.all()
     serializer_class = AnimalSerializer
     pagination_class = AnimalPagination  # Add pagination
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, AnimalSearchFilter]
     filterset_fields = ['animal_type', 'gender', 'vaccinated', 'neutered_spayed']
-    search_fields = ['name', 'breed', 'color']
-    ordering_fields = ['created_at', 'intake_date']
+    
+    # Statuses returned by filter/medical when no ?status= is given
+    MEDICAL_STATUSES = ['UNDER_TREATMENT', 'QUARANTINE', 'URGENT_MEDICAL']
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve', 'adoptable']:
+        if self.action in ['list', 'retrieve', 'adoptable', 'advanced_search', 'nearby']:
             return [permissions.AllowAny()] 
         elif self.action in ['create', 'update', 'partial_update', 'destroy']:
             return [permissions.IsAuthenticated()]
         return [permissions.IsAuthenticated()]
 
     def get_queryset(self):
-        queryset = Animal.objects.all()
-        
+        # Health fields and shelter details in a constant number of queries per page
+        return self.apply_param_filters(AnimalSerializer.setup_eager_loading(Animal.objects.all()))
+    
+    def apply_param_filters(self, queryset):
         # Handle comma-separated status filtering
         status_param = self.request.query_params.get('status', None)
         if status_param:
@@ -51,8 +68,108 @@ class AnimalViewSet(viewsets.ModelViewSet):
                 
         return queryset
     
+    def is_compact_view(self):
+        return self.request.query_params.get('view') == 'compact'
+    
+    def list(self, request, *args, **kwargs):
+        if self.is_compact_view():
+            queryset = self.filter_queryset(self.apply_param_filters(Animal.objects.all()))
+            return self.compact_response(queryset)
+        return super().list(request, *args, **kwargs)
+    
+    def compact_response(self, queryset):
+        """
+        Slim, cursor-paginated rows for map and grid views. The ETag and
+        Last-Modified validators come from max(updated_at) and the row count
+        of the filtered set, so an unchanged list is answered with a 304
+        before any row is read.
+        """
+        request = self.request
+        state = queryset.order_by().aggregate(last_modified=Max('updated_at'), total=Count('id'))
+        last_modified = state['last_modified']
+        
+        validator = f"{last_modified.isoformat() if last_modified else ''}:{state['total']}:{request.get_full_path()}"
+        etag = quote_etag(hashlib.md5(validator.encode()).hexdigest())
+        last_modified_ts = int(last_modified.timestamp()) if last_modified else None
+        
+        not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified_ts)
+        if not_modified is None:
+            paginator = CompactAnimalPagination()
+            page = paginator.paginate_queryset(AnimalCompactSerializer.project(queryset), request, view=self)
+            response = paginator.get_paginated_response(AnimalCompactSerializer(page, many=True).data)
+        else:
+            response = not_modified
+        
+        response['ETag'] = etag
+        if last_modified_ts is not None:
+            response['Last-Modified'] = http_date(last_modified_ts)
+        return response
+    
     @action(detail=False, methods=['get'])
     def adoptable(self, request):
-        adoptable = self.queryset.filter(status='AVAILABLE')
+        if self.is_compact_view():
+            return self.compact_response(Animal.objects.filter(status='AVAILABLE'))
+        adoptable = AnimalSerializer.setup_eager_loading(self.queryset.filter(status='AVAILABLE'))
         serializer = self.get_serializer(adoptable, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """Compact rows for animals within ?radius_km= of ?lat=&lng=, nearest first"""
+        try:
+            point, radius_km, limit = nearby_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        
+        queryset = self.filter_queryset(self.apply_param_filters(Animal.objects.all()))
+        rows = list(nearby(AnimalCompactSerializer.project(queryset), point, radius_km)[:limit])
+        data = AnimalCompactSerializer(rows, many=True).data
+        for row, animal in zip(data, rows):
+            row['distance_km'] = round(animal['distance'].km, 2)
+        return Response(data)
+    
+    @action(detail=False, methods=['get'], url_path='search/advanced')
+    def advanced_search(self, request):
+        """Ranked full-text and fuzzy name/breed search (animals/search.py), best match first"""
+        query = request.query_params.get('q') or request.query_params.get('search')
+        if not query:
+            return Response({'error': 'q is required'}, status=400)
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 50)), 1), 100)
+        except ValueError:
+            limit = 50
+        
+        animals = list(search_animals(self.get_queryset(), query)[:limit])
+        data = self.get_serializer(animals, many=True).data
+        for animal, row in zip(animals, data):
+            row['search_rank'] = round(animal.search_rank, 4)
+        
+        return Response({'query': query, 'count': len(data), 'results': data})
+    
+    @action(detail=False, methods=['get'], url_path='filter/medical')
+    def filter_medical(self, request):
+        """Animals in medical care (or the given ?status=), emergencies first"""
+        if request.user.user_type not in ['STAFF', 'SHELTER']:
+            return Response({'error': 'Permission denied'}, status=403)
+        
+        queryset = self.get_queryset()
+        if not request.query_params.get('status'):
+            queryset = queryset.filter(status__in=self.MEDICAL_STATUSES)
+        return self.paginated_response(self.filter_queryset(queryset))
+    
+    @action(detail=False, methods=['get'], url_path='filter/priority')
+    def filter_priority(self, request):
+        """Animals at the given ?priority= levels (default HIGH and EMERGENCY)"""
+        if request.user.user_type not in ['STAFF', 'SHELTER']:
+            return Response({'error': 'Permission denied'}, status=403)
+        
+        queryset = self.get_queryset()
+        if not request.query_params.get('priority'):
+            queryset = queryset.filter(priority_level__in=['HIGH', 'EMERGENCY'])
+        return self.paginated_response(self.filter_queryset(queryset))
+    
+    def paginated_response(self, queryset):
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
\ No newline at end of file
@@ -5,4 +5,5 @@ from . import views
 urlpatterns = [
     path('', views.health_check, name='health_check'),
     path('simple/', views.simple_check, name='simple_check'),
+    path('ml-metrics', views.ml_metrics, name='ml_metrics'),
 ]
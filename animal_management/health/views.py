@@ -1,4 +1,4 @@
-from django.http import JsonResponse
+from django.http import JsonResponse, HttpResponse
 from django.db import connections
 from django.core.cache import cache  # ADD THIS IMPORT
 from django.views.decorators.csrf import csrf_exempt
@@ -91,3 +91,14 @@ def simple_check(request):
         'message': 'Animal Management System is running!',
         'timestamp': time.time()
     })
+
+
+@csrf_exempt
+@require_http_methods(["GET"])
+def ml_metrics(request):
+    """
+    ML inference latency histograms and prediction counts for this worker,
+    in Prometheus text format
+    """
+    from adoptions.monitoring import ml_metrics as metrics
+    return HttpResponse(metrics.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
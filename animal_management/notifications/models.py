@@ -22,6 +22,11 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination keys (notifications.views.NotificationPagination)
+            models.Index(fields=['recipient', 'created_at', 'id'], name='notif_recipient_created_idx'),
+            models.Index(fields=['recipient', 'is_read', 'created_at', 'id'], name='notif_unread_created_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} - {self.recipient.username}"
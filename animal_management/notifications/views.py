@@ -3,11 +3,18 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from .models import Notification
 from .serializers import NotificationSerializer
+from animal_management.pagination import KeysetPagination
+
+class NotificationPagination(KeysetPagination):
+    """Newest first; pages only when the client sends cursor or page_size"""
+    ordering = ('-created_at', '-id')
+    optional = True
 
 class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = NotificationPagination
     
     def get_queryset(self):
         # Users can only see their own notifications
@@ -17,6 +24,9 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def unread(self, request):
         """Get all unread notifications for the current user"""
         unread = Notification.objects.filter(recipient=request.user, is_read=False)
+        page = self.paginate_queryset(unread)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
         serializer = self.get_serializer(unread, many=True)
         return Response(serializer.data)
     
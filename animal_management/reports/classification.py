@@ -0,0 +1,323 @@
+# reports/classification.py
+"""
+Keyword classification of report text
+
+Every keyword list used to derive urgency, animal type and condition from
+a report is declared once in KEYWORD_SETS and compiled into a single regex.
+KeywordClassifier.scan() walks a text once and returns every label whose
+keywords occur in it, for all keyword sets at the same time; the rule
+functions below only combine those labels with the structured fields.
+
+Keywords match as lowercase substrings, as the old `keyword in text`
+checks did. The rules come in two flavours:
+
+- intake_*: applied by Report.save() to new reports
+- full_*: the longer lists used by the fix_report_urgency and
+  fix_animal_types commands, which reclassify the whole table through
+  reclassify_reports()
+
+rescue_features() gives the stored volunteer rescue feed columns
+(Report.update_rescue_features, migration 0011).
+"""
+
+import re
+from collections import defaultdict
+
+# {set name: {label: keywords}}; labels are listed in priority order
+KEYWORD_SETS = {
+    # Report.calculate_urgency, on the description
+    'intake_urgency': {
+        'EMERGENCY': ['injured', 'bleeding', 'hit by car', 'emergency', 'urgent', 'dying', 'trapped'],
+        'HIGH': ['aggressive', 'pregnant', 'babies', 'puppies', 'kittens', 'scared'],
+    },
+    # Report.calculate_urgency, on the animal_condition text
+    'condition_urgency': {
+        'EMERGENCY': ['injured', 'sick', 'bleeding'],
+        'HIGH': ['aggressive', 'pregnant'],
+    },
+    # fix_report_urgency
+    'full_urgency': {
+        'EMERGENCY': [
+            'injured', 'bleeding', 'blood', 'hit by car', 'accident', 'emergency',
+            'urgent', 'dying', 'trapped', 'stuck', 'broken', 'limping', 'wound',
+            'cut', 'bite', 'attack', 'unconscious', 'collapse', "can't move",
+            'help immediately', 'critical', 'severe', 'distress', 'pain'
+        ],
+        'HIGH': [
+            'aggressive', 'attacking', 'biting', 'rabid', 'dangerous',
+            'pregnant', 'giving birth', 'babies', 'puppies', 'kittens', 'newborn',
+            'mother with', 'scared', 'terrified', 'hiding', "won't come out",
+            'multiple animals', 'pack', 'group', 'litter'
+        ],
+        'LOW': [
+            'friendly', 'healthy', 'well', 'calm', 'peaceful', 'just wandering',
+            'just walking', 'seems fine', 'looks good', 'playful'
+        ],
+    },
+    # Report.detect_animal_type and the rescue feed label
+    'animal': {
+        'DOG': ['dog', 'puppy', 'canine', 'pup'],
+        'CAT': ['cat', 'kitten', 'feline', 'kitty'],
+        'BIRD': ['bird', 'chicken', 'duck', 'pigeon'],
+        'RABBIT': ['rabbit', 'bunny'],
+    },
+    # fix_animal_types
+    'full_animal': {
+        'DOG': [
+            'dog', 'puppy', 'canine', 'pup', 'doggie', 'doggy',
+            'terrier', 'retriever', 'bulldog', 'shepherd', 'spaniel',
+            'husky', 'labrador', 'lab', 'poodle', 'beagle', 'boxer',
+            'rottweiler', 'pitbull', 'chihuahua', 'dachshund', 'collie',
+            'barking', 'wagging', 'tail wagging'
+        ],
+        'CAT': [
+            'cat', 'kitten', 'feline', 'kitty', 'kitkat', 'meow',
+            'persian', 'siamese', 'tabby', 'maine coon', 'ragdoll',
+            'calico', 'tortoiseshell', 'purring', 'meowing', 'whiskers'
+        ],
+        'BIRD': ['bird', 'chicken', 'duck', 'pigeon', 'parrot', 'crow', 'sparrow', 'flying', 'wings', 'feathers'],
+        'RABBIT': ['rabbit', 'bunny', 'hare', 'hopping', 'ears', 'fluffy tail'],
+    },
+    # Rescue skill matching, on the animal_condition text
+    'condition': {
+        'injured': ['injured', 'bleeding', 'hurt'],
+        'sick': ['sick', 'ill'],
+        'aggressive': ['aggressive', 'attacking'],
+    },
+    # Rescue skill matching, on the description
+    'description_condition': {
+        'injured': ['injured', 'bleeding', 'hurt', 'wound'],
+        'sick': ['sick', 'ill', 'weak'],
+        'aggressive': ['aggressive', 'attacking', 'biting'],
+        'pregnant': ['pregnant', 'babies', 'puppies'],
+    },
+    # Rescue feed condition summary, on the description
+    'condition_summary': {
+        'Injured - needs immediate help': ['injured', 'bleeding', 'limping', 'hurt'],
+        'Appears sick': ['sick', 'ill', 'weak', 'lethargic'],
+        'Aggressive - approach with caution': ['aggressive', 'attacking', 'biting', 'dangerous'],
+        'Scared and hiding': ['scared', 'hiding', 'terrified', "won't come"],
+        'Pregnant or with offspring': ['pregnant', 'babies', 'puppies', 'kittens'],
+        'Appears healthy': ['healthy', 'well', 'good', 'friendly'],
+    },
+}
+
+# Structured animal_condition_choice values
+EMERGENCY_CONDITIONS = ['INJURED', 'SICK']
+HIGH_PRIORITY_CONDITIONS = ['AGGRESSIVE', 'PREGNANT', 'WITH_BABIES']
+
+CONDITION_SUMMARIES = {
+    'HEALTHY': 'Appears healthy',
+    'INJURED': 'Injured - needs immediate help',
+    'SICK': 'Appears sick',
+    'AGGRESSIVE': 'Aggressive - approach with caution',
+    'SCARED': 'Scared and hiding',
+    'PREGNANT': 'Pregnant',
+    'WITH_BABIES': 'With babies/offspring',
+    'UNKNOWN': 'Condition unknown'
+}
+
+RESCUE_FEATURE_FIELDS = ['rescue_animal_type', 'rescue_animal_label', 'rescue_condition', 'condition_summary']
+
+
+def _trie_pattern(keywords):
+    """Regex for a set of keywords, shaped like their trie; greedy, so the longest keyword wins"""
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie)
+
+
+class KeywordClassifier:
+    """
+    Keyword sets compiled into one pattern. scan() returns
+    {set name: {labels}} for every keyword found in the text.
+
+    The pattern is the keyword trie written as a regex (so each position
+    costs one branch per character, like an Aho-Corasick automaton) inside
+    a lookahead, so it is tried at every position, overlapping keywords
+    included. It reports the longest keyword starting at a position; the
+    shorter keywords that are prefixes of it are credited along with it.
+    """
+
+    def __init__(self, keyword_sets):
+        self.keyword_sets = keyword_sets
+        labels = defaultdict(set)
+        for name, groups in keyword_sets.items():
+            for label, keywords in groups.items():
+                for keyword in keywords:
+                    labels[keyword.lower()].add((name, label))
+
+        self._labels = {
+            keyword: frozenset().union(*(labels[other] for other in labels if keyword.startswith(other)))
+            for keyword in labels
+        }
+        self._pattern = re.compile(f'(?=({_trie_pattern(labels)}))')
+
+    def scan(self, *texts):
+        hits = defaultdict(set)
+        for text in texts:
+            if not text:
+                continue
+            for keyword in set(self._pattern.findall(text.lower())):
+                for name, label in self._labels[keyword]:
+                    hits[name].add(label)
+        return hits
+
+    def first(self, hits, name):
+        """Highest priority label of keyword set `name` in hits, or None"""
+        found = hits.get(name)
+        if found:
+            for label in self.keyword_sets[name]:
+                if label in found:
+                    return label
+        return None
+
+
+classifier = KeywordClassifier(KEYWORD_SETS)
+
+
+def scan_report(description, condition_text):
+    """(description hits, animal_condition hits): one pass over each text"""
+    return classifier.scan(description), classifier.scan(condition_text)
+
+
+def _combined(description_hits, condition_hits):
+    hits = defaultdict(set)
+    for source in (description_hits, condition_hits):
+        for name, labels in source.items():
+            hits[name] |= labels
+    return hits
+
+
+def _structured_urgency(condition_choice):
+    if condition_choice in EMERGENCY_CONDITIONS:
+        return 'EMERGENCY'
+    if condition_choice in HIGH_PRIORITY_CONDITIONS:
+        return 'HIGH'
+    return None
+
+
+def intake_urgency(condition_choice, description_hits, condition_hits):
+    """Urgency for a new report: structured condition, then description, then condition text"""
+    return (
+        _structured_urgency(condition_choice)
+        or classifier.first(description_hits, 'intake_urgency')
+        or classifier.first(condition_hits, 'condition_urgency')
+        or 'NORMAL'
+    )
+
+
+def full_urgency(condition_choice, description_hits, condition_hits):
+    """Urgency from the full keyword lists (may be LOW)"""
+    return (
+        _structured_urgency(condition_choice)
+        or classifier.first(_combined(description_hits, condition_hits), 'full_urgency')
+        or 'NORMAL'
+    )
+
+
+def intake_animal_type(description_hits, condition_hits):
+    return classifier.first(_combined(description_hits, condition_hits), 'animal') or 'OTHER'
+
+
+def full_animal_type(linked_animal_type, description_hits, condition_hits):
+    """Type of a linked Animal if it is specific, else from the full keyword lists; None if unknown"""
+    if linked_animal_type and linked_animal_type != 'OTHER':
+        return linked_animal_type.upper()
+    return classifier.first(_combined(description_hits, condition_hits), 'full_animal')
+
+
+def rescue_features(animal_type=None, linked_animal_type=None, description=None,
+                    condition_choice=None, condition_text=None, hits=None):
+    """
+    Values for the Report.rescue_* / condition_summary columns. `hits` is
+    the scan_report() result when the caller already has it.
+    """
+    description_hits, condition_hits = hits if hits is not None else scan_report(description, condition_text)
+    described_type = classifier.first(description_hits, 'animal')
+
+    # Animal type for skill matching, and the feed label ("Dog Rescue")
+    if animal_type:
+        rescue_animal_type = animal_type.upper()
+        label = f"{animal_type.replace('_', ' ').title()} Rescue"
+    elif linked_animal_type:
+        rescue_animal_type = linked_animal_type.upper()
+        label = f"{linked_animal_type.title()} Rescue"
+    elif described_type:
+        rescue_animal_type = described_type
+        label = f"{described_type.title()} Rescue"
+    else:
+        rescue_animal_type, label = 'UNKNOWN', 'Unknown Animal'
+
+    # Condition for skill matching: structured choice, condition text, description
+    if condition_choice:
+        rescue_condition = condition_choice.lower()
+    else:
+        rescue_condition = (
+            classifier.first(condition_hits, 'condition')
+            or classifier.first(description_hits, 'description_condition')
+            or 'unknown'
+        )
+
+    # Condition shown in the feed
+    if condition_choice:
+        summary = CONDITION_SUMMARIES.get(condition_choice, condition_choice)
+    elif condition_text:
+        summary = condition_text[:100]
+    else:
+        summary = classifier.first(description_hits, 'condition_summary') or 'Condition unknown'
+
+    return {
+        'rescue_animal_type': rescue_animal_type,
+        'rescue_animal_label': label,
+        'rescue_condition': rescue_condition,
+        'condition_summary': summary,
+    }
+
+
+def reclassify_reports(queryset, classify, fields, batch_size=500, dry_run=False):
+    """
+    Stream `queryset` in primary key order, batch_size rows at a time, and
+    yield (report, changes) for every row, where changes is
+    {field: (old, new)} for the values classify(report) changed. Changed
+    rows are written with one bulk_update of `fields` per batch (skipped
+    with dry_run); save() and its signals are not called.
+    """
+    model = queryset.model
+    last_pk = None
+    while True:
+        batch = queryset.order_by('pk')
+        if last_pk is not None:
+            batch = batch.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+
+        changed = []
+        for report in batch:
+            changes = {
+                field: (getattr(report, field), value)
+                for field, value in classify(report).items()
+                if getattr(report, field) != value
+            }
+            yield report, changes
+            if changes:
+                for field, (old, new) in changes.items():
+                    setattr(report, field, new)
+                changed.append(report)
+
+        if changed and not dry_run:
+            model.objects.bulk_update(changed, fields)
+        last_pk = batch[-1].pk
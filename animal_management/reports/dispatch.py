@@ -0,0 +1,113 @@
+# reports/dispatch.py
+"""
+Background volunteer dispatch for new HIGH/EMERGENCY reports
+
+Report.save() only marks the report QUEUED; once the transaction commits
+the report id is handed to a worker thread (or dispatched inline when
+REPORT_DISPATCH_ASYNC is off), so submitting a report never waits for
+volunteer matching or notifications. Report.dispatch_status is the state
+the reporter (and staff) can poll.
+
+run_dispatch() takes only a report id and is safe to call more than once:
+a report is claimed with a QUEUED -> RUNNING update, volunteers already
+assigned are skipped, and (volunteer, report) is unique. Failed attempts
+are retried with a growing delay up to REPORT_DISPATCH_MAX_ATTEMPTS (by
+the worker thread; with REPORT_DISPATCH_ASYNC off they wait for the next
+dispatch_reports run); `manage.py dispatch_reports` also picks up work left
+behind by a restarted process.
+"""
+
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from animal_management.background import BackgroundQueue
+
+from .models import Report
+
+logger = logging.getLogger(__name__)
+
+
+def get_max_attempts():
+    return getattr(settings, 'REPORT_DISPATCH_MAX_ATTEMPTS', 3)
+
+
+def run_dispatch(report_id):
+    """
+    Assign volunteers to one queued report in the calling thread. Returns
+    the resulting dispatch_status, or None if the report was not queued.
+    """
+    claimed = Report.objects.filter(pk=report_id, dispatch_status='QUEUED').update(
+        dispatch_status='RUNNING', dispatch_attempts=F('dispatch_attempts') + 1, dispatch_started_at=timezone.now()
+    )
+    if not claimed:
+        # Already dispatched, or picked up by another worker
+        return None
+
+    report = Report.objects.get(pk=report_id)
+    try:
+        from volunteers.services import RescueVolunteerService
+        assignments = RescueVolunteerService.assign_volunteers_to_rescue(report)
+    except Exception as e:
+        logger.exception(f"Volunteer dispatch for report {report_id} failed (attempt {report.dispatch_attempts}): {e}")
+        return _failed(report, e)
+
+    # An earlier attempt may have assigned volunteers before failing
+    if assignments or report.volunteer_assignments.exists():
+        report.dispatch_status = 'DISPATCHED'
+        report.dispatched_at = timezone.now()
+        report.dispatch_error = None
+        update_fields = ['dispatch_status', 'dispatched_at', 'dispatch_error']
+        if report.status == 'PENDING':
+            report.status = 'ASSIGNED'
+            update_fields.append('status')
+        report.save(update_fields=update_fields)
+    else:
+        Report.objects.filter(pk=report_id).update(dispatch_status='NO_VOLUNTEERS')
+        report.dispatch_status = 'NO_VOLUNTEERS'
+    return report.dispatch_status
+
+
+def _failed(report, error):
+    if report.dispatch_attempts < get_max_attempts():
+        status = 'QUEUED'
+        delay = getattr(settings, 'REPORT_DISPATCH_RETRY_DELAY', 30) * 2 ** (report.dispatch_attempts - 1)
+    else:
+        status, delay = 'FAILED', None
+
+    Report.objects.filter(pk=report.pk).update(dispatch_status=status, dispatch_error=str(error)[:1000])
+    if delay is not None and getattr(settings, 'REPORT_DISPATCH_ASYNC', True):
+        report_dispatch_queue.enqueue(report.pk, delay=delay)
+    # Without the worker thread the report just stays QUEUED for dispatch_reports
+    return status
+
+
+class ReportDispatchQueue(BackgroundQueue):
+    """Report ids waiting for volunteer dispatch, drained by a daemon thread"""
+
+    thread_name = 'report-dispatch'
+    async_setting = 'REPORT_DISPATCH_ASYNC'
+
+    def enqueue(self, report_id, delay=None):
+        self.put(report_id, delay=delay)
+
+    def process(self, items):
+        for report_id in items:
+            run_dispatch(report_id)
+
+
+# Global queue instance (one dispatch thread per process)
+report_dispatch_queue = ReportDispatchQueue()
+
+
+def pending_dispatches():
+    """
+    Ids of reports whose dispatch has not finished: QUEUED ones (e.g. a
+    retry timer lost with its process) and RUNNING ones older than
+    REPORT_DISPATCH_TIMEOUT, which are put back to QUEUED
+    """
+    stale_before = timezone.now() - timedelta(seconds=getattr(settings, 'REPORT_DISPATCH_TIMEOUT', 600))
+    Report.objects.filter(dispatch_status='RUNNING', dispatch_started_at__lt=stale_before).update(dispatch_status='QUEUED')
+    return list(Report.objects.filter(dispatch_status='QUEUED').order_by('created_at').values_list('pk', flat=True))
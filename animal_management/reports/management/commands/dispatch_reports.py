@@ -0,0 +1,17 @@
+# reports/management/commands/dispatch_reports.py
+
+from django.core.management.base import BaseCommand
+from reports.dispatch import pending_dispatches, run_dispatch
+
+
+class Command(BaseCommand):
+    help = 'Dispatch volunteers for queued reports, including dispatches left unfinished by a stopped worker'
+
+    def handle(self, *args, **options):
+        report_ids = pending_dispatches()
+        for report_id in report_ids:
+            status = run_dispatch(report_id)
+            if status:
+                self.stdout.write(f"🚑 Report #{report_id}: {status}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Processed {len(report_ids)} queued reports"))
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.23 on 2026-10-17 14:40
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reports', '0008_report_animal_behavior_report_animal_size_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['created_at', 'id'], name='report_created_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['reporter', 'created_at', 'id'], name='report_reporter_created_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.23 on 2026-10-17 16:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0009_report_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='dispatch_status',
+            field=models.CharField(choices=[('NOT_REQUIRED', 'Not Required'), ('QUEUED', 'Queued'), ('RUNNING', 'Finding Volunteers'), ('DISPATCHED', 'Volunteers Notified'), ('NO_VOLUNTEERS', 'No Volunteers Available'), ('FAILED', 'Failed')], default='NOT_REQUIRED', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='dispatch_attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='dispatch_error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='dispatch_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='dispatched_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
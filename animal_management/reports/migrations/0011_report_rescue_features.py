@@ -0,0 +1,141 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:10
+
+from django.db import migrations, models
+
+
+# The rules of reports.classification.rescue_features() as of this
+# migration, frozen here so the backfill does not change when the live
+# keyword lists do. Keywords match as lowercase substrings; labels are in
+# priority order.
+ANIMAL_KEYWORDS = {
+    'DOG': ['dog', 'puppy', 'canine', 'pup'],
+    'CAT': ['cat', 'kitten', 'feline', 'kitty'],
+    'BIRD': ['bird', 'chicken', 'duck', 'pigeon'],
+    'RABBIT': ['rabbit', 'bunny'],
+}
+CONDITION_KEYWORDS = {
+    'injured': ['injured', 'bleeding', 'hurt'],
+    'sick': ['sick', 'ill'],
+    'aggressive': ['aggressive', 'attacking'],
+}
+DESCRIPTION_CONDITION_KEYWORDS = {
+    'injured': ['injured', 'bleeding', 'hurt', 'wound'],
+    'sick': ['sick', 'ill', 'weak'],
+    'aggressive': ['aggressive', 'attacking', 'biting'],
+    'pregnant': ['pregnant', 'babies', 'puppies'],
+}
+CONDITION_SUMMARY_KEYWORDS = {
+    'Injured - needs immediate help': ['injured', 'bleeding', 'limping', 'hurt'],
+    'Appears sick': ['sick', 'ill', 'weak', 'lethargic'],
+    'Aggressive - approach with caution': ['aggressive', 'attacking', 'biting', 'dangerous'],
+    'Scared and hiding': ['scared', 'hiding', 'terrified', "won't come"],
+    'Pregnant or with offspring': ['pregnant', 'babies', 'puppies', 'kittens'],
+    'Appears healthy': ['healthy', 'well', 'good', 'friendly'],
+}
+CONDITION_SUMMARIES = {
+    'HEALTHY': 'Appears healthy',
+    'INJURED': 'Injured - needs immediate help',
+    'SICK': 'Appears sick',
+    'AGGRESSIVE': 'Aggressive - approach with caution',
+    'SCARED': 'Scared and hiding',
+    'PREGNANT': 'Pregnant',
+    'WITH_BABIES': 'With babies/offspring',
+    'UNKNOWN': 'Condition unknown'
+}
+RESCUE_FEATURE_FIELDS = ['rescue_animal_type', 'rescue_animal_label', 'rescue_condition', 'condition_summary']
+
+
+def first_label(keyword_sets, text):
+    if not text:
+        return None
+    text = text.lower()
+    for label, keywords in keyword_sets.items():
+        if any(keyword in text for keyword in keywords):
+            return label
+    return None
+
+
+def rescue_features(animal_type, linked_animal_type, description, condition_choice, condition_text):
+    described_type = first_label(ANIMAL_KEYWORDS, description)
+
+    if animal_type:
+        rescue_animal_type = animal_type.upper()
+        label = f"{animal_type.replace('_', ' ').title()} Rescue"
+    elif linked_animal_type:
+        rescue_animal_type = linked_animal_type.upper()
+        label = f"{linked_animal_type.title()} Rescue"
+    elif described_type:
+        rescue_animal_type = described_type
+        label = f"{described_type.title()} Rescue"
+    else:
+        rescue_animal_type, label = 'UNKNOWN', 'Unknown Animal'
+
+    if condition_choice:
+        rescue_condition = condition_choice.lower()
+    else:
+        rescue_condition = (
+            first_label(CONDITION_KEYWORDS, condition_text)
+            or first_label(DESCRIPTION_CONDITION_KEYWORDS, description)
+            or 'unknown'
+        )
+
+    if condition_choice:
+        summary = CONDITION_SUMMARIES.get(condition_choice, condition_choice)
+    elif condition_text:
+        summary = condition_text[:100]
+    else:
+        summary = first_label(CONDITION_SUMMARY_KEYWORDS, description) or 'Condition unknown'
+
+    return dict(zip(RESCUE_FEATURE_FIELDS, (rescue_animal_type, label, rescue_condition, summary)))
+
+
+def backfill_rescue_features(apps, schema_editor):
+    Report = apps.get_model('reports', 'Report')
+    batch = []
+    for report in Report.objects.select_related('animal').iterator(chunk_size=500):
+        features = rescue_features(
+            animal_type=report.animal_type,
+            linked_animal_type=report.animal.animal_type if report.animal_id and not report.animal_type else None,
+            description=report.description,
+            condition_choice=report.animal_condition_choice,
+            condition_text=report.animal_condition,
+        )
+        for field, value in features.items():
+            setattr(report, field, value)
+        batch.append(report)
+        if len(batch) >= 500:
+            Report.objects.bulk_update(batch, RESCUE_FEATURE_FIELDS)
+            batch = []
+    if batch:
+        Report.objects.bulk_update(batch, RESCUE_FEATURE_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0010_report_dispatch_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='rescue_animal_type',
+            field=models.CharField(blank=True, default='UNKNOWN', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='rescue_animal_label',
+            field=models.CharField(blank=True, default='Unknown Animal', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='rescue_condition',
+            field=models.CharField(blank=True, default='unknown', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='report',
+            name='condition_summary',
+            field=models.CharField(blank=True, default='Condition unknown', max_length=100),
+        ),
+        migrations.RunPython(backfill_rescue_features, migrations.RunPython.noop),
+    ]
@@ -5,6 +5,9 @@ from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from animals.models import Animal
+from .classification import (
+    RESCUE_FEATURE_FIELDS, intake_animal_type, intake_urgency, rescue_features, scan_report
+)
 
 
 class Report(models.Model):
@@ -41,6 +44,16 @@ class Report(models.Model):
         ('WITH_BABIES', 'With Babies'),
         ('UNKNOWN', 'Unknown'),
     )
+    
+    # Background volunteer dispatch (reports/dispatch.py)
+    DISPATCH_STATUS_CHOICES = (
+        ('NOT_REQUIRED', 'Not Required'),
+        ('QUEUED', 'Queued'),
+        ('RUNNING', 'Finding Volunteers'),
+        ('DISPATCHED', 'Volunteers Notified'),
+        ('NO_VOLUNTEERS', 'No Volunteers Available'),
+        ('FAILED', 'Failed'),
+    )
 
     # NEW: Animal size choices for volunteer safety
     SIZE_CHOICES = (
@@ -203,6 +216,24 @@ class Report(models.Model):
     backup_requested = models.BooleanField(default=False)
     volunteer_can_respond = models.BooleanField(default=False)
     
+    # Volunteer dispatch state, polled by the reporter
+    dispatch_status = models.CharField(max_length=20, choices=DISPATCH_STATUS_CHOICES, default='NOT_REQUIRED')
+    dispatch_attempts = models.IntegerField(default=0)
+    dispatch_error = models.TextField(blank=True, null=True)
+    dispatch_started_at = models.DateTimeField(null=True, blank=True)
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+    
+    # Rescue feed features, derived from the report text on save (reports/classification.py)
+    rescue_animal_type = models.CharField(max_length=20, default='UNKNOWN', blank=True)
+    rescue_animal_label = models.CharField(max_length=50, default='Unknown Animal', blank=True)
+    rescue_condition = models.CharField(max_length=20, default='unknown', blank=True)
+    condition_summary = models.CharField(max_length=100, default='Condition unknown', blank=True)
+    
+    # Fields the rescue features are derived from
+    RESCUE_FEATURE_SOURCES = {
+        'animal_type', 'animal', 'animal_id', 'description', 'animal_condition', 'animal_condition_choice'
+    }
+    
     # Your existing property (KEEP EXACTLY AS IS)
     @property
     def location(self):
@@ -266,97 +297,80 @@ class Report(models.Model):
             year = self.created_at.year if self.created_at else timezone.now().year
             # Format: PWR-YYYY-NNNN (e.g., PWR-2025-0001)
             self.tracking_id = f"PWR-{year}-{self.id:04d}"
-            self.save(update_fields=['tracking_id'])
+            # Column update only: no second save() (signals, auto_now, full row write)
+            Report.objects.filter(pk=self.pk).update(tracking_id=self.tracking_id)
     	return self.tracking_id
     
     # NEW: Add rescue-related methods
     def save(self, *args, **kwargs):
         is_new = self.pk is None
+        
+        update_fields = kwargs.get('update_fields')
+        refresh_features = update_fields is None or bool(self.RESCUE_FEATURE_SOURCES.intersection(update_fields))
+        
+        # One keyword scan of the text serves every derived field below
+        hits = self.scan_text() if is_new or refresh_features else None
 
         if is_new and not self.animal_type:
-            self.animal_type = self.detect_animal_type()
+            self.animal_type = self.detect_animal_type(hits)
         
         # Set urgency based on condition if not explicitly set
         if is_new and self.urgency_level == 'NORMAL':
-            self.urgency_level = self.calculate_urgency()
+            self.urgency_level = self.calculate_urgency(hits)
+        
+        # Auto-assign volunteers for new high-priority reports (in the background)
+        dispatch = is_new and self.urgency_level in ['HIGH', 'EMERGENCY']
+        if dispatch:
+            self.dispatch_status = 'QUEUED'
+        
+        if refresh_features:
+            self.update_rescue_features(hits)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields).union(RESCUE_FEATURE_FIELDS)
         
         super().save(*args, **kwargs)
 
         if is_new and not self.tracking_id:
             self.generate_tracking_id()
         
-        # Auto-assign volunteers for new high-priority reports
-        if is_new and self.urgency_level in ['HIGH', 'EMERGENCY']:
+        if dispatch:
             self.auto_assign_volunteers()
     
-    def calculate_urgency(self):
+    def scan_text(self):
+        """Keyword hits for the description and condition text (reports/classification.py)"""
+        return scan_report(self.description, self.animal_condition)
+    
+    def calculate_urgency(self, hits=None):
         """Calculate urgency level based on animal condition and description"""
-        # Check structured condition field if available
-        if self.animal_condition_choice:
-            emergency_conditions = ['INJURED', 'SICK']
-            if self.animal_condition_choice in emergency_conditions:
-                return 'EMERGENCY'
-            
-            high_priority_conditions = ['AGGRESSIVE', 'PREGNANT', 'WITH_BABIES']
-            if self.animal_condition_choice in high_priority_conditions:
-                return 'HIGH'
-        
-        # Check text description for urgent keywords
-        if self.description:
-            description_lower = self.description.lower()
-            urgent_keywords = ['injured', 'bleeding', 'hit by car', 'emergency', 'urgent', 'dying', 'trapped']
-            if any(keyword in description_lower for keyword in urgent_keywords):
-                return 'EMERGENCY'
-            
-            priority_keywords = ['aggressive', 'pregnant', 'babies', 'puppies', 'kittens', 'scared']
-            if any(keyword in description_lower for keyword in priority_keywords):
-                return 'HIGH'
-        
-        # Check text animal condition field
-        if self.animal_condition:
-            condition_lower = self.animal_condition.lower()
-            if any(keyword in condition_lower for keyword in ['injured', 'sick', 'bleeding']):
-                return 'EMERGENCY'
-            if any(keyword in condition_lower for keyword in ['aggressive', 'pregnant']):
-                return 'HIGH'
-        
-        return 'NORMAL'
+        return intake_urgency(self.animal_condition_choice, *(hits or self.scan_text()))
 
-    def detect_animal_type(self):
+    def detect_animal_type(self, hits=None):
         """Auto-detect animal type from description and condition"""
-        # Check description for animal keywords
-        text_to_check = []
-        if self.description:
-            text_to_check.append(self.description.lower())
-        if self.animal_condition:
-            text_to_check.append(self.animal_condition.lower())
-    
-        combined_text = ' '.join(text_to_check)
-    
-        # Animal type detection
-        if any(word in combined_text for word in ['dog', 'puppy', 'canine', 'pup']):
-            return 'DOG'
-        elif any(word in combined_text for word in ['cat', 'kitten', 'feline', 'kitty']):
-            return 'CAT'
-        elif any(word in combined_text for word in ['bird', 'chicken', 'duck', 'pigeon']):
-            return 'BIRD'
-        elif any(word in combined_text for word in ['rabbit', 'bunny']):
-            return 'RABBIT'
-    
-        return 'OTHER'  # Default fallback
+        return intake_animal_type(*(hits or self.scan_text()))
 
-    
+    def update_rescue_features(self, hits=None):
+        """Recompute the stored rescue feed features from the report text"""
+        linked_animal_type = self.animal.animal_type if self.animal_id and not self.animal_type else None
+        features = rescue_features(
+            animal_type=self.animal_type,
+            linked_animal_type=linked_animal_type,
+            condition_choice=self.animal_condition_choice,
+            condition_text=self.animal_condition,
+            hits=hits or self.scan_text(),
+        )
+        for field, value in features.items():
+            setattr(self, field, value)
     
     def auto_assign_volunteers(self):
-        """Automatically assign volunteers to high-priority reports"""
-        try:
-            from volunteers.services import RescueVolunteerService
-            assignments = RescueVolunteerService.assign_volunteers_to_rescue(self)
-            if assignments:
-                self.status = 'ASSIGNED'
-                self.save(update_fields=['status'])
-        except ImportError:
-            pass  # Volunteer service not available
+        """Queue volunteer dispatch for this report; it runs after the current transaction commits"""
+        from django.db import transaction
+        from .dispatch import report_dispatch_queue
+        
+        if self.dispatch_status != 'QUEUED':
+            Report.objects.filter(pk=self.pk).update(dispatch_status='QUEUED')
+            self.dispatch_status = 'QUEUED'
+        report_id = self.pk
+        transaction.on_commit(lambda: report_dispatch_queue.enqueue(report_id))
     
     def get_distance_to(self, latitude, longitude):
         """Calculate distance to another location in kilometers"""
@@ -435,6 +449,9 @@ class Report(models.Model):
             models.Index(fields=['created_at']),
             models.Index(fields=['urgency_level']),
             models.Index(fields=['animal_type']),  # NEW: Add index for animal_type
+            # Keyset pagination keys (reports.views.ReportPagination)
+            models.Index(fields=['created_at', 'id'], name='report_created_id_idx'),
+            models.Index(fields=['reporter', 'created_at', 'id'], name='report_reporter_created_idx'),
         ]
 
 
@@ -13,5 +13,5 @@ class ReportSerializer(serializers.ModelSerializer):
         fields = ['id', 'tracking_id', 'reporter', 'reporter_details', 'animal', 'animal_details', 
                   'status', 'location', 'location_details', 'description', 
                   'animal_condition', 'photos', 'assigned_to', 'assigned_to_details', 
-                  'rescue_notes', 'rescue_time', 'created_at', 'updated_at']
-        read_only_fields = ['reporter', 'tracking_id', 'created_at', 'updated_at']
+                  'rescue_notes', 'rescue_time', 'created_at', 'updated_at', 'dispatch_status']
+        read_only_fields = ['reporter', 'tracking_id', 'created_at', 'updated_at', 'dispatch_status']
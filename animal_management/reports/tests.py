@@ -1,3 +1,213 @@
-from django.test import TestCase
+import itertools
+from datetime import timedelta
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from animals.models import Animal
+
+from .classification import RESCUE_FEATURE_FIELDS, rescue_features
+from .dispatch import pending_dispatches, report_dispatch_queue, run_dispatch
+from .models import Report
+
+KUALA_LUMPUR = Point(101.6869, 3.1390, srid=4326)
+
+
+class ReportListOrderingTests(TestCase):
+    """?ordering= applies to the unpaginated list and is refused for keyset pages"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create(username='staff', user_type='STAFF')
+        # bulk_create skips save() (dispatch, tracking ids) and its signals
+        reports = Report.objects.bulk_create([
+            Report(description=f'Report {i}', geo_location=KUALA_LUMPUR)
+            for i in range(3)
+        ])
+        # Oldest first is the reverse of insertion order
+        for i, report in enumerate(reports):
+            Report.objects.filter(pk=report.pk).update(created_at=timezone.now() - timedelta(hours=i))
+        cls.oldest_first = [report.pk for report in reversed(reports)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_unpaginated_list_honours_ordering(self):
+        response = self.client.get('/api/reports/', {'ordering': 'created_at'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.data], self.oldest_first)
+
+    def test_ordering_with_pagination_is_rejected(self):
+        for params in [{'page_size': 2}, {'cursor': 'abc'}]:
+            with self.subTest(params=params):
+                response = self.client.get('/api/reports/', {'ordering': 'created_at', **params})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('ordering', response.data)
+
+    def test_pages_follow_keyset_ordering(self):
+        response = self.client.get('/api/reports/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        ids = [row['id'] for row in response.data['results']]
+        self.assertEqual(ids, self.oldest_first[::-1][:2])
+
+
+@override_settings(REPORT_DISPATCH_ASYNC=False, REPORT_DISPATCH_MAX_ATTEMPTS=3, REPORT_DISPATCH_RETRY_DELAY=30)
+class ReportDispatchTests(TestCase):
+    """run_dispatch claims a report once, retries failures and gives up after the last attempt"""
+
+    ASSIGN = 'volunteers.services.RescueVolunteerService.assign_volunteers_to_rescue'
+
+    def queued_report(self, **fields):
+        # bulk_create skips save(), which would queue the dispatch itself
+        return Report.objects.bulk_create([
+            Report(description='Injured dog', geo_location=KUALA_LUMPUR, urgency_level='HIGH',
+                   dispatch_status='QUEUED', **fields)
+        ])[0]
+
+    def test_claims_and_dispatches_once(self):
+        report = self.queued_report()
+
+        def assign(claimed):
+            # A second worker finds the report already RUNNING
+            self.assertEqual(Report.objects.get(pk=claimed.pk).dispatch_status, 'RUNNING')
+            self.assertIsNone(run_dispatch(claimed.pk))
+            return ['assignment']
+
+        with mock.patch(self.ASSIGN, side_effect=assign) as assign_volunteers:
+            self.assertEqual(run_dispatch(report.pk), 'DISPATCHED')
+            self.assertIsNone(run_dispatch(report.pk))
+
+        self.assertEqual(assign_volunteers.call_count, 1)
+        report.refresh_from_db()
+        self.assertEqual((report.dispatch_status, report.status, report.dispatch_attempts), ('DISPATCHED', 'ASSIGNED', 1))
+        self.assertIsNotNone(report.dispatched_at)
+
+    def test_no_volunteers(self):
+        report = self.queued_report()
+        with mock.patch(self.ASSIGN, return_value=[]):
+            self.assertEqual(run_dispatch(report.pk), 'NO_VOLUNTEERS')
+        report.refresh_from_db()
+        self.assertEqual(report.status, 'PENDING')
+
+    def test_retries_until_max_attempts(self):
+        report = self.queued_report()
+
+        with mock.patch(self.ASSIGN, side_effect=RuntimeError('geocoder down')), \
+                mock.patch('threading.Timer') as timer:
+            statuses = [run_dispatch(report.pk) for _ in range(4)]
+
+        self.assertEqual(statuses, ['QUEUED', 'QUEUED', 'FAILED', None])
+        # Synchronous mode leaves retries to dispatch_reports instead of starting timers
+        timer.assert_not_called()
+        report.refresh_from_db()
+        self.assertEqual((report.dispatch_status, report.dispatch_attempts), ('FAILED', 3))
+        self.assertEqual(report.dispatch_error, 'geocoder down')
+
+    @override_settings(REPORT_DISPATCH_ASYNC=True)
+    def test_async_retry_backs_off(self):
+        report = self.queued_report()
+
+        with mock.patch(self.ASSIGN, side_effect=RuntimeError('geocoder down')), \
+                mock.patch.object(report_dispatch_queue, 'enqueue') as enqueue:
+            run_dispatch(report.pk)
+            run_dispatch(report.pk)
+
+        self.assertEqual(enqueue.call_args_list, [
+            mock.call(report.pk, delay=30), mock.call(report.pk, delay=60),
+        ])
+
+    @override_settings(REPORT_DISPATCH_TIMEOUT=600)
+    def test_stale_running_dispatch_is_requeued(self):
+        now = timezone.now()
+        queued = self.queued_report()
+        stale = self.queued_report(dispatch_started_at=now - timedelta(hours=1))
+        running = self.queued_report(dispatch_started_at=now)
+        Report.objects.filter(pk__in=[stale.pk, running.pk]).update(dispatch_status='RUNNING')
+
+        self.assertEqual(sorted(pending_dispatches()), sorted([queued.pk, stale.pk]))
+        stale.refresh_from_db()
+        running.refresh_from_db()
+        self.assertEqual(stale.dispatch_status, 'QUEUED')
+        self.assertEqual(running.dispatch_status, 'RUNNING')
+
+    def test_dispatch_reports_command_retries_queued(self):
+        report = self.queued_report(dispatch_attempts=1)
+
+        with mock.patch(self.ASSIGN, return_value=['assignment']):
+            call_command('dispatch_reports', stdout=StringIO())
+
+        report.refresh_from_db()
+        self.assertEqual((report.dispatch_status, report.dispatch_attempts), ('DISPATCHED', 2))
+
+    def test_new_urgent_report_is_dispatched_after_commit(self):
+        with mock.patch(self.ASSIGN, return_value=['assignment']) as assign_volunteers:
+            with self.captureOnCommitCallbacks(execute=True):
+                report = Report.objects.create(
+                    description='Dog hit by car, bleeding', geo_location=KUALA_LUMPUR, urgency_level='EMERGENCY'
+                )
+                self.assertEqual(report.dispatch_status, 'QUEUED')
+                assign_volunteers.assert_not_called()
+
+        report.refresh_from_db()
+        self.assertEqual(report.dispatch_status, 'DISPATCHED')
+
+
+class RescueFeatureBackfillTests(TestCase):
+    """Migration 0011's frozen rules give the same columns as classification.rescue_features()"""
+
+    DESCRIPTIONS = [
+        None, '', 'Injured puppy bleeding near the road', 'A sick kitten, weak', 'Aggressive dog biting people',
+        'Scared bird hiding', "Pregnant cat with kittens, won't come", 'Friendly rabbit looks healthy',
+        'Duck with a wound', 'Something in the drain', 'Lethargic pigeon', 'DOG and CAT fighting',
+    ]
+    CONDITION_TEXTS = [None, '', 'injured leg', 'ill', 'attacking', 'looks fine']
+    CONDITION_CHOICES = [None, 'INJURED', 'SCARED', 'WITH_BABIES']
+    ANIMAL_TYPES = [None, 'DOG', 'RABBIT']
+
+    migration = import_module('reports.migrations.0011_report_rescue_features')
+
+    def test_frozen_rules_match_classification(self):
+        for description, condition_text, condition_choice, animal_type, linked_animal_type in itertools.product(
+            self.DESCRIPTIONS, self.CONDITION_TEXTS, self.CONDITION_CHOICES, self.ANIMAL_TYPES, [None, 'CAT']
+        ):
+            arguments = {
+                'animal_type': animal_type, 'linked_animal_type': linked_animal_type, 'description': description,
+                'condition_choice': condition_choice, 'condition_text': condition_text,
+            }
+            with self.subTest(**arguments):
+                self.assertEqual(self.migration.rescue_features(**arguments), rescue_features(**arguments))
+
+    def test_backfill_matches_classification(self):
+        # bulk_create skips save(), so the report feature columns keep their defaults until the backfill
+        cat = Animal.objects.bulk_create([Animal(name='Linked', animal_type='CAT', gender='FEMALE')])[0]
+        reports = Report.objects.bulk_create([
+            Report(
+                description=description, animal_condition=condition_text, animal_condition_choice=condition_choice,
+                animal_type=animal_type, animal=cat if linked else None, geo_location=KUALA_LUMPUR,
+            )
+            for description, condition_text, condition_choice, animal_type, linked in itertools.product(
+                self.DESCRIPTIONS, self.CONDITION_TEXTS[:3], self.CONDITION_CHOICES[:2], self.ANIMAL_TYPES, [False, True]
+            )
+        ])
+
+        self.migration.backfill_rescue_features(apps, None)
+
+        for report in Report.objects.filter(pk__in=[report.pk for report in reports]).select_related('animal'):
+            expected = rescue_features(
+                animal_type=report.animal_type,
+                linked_animal_type=report.animal.animal_type if report.animal_id and not report.animal_type else None,
+                description=report.description,
+                condition_choice=report.animal_condition_choice,
+                condition_text=report.animal_condition,
+            )
+            with self.subTest(report=report.pk):
+                self.assertEqual({field: getattr(report, field) for field in RESCUE_FEATURE_FIELDS}, expected)
@@ -15,14 +15,23 @@ import uuid
 import json
 from .models import Report
 from .serializers import ReportSerializer
+from animals.serializers import AnimalSerializer
 from animals.models import Animal
 from community.services import award_points
+from animal_management.pagination import KeysetPagination
+from animal_management.geo import nearby, nearby_params
 
 User = get_user_model()
 
+class ReportPagination(KeysetPagination):
+    """Newest first; pages only when the client sends cursor or page_size"""
+    ordering = ('-created_at', '-id')
+    optional = True
+
 class ReportViewSet(viewsets.ModelViewSet):
     queryset = Report.objects.all()
     serializer_class = ReportSerializer
+    pagination_class = ReportPagination
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['status']
     search_fields = ['description', 'location_details']
@@ -169,18 +178,18 @@ class ReportViewSet(viewsets.ModelViewSet):
         """
         Get all reports submitted by the current user
         """
+        # Get reports created by the current user, ordered by most recent first
+        reports = Report.objects.filter(reporter=request.user).select_related('assigned_to')
+        page = self.paginate_queryset(reports)
+        
         try:
-            # Get reports created by the current user, ordered by most recent first
-            reports = Report.objects.filter(reporter=request.user).order_by('-created_at')
-            
             # Serialize the reports
-            serializer = ReportSerializer(reports, many=True)
+            rows = page if page is not None else reports.order_by('-created_at', '-id')
+            serializer = ReportSerializer(rows, many=True)
             
             # Add additional computed fields for the frontend
             enriched_data = []
-            for report_data in serializer.data:
-                report = Report.objects.get(id=report_data['id'])
-                
+            for report, report_data in zip(rows, serializer.data):
                 # Add timeline information
                 if hasattr(report, 'rescue_time') and report.rescue_time:
                     report_data['resolved_at'] = report.rescue_time
@@ -198,6 +207,8 @@ class ReportViewSet(viewsets.ModelViewSet):
                 
                 enriched_data.append(report_data)
             
+            if page is not None:
+                return self.get_paginated_response(enriched_data)
             return Response(enriched_data)
             
         except Exception as e:
@@ -206,6 +217,30 @@ class ReportViewSet(viewsets.ModelViewSet):
                 status=500
             )
     
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        Reports within ?radius_km= of ?lat=&lng=, nearest first. ?status=
+        takes a comma-separated list.
+        """
+        try:
+            point, radius_km, limit = nearby_params(request.query_params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        
+        reports = AnimalSerializer.setup_eager_loading(
+            Report.objects.select_related('reporter', 'assigned_to', 'animal'), prefix='animal__'
+        )
+        status_param = request.query_params.get('status')
+        if status_param:
+            reports = reports.filter(status__in=[s.strip() for s in status_param.split(',')])
+        
+        reports = list(nearby(reports, point, radius_km)[:limit])
+        data = self.get_serializer(reports, many=True).data
+        for report, row in zip(reports, data):
+            row['distance_km'] = round(report.distance.km, 2)
+        return Response(data)
+    
     @action(detail=True, methods=['post'])
     def add_note(self, request, pk=None):
         """
@@ -0,0 +1,181 @@
+# volunteers/geocoding.py
+"""
+Volunteer geocoding, kept off the request path
+
+Addresses are resolved by a pluggable geocoder (GEOCODER_BACKEND, a dotted
+path; StaticGeocoder is an offline stand-in for tests and local setups)
+and every answer is stored in GeocodeCache by address hash. "Not found"
+answers expire after GEOCODER_NEGATIVE_CACHE_TTL seconds, so an address the
+geocoder learns later (or a lookup that failed upstream) is tried again. A volunteer's address is geocoded once into
+VolunteerProfile.home_location by a background worker (queued from
+volunteers/signals.py) or by `manage.py geocode_volunteers`.
+
+Request-path code only reads stored points: geocode_address() with
+allow_network=False never calls the geocoder.
+"""
+
+import hashlib
+import threading
+import logging
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.gis.geos import Point
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from animal_management.background import BackgroundQueue
+
+from .models import GeocodeCache, VolunteerProfile
+
+logger = logging.getLogger(__name__)
+
+
+class NominatimGeocoder:
+    """OpenStreetMap Nominatim through geopy (network)"""
+
+    name = 'nominatim'
+
+    def __init__(self):
+        from geopy.geocoders import Nominatim
+        self._geolocator = Nominatim(user_agent='stray_animal_platform', timeout=10)
+
+    def geocode(self, address):
+        location = self._geolocator.geocode(address)
+        if not location:
+            return None
+        return (location.latitude, location.longitude)
+
+
+class StaticGeocoder:
+    """Offline geocoder answering from GEOCODER_STATIC_LOCATIONS ({address: (lat, lng)})"""
+
+    name = 'static'
+
+    def __init__(self):
+        self._locations = {
+            normalize_address(address): coords
+            for address, coords in getattr(settings, 'GEOCODER_STATIC_LOCATIONS', {}).items()
+        }
+
+    def geocode(self, address):
+        return self._locations.get(normalize_address(address))
+
+
+_geocoder = None
+_geocoder_lock = threading.Lock()
+
+
+def get_geocoder():
+    global _geocoder
+    with _geocoder_lock:
+        if _geocoder is None:
+            backend = getattr(settings, 'GEOCODER_BACKEND', 'volunteers.geocoding.NominatimGeocoder')
+            _geocoder = import_string(backend)()
+        return _geocoder
+
+
+def normalize_address(address):
+    return ' '.join((address or '').lower().split())
+
+
+def address_hash(address):
+    return hashlib.sha256(normalize_address(address).encode()).hexdigest()
+
+
+def negative_cache_cutoff():
+    """"Not found" answers stored before this time are looked up again"""
+    return timezone.now() - timedelta(seconds=getattr(settings, 'GEOCODER_NEGATIVE_CACHE_TTL', 7 * 24 * 3600))
+
+
+def geocode_address(address, allow_network=False):
+    """
+    (lat, lng) for an address, or None if it is unknown. Answers come from
+    GeocodeCache; only with allow_network=True is a cache miss (or an
+    expired "not found") sent to the geocoder and its answer cached.
+    """
+    if not normalize_address(address):
+        return None
+
+    key = address_hash(address)
+    cached = GeocodeCache.objects.filter(address_hash=key).first()
+    if cached is not None and cached.location:
+        return (cached.location.y, cached.location.x)
+    if cached is not None and not (allow_network and cached.updated_at < negative_cache_cutoff()):
+        return None
+    if not allow_network:
+        return None
+
+    geocoder = get_geocoder()
+    try:
+        coords = geocoder.geocode(address)
+    except Exception as e:
+        # Not cached, so the next run retries
+        logger.warning(f"Geocoding failed for {address!r}: {e}")
+        return None
+
+    GeocodeCache.objects.update_or_create(address_hash=key, defaults={
+        'address': address,
+        'location': Point(coords[1], coords[0], srid=4326) if coords else None,
+        'provider': getattr(geocoder, 'name', geocoder.__class__.__name__),
+    })
+    return coords
+
+
+def volunteer_address(profile):
+    """Address a volunteer's home location is geocoded from"""
+    if getattr(profile.user, 'address', None):
+        return profile.user.address
+    return profile.emergency_contact or None
+
+
+def locate_volunteer(profile, allow_network=True):
+    """Geocode the volunteer's address into home_location; returns True if it changed"""
+    address = volunteer_address(profile)
+    coords = geocode_address(address, allow_network=allow_network) if address else None
+    if coords is None and address and not GeocodeCache.objects.filter(address_hash=address_hash(address)).exists():
+        # No answer yet (offline or geocoder error); keep the stored point and retry later
+        return False
+
+    location = Point(coords[1], coords[0], srid=4326) if coords else None
+    if profile.home_location_address == address and profile.home_location == location:
+        return False
+
+    VolunteerProfile.objects.filter(pk=profile.pk).update(
+        home_location=location, home_location_address=address, home_location_updated_at=timezone.now()
+    )
+    profile.home_location, profile.home_location_address = location, address
+    return True
+
+
+def needs_geocoding(profile, retry_not_found=False):
+    """
+    The volunteer's address changed since it was geocoded. With
+    retry_not_found, also when it was not found and that answer has expired
+    (one query; the save signal leaves this to geocode_volunteers).
+    """
+    address = volunteer_address(profile)
+    if address != profile.home_location_address:
+        return True
+    if not retry_not_found or not address or profile.home_location is not None:
+        return False
+    return GeocodeCache.objects.filter(
+        address_hash=address_hash(address), location__isnull=True, updated_at__lt=negative_cache_cutoff()
+    ).exists()
+
+
+class VolunteerGeocodeQueue(BackgroundQueue):
+    """Profiles whose address changed, geocoded by a daemon thread"""
+
+    thread_name = 'volunteer-geocode'
+    async_setting = 'VOLUNTEER_GEOCODE_ASYNC'
+
+    def enqueue(self, profile_id):
+        self.put(profile_id)
+
+    def process(self, items):
+        for profile in VolunteerProfile.objects.filter(pk__in=items).select_related('user'):
+            locate_volunteer(profile)
+
+
+# Global queue instance (one geocoding thread per process)
+volunteer_geocode_queue = VolunteerGeocodeQueue()
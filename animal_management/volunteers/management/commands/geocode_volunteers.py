@@ -0,0 +1,31 @@
+# volunteers/management/commands/geocode_volunteers.py
+
+from django.core.management.base import BaseCommand
+from volunteers.geocoding import locate_volunteer, needs_geocoding
+from volunteers.models import VolunteerProfile
+
+
+class Command(BaseCommand):
+    help = 'Geocode volunteer addresses into VolunteerProfile.home_location (uses the geocode cache)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true', help='Re-check every volunteer, not only changed or expired not-found addresses')
+        parser.add_argument('--limit', type=int, default=None, help='Geocode at most this many volunteers')
+
+    def handle(self, *args, **options):
+        profiles = VolunteerProfile.objects.select_related('user').order_by('id')
+        if not options['all']:
+            profiles = (profile for profile in profiles.iterator() if needs_geocoding(profile, retry_not_found=True))
+
+        checked = updated = 0
+        for profile in profiles:
+            if options['limit'] is not None and checked >= options['limit']:
+                break
+            checked += 1
+            if locate_volunteer(profile):
+                updated += 1
+                location = profile.home_location
+                where = f"{location.y:.4f}, {location.x:.4f}" if location else 'not found'
+                self.stdout.write(f"📍 {profile.user.username}: {where}")
+
+        self.stdout.write(self.style.SUCCESS(f"✅ Checked {checked} volunteers, updated {updated}"))
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.23 on 2026-10-17 15:50
+
+import django.contrib.gis.db.models.fields
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0003_rescuevolunteerassignment_hours_logged'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodeCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('address_hash', models.CharField(max_length=64, unique=True)),
+                ('address', models.TextField()),
+                ('location', django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, srid=4326)),
+                ('provider', models.CharField(max_length=50)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='home_location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, srid=4326),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='home_location_address',
+            field=models.TextField(blank=True, help_text='Address home_location was geocoded from', null=True),
+        ),
+        migrations.AddField(
+            model_name='volunteerprofile',
+            name='home_location_updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 4.2.23 on 2026-10-17 17:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+
+def move_location_history(apps, schema_editor):
+    """Copy each assignment's location_updates into RescueLocationFix and keep only the newest entries"""
+    RescueVolunteerAssignment = apps.get_model('volunteers', 'RescueVolunteerAssignment')
+    RescueLocationFix = apps.get_model('volunteers', 'RescueLocationFix')
+    keep = getattr(settings, 'RESCUE_RECENT_LOCATION_FIXES', 20)
+
+    for assignment in RescueVolunteerAssignment.objects.exclude(location_updates=[]).iterator(chunk_size=200):
+        history = assignment.location_updates if isinstance(assignment.location_updates, list) else []
+        fixes = [
+            RescueLocationFix(
+                assignment_id=assignment.pk,
+                latitude=entry['latitude'],
+                longitude=entry['longitude'],
+                status=entry.get('status') or '',
+                recorded_at=parse_datetime(entry.get('timestamp') or '') or assignment.assigned_at or timezone.now(),
+            )
+            for entry in history
+            if isinstance(entry, dict) and entry.get('latitude') is not None and entry.get('longitude') is not None
+        ]
+        RescueLocationFix.objects.bulk_create(fixes, batch_size=1000)
+        if len(history) > keep:
+            RescueVolunteerAssignment.objects.filter(pk=assignment.pk).update(location_updates=history[-keep:])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('volunteers', '0004_geocodecache_volunteer_home_location'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RescueLocationFix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('latitude', models.FloatField()),
+                ('longitude', models.FloatField()),
+                ('accuracy_m', models.FloatField(blank=True, help_text='GPS accuracy reported by the device, in meters', null=True)),
+                ('status', models.CharField(blank=True, help_text='Assignment status when the fix was taken', max_length=20)),
+                ('recorded_at', models.DateTimeField(help_text='When the device took the fix')),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='location_fixes', to='volunteers.rescuevolunteerassignment')),
+            ],
+            options={
+                'ordering': ['recorded_at', 'id'],
+                'indexes': [models.Index(fields=['assignment', 'recorded_at', 'id'], name='rescue_fix_assign_time_idx')],
+            },
+        ),
+        migrations.RunPython(move_location_history, migrations.RunPython.noop),
+    ]
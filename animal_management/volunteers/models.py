@@ -1,6 +1,7 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 # For GPS functionality - you may need to install GeoDjango
 try:
@@ -67,6 +68,11 @@ class VolunteerProfile(models.Model):
     gps_tracking_consent = models.BooleanField(default=False, help_text="Consent to GPS tracking during rescues")
     last_location_update = models.DateTimeField(null=True, blank=True)
     
+    # Home location, geocoded off the request path (volunteers/geocoding.py)
+    home_location = geo_models.PointField(null=True, blank=True, geography=True)
+    home_location_address = models.TextField(blank=True, null=True, help_text="Address home_location was geocoded from")
+    home_location_updated_at = models.DateTimeField(null=True, blank=True)
+    
     # NEW: Enhanced contact preferences
     emergency_contact_phone = models.CharField(max_length=20, blank=True, null=True)
     preferred_contact_method = models.CharField(max_length=20, choices=CONTACT_METHOD_CHOICES, default='APP')
@@ -114,6 +120,19 @@ class VolunteerProfile(models.Model):
         self.save(update_fields=['total_rescues_completed', 'average_response_time_minutes'])
 
 
+class GeocodeCache(models.Model):
+    """Geocoder results keyed by normalized address, so each address is looked up once"""
+    address_hash = models.CharField(max_length=64, unique=True)
+    address = models.TextField()
+    location = geo_models.PointField(null=True, blank=True, geography=True)  # None: geocoder found nothing
+    provider = models.CharField(max_length=50)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.address[:50]} ({'found' if self.location else 'not found'})"
+
+
 class VolunteerOpportunity(models.Model):
     STATUS_CHOICES = (
         ('OPEN', 'Open'),
@@ -293,7 +312,7 @@ class RescueVolunteerAssignment(models.Model):
         current_location_lat = models.FloatField(null=True, blank=True)
         current_location_lng = models.FloatField(null=True, blank=True)
     
-    location_updates = models.JSONField(default=list)  # Store GPS tracking history
+    location_updates = models.JSONField(default=list)  # Last few GPS fixes; full track in RescueLocationFix
     
     # Response metrics
     response_time_minutes = models.IntegerField(null=True, blank=True)
@@ -322,32 +341,57 @@ class RescueVolunteerAssignment(models.Model):
     def update_location(self, latitude, longitude):
         """Update current location and add to tracking history"""
         try:
-            if HAS_GIS:
-                self.current_location = Point(longitude, latitude)
-            else:
-                self.current_location_lat = latitude
-                self.current_location_lng = longitude
-            
-            location_update = {
-                'latitude': latitude,
-                'longitude': longitude,
-                'timestamp': timezone.now().isoformat(),
-                'status': self.status
-            }
-            
-            # Ensure location_updates is a list
-            if not isinstance(self.location_updates, list):
-                self.location_updates = []
+            self.add_location_fixes([{'latitude': latitude, 'longitude': longitude}])
+        except Exception as e:
+            print(f"Error updating location: {e}")
+    
+    def add_location_fixes(self, fixes):
+        """
+        Record GPS fixes ({'latitude', 'longitude'} plus optional 'timestamp'
+        and 'accuracy'): one RescueLocationFix row each, one bulk insert.
+        location_updates keeps only the newest RESCUE_RECENT_LOCATION_FIXES
+        entries, and current_location follows the newest of them, so fixes
+        uploaded late by an offline device do not move it backwards.
+        """
+        from .tracking import fix_entry, get_recent_fix_limit
+        
+        if not fixes:
+            return 0
+        
+        now = timezone.now()
+        rows = sorted((
+            RescueLocationFix(
+                assignment=self,
+                latitude=fix['latitude'],
+                longitude=fix['longitude'],
+                accuracy_m=fix.get('accuracy'),
+                status=self.status,
+                recorded_at=fix.get('timestamp') or now,
+            ) for fix in fixes
+        ), key=lambda row: row.recorded_at)
+        
+        with transaction.atomic():
+            RescueLocationFix.objects.bulk_create(rows)
             
-            self.location_updates.append(location_update)
+            # Locked read, so concurrent uploads do not drop each other's entries
+            recent = RescueVolunteerAssignment.objects.select_for_update().values_list(
+                'location_updates', flat=True
+            ).get(pk=self.pk)
+            recent = list(recent) if isinstance(recent, list) else []
+            recent.extend(fix_entry(row.latitude, row.longitude, row.recorded_at, row.status) for row in rows)
+            recent.sort(key=lambda entry: parse_datetime(entry.get('timestamp') or '') or now)
+            self.location_updates = recent[-get_recent_fix_limit():]
             
+            latest = self.location_updates[-1]
             if HAS_GIS:
+                self.current_location = Point(latest['longitude'], latest['latitude'])
                 self.save(update_fields=['current_location', 'location_updates'])
             else:
+                self.current_location_lat = latest['latitude']
+                self.current_location_lng = latest['longitude']
                 self.save(update_fields=['current_location_lat', 'current_location_lng', 'location_updates'])
-            
-        except Exception as e:
-            print(f"Error updating location: {e}")
+        
+        return len(rows)
     
     def mark_completed(self, completion_notes=None):
         """Mark rescue as completed and award points"""
@@ -390,6 +434,30 @@ class RescueVolunteerAssignment(models.Model):
         return None
 
 
+class RescueLocationFix(models.Model):
+    """One GPS fix of a rescue assignment; rows are only ever appended (volunteers/tracking.py)"""
+    assignment = models.ForeignKey(
+        RescueVolunteerAssignment,
+        on_delete=models.CASCADE,
+        related_name='location_fixes'
+    )
+    latitude = models.FloatField()
+    longitude = models.FloatField()
+    accuracy_m = models.FloatField(null=True, blank=True, help_text="GPS accuracy reported by the device, in meters")
+    status = models.CharField(max_length=20, blank=True, help_text="Assignment status when the fix was taken")
+    recorded_at = models.DateTimeField(help_text="When the device took the fix")
+    received_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['recorded_at', 'id']
+        indexes = [
+            models.Index(fields=['assignment', 'recorded_at', 'id'], name='rescue_fix_assign_time_idx'),
+        ]
+    
+    def __str__(self):
+        return f"Fix for assignment #{self.assignment_id} at {self.recorded_at}"
+
+
 # NEW: Simplified Training Progress (without Resource dependency)
 class VolunteerTrainingProgress(models.Model):
     """Track volunteer training completion and certifications"""
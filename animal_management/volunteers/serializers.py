@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from django.conf import settings
 from .models import (
     VolunteerProfile, VolunteerOpportunity, VolunteerAssignment,
     RescueVolunteerAssignment, VolunteerTrainingProgress, VolunteerSkillCertification
@@ -137,6 +138,23 @@ class LocationUpdateSerializer(serializers.Serializer):
         return value
 
 
+class LocationFixSerializer(LocationUpdateSerializer):
+    """One GPS fix in a batch upload; timestamp is when the device took it"""
+    timestamp = serializers.DateTimeField(required=False)
+    accuracy = serializers.FloatField(min_value=0, required=False)
+
+
+class LocationBatchSerializer(serializers.Serializer):
+    """Serializer for uploading many GPS fixes at once (e.g. buffered while offline)"""
+    fixes = LocationFixSerializer(many=True, allow_empty=False)
+    
+    def validate_fixes(self, value):
+        max_fixes = getattr(settings, 'RESCUE_LOCATION_BATCH_MAX', 500)
+        if len(value) > max_fixes:
+            raise serializers.ValidationError(f"At most {max_fixes} fixes per request")
+        return value
+
+
 class VolunteerTrainingProgressSerializer(serializers.ModelSerializer):
     volunteer_details = UserSerializer(source='volunteer.user', read_only=True)
     resource_details = serializers.SerializerMethodField()
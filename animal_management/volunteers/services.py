@@ -1,8 +1,13 @@
 from django.utils import timezone
-from django.db.models import Q
+from django.db.models import Q, F, Case, When, Value, FloatField, ExpressionWrapper
+from django.db.models.functions import Coalesce, Greatest
+from django.conf import settings
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
 from geopy.distance import geodesic
-from geopy.geocoders import Nominatim
 from .models import VolunteerProfile, RescueVolunteerAssignment
+from .geocoding import geocode_address, volunteer_address
 import logging
 
 logger = logging.getLogger(__name__)
@@ -12,29 +17,21 @@ class RescueVolunteerService:
     """Service class for managing volunteer rescue operations"""
     
     @staticmethod
-    def calculate_distance(address1, address2):
-        """Calculate distance between two addresses using geocoding"""
+    def calculate_distance(location1, location2):
+        """
+        Distance in km between two (lat, lng) tuples. Addresses are looked up
+        in the geocode cache only (no network call); 999 if one is unknown.
+        """
         try:
-            geolocator = Nominatim(user_agent="stray_animal_platform")
+            coords = []
+            for location in (location1, location2):
+                if not isinstance(location, tuple):
+                    location = geocode_address(location)
+                    if location is None:
+                        return 999  # Return large distance if the address is not geocoded yet
+                coords.append(location)
             
-            # Handle different input formats
-            if isinstance(address1, tuple):
-                coords1 = address1
-            else:
-                loc1 = geolocator.geocode(address1)
-                if not loc1:
-                    return 999  # Return large distance if geocoding fails
-                coords1 = (loc1.latitude, loc1.longitude)
-            
-            if isinstance(address2, tuple):
-                coords2 = address2
-            else:
-                loc2 = geolocator.geocode(address2)
-                if not loc2:
-                    return 999
-                coords2 = (loc2.latitude, loc2.longitude)
-            
-            return geodesic(coords1, coords2).kilometers
+            return geodesic(coords[0], coords[1]).kilometers
             
         except Exception as e:
             logger.error(f"Distance calculation error: {e}")
@@ -42,33 +39,52 @@ class RescueVolunteerService:
     
     @staticmethod
     def get_volunteer_location(volunteer_user):
-        """Get volunteer location from various possible sources"""
-        # Try different location sources in order of preference
-        
-        # 1. Check if user has address field
-        if hasattr(volunteer_user, 'address') and volunteer_user.address:
-            return volunteer_user.address
-        
-        # 2. Check volunteer profile for emergency contact or location info
+        """(lat, lng) of the volunteer from stored coordinates, without geocoding"""
         try:
             profile = volunteer_user.volunteer_profile
-            if hasattr(profile, 'location') and profile.location:
-                return profile.location
-            if hasattr(profile, 'emergency_contact') and profile.emergency_contact:
-                # Parse location from emergency contact if it contains address
-                return profile.emergency_contact
-        except:
-            pass
+        except VolunteerProfile.DoesNotExist:
+            profile = None
+        
+        # 1. Home location geocoded from the volunteer's address
+        if profile is not None and profile.home_location:
+            return (profile.home_location.y, profile.home_location.x)
+        
+        # 2. Address already in the geocode cache (home_location not refreshed yet)
+        address = volunteer_address(profile) if profile is not None else getattr(volunteer_user, 'address', None)
+        coords = geocode_address(address) if address else None
+        if coords:
+            return coords
         
         # 3. Use a default city location for demo purposes
         # In production, you'd require volunteers to set their location
-        return "Kuala Lumpur, Malaysia" # Fallback location
+        return tuple(getattr(settings, 'VOLUNTEER_DEFAULT_LOCATION', (3.1390, 101.6869)))  # Kuala Lumpur
+    
+    # Dispatch score weights (higher score is dispatched first, then closer distance)
+    EXPERIENCE_WEIGHTS = {
+        'EXPERT': 4,
+        'EXPERIENCED': 3,
+        'INTERMEDIATE': 2,
+        'BEGINNER': 1,
+        'NONE': 0
+    }
     
     @staticmethod
     def find_nearby_volunteers(report, max_distance_km=15, limit=10):
-        """Find volunteers within distance who can respond to rescue"""
+        """
+        Find volunteers within distance who can respond to rescue, as
+        (volunteer_profile, distance_km) pairs, best candidates first.
+        
+        One query: ST_DWithin on the GiST-indexed home_location (bounded by
+        VOLUNTEER_MAX_RESCUE_DISTANCE_KM, then each volunteer's own
+        max_rescue_distance_km), with distance and the dispatch score
+        computed as annotations.
+        
+        Volunteers whose address is not geocoded are skipped unless
+        VOLUNTEER_DISPATCH_UNLOCATED is on, in which case they count as being
+        at VOLUNTEER_DEFAULT_LOCATION.
+        """
         urgency = getattr(report, 'urgency_level', 'NORMAL')
-        report_location = (report.latitude, report.longitude)
+        report_point = getattr(report, 'geo_location', None) or Point(report.longitude, report.latitude, srid=4326)
         
         # Base query for available volunteers
         base_query = VolunteerProfile.objects.filter(
@@ -85,73 +101,69 @@ class RescueVolunteerService:
         base_query = base_query.filter(max_rescue_distance_km__gte=max_distance_km)
         
         # Exclude volunteers already assigned to this report
-        base_query = base_query.exclude(
-            user__rescue_assignments__report=report,
-            user__rescue_assignments__status__in=['ASSIGNED', 'ACCEPTED', 'EN_ROUTE', 'ON_SCENE']
+        if getattr(report, 'pk', None):
+            base_query = base_query.exclude(
+                user__rescue_assignments__report=report,
+                user__rescue_assignments__status__in=['ASSIGNED', 'ACCEPTED', 'EN_ROUTE', 'ON_SCENE']
+            )
+        
+        search_radius_km = getattr(settings, 'VOLUNTEER_MAX_RESCUE_DISTANCE_KM', 100)
+        nearby = Q(
+            home_location__dwithin=(report_point, D(km=search_radius_km))
+        ) & Q(
+            home_location__dwithin=(report_point, F('max_rescue_distance_km') * 1000)
         )
         
-        suitable_volunteers = []
-        for volunteer in base_query:
-            try:
-                # Get volunteer location
-                volunteer_location = RescueVolunteerService.get_volunteer_location(volunteer.user)
-                
-                if volunteer_location:
-                    distance = RescueVolunteerService.calculate_distance(
-                        volunteer_location,
-                        report_location
-                    )
-                else:
-                    # If no location available, assume they're far away
-                    distance = 999
-                
-                # Check if within preferred distance
-                if distance <= volunteer.max_rescue_distance_km:
-                    # Additional availability check
-                    if volunteer.is_available_for_rescue(urgency, distance):
-                        suitable_volunteers.append((volunteer, distance))
-                        
-            except Exception as e:
-                logger.error(f"Error processing volunteer {volunteer.user.username}: {e}")
-                continue
+        # Opt-in: volunteers whose address is not geocoded yet count as being
+        # at the default location (see get_volunteer_location)
+        default_location = tuple(getattr(settings, 'VOLUNTEER_DEFAULT_LOCATION', (3.1390, 101.6869)))
+        default_distance_m = geodesic(default_location, (report_point.y, report_point.x)).meters
+        if getattr(settings, 'VOLUNTEER_DISPATCH_UNLOCATED', False):
+            nearby |= Q(home_location__isnull=True, max_rescue_distance_km__gte=default_distance_m / 1000)
         
-        # Sort by multiple criteria:
-        # 1. Experience level (expert first)
-        # 2. Emergency availability (for urgent cases)
-        # 3. Distance (closest first)
-        # 4. Response time history (faster responders first)
-        def sort_key(volunteer_distance_tuple):
-            volunteer, distance = volunteer_distance_tuple
-            
-            # Experience level weight
-            experience_weights = {
-                'EXPERT': 4,
-                'EXPERIENCED': 3,
-                'INTERMEDIATE': 2,
-                'BEGINNER': 1,
-                'NONE': 0
-            }
-            experience_score = experience_weights.get(volunteer.rescue_experience_level, 0)
-            
-            # Emergency availability bonus for urgent cases
-            emergency_bonus = 10 if (urgency in ['HIGH', 'EMERGENCY'] and volunteer.available_for_emergency) else 0
-            
-            # Transportation bonus
-            transport_bonus = 5 if volunteer.has_transportation else 0
-            
-            # Response time bonus (lower is better, so invert)
-            response_time_bonus = 0
-            if volunteer.average_response_time_minutes:
-                response_time_bonus = max(0, 30 - volunteer.average_response_time_minutes) / 30 * 5
-            
-            # Calculate total score (higher is better)
-            total_score = experience_score + emergency_bonus + transport_bonus + response_time_bonus
-            
-            # Return tuple for sorting (higher score first, then closer distance)
-            return (-total_score, distance)
+        experience_score = Case(
+            *[When(rescue_experience_level=level, then=Value(weight))
+              for level, weight in RescueVolunteerService.EXPERIENCE_WEIGHTS.items()],
+            default=Value(0), output_field=FloatField()
+        )
         
-        suitable_volunteers.sort(key=sort_key)
-        return suitable_volunteers[:limit]
+        # Emergency availability bonus for urgent cases
+        if urgency in ['HIGH', 'EMERGENCY']:
+            emergency_bonus = Case(When(available_for_emergency=True, then=Value(10.0)), default=Value(0.0))
+        else:
+            emergency_bonus = Value(0.0)
+        
+        # Transportation bonus
+        transport_bonus = Case(When(has_transportation=True, then=Value(5.0)), default=Value(0.0))
+        
+        # Response time bonus (lower is better, so invert)
+        response_time_bonus = Case(
+            When(
+                average_response_time_minutes__gt=0,
+                then=Greatest(Value(0.0), Value(30.0) - F('average_response_time_minutes')) / 30 * 5
+            ),
+            default=Value(0.0), output_field=FloatField()
+        )
+        
+        candidates = base_query.filter(nearby).annotate(
+            distance_m=Coalesce(
+                Distance('home_location', report_point), Value(default_distance_m), output_field=FloatField()
+            ),
+            dispatch_score=ExpressionWrapper(
+                experience_score + emergency_bonus + transport_bonus + response_time_bonus,
+                output_field=FloatField()
+            ),
+        ).order_by('-dispatch_score', 'distance_m', 'id')[:limit]
+        
+        candidates = list(candidates)
+        unlocated = [volunteer.user.username for volunteer in candidates if volunteer.home_location is None]
+        if unlocated:
+            logger.warning(
+                f"Report {getattr(report, 'pk', None)}: {len(unlocated)} volunteer(s) without a geocoded address "
+                f"placed at the default location {default_location}: {', '.join(unlocated)}"
+            )
+        
+        return [(volunteer, volunteer.distance_m / 1000) for volunteer in candidates]
     
     @staticmethod
     def assign_volunteers_to_rescue(report, assignment_types=None):
@@ -308,15 +320,15 @@ class RescueVolunteerService:
                 urgency_level__in=['NORMAL', 'HIGH', 'EMERGENCY']
             )
         
+        # Get volunteer location
+        volunteer_location = RescueVolunteerService.get_volunteer_location(volunteer_user)
+        
         available_rescues = []
         for report in available_reports:
             try:
                 # Check if volunteer can handle this rescue
                 urgency = getattr(report, 'urgency_level', 'NORMAL')
                 
-                # Get volunteer location
-                volunteer_location = RescueVolunteerService.get_volunteer_location(volunteer_user)
-                
                 if volunteer_location:
                     distance = RescueVolunteerService.calculate_distance(
                         volunteer_location,
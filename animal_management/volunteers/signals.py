@@ -1,10 +1,13 @@
 # volunteers/signals.py
+from django.conf import settings
+from django.db import transaction
 from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 
 from resources.models import LearningProgress
 from .models import VolunteerProfile, VolunteerTrainingProgress
+from .geocoding import needs_geocoding, volunteer_geocode_queue
 
 # Training module slug to certification name mapping
 TRAINING_MAPPING = {
@@ -60,4 +63,27 @@ def create_volunteer_training_progress(sender, instance, created, **kwargs):
                 print(f"✅ Created training record: {training_name} for {instance.user.username}")
                 
             except Exception as e:
-                print(f"❌ Error creating volunteer training progress: {e}")
\ No newline at end of file
+                print(f"❌ Error creating volunteer training progress: {e}")
+
+
+def _queue_geocoding(profile):
+    if needs_geocoding(profile):
+        transaction.on_commit(lambda: volunteer_geocode_queue.enqueue(profile.pk))
+
+
+@receiver(post_save, sender=VolunteerProfile)
+def geocode_volunteer_profile(sender, instance, **kwargs):
+    """Geocode the volunteer's home location in the background when their address changes"""
+    _queue_geocoding(instance)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def geocode_volunteer_address(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and 'address' not in update_fields:
+        return
+    profile = VolunteerProfile.objects.filter(user=instance).only(
+        'id', 'user_id', 'emergency_contact', 'home_location_address'
+    ).first()
+    if profile is not None:
+        profile.user = instance
+        _queue_geocoding(profile)
@@ -1,3 +1,465 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from geopy.distance import geodesic
+from rest_framework.test import APIClient
+
+from reports.models import Report
+
+from . import geocoding
+from .geocoding import (
+    StaticGeocoder, address_hash, geocode_address, locate_volunteer, needs_geocoding, volunteer_geocode_queue,
+)
+from .models import GeocodeCache, RescueLocationFix, RescueVolunteerAssignment, VolunteerProfile
+from .serializers import LocationBatchSerializer
+from .services import RescueVolunteerService
+from .tracking import simplify_track
+from .views import AvailableRescuePagination
+
+KL_ADDRESS = 'Jalan Ampang, Kuala Lumpur'
+KL_COORDS = (3.1600, 101.7100)
+REPORT_COORDS = (3.1390, 101.6869)
+
+
+def create_volunteer(username, address=None, **profile_fields):
+    user = get_user_model().objects.create(username=username, user_type='VOLUNTEER', address=address)
+    profile_fields.setdefault('availability', 'FLEXIBLE')
+    profile_fields.setdefault('experience_level', 'BEGINNER')
+    return VolunteerProfile.objects.create(user=user, **profile_fields)
+
+
+class StaticGeocoderTests(TestCase):
+
+    @override_settings(GEOCODER_STATIC_LOCATIONS={KL_ADDRESS: KL_COORDS})
+    def test_answers_normalized_addresses(self):
+        geocoder = StaticGeocoder()
+        self.assertEqual(geocoder.geocode(KL_ADDRESS), KL_COORDS)
+        self.assertEqual(geocoder.geocode('  jalan AMPANG,   kuala lumpur '), KL_COORDS)
+        self.assertIsNone(geocoder.geocode('Somewhere else'))
+
+
+class GeocodeAddressTests(TestCase):
+    """Cached answers, the offline path and expiry of "not found" answers"""
+
+    def setUp(self):
+        self.geocoder = mock.Mock(name='geocoder')
+        self.geocoder.name = 'mock'
+        self.geocoder.geocode.return_value = KL_COORDS
+        patcher = mock.patch.object(geocoding, '_geocoder', self.geocoder)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def cache(self, address, coords, age=timedelta(0)):
+        location = Point(coords[1], coords[0], srid=4326) if coords else None
+        entry = GeocodeCache.objects.create(address_hash=address_hash(address), address=address, location=location, provider='mock')
+        GeocodeCache.objects.filter(pk=entry.pk).update(updated_at=timezone.now() - age)
+
+    def test_offline_miss_returns_none_without_geocoding(self):
+        self.assertIsNone(geocode_address(KL_ADDRESS, allow_network=False))
+        self.geocoder.geocode.assert_not_called()
+        self.assertFalse(GeocodeCache.objects.exists())
+
+    def test_offline_hit_reads_the_cache(self):
+        self.cache(KL_ADDRESS, KL_COORDS)
+        lat, lng = geocode_address(' jalan ampang, KUALA LUMPUR', allow_network=False)
+        self.assertAlmostEqual(lat, KL_COORDS[0])
+        self.assertAlmostEqual(lng, KL_COORDS[1])
+        self.geocoder.geocode.assert_not_called()
+
+    def test_network_miss_is_cached(self):
+        self.assertEqual(geocode_address(KL_ADDRESS, allow_network=True), KL_COORDS)
+        self.assertEqual(geocode_address(KL_ADDRESS, allow_network=True), KL_COORDS)
+        self.geocoder.geocode.assert_called_once_with(KL_ADDRESS)
+
+    def test_not_found_is_cached(self):
+        self.geocoder.geocode.return_value = None
+        self.assertIsNone(geocode_address('Nowhere', allow_network=True))
+        self.assertIsNone(geocode_address('Nowhere', allow_network=True))
+        self.geocoder.geocode.assert_called_once()
+        self.assertIsNone(GeocodeCache.objects.get().location)
+
+    def test_geocoder_error_is_not_cached(self):
+        self.geocoder.geocode.side_effect = RuntimeError('rate limited')
+        self.assertIsNone(geocode_address(KL_ADDRESS, allow_network=True))
+        self.assertFalse(GeocodeCache.objects.exists())
+
+    @override_settings(GEOCODER_NEGATIVE_CACHE_TTL=3600)
+    def test_expired_not_found_is_looked_up_again(self):
+        self.cache(KL_ADDRESS, None, age=timedelta(hours=2))
+        # Offline callers keep the stored answer
+        self.assertIsNone(geocode_address(KL_ADDRESS, allow_network=False))
+        self.geocoder.geocode.assert_not_called()
+
+        self.assertEqual(geocode_address(KL_ADDRESS, allow_network=True), KL_COORDS)
+        self.assertIsNotNone(GeocodeCache.objects.get().location)
+
+    @override_settings(GEOCODER_NEGATIVE_CACHE_TTL=3600)
+    def test_fresh_not_found_is_not_looked_up_again(self):
+        self.cache(KL_ADDRESS, None, age=timedelta(minutes=30))
+        self.assertIsNone(geocode_address(KL_ADDRESS, allow_network=True))
+        self.geocoder.geocode.assert_not_called()
+
+
+@override_settings(GEOCODER_BACKEND='volunteers.geocoding.StaticGeocoder', GEOCODER_STATIC_LOCATIONS={KL_ADDRESS: KL_COORDS})
+class LocateVolunteerTests(TestCase):
+
+    def setUp(self):
+        # StaticGeocoder reads GEOCODER_STATIC_LOCATIONS when it is built
+        patcher = mock.patch.object(geocoding, '_geocoder', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_known_address_sets_home_location(self):
+        profile = create_volunteer('volunteer', address=KL_ADDRESS)
+        self.assertTrue(needs_geocoding(profile))
+        self.assertTrue(locate_volunteer(profile))
+
+        profile.refresh_from_db()
+        self.assertAlmostEqual(profile.home_location.y, KL_COORDS[0])
+        self.assertAlmostEqual(profile.home_location.x, KL_COORDS[1])
+        self.assertEqual(profile.home_location_address, KL_ADDRESS)
+        self.assertFalse(needs_geocoding(profile))
+        # Nothing changed the second time
+        self.assertFalse(locate_volunteer(profile))
+
+    def test_emergency_contact_is_the_fallback_address(self):
+        profile = create_volunteer('volunteer', emergency_contact=KL_ADDRESS)
+        self.assertTrue(locate_volunteer(profile))
+        self.assertEqual(VolunteerProfile.objects.get(pk=profile.pk).home_location_address, KL_ADDRESS)
+
+    def test_unknown_address_clears_home_location(self):
+        profile = create_volunteer('volunteer', address=KL_ADDRESS)
+        locate_volunteer(profile)
+        profile.user.address = 'Nowhere'
+        self.assertTrue(locate_volunteer(profile))
+
+        profile.refresh_from_db()
+        self.assertIsNone(profile.home_location)
+        self.assertEqual(profile.home_location_address, 'Nowhere')
+
+    def test_offline_miss_keeps_the_stored_point(self):
+        profile = create_volunteer('volunteer', address=KL_ADDRESS)
+        locate_volunteer(profile)
+        profile.user.address = 'New address'
+        self.assertFalse(locate_volunteer(profile, allow_network=False))
+
+        profile.refresh_from_db()
+        self.assertIsNotNone(profile.home_location)
+        self.assertEqual(profile.home_location_address, KL_ADDRESS)
+
+    @override_settings(GEOCODER_NEGATIVE_CACHE_TTL=3600)
+    def test_command_retries_expired_not_found(self):
+        profile = create_volunteer('volunteer', address='Nowhere')
+        locate_volunteer(profile)
+        self.assertFalse(needs_geocoding(profile, retry_not_found=True))
+
+        # The geocoder has learned the address since
+        with override_settings(GEOCODER_STATIC_LOCATIONS={'Nowhere': KL_COORDS}), \
+                mock.patch.object(geocoding, '_geocoder', None):
+            GeocodeCache.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+            profile.refresh_from_db()
+            self.assertFalse(needs_geocoding(profile))
+            self.assertTrue(needs_geocoding(profile, retry_not_found=True))
+
+            call_command('geocode_volunteers', stdout=StringIO())
+
+        self.assertIsNotNone(VolunteerProfile.objects.get(pk=profile.pk).home_location)
+
+    @override_settings(VOLUNTEER_GEOCODE_ASYNC=False)
+    def test_address_change_is_geocoded_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = create_volunteer('volunteer', address=KL_ADDRESS)
+
+        self.assertEqual(volunteer_geocode_queue.pending, 0)
+        self.assertIsNotNone(VolunteerProfile.objects.get(pk=profile.pk).home_location)
+
+
+def point_north_of(coords, km):
+    """Point `km` due north of (lat, lng)"""
+    destination = geodesic(kilometers=km).destination(coords, 0)
+    return Point(destination.longitude, destination.latitude, srid=4326)
+
+
+def reference_dispatch_order(profiles, urgency, report_coords):
+    """The Python ranking find_nearby_volunteers replaced (sort_key: score, then distance)"""
+    weights = RescueVolunteerService.EXPERIENCE_WEIGHTS
+    ranked = []
+    for profile in profiles:
+        distance = geodesic((profile.home_location.y, profile.home_location.x), report_coords).kilometers
+        if distance > profile.max_rescue_distance_km:
+            continue
+        score = weights.get(profile.rescue_experience_level, 0)
+        score += 10 if urgency in ['HIGH', 'EMERGENCY'] and profile.available_for_emergency else 0
+        score += 5 if profile.has_transportation else 0
+        if profile.average_response_time_minutes:
+            score += max(0, 30 - profile.average_response_time_minutes) / 30 * 5
+        ranked.append(((-score, distance), profile.pk))
+    return [pk for key, pk in sorted(ranked)]
+
+
+class FindNearbyVolunteersTests(TestCase):
+    """The single-query dispatch ranking matches the old per-volunteer sort"""
+
+    @classmethod
+    def setUpTestData(cls):
+        dispatchable = {'has_animal_handling': True, 'gps_tracking_consent': True, 'max_rescue_distance_km': 30}
+        cls.expert_far = create_volunteer('expert_far', rescue_experience_level='EXPERT',
+                                          home_location=point_north_of(REPORT_COORDS, 5), **dispatchable)
+        cls.expert_near = create_volunteer('expert_near', rescue_experience_level='EXPERT',
+                                           home_location=point_north_of(REPORT_COORDS, 2), **dispatchable)
+        cls.driver = create_volunteer('driver', rescue_experience_level='BEGINNER', has_transportation=True,
+                                      home_location=point_north_of(REPORT_COORDS, 10), **dispatchable)
+        cls.fast = create_volunteer('fast', rescue_experience_level='INTERMEDIATE', average_response_time_minutes=12,
+                                    available_for_emergency=True, home_location=point_north_of(REPORT_COORDS, 1),
+                                    **dispatchable)
+        cls.novice = create_volunteer('novice', home_location=point_north_of(REPORT_COORDS, 20), **dispatchable)
+        # 20 km away but only travels 15 km: outside their own limit
+        cls.out_of_range = create_volunteer('out_of_range', rescue_experience_level='EXPERT',
+                                            home_location=point_north_of(REPORT_COORDS, 20),
+                                            **{**dispatchable, 'max_rescue_distance_km': 15})
+        cls.unlocated = create_volunteer('unlocated', rescue_experience_level='EXPERT', **dispatchable)
+        create_volunteer('no_handling', rescue_experience_level='EXPERT', home_location=point_north_of(REPORT_COORDS, 1),
+                         **{**dispatchable, 'has_animal_handling': False})
+        cls.located = [cls.expert_far, cls.expert_near, cls.driver, cls.fast, cls.novice, cls.out_of_range]
+
+    def report(self, urgency='NORMAL'):
+        return Report(geo_location=Point(REPORT_COORDS[1], REPORT_COORDS[0], srid=4326), urgency_level=urgency)
+
+    def nearby(self, urgency='NORMAL', **kwargs):
+        return RescueVolunteerService.find_nearby_volunteers(self.report(urgency), **kwargs)
+
+    def test_matches_reference_ordering(self):
+        results = self.nearby()
+        self.assertEqual(
+            [volunteer.pk for volunteer, distance in results],
+            reference_dispatch_order(self.located, 'NORMAL', REPORT_COORDS),
+        )
+        for volunteer, distance in results:
+            expected = geodesic((volunteer.home_location.y, volunteer.home_location.x), REPORT_COORDS).kilometers
+            self.assertAlmostEqual(distance, expected, delta=0.05)
+
+    def test_score_ties_are_broken_by_distance(self):
+        ids = [volunteer.pk for volunteer, distance in self.nearby()]
+        self.assertLess(ids.index(self.expert_near.pk), ids.index(self.expert_far.pk))
+
+    def test_volunteers_own_distance_limit_applies(self):
+        ids = [volunteer.pk for volunteer, distance in self.nearby()]
+        self.assertNotIn(self.out_of_range.pk, ids)
+        self.assertIn(self.novice.pk, ids)
+
+        VolunteerProfile.objects.filter(pk=self.out_of_range.pk).update(max_rescue_distance_km=25)
+        self.assertIn(self.out_of_range.pk, [volunteer.pk for volunteer, distance in self.nearby()])
+
+    def test_urgent_reports_only_reach_emergency_volunteers(self):
+        results = self.nearby('EMERGENCY')
+        self.assertEqual([volunteer.pk for volunteer, distance in results], [self.fast.pk])
+
+    def test_limit(self):
+        self.assertEqual(
+            [volunteer.pk for volunteer, distance in self.nearby(limit=2)],
+            reference_dispatch_order(self.located, 'NORMAL', REPORT_COORDS)[:2],
+        )
+
+    def test_unlocated_volunteers_are_skipped_by_default(self):
+        ids = [volunteer.pk for volunteer, distance in self.nearby()]
+        self.assertNotIn(self.unlocated.pk, ids)
+
+    @override_settings(VOLUNTEER_DISPATCH_UNLOCATED=True, VOLUNTEER_DEFAULT_LOCATION=REPORT_COORDS)
+    def test_unlocated_volunteers_opt_in_is_logged(self):
+        with self.assertLogs('volunteers.services', level='WARNING') as logs:
+            results = dict(self.nearby())
+
+        self.assertAlmostEqual(results[self.unlocated], 0.0, delta=0.001)
+        self.assertIn('unlocated', logs.output[0])
+
+
+class SimplifyTrackTests(SimpleTestCase):
+
+    def straight_track(self, count=50):
+        # ~11 m steps due north
+        return [3.0 + i * 0.0001 for i in range(count)], [101.0] * count
+
+    def test_straight_line_keeps_its_ends(self):
+        latitudes, longitudes = self.straight_track()
+        self.assertEqual(simplify_track(latitudes, longitudes), [0, 49])
+
+    def test_spike_is_kept(self):
+        latitudes, longitudes = self.straight_track()
+        longitudes[25] += 0.001  # ~110 m off the line
+        kept = simplify_track(latitudes, longitudes)
+        self.assertIn(25, kept)
+        self.assertEqual((kept[0], kept[-1]), (0, 49))
+        # ...unless it is within the tolerance
+        self.assertEqual(simplify_track(latitudes, longitudes, tolerance_m=1000), [0, 49])
+
+    def test_zero_tolerance_returns_every_fix(self):
+        latitudes, longitudes = self.straight_track()
+        self.assertEqual(simplify_track(latitudes, longitudes, tolerance_m=0), list(range(50)))
+
+    def test_short_tracks_are_returned_whole(self):
+        self.assertEqual(simplify_track([], []), [])
+        self.assertEqual(simplify_track([3.0, 3.1], [101.0, 101.0]), [0, 1])
+
+    def test_closed_loop_keeps_its_corners(self):
+        # ~1.1 km square walked anticlockwise back to the start, 10 fixes per side
+        corners = [(0, 0), (0, 1), (1, 1), (1, 0), (0, 0)]
+        points = [
+            (start[0] + (end[0] - start[0]) * i / 10, start[1] + (end[1] - start[1]) * i / 10)
+            for start, end in zip(corners, corners[1:]) for i in range(10)
+        ] + [corners[-1]]
+        latitudes = [3.0 + y * 0.01 for y, x in points]
+        longitudes = [101.0 + x * 0.01 for y, x in points]
+        self.assertEqual(simplify_track(latitudes, longitudes), [0, 10, 20, 30, 40])
+
+
+class RescueTrackingTests(TestCase):
+    """Fix table, the location_updates ring buffer and the batch upload endpoint"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.volunteer = get_user_model().objects.create(username='rescuer', user_type='VOLUNTEER')
+        # bulk_create skips Report.save() (dispatch, tracking ids) and assignment signals
+        report = Report.objects.bulk_create([
+            Report(description='Injured dog', geo_location=Point(REPORT_COORDS[1], REPORT_COORDS[0], srid=4326))
+        ])[0]
+        cls.assignment = RescueVolunteerAssignment.objects.bulk_create([
+            RescueVolunteerAssignment(volunteer=cls.volunteer, report=report, status='EN_ROUTE')
+        ])[0]
+        cls.start = timezone.now() - timedelta(hours=1)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.volunteer)
+
+    def fixes(self, count, first_minute=0, latitude=3.0):
+        return [
+            {'latitude': latitude + i * 0.001, 'longitude': 101.0,
+             'timestamp': self.start + timedelta(minutes=first_minute + i)}
+            for i in range(count)
+        ]
+
+    @override_settings(RESCUE_RECENT_LOCATION_FIXES=5)
+    def test_location_updates_keep_only_the_newest_fixes(self):
+        self.assertEqual(self.assignment.add_location_fixes(self.fixes(12)), 12)
+
+        assignment = RescueVolunteerAssignment.objects.get(pk=self.assignment.pk)
+        self.assertEqual(RescueLocationFix.objects.filter(assignment=assignment).count(), 12)
+        self.assertEqual(
+            [entry['latitude'] for entry in assignment.location_updates],
+            [3.0 + i * 0.001 for i in range(7, 12)],
+        )
+        self.assertAlmostEqual(assignment.get_current_location()[0], 3.011)
+
+    def test_late_offline_fixes_do_not_move_current_location_back(self):
+        self.assignment.add_location_fixes(self.fixes(1, first_minute=30, latitude=3.5))
+        # Buffered while offline, uploaded after the newer fix
+        self.assignment.add_location_fixes(self.fixes(5, first_minute=0))
+
+        assignment = RescueVolunteerAssignment.objects.get(pk=self.assignment.pk)
+        self.assertEqual(assignment.get_current_location(), (3.5, 101.0))
+        self.assertEqual(assignment.location_updates[-1]['latitude'], 3.5)
+        self.assertEqual(
+            [round(latitude, 6) for latitude in assignment.location_fixes.values_list('latitude', flat=True)],
+            [3.0, 3.001, 3.002, 3.003, 3.004, 3.5],
+        )
+
+    @override_settings(RESCUE_LOCATION_BATCH_MAX=3)
+    def test_batch_size_limit(self):
+        def payload(count):
+            return {'fixes': [
+                {'latitude': fix['latitude'], 'longitude': fix['longitude'], 'timestamp': fix['timestamp'].isoformat()}
+                for fix in self.fixes(count)
+            ]}
+
+        self.assertTrue(LocationBatchSerializer(data=payload(3)).is_valid())
+        serializer = LocationBatchSerializer(data=payload(4))
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('fixes', serializer.errors)
+        self.assertFalse(LocationBatchSerializer(data={'fixes': []}).is_valid())
+
+        url = f'/api/volunteers/rescue-assignments/{self.assignment.pk}/location_batch/'
+        self.assertEqual(self.client.post(url, payload(4), format='json').status_code, 400)
+        self.assertFalse(RescueLocationFix.objects.exists())
+
+        response = self.client.post(url, payload(3), format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['accepted'], 3)
+        self.assertAlmostEqual(response.data['current_location']['latitude'], 3.002)
+
+    def test_location_history_is_simplified(self):
+        # A straight walk north: simplified to its ends unless tolerance_m=0
+        self.assignment.add_location_fixes(self.fixes(10))
+        url = f'/api/volunteers/rescue-assignments/{self.assignment.pk}/location_history/'
+
+        response = self.client.get(url)
+        self.assertEqual(response.data['total_fixes'], 10)
+        self.assertEqual(len(response.data['points']), 2)
+        self.assertEqual(len(self.client.get(url, {'tolerance_m': 0}).data['points']), 10)
+        self.assertEqual(self.client.get(url, {'tolerance_m': 'far'}).status_code, 400)
+
+
+class AvailableRescuesFeedTests(TestCase):
+    """The rescue feed: every open report unless paged, in a fixed number of queries"""
+
+    URL = '/api/volunteers/rescue-assignments/available_rescues/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.profile = create_volunteer('rescuer', home_location=Point(REPORT_COORDS[1], REPORT_COORDS[0], srid=4326))
+        cls.reporter = get_user_model().objects.create(username='reporter', user_type='PUBLIC')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def create_reports(self, count, urgency='NORMAL'):
+        # bulk_create skips Report.save() (dispatch, classification); the feed reads the stored columns
+        return Report.objects.bulk_create([
+            Report(description=f'Injured dog {i}', reporter=self.reporter, urgency_level=urgency,
+                   rescue_animal_type='DOG', rescue_animal_label='Dog Rescue', rescue_condition='injured',
+                   condition_summary='Injured - needs immediate help',
+                   geo_location=point_north_of(REPORT_COORDS, i + 1))
+            for i in range(count)
+        ])
+
+    def test_unpaginated_feed_returns_every_rescue(self):
+        self.create_reports(2, urgency='HIGH')
+        self.create_reports(3)
+        with mock.patch.object(AvailableRescuePagination, 'max_page_size', 2):
+            response = self.client.get(self.URL)
+            paged = self.client.get(self.URL, {'page_size': 10})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+        # Most urgent first, then nearest
+        self.assertEqual([rescue['urgency'] for rescue in response.data], ['HIGH', 'HIGH', 'NORMAL', 'NORMAL', 'NORMAL'])
+        distances = [rescue['distance_km'] for rescue in response.data]
+        self.assertEqual(distances[:2], sorted(distances[:2]))
+        self.assertEqual(distances[2:], sorted(distances[2:]))
+
+        # Pages are still capped at max_page_size
+        self.assertEqual(len(paged.data['results']), 2)
+        self.assertIsNotNone(paged.data['next'])
+
+    def test_query_count_does_not_grow_with_reports(self):
+        self.create_reports(2)
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(len(self.client.get(self.URL).data), 2)
+
+        self.create_reports(20)
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(len(self.client.get(self.URL).data), 22)
+
+        self.assertEqual(len(many), len(few))
+
+        with CaptureQueriesContext(connection) as paged:
+            self.assertEqual(len(self.client.get(self.URL, {'page_size': 10}).data['results']), 10)
+        self.assertEqual(len(paged), len(few))
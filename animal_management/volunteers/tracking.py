@@ -0,0 +1,81 @@
+# volunteers/tracking.py
+"""
+GPS tracks of rescue assignments
+
+Every fix is appended to RescueLocationFix (one row per fix, never
+rewritten); RescueVolunteerAssignment.location_updates only keeps the last
+RESCUE_RECENT_LOCATION_FIXES of them for the live view. Full tracks are
+read back from the table and thinned with Douglas-Peucker before they are
+returned, so a long rescue does not ship every fix.
+"""
+
+import numpy as np
+from django.conf import settings
+
+EARTH_RADIUS_M = 6371000.0
+DEFAULT_TOLERANCE_M = 10.0
+
+
+def get_recent_fix_limit():
+    return getattr(settings, 'RESCUE_RECENT_LOCATION_FIXES', 20)
+
+
+def fix_entry(latitude, longitude, timestamp, status):
+    """A location_updates entry (same shape the JSON history always had)"""
+    return {
+        'latitude': latitude,
+        'longitude': longitude,
+        'timestamp': timestamp.isoformat(),
+        'status': status
+    }
+
+
+def _to_meters(latitudes, longitudes):
+    """Equirectangular projection around the track's mean latitude; fine at city scale"""
+    lat = np.radians(latitudes)
+    lng = np.radians(longitudes)
+    x = (lng - lng[0]) * np.cos(lat.mean()) * EARTH_RADIUS_M
+    y = (lat - lat[0]) * EARTH_RADIUS_M
+    return x, y
+
+
+def simplify_track(latitudes, longitudes, tolerance_m=DEFAULT_TOLERANCE_M):
+    """
+    Indices of the points Douglas-Peucker keeps for a track, in order. The
+    first and last points are always kept; a point is dropped when it lies
+    within tolerance_m of the segment joining the points kept around it.
+    """
+    count = len(latitudes)
+    if count <= 2 or tolerance_m <= 0:
+        return list(range(count))
+
+    x, y = _to_meters(np.asarray(latitudes, dtype=np.float64), np.asarray(longitudes, dtype=np.float64))
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    # Iterative, so very long tracks cannot hit the recursion limit
+    stack = [(0, count - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+
+        dx, dy = x[end] - x[start], y[end] - y[start]
+        px, py = x[start + 1:end] - x[start], y[start + 1:end] - y[start]
+        length_sq = dx * dx + dy * dy
+        if length_sq == 0:
+            # Closed segment (returned to the same spot): distance to the point
+            distances = np.hypot(px, py)
+        else:
+            # Distance to the segment, clamped to its ends
+            t = np.clip((px * dx + py * dy) / length_sq, 0.0, 1.0)
+            distances = np.hypot(px - t * dx, py - t * dy)
+
+        farthest = int(distances.argmax())
+        if distances[farthest] > tolerance_m:
+            index = start + 1 + farthest
+            keep[index] = True
+            stack.append((start, index))
+            stack.append((index, end))
+
+    return np.flatnonzero(keep).tolist()
@@ -5,7 +5,9 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
 from django.contrib.auth import get_user_model
-from django.db.models import Q
+from django.db.models import Q, Case, When, Value, IntegerField, FloatField, ExpressionWrapper
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.geos import Point
 from .models import (
     VolunteerProfile, VolunteerOpportunity, VolunteerAssignment,
     RescueVolunteerAssignment, VolunteerTrainingProgress, VolunteerSkillCertification
@@ -24,15 +26,27 @@ from .serializers import (
     VolunteerProfileSerializer, VolunteerOpportunitySerializer, VolunteerAssignmentSerializer,
     RescueVolunteerAssignmentSerializer, LocationUpdateSerializer, VolunteerTrainingProgressSerializer,
     VolunteerSkillCertificationSerializer, AvailableRescueSerializer, RescueAcceptanceSerializer,
-    RescueCompletionSerializer, VolunteerStatsSerializer, NearbyVolunteerSerializer
+    RescueCompletionSerializer, VolunteerStatsSerializer, NearbyVolunteerSerializer, LocationBatchSerializer
 )
 from .services import RescueVolunteerService
+from .tracking import DEFAULT_TOLERANCE_M, fix_entry, simplify_track
 from notifications.services import create_notification
+from animal_management.pagination import KeysetPagination
 import logging
 
 logger = logging.getLogger(__name__)
 User = get_user_model()
 
+# Rescue feed order (lower comes first)
+URGENCY_RANKS = {'EMERGENCY': 0, 'HIGH': 1, 'NORMAL': 2, 'LOW': 3}
+
+
+class AvailableRescuePagination(KeysetPagination):
+    """Most urgent, then nearest; pages only when the client sends cursor or page_size"""
+    ordering = ('urgency_rank', 'distance_m', '-id')
+    annotation_fields = {'urgency_rank': IntegerField(), 'distance_m': FloatField()}
+    optional = True
+
 
 class VolunteerProfileViewSet(viewsets.ModelViewSet):
     queryset = VolunteerProfile.objects.all()
@@ -294,20 +308,63 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
             return RescueVolunteerAssignment.objects.all()
         return RescueVolunteerAssignment.objects.filter(volunteer=self.request.user)
     
-    # 🔧 FIXED: Enhanced available_rescues method
+    # Training modules a rescue can require, and the skills they provide
+    TRAINING_MODULES = {
+        'animal-rescue-fundamentals': {
+            'name': 'Animal Rescue Fundamentals',
+            'provides_skills': ['Animal Handling', 'Basic Rescue', 'Safety Protocols'],
+            'level': 'beginner',
+            'duration': '45min'
+        },
+        'emergency-animal-first-aid': {
+            'name': 'Emergency Animal First Aid', 
+            'provides_skills': ['First Aid', 'Medical Emergency Response', 'Wound Care'],
+            'level': 'intermediate',
+            'duration': '60min'
+        },
+        'emergency-scene-management': {
+            'name': 'Emergency Scene Management',
+            'provides_skills': ['Emergency Response', 'Scene Coordination', 'Rapid Response Training'],
+            'level': 'advanced', 
+            'duration': '65min'
+        },
+        'animal-behavior-psychology': {
+            'name': 'Animal Behavior & Psychology',
+            'provides_skills': ['Dog Handling', 'Cat Handling', 'Animal Behavior Assessment', 'Stress Recognition'],
+            'level': 'intermediate',
+            'duration': '60min'
+        },
+        'large-animal-rescue': {
+            'name': 'Large Animal Rescue Operations',
+            'provides_skills': ['Large Animal Handling', 'Livestock Rescue', 'Equipment Operation'],
+            'level': 'advanced',
+            'duration': '75min'
+        }
+    }
+    
     @action(detail=False, methods=['get'])
     def available_rescues(self, request):
-        """Get rescue assignments available for volunteer - FIXED to handle direct animal_type"""
+        """
+        Open reports the volunteer can join, most urgent first, then nearest.
+
+        Animal type and condition are read from the columns stored when the
+        report was written and the volunteer's training is loaded once, so
+        the feed costs the same few queries however many reports are open.
+        Send cursor or page_size for keyset pages; otherwise every open
+        rescue is returned as a list, as the volunteer dashboard expects.
+        """
         try:
-            volunteer_profile = VolunteerProfile.objects.get(user=request.user)
+            volunteer_profile = VolunteerProfile.objects.select_related('user').get(user=request.user)
         except VolunteerProfile.DoesNotExist:
             return Response({"detail": "Volunteer profile required"}, status=400)
 
         # Import here to avoid circular imports
         from reports.models import Report
-        from django.utils import timezone
 
-        # Get reports that need volunteers - DIRECT DATABASE QUERY
+        lat, lng = RescueVolunteerService.get_volunteer_location(volunteer_profile.user)
+        volunteer_point = Point(lng, lat, srid=4326)
+
+        # Get reports that need volunteers, ranked and measured in SQL
         available_reports = Report.objects.filter(
             status__in=['PENDING', 'INVESTIGATING', 'ASSIGNED']
         ).exclude(
@@ -315,211 +372,68 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
             volunteer_assignments__volunteer=request.user
         ).exclude(
             volunteer_assignments__status__in=['ACCEPTED', 'IN_PROGRESS']
-        ).select_related('animal').order_by('-urgency_level', '-created_at')
-
-        available_rescues = []
-
-        for report in available_reports:
-            try:
-                # 🔧 FIXED: Enhanced animal type detection with multiple fallbacks
-                animal_type = 'Unknown Animal'
-                
-                # Method 1: Check direct animal_type field (for emergency reports)
-                if hasattr(report, 'animal_type') and report.animal_type:
-                    # Handle both "DOG" format and "Dog" format
-                    animal_type_clean = report.animal_type.replace('_', ' ').title()
-                    animal_type = f"{animal_type_clean} Rescue"
-                
-                # Method 2: Check linked Animal object
-                elif hasattr(report, 'animal') and report.animal and hasattr(report.animal, 'animal_type'):
-                    animal_type = f"{report.animal.animal_type.title()} Rescue"
-                
-                # Method 3: Check linked animal breed
-                elif hasattr(report, 'animal') and report.animal and hasattr(report.animal, 'breed'):
-                    breed_lower = report.animal.breed.lower()
-                    if any(dog_word in breed_lower for dog_word in ['dog', 'terrier', 'retriever', 'bulldog', 'shepherd']):
-                        animal_type = 'Dog Rescue'
-                    elif any(cat_word in breed_lower for cat_word in ['cat', 'persian', 'siamese', 'tabby']):
-                        animal_type = 'Cat Rescue'
-                    else:
-                        animal_type = f"{report.animal.breed.title()} Rescue"
-                
-                # Method 4: Analyze description for animal type keywords
-                elif report.description:
-                    desc_lower = report.description.lower()
-                    if any(word in desc_lower for word in ['dog', 'puppy', 'canine', 'pup']):
-                        animal_type = 'Dog Rescue'
-                    elif any(word in desc_lower for word in ['cat', 'kitten', 'feline', 'kitty']):
-                        animal_type = 'Cat Rescue'
-                    elif any(word in desc_lower for word in ['bird', 'chicken', 'duck', 'pigeon']):
-                        animal_type = 'Bird Rescue'
-                    elif any(word in desc_lower for word in ['rabbit', 'bunny']):
-                        animal_type = 'Rabbit Rescue'
-
-                # 🔧 FIXED: Enhanced urgency detection
-                urgency = 'NORMAL'
-                if hasattr(report, 'urgency_level') and report.urgency_level:
-                    urgency = report.urgency_level
-                else:
-                    # Fallback: detect urgency from description/condition
-                    urgency = self.calculate_report_urgency(report)
-
-                # 🔧 FIXED: Better location handling
-                location_display = 'Location not specified'
-                coordinates = None
-                
-                if hasattr(report, 'location_details') and report.location_details:
-                    location_display = report.location_details
-                    
-                if hasattr(report, 'latitude') and report.latitude:
-                    coordinates = {
-                        'lat': float(report.latitude),
-                        'lng': float(report.longitude)
-                    }
-                    if not report.location_details:
-                        location_display = f"{round(report.latitude, 4)}, {round(report.longitude, 4)}"
-                elif hasattr(report, 'geo_location') and report.geo_location:
-                    coordinates = {
-                        'lat': report.geo_location.y,
-                        'lng': report.geo_location.x
-                    }
-                    if not report.location_details:
-                        location_display = f"{round(report.geo_location.y, 4)}, {round(report.geo_location.x, 4)}"
-
-                # 🔧 FIXED: Enhanced condition detection
-                condition_display = self.detect_animal_condition(report)
-
-                # 🔧 FIXED: Better time calculation
-                time_since = self.calculate_time_since(report.created_at)
-       
-                skill_analysis = self.analyze_rescue_skills(report, volunteer_profile)
-
-                rescue_data = {
-                    'id': report.id,
-                    'type': 'rescue',
-                    'animal_type': animal_type,  
-                    'urgency': urgency,
-                    'location': coordinates or location_display,
-                    'location_details': getattr(report, 'location_details', ''),
-                    'description': report.description or 'No description available',
-                    'animal_condition': condition_display,
-                    'created_at': report.created_at.isoformat(),
-                    'time_since_reported': time_since,
-                    'distance_km': None,  # Will be calculated by frontend if needed
-                    'photos': getattr(report, 'photos', []),
-                    'status': report.status,
-                    'reporter_contact': getattr(report.reporter, 'phone', '') if hasattr(report, 'reporter') and report.reporter else '',
-
-                    'skill_match': skill_analysis['match_level'],
-                    'skill_score': skill_analysis['score'],
-                    'required_trainings': skill_analysis['required_trainings'],
-                    'recommended_trainings': skill_analysis['recommended_trainings'],
-                    'completed_trainings': skill_analysis['completed_trainings'],
-                    'training_requirements': skill_analysis['training_requirements'],
-                    'skill_badges': skill_analysis['badges'],
-                    'qualification_message': skill_analysis['message'],
-                    'critical_missing': skill_analysis.get('critical_missing', [])
-
-                }
-
-                available_rescues.append(rescue_data)
-
-            except Exception as e:
-                print(f"Error processing report {report.id}: {e}")
-                continue
+        ).select_related('reporter').annotate(
+            urgency_rank=Case(
+                *[When(urgency_level=level, then=Value(rank)) for level, rank in URGENCY_RANKS.items()],
+                default=Value(URGENCY_RANKS['NORMAL']), output_field=IntegerField()
+            ),
+            distance_m=ExpressionWrapper(Distance('geo_location', volunteer_point), output_field=FloatField()),
+        )
 
-        # 🔧 FIXED: Proper sorting by urgency and recency
-        def sort_key(rescue):
-            urgency_weights = {'EMERGENCY': 0, 'HIGH': 1, 'NORMAL': 2, 'LOW': 3}
-            return (urgency_weights.get(rescue['urgency'], 2), -rescue['id'])
+        paginator = AvailableRescuePagination()
+        page = paginator.paginate_queryset(available_reports, request, view=self)
+        rows = page if page is not None else available_reports.order_by(*paginator.ordering)
 
-        available_rescues.sort(key=sort_key)
+        completed_trainings = self.load_completed_trainings(volunteer_profile)
+        available_rescues = [
+            self.build_rescue_data(report, volunteer_profile, completed_trainings)
+            for report in rows
+        ]
 
+        if page is not None:
+            return paginator.get_paginated_response(available_rescues)
         return Response(available_rescues)
 
-    def calculate_report_urgency(self, report):
-        """Enhanced urgency calculation"""
-        # Check structured condition field first
-        if hasattr(report, 'animal_condition_choice') and report.animal_condition_choice:
-            emergency_conditions = ['INJURED', 'SICK']
-            if report.animal_condition_choice in emergency_conditions:
-                return 'EMERGENCY'
-            
-            high_priority_conditions = ['AGGRESSIVE', 'PREGNANT', 'WITH_BABIES']
-            if report.animal_condition_choice in high_priority_conditions:
-                return 'HIGH'
-        
-        # Enhanced text analysis
-        text_to_check = []
-        if hasattr(report, 'description') and report.description:
-            text_to_check.append(report.description.lower())
-        if hasattr(report, 'animal_condition') and report.animal_condition:
-            text_to_check.append(report.animal_condition.lower())
-        
-        combined_text = ' '.join(text_to_check)
-        
-        # Emergency keywords
-        emergency_keywords = [
-            'injured', 'bleeding', 'blood', 'hit by car', 'accident', 'emergency', 
-            'urgent', 'dying', 'trapped', 'stuck', 'broken', 'limping', 'wound',
-            'cut', 'bite', 'attack', 'unconscious', 'collapse', 'can\'t move',
-            'help immediately', 'critical', 'severe'
-        ]
-        
-        # High priority keywords  
-        high_priority_keywords = [
-            'aggressive', 'attacking', 'biting', 'rabid', 'dangerous',
-            'pregnant', 'giving birth', 'babies', 'puppies', 'kittens', 'newborn',
-            'mother with', 'scared', 'terrified', 'hiding', 'won\'t come out',
-            'multiple animals', 'pack', 'group'
-        ]
-        
-        if any(keyword in combined_text for keyword in emergency_keywords):
-            return 'EMERGENCY'
-        
-        if any(keyword in combined_text for keyword in high_priority_keywords):
-            return 'HIGH'
-        
-        return 'NORMAL'
-
-    def detect_animal_condition(self, report):
-        """Enhanced animal condition detection"""
-        # Check structured condition first
-        if hasattr(report, 'animal_condition_choice') and report.animal_condition_choice:
-            condition_map = {
-                'HEALTHY': 'Appears healthy',
-                'INJURED': 'Injured - needs immediate help',
-                'SICK': 'Appears sick',
-                'AGGRESSIVE': 'Aggressive - approach with caution',
-                'SCARED': 'Scared and hiding',
-                'PREGNANT': 'Pregnant',
-                'WITH_BABIES': 'With babies/offspring',
-                'UNKNOWN': 'Condition unknown'
+    def build_rescue_data(self, report, volunteer_profile, completed_trainings):
+        """Feed entry for one report (no queries: reporter is select_related)"""
+        location_display = report.location_details or 'Location not specified'
+        coordinates = None
+        if report.geo_location:
+            coordinates = {
+                'lat': report.geo_location.y,
+                'lng': report.geo_location.x
             }
-            return condition_map.get(report.animal_condition_choice, report.animal_condition_choice)
+            if not report.location_details:
+                location_display = f"{round(report.geo_location.y, 4)}, {round(report.geo_location.x, 4)}"
 
-        # Check text condition field
-        if hasattr(report, 'animal_condition') and report.animal_condition:
-            return report.animal_condition
-        
-        # Analyze description for condition keywords
-        if hasattr(report, 'description') and report.description:
-            description_lower = report.description.lower()
-            
-            if any(word in description_lower for word in ['injured', 'bleeding', 'limping', 'hurt']):
-                return 'Injured - needs immediate help'
-            elif any(word in description_lower for word in ['sick', 'ill', 'weak', 'lethargic']):
-                return 'Appears sick'
-            elif any(word in description_lower for word in ['aggressive', 'attacking', 'biting', 'dangerous']):
-                return 'Aggressive - approach with caution'
-            elif any(word in description_lower for word in ['scared', 'hiding', 'terrified', 'won\'t come']):
-                return 'Scared and hiding'
-            elif any(word in description_lower for word in ['pregnant', 'babies', 'puppies', 'kittens']):
-                return 'Pregnant or with offspring'
-            elif any(word in description_lower for word in ['healthy', 'well', 'good', 'friendly']):
-                return 'Appears healthy'
-        
-        return 'Condition unknown'
+        skill_analysis = self.analyze_rescue_skills(report, volunteer_profile, completed_trainings)
+
+        return {
+            'id': report.id,
+            'type': 'rescue',
+            'animal_type': report.rescue_animal_label,
+            'urgency': report.urgency_level or 'NORMAL',
+            'location': coordinates or location_display,
+            'location_details': report.location_details or '',
+            'description': report.description or 'No description available',
+            'animal_condition': report.condition_summary,
+            'created_at': report.created_at.isoformat(),
+            'time_since_reported': self.calculate_time_since(report.created_at),
+            'distance_km': round(report.distance_m / 1000, 2) if report.distance_m is not None else None,
+            'photos': report.photos or [],
+            'status': report.status,
+            'reporter_contact': getattr(report.reporter, 'phone', '') if report.reporter else '',
+
+            'skill_match': skill_analysis['match_level'],
+            'skill_score': skill_analysis['score'],
+            'required_trainings': skill_analysis['required_trainings'],
+            'recommended_trainings': skill_analysis['recommended_trainings'],
+            'completed_trainings': skill_analysis['completed_trainings'],
+            'training_requirements': skill_analysis['training_requirements'],
+            'skill_badges': skill_analysis['badges'],
+            'qualification_message': skill_analysis['message'],
+            'critical_missing': skill_analysis.get('critical_missing', [])
+        }
 
     def calculate_time_since(self, created_at):
         """Calculate user-friendly time since report was created"""
@@ -546,76 +460,23 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
             return f"{days}d {hours}h ago"
 
 
-    def analyze_rescue_skills(self, report, volunteer_profile):
+    def load_completed_trainings(self, volunteer_profile):
+        """Slugs of the training modules the volunteer has completed (one query per request)"""
+        slugs = volunteer_profile.training_progress.filter(
+            completed_date__isnull=False,
+            progress_percentage=100
+        ).values_list('training_slug', flat=True)
+        return set(slug for slug in slugs if slug)
+
+    def analyze_rescue_skills(self, report, volunteer_profile, completed_trainings):
         """
         Analyze training requirements vs volunteer completions - TRAINING INTEGRATED
-        Returns comprehensive skill matching data linked to actual training modules
+        Returns comprehensive skill matching data linked to actual training modules.
+        completed_trainings comes from load_completed_trainings(), loaded once per request.
         """
-        # Get completed training modules
-        completed_trainings = set()
-        earned_certifications = set()
-    
-        try:
-            # Get completed training progress
-            training_progress = volunteer_profile.training_progress.filter(
-                completed_date__isnull=False,
-                progress_percentage=100
-            )
-            completed_trainings = set(tp.training_slug for tp in training_progress if tp.training_slug)
-        
-            # Get active certifications  
-            certifications = volunteer_profile.certifications.filter(is_active=True)
-            earned_certifications = set(cert.skill_name for cert in certifications)
-        except:
-            # Fallback if relations don't exist
-            pass
-    
-        # Define training module mappings
-        TRAINING_MODULES = {
-            'animal-rescue-fundamentals': {
-                'name': 'Animal Rescue Fundamentals',
-                'provides_skills': ['Animal Handling', 'Basic Rescue', 'Safety Protocols'],
-                'level': 'beginner',
-                'duration': '45min'
-            },
-            'emergency-animal-first-aid': {
-                'name': 'Emergency Animal First Aid', 
-                'provides_skills': ['First Aid', 'Medical Emergency Response', 'Wound Care'],
-                'level': 'intermediate',
-                'duration': '60min'
-            },
-            'emergency-scene-management': {
-                'name': 'Emergency Scene Management',
-                'provides_skills': ['Emergency Response', 'Scene Coordination', 'Rapid Response Training'],
-                'level': 'advanced', 
-                'duration': '65min'
-            },
-            'animal-behavior-psychology': {
-                'name': 'Animal Behavior & Psychology',
-                'provides_skills': ['Dog Handling', 'Cat Handling', 'Animal Behavior Assessment', 'Stress Recognition'],
-                'level': 'intermediate',
-                'duration': '60min'
-            },
-            'large-animal-rescue': {
-                'name': 'Large Animal Rescue Operations',
-                'provides_skills': ['Large Animal Handling', 'Livestock Rescue', 'Equipment Operation'],
-                'level': 'advanced',
-                'duration': '75min'
-            }
-        }
-    
-        # Build available skills from completed training
-        available_skills = set()
-        for training_slug in completed_trainings:
-            if training_slug in TRAINING_MODULES:
-                available_skills.update(TRAINING_MODULES[training_slug]['provides_skills'])
-    
-        # Add skills from certifications
-        available_skills.update(earned_certifications)
-    
         # Determine rescue requirements
-        animal_type = self.detect_rescue_animal_type(report)
-        condition = self.detect_rescue_condition(report)
+        animal_type = report.rescue_animal_type
+        condition = report.rescue_condition
         urgency = getattr(report, 'urgency_level', 'NORMAL')
     
         # Build training requirements (instead of generic skills)
@@ -707,7 +568,7 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
     
         # Add training requirement badges
         for training_slug in required_trainings:
-            training_info = TRAINING_MODULES.get(training_slug, {})
+            training_info = self.TRAINING_MODULES.get(training_slug, {})
             training_name = training_info.get('name', training_slug)
         
             if training_slug in completed_trainings:
@@ -733,7 +594,7 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
         # Add recommended training badges (limit to 2)
         for training_slug in list(recommended_trainings)[:2]:
             if training_slug not in required_trainings and training_slug not in completed_trainings:
-                training_info = TRAINING_MODULES.get(training_slug, {})
+                training_info = self.TRAINING_MODULES.get(training_slug, {})
                 training_name = training_info.get('name', training_slug)
                 badges.append({
                     'type': 'training_recommended', 
@@ -759,55 +620,6 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
             'message': message,
             'critical_missing': critical_missing
         }
-
-    def detect_rescue_animal_type(self, report):
-        """Extract animal type for skill matching"""
-        if hasattr(report, 'animal_type') and report.animal_type:
-            return report.animal_type.upper()
-    
-        if hasattr(report, 'animal') and report.animal and hasattr(report.animal, 'animal_type'):
-            return report.animal.animal_type.upper()
-    
-        if report.description:
-            desc_lower = report.description.lower()
-            if any(word in desc_lower for word in ['dog', 'puppy', 'canine']):
-                return 'DOG'
-            elif any(word in desc_lower for word in ['cat', 'kitten', 'feline']):
-                return 'CAT'
-            elif any(word in desc_lower for word in ['bird', 'chicken', 'duck']):
-                return 'BIRD'
-    
-        return 'UNKNOWN'
-
-    def detect_rescue_condition(self, report):
-        """Extract animal condition for skill matching"""
-        # Check structured condition first
-        if hasattr(report, 'animal_condition_choice') and report.animal_condition_choice:
-            return report.animal_condition_choice.lower()
-    
-        # Check text condition
-        if hasattr(report, 'animal_condition') and report.animal_condition:
-            condition_lower = report.animal_condition.lower()
-            if any(word in condition_lower for word in ['injured', 'bleeding', 'hurt']):
-                return 'injured'
-            elif any(word in condition_lower for word in ['sick', 'ill']):
-                return 'sick'
-            elif any(word in condition_lower for word in ['aggressive', 'attacking']):
-                return 'aggressive'
-    
-        # Analyze description
-        if report.description:
-            desc_lower = report.description.lower()
-            if any(word in desc_lower for word in ['injured', 'bleeding', 'hurt', 'wound']):
-                return 'injured'
-            elif any(word in desc_lower for word in ['sick', 'ill', 'weak']):
-                return 'sick'
-            elif any(word in desc_lower for word in ['aggressive', 'attacking', 'biting']):
-                return 'aggressive'
-            elif any(word in desc_lower for word in ['pregnant', 'babies', 'puppies']):
-                return 'pregnant'
-    
-        return 'unknown'
     
     @action(detail=False, methods=['post'])
     def accept_rescue(self, request):
@@ -943,6 +755,55 @@ class RescueVolunteerAssignmentViewSet(viewsets.ModelViewSet):
         
         return Response(serializer.errors, status=400)
     
+    @action(detail=True, methods=['post'])
+    def location_batch(self, request, pk=None):
+        """Record many GPS fixes in one call, e.g. buffered by the app while offline"""
+        assignment = self.get_object()
+        
+        if assignment.volunteer != request.user:
+            return Response({"detail": "Not your assignment"}, status=403)
+        
+        serializer = LocationBatchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=400)
+        
+        accepted = assignment.add_location_fixes(serializer.validated_data['fixes'])
+        current = assignment.get_current_location()
+        
+        return Response({
+            "detail": "Locations recorded",
+            "accepted": accepted,
+            "current_location": {'latitude': current[0], 'longitude': current[1]} if current else None
+        })
+    
+    @action(detail=True, methods=['get'])
+    def location_history(self, request, pk=None):
+        """
+        GPS track of the assignment, oldest first, simplified with
+        Douglas-Peucker (?tolerance_m=, default 10; 0 returns every fix)
+        """
+        assignment = self.get_object()
+        
+        try:
+            tolerance_m = float(request.query_params.get('tolerance_m', DEFAULT_TOLERANCE_M))
+        except ValueError:
+            return Response({"detail": "tolerance_m must be a number"}, status=400)
+        
+        fixes = list(assignment.location_fixes.order_by('recorded_at', 'id').values_list(
+            'latitude', 'longitude', 'recorded_at', 'status'
+        ))
+        kept = simplify_track([fix[0] for fix in fixes], [fix[1] for fix in fixes], tolerance_m)
+        
+        return Response({
+            "assignment_id": assignment.id,
+            "total_fixes": len(fixes),
+            "tolerance_m": tolerance_m,
+            "points": [
+                fix_entry(*fixes[index])
+                for index in kept
+            ]
+        })
+    
     @action(detail=True, methods=['post'])
     def complete_rescue(self, request, pk=None):
         """Mark rescue as completed"""
@@ -94,17 +94,14 @@ function AnimalListPage() {
     }
   };
 
-  const fetchPage = (pageUrl) => {
+  // The list is cursor paginated: follow the next/previous links as given
+  // and count pages here (the API does not return a total count)
+  const fetchPage = (pageUrl, step) => {
     if (pageUrl) {
        // Extract just the path and query from the full URL
-       const url = pageUrl.replace('https://pawrescue-backend.onrender.com/api', '');
+       const url = pageUrl.replace(/^https?:\/\/[^/]+\/api/, '');
        fetchAnimals(url);
-    
-       // Update current page number
-       const pageMatch = pageUrl.match(/page=(\d+)/);
-       if (pageMatch) {
-         setCurrentPage(parseInt(pageMatch[1]));
-       }
+       setCurrentPage((page) => Math.max(1, page + step));
      }
    };
 
@@ -398,9 +395,9 @@ function AnimalListPage() {
 
       {/* Results Count */}
       <Typography variant="body2" color="textSecondary" sx={{ mb: 2 }}>
-        Showing {filteredAnimals.length} of {apiResponse?.count || animals.length} animals
-        {apiResponse && apiResponse.count > 20 && (
-          <span> (Page {currentPage} of {Math.ceil(apiResponse.count / 20)})</span>
+        Showing {filteredAnimals.length} of {animals.length} animals
+        {apiResponse && (apiResponse.next || apiResponse.previous) && (
+          <span> (Page {currentPage})</span>
         )}
         {user?.user_type === 'SHELTER' && getUrgentCount() > 0 && (
           <Chip 
@@ -418,18 +415,18 @@ function AnimalListPage() {
           <Button
             variant="outlined"
             disabled={!apiResponse.previous}
-            onClick={() => fetchPage(apiResponse.previous)}
+            onClick={() => fetchPage(apiResponse.previous, -1)}
             sx={{ mr: 2 }}
           >
             Previous Page
           </Button>
           <Typography variant="body2" sx={{ mx: 2 }}>
-            Page {currentPage} of {Math.ceil(apiResponse.count / 20)}
+            Page {currentPage}
           </Typography>
           <Button
             variant="outlined"
             disabled={!apiResponse.next}
-            onClick={() => fetchPage(apiResponse.next)}
+            onClick={() => fetchPage(apiResponse.next, 1)}
           >
             Next Page
           </Button>